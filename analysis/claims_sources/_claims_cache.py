@@ -0,0 +1,336 @@
+"""Typed parquet copies of the CMS claims CSVs, and the reader behind _csv_scan.
+
+The Part B, Part D, DMEPOS and Open Payments files arrive as CSV. Every
+finding parsed them with csv.DictReader: one dict of strings per row,
+including the dozens of columns no finding reads, and then float() and
+int(float()) by hand on each number it used. convert() (run once per
+release by convert_claims_csvs.py) writes each file beside itself as
+`<name>.typed.parquet`, keeping only the columns in its LAYOUTS entry:
+
+    key          the NPI column scans filter on, as string
+    strings      free text (names, cities), as string
+    categories   low-cardinality codes (state, provider type, HCPCS),
+                 dictionary-encoded
+    floats       amounts and service counts, float64
+    ints         beneficiary, claim and transaction counts, int64
+
+A blank number is null. A number the cast cannot parse is null too, as the
+old _f/_i helpers treated it as absent. Counts go through float64 first, so
+"12.0" is 12 and "3.6" is 3, which is what int(float(v)) gave.
+
+batches() is the reader. It yields Arrow record batches of a CSV with those
+types, from the typed copy when it is current, otherwise by streaming the
+CSV through pyarrow's reader and typing each block the same way. Rows
+therefore look the same to a finding whichever file was read. A CSV with
+no LAYOUTS entry is read with every column as a string. A layout names the
+file's encoding; PPEF, for one, is latin-1.
+
+pieces() cuts the same read into parts that can be parsed in separate
+processes (_csv_scan.scan's workers): runs of row groups of the typed
+copy, or record-aligned byte ranges of the CSV (_csv_ranges.py).
+batches(csv_path, piece) reads one of them.
+
+The CSV may be kept compressed (`<name>.csv.zst`, `.csv.gz` or a `.zip`;
+see analysis/csv_source.py) and is then streamed through its decompressor.
+A compressed CSV cannot be cut into byte ranges, so it is one piece.
+"""
+from __future__ import annotations
+
+import csv
+import os
+import pathlib
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Iterator, NamedTuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+from analysis import csv_source
+from analysis.claims_sources import _csv_ranges as csv_ranges
+
+TYPED_SUFFIX = ".typed.parquet"
+# pyarrow's CSV reader hands back one record batch per block. Scans turn
+# whole batches into row dicts, so they read in smaller pieces than
+# convert() writes.
+BLOCK_BYTES = 64 << 20
+SCAN_BLOCK_BYTES = 8 << 20
+SCAN_BATCH_ROWS = 65_536
+ROW_GROUP_ROWS = 1_000_000
+
+
+@dataclass(frozen=True)
+class Layout:
+    key: str
+    strings: tuple[str, ...] = ()
+    categories: tuple[str, ...] = ()
+    floats: tuple[str, ...] = ()
+    ints: tuple[str, ...] = ()
+    encoding: str = "utf-8"
+
+    @property
+    def columns(self) -> tuple[str, ...]:
+        return (self.key, *self.strings, *self.categories, *self.floats, *self.ints)
+
+    def schema(self) -> pa.Schema:
+        dict_type = pa.dictionary(pa.int32(), pa.string())
+        return pa.schema(
+            [(self.key, pa.string())]
+            + [(c, pa.string()) for c in self.strings]
+            + [(c, dict_type) for c in self.categories]
+            + [(c, pa.float64()) for c in self.floats]
+            + [(c, pa.int64()) for c in self.ints]
+        )
+
+
+# Keyed by CSV file name. Only the columns some finding reads are kept;
+# add a column here (and re-run the conversion) before reading it.
+LAYOUTS: dict[str, Layout] = {
+    "partb-by-provider.csv": Layout(
+        key="Rndrng_NPI",
+        strings=("Rndrng_Prvdr_Last_Org_Name", "Rndrng_Prvdr_First_Name"),
+        categories=("Rndrng_Prvdr_Ent_Cd", "Rndrng_Prvdr_State_Abrvtn", "Rndrng_Prvdr_Type"),
+        floats=("Tot_Srvcs", "Tot_Mdcr_Pymt_Amt", "Tot_Mdcr_Alowd_Amt"),
+        ints=("Tot_Benes",),
+    ),
+    "partb-by-provider-and-service.csv": Layout(
+        key="Rndrng_NPI",
+        strings=("Rndrng_Prvdr_Last_Org_Name", "Rndrng_Prvdr_First_Name"),
+        categories=("Rndrng_Prvdr_State_Abrvtn", "Rndrng_Prvdr_Type", "HCPCS_Cd",
+                    "HCPCS_Desc", "HCPCS_Drug_Ind", "Place_Of_Srvc"),
+        floats=("Tot_Srvcs", "Avg_Mdcr_Pymt_Amt", "Avg_Mdcr_Alowd_Amt", "Avg_Sbmtd_Chrg"),
+        ints=("Tot_Benes",),
+    ),
+    "partd-by-provider.csv": Layout(
+        key="PRSCRBR_NPI",
+        categories=("Prscrbr_State_Abrvtn",),
+        floats=("Tot_Drug_Cst", "Opioid_Tot_Drug_Cst"),
+        ints=("Tot_Clms", "Tot_Benes", "Opioid_Tot_Clms"),
+    ),
+    "dmepos-by-supplier.csv": Layout(
+        key="Suplr_NPI",
+        strings=("Suplr_Prvdr_Last_Name_Org", "Suplr_Prvdr_First_Name", "Suplr_Prvdr_City"),
+        categories=("Suplr_Prvdr_State_Abrvtn", "Suplr_Prvdr_Spclty_Desc"),
+        floats=("Suplr_Mdcr_Pymt_Amt",),
+        ints=("Tot_Suplr_Clms", "Tot_Suplr_Srvcs", "Tot_Suplr_Benes"),
+    ),
+    "openpayments-2024-by-recipient-nature.csv": Layout(
+        key="Covered_Recipient_NPI",
+        strings=("Covered_Recipient_Profile_First_Name", "Covered_Recipient_Profile_Last_Name"),
+        categories=("Nature_Of_Payment_Type_Code", "Recipient_Type"),
+        floats=("Total_Amount",),
+        ints=("Number_of_Transaction",),
+    ),
+    "PPEF_Enrollment_Extract_2026.04.01.csv": Layout(
+        key="NPI",
+        strings=("ENRLMT_ID", "FIRST_NAME", "LAST_NAME", "ORG_NAME"),
+        categories=("STATE_CD", "PROVIDER_TYPE_CD", "PROVIDER_TYPE_DESC"),
+        encoding="latin-1",
+    ),
+}
+
+
+class Piece(NamedTuple):
+    """Part of a file for one worker: parquet row groups or CSV bytes [start, stop)."""
+    source: str
+    start: int
+    stop: int
+
+
+@dataclass
+class ConvertStats:
+    source: str = ""
+    rows: int = 0
+    csv_bytes: int = 0
+    parquet_bytes: int = 0
+    seconds: float = 0.0
+
+    def summary(self) -> str:
+        return (f"{self.rows:,} rows · {self.csv_bytes / 1e6:,.0f} MB {self.source or 'CSV'} -> "
+                f"{self.parquet_bytes / 1e6:,.0f} MB parquet in {self.seconds:,.1f}s "
+                f"({self.rows / max(self.seconds, 1e-9):,.0f} rows/s, "
+                f"{self.csv_bytes / 1e6 / max(self.seconds, 1e-9):,.0f} MB/s)")
+
+
+def typed_path(csv_path: pathlib.Path) -> pathlib.Path:
+    csv_path = pathlib.Path(csv_path)
+    return csv_path.with_name(csv_path.stem + TYPED_SUFFIX)
+
+
+def cached(csv_path: pathlib.Path) -> pathlib.Path | None:
+    """The typed copy of `csv_path`, or None if it is missing or stale.
+
+    Stale means older than the CSV (in whichever form csv_source.locate()
+    finds it), or written for a different layout. A copy whose CSV has been
+    deleted to save disk is still used.
+    """
+    csv_path = pathlib.Path(csv_path)
+    path = typed_path(csv_path)
+    layout = LAYOUTS.get(csv_path.name)
+    if layout is None or not path.exists():
+        return None
+    source = csv_source.locate(csv_path)
+    if source is not None and path.stat().st_mtime < source.stat().st_mtime:
+        return None
+    if pq.read_schema(path).names != list(layout.columns):
+        return None
+    return path
+
+
+def _header(csv_path: pathlib.Path, encoding: str = "utf-8") -> list[str]:
+    # pyarrow drops a UTF-8 byte-order mark; so must the names given to it.
+    with csv_source.open_text(csv_path, "utf-8-sig" if encoding == "utf-8" else encoding) as fh:
+        return next(csv.reader(fh), [])
+
+
+def _blank_to_null(col: pa.Array) -> pa.Array:
+    return pc.if_else(pc.equal(pc.utf8_trim_whitespace(col), ""),
+                      pa.scalar(None, pa.string()), col)
+
+
+def _floats(col: pa.Array) -> pa.Array:
+    col = _blank_to_null(col)
+    try:
+        return pc.cast(col, pa.float64())
+    except pa.ArrowInvalid:
+        pass
+    out = []
+    for v in col.to_pylist():
+        try:
+            out.append(None if v is None else float(v))
+        except ValueError:
+            out.append(None)
+    return pa.array(out, pa.float64())
+
+
+def _typed(batch: pa.RecordBatch, layout: Layout) -> pa.RecordBatch:
+    """A batch of CSV strings, cast to `layout`'s types."""
+    arrays = [batch.column(layout.key)]
+    arrays += [batch.column(c) for c in layout.strings]
+    arrays += [pc.dictionary_encode(batch.column(c)) for c in layout.categories]
+    arrays += [_floats(batch.column(c)) for c in layout.floats]
+    arrays += [pc.cast(_floats(batch.column(c)), pa.int64(), safe=False) for c in layout.ints]
+    return pa.RecordBatch.from_arrays(arrays, schema=layout.schema())
+
+
+def _csv_batches(csv_path: pathlib.Path, layout: Layout | None,
+                 block_bytes: int = BLOCK_BYTES,
+                 byte_range: tuple[int, int] | None = None) -> Iterator[pa.RecordBatch]:
+    encoding = layout.encoding if layout else "utf-8"
+    header = _header(csv_path, encoding)
+    names = list(layout.columns) if layout else header
+    path = csv_source.locate(csv_path) or csv_path
+    stream = None
+    source: object = path
+    read_options = pacsv.ReadOptions(block_size=block_bytes, encoding=encoding)
+    if byte_range is not None:
+        start, stop = byte_range
+        source = pa.BufferReader(csv_ranges.buffer(path, start, stop))
+        if start > 0:
+            # Only the first range holds the header line.
+            read_options = pacsv.ReadOptions(block_size=block_bytes, encoding=encoding,
+                                             column_names=header)
+    elif csv_source.compressed(path):
+        source = stream = csv_source.open_binary(path)
+    try:
+        reader = pacsv.open_csv(
+            source,
+            read_options=read_options,
+            parse_options=pacsv.ParseOptions(newlines_in_values=True),
+            convert_options=pacsv.ConvertOptions(
+                include_columns=names,
+                include_missing_columns=True,
+                column_types={c: pa.string() for c in names},
+                strings_can_be_null=False,
+                quoted_strings_can_be_null=False,
+            ),
+        )
+        for batch in reader:
+            # A column missing from the file reads as all-null; DictReader-era
+            # code saw "" for it.
+            batch = pa.RecordBatch.from_arrays(
+                [pc.fill_null(c, "") if c.null_count else c for c in batch.columns],
+                names=batch.schema.names)
+            yield _typed(batch, layout) if layout else batch
+    finally:
+        if stream is not None:
+            stream.close()
+
+
+def batches(csv_path: pathlib.Path, piece: Piece | None = None) -> tuple[str, Iterator[pa.RecordBatch]]:
+    """(name of the file read, its typed record batches).
+
+    With `piece` (one of pieces()), only that part of the file is read.
+    """
+    csv_path = pathlib.Path(csv_path)
+    layout = LAYOUTS.get(csv_path.name)
+    path = cached(csv_path) if piece is None else (
+        typed_path(csv_path) if piece.source.endswith(TYPED_SUFFIX) else None)
+    if path is not None:
+        pf = pq.ParquetFile(path, read_dictionary=list(layout.categories))
+        groups = None if piece is None else list(range(piece.start, piece.stop))
+        return path.name, pf.iter_batches(batch_size=SCAN_BATCH_ROWS, row_groups=groups)
+    source = csv_source.locate(csv_path) or csv_path
+    byte_range = None if piece is None or csv_source.compressed(source) else (piece.start, piece.stop)
+    return source.name, _csv_batches(csv_path, layout, SCAN_BLOCK_BYTES, byte_range)
+
+
+def pieces(csv_path: pathlib.Path, n: int, *, workers: int = 1) -> list[Piece]:
+    """Up to `n` pieces of what batches() would read, in file order.
+
+    Row groups of the typed copy when it is current; otherwise byte ranges
+    of the CSV that begin and end on record boundaries (_csv_ranges.split,
+    which counts quotes with `workers` processes). A compressed CSV is
+    read whole, as one piece.
+    """
+    csv_path = pathlib.Path(csv_path)
+    path = cached(csv_path)
+    if path is not None:
+        groups = pq.ParquetFile(path).num_row_groups
+        cuts = sorted({groups * i // max(1, n) for i in range(n + 1)})
+        return [Piece(path.name, a, b) for a, b in zip(cuts, cuts[1:])] or [Piece(path.name, 0, 0)]
+    source = csv_source.locate(csv_path)
+    if source is None:
+        raise FileNotFoundError(csv_path)
+    if csv_source.compressed(source):
+        return [Piece(source.name, 0, source.stat().st_size)]
+    return [Piece(source.name, a, b)
+            for a, b in csv_ranges.split(source, n, workers=workers)]
+
+
+def convert(csv_path: pathlib.Path, block_bytes: int = BLOCK_BYTES) -> tuple[pathlib.Path, ConvertStats]:
+    """Write the typed parquet copy of `csv_path`; see the module docstring."""
+    csv_path = pathlib.Path(csv_path)
+    layout = LAYOUTS[csv_path.name]
+    out = typed_path(csv_path)
+    started = time.perf_counter()
+    source = csv_source.locate(csv_path)
+    if source is None:
+        raise FileNotFoundError(csv_path)
+    stats = ConvertStats(source=source.name, csv_bytes=source.stat().st_size)
+    fd, tmp = tempfile.mkstemp(dir=out.parent, prefix=out.name, suffix=".tmp")
+    os.close(fd)
+    try:
+        with pq.ParquetWriter(tmp, layout.schema(), compression="zstd") as writer:
+            pending: list[pa.RecordBatch] = []
+            pending_rows = 0
+            for batch in _csv_batches(csv_path, layout, block_bytes):
+                pending.append(batch)
+                pending_rows += batch.num_rows
+                if pending_rows >= ROW_GROUP_ROWS:
+                    writer.write_table(pa.Table.from_batches(pending), row_group_size=ROW_GROUP_ROWS)
+                    stats.rows += pending_rows
+                    pending, pending_rows = [], 0
+            if pending:
+                writer.write_table(pa.Table.from_batches(pending), row_group_size=ROW_GROUP_ROWS)
+                stats.rows += pending_rows
+        os.replace(tmp, out)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+    stats.parquet_bytes = out.stat().st_size
+    stats.seconds = time.perf_counter() - started
+    return out, stats
@@ -29,6 +29,9 @@ STATES_DIR = REPO_ROOT / "frontend" / "public" / "api" / "v1" / "states"
 #     from google.cloud import bigquery
 #     from analysis.claims_sources._cohorts import bq_job_config
 #     client.query(sql, job_config=bq_job_config())
+#
+# or through analysis.warehouse.query(sql, params), which applies it and can
+# run the same SQL on local parquet instead.
 DEFAULT_MAX_BYTES_BILLED = 100_000_000_000  # 100 GB
 
 
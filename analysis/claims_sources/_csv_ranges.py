@@ -0,0 +1,122 @@
+"""Split a CSV into byte ranges that start and end on record boundaries.
+
+Open Payments, Part B by-HCPCS and PPEF are several GB each, and a single
+reader parses them on one core however many the machine has. A CSV can be
+cut anywhere a record ends, and each piece parsed on its own, but "where a
+record ends" is not simply after a newline: a quoted field may hold one
+(the claims files carry addresses and free-text descriptions that do).
+
+split() finds the cuts in two steps. It counts the '"' bytes in equal
+slices of the file, in parallel, so the running total tells whether each
+nominal cut falls inside a quoted field (an odd count before it) or not.
+It then walks forward from each cut, tracking quotes from that state, to
+the first newline outside quotes. A doubled quote inside a quoted field
+flips the state twice, so it needs no special case.
+
+This assumes the file is valid RFC 4180 CSV: a quote either encloses a
+field or is doubled inside one. The CMS extracts are. A stray quote in the
+middle of an unquoted field would make the count wrong, and the parser
+would fail on the piece that follows (the wrong number of columns), so the
+mistake cannot pass unnoticed.
+
+The first range starts at 0 and so carries the header line; the others
+start on a data record. buffer() hands a range to pyarrow's CSV reader as
+a zero-copy slice of the memory-mapped file.
+
+    for start, stop in split(path, 8, workers=8):
+        ...  # parse buffer(path, start, stop) in a worker
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import pathlib
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Callable, Iterable, Iterator, TypeVar
+
+import pyarrow as pa
+
+# A piece smaller than this is not worth a process.
+MIN_RANGE_BYTES = 16 << 20
+COUNT_BLOCK_BYTES = 16 << 20
+QUOTE, NEWLINE = b'"', b"\n"
+
+T = TypeVar("T")
+
+
+def workers(requested: int | None) -> int:
+    """`requested` processes, or one per CPU when it is None."""
+    return max(1, requested if requested is not None else os.cpu_count() or 1)
+
+
+def pool_map(fn: Callable[..., T], args: Iterable[tuple], n_workers: int) -> Iterator[T]:
+    """fn(*a) for each a in `args`, in order; in a process pool when n_workers > 1."""
+    args = list(args)
+    if n_workers <= 1 or len(args) <= 1:
+        yield from (fn(*a) for a in args)
+        return
+    with ProcessPoolExecutor(max_workers=min(n_workers, len(args))) as pool:
+        yield from pool.map(fn, *zip(*args))
+
+
+def _count_quotes(path: pathlib.Path, start: int, stop: int) -> int:
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        n, left = 0, stop - start
+        while left > 0:
+            block = fh.read(min(COUNT_BLOCK_BYTES, left))
+            if not block:
+                break
+            n += block.count(QUOTE)
+            left -= len(block)
+        return n
+
+
+def _record_start(mm: mmap.mmap, pos: int, quoted: bool) -> int:
+    """The offset just past the first newline at or after `pos` outside quotes."""
+    size = len(mm)
+    while pos < size:
+        if quoted:
+            q = mm.find(QUOTE, pos)
+            if q < 0:
+                return size
+            quoted, pos = False, q + 1
+            continue
+        nl = mm.find(NEWLINE, pos)
+        q = mm.find(QUOTE, pos, nl if nl >= 0 else size)
+        if q < 0:
+            return size if nl < 0 else nl + 1
+        quoted, pos = True, q + 1
+    return size
+
+
+def split(path: pathlib.Path, parts: int, *, workers: int = 1) -> list[tuple[int, int]]:
+    """Up to `parts` (start, stop) byte ranges covering `path`, in file order.
+
+    Every range but the first begins on a record; every range ends just
+    after a record's newline, or at the end of the file. Files too small
+    to be worth splitting come back as one range.
+    """
+    path = pathlib.Path(path)
+    size = path.stat().st_size
+    parts = max(1, min(parts, size // MIN_RANGE_BYTES))
+    if parts == 1:
+        return [(0, size)]
+    cuts = [size * i // parts for i in range(parts + 1)]
+    counts = list(pool_map(_count_quotes, zip(repeat(path), cuts, cuts[1:]), workers))
+    bounds, quotes = [0], 0
+    with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for cut, n in zip(cuts[1:-1], counts):
+            quotes += n
+            # A long quoted field can carry one cut's boundary past the next.
+            bounds.append(max(bounds[-1], _record_start(mm, cut, quotes % 2 == 1)))
+    bounds.append(size)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def buffer(path: pathlib.Path, start: int, stop: int) -> pa.Buffer:
+    """Bytes [start, stop) of `path`, memory-mapped rather than read."""
+    source = pa.memory_map(str(path))
+    source.seek(start)
+    return source.read_buffer(stop - start)
@@ -0,0 +1,200 @@
+"""One read of a CMS claims CSV, shared by every finding that needs it.
+
+The Medicare Part B by-Provider file feeds H30a (medicare_partb.py), H36
+(ndh_completeness.py) and H31 (nppes_deactivation_join.py); the
+by-Provider-and-Service file feeds H40 (medicare_partb_by_hcpcs.py) and
+H41 (h41_specialty_drift.py). Each used to stream its file on its own, so a
+refresh of all of them parsed the same gigabytes several times. Parsing is
+the cost, not the per-finding work on a row.
+
+A finding now describes its use of a file as a Consumer: the key column it
+filters on, which keys it wants, and what it does with a row it wants.
+scan() reads the file once and hands each row to every consumer. The key
+column is stripped once per row and shared by every consumer that filters
+on it. Consumers see rows in file order, exactly as their own loop did, so
+each result is the one a separate read would have produced.
+
+Each script still runs alone (its main() scans with just its own consumer);
+refresh_partb.py builds all of them and reads each file once.
+
+Rows come from _claims_cache.batches(): the typed parquet copy of the CSV
+when there is one, else the CSV itself, typed the same way. A row is a dict
+of the file's LAYOUTS columns, with amounts as float, counts as int and
+blanks as None. A consumer's accept() is asked once per distinct key in
+each batch rather than once per row, the batch is cut to the keys it
+accepts in Arrow, and only those rows become dicts. A consumer holding its
+keys as an _npi_set.NpiSet answers for all of a batch's keys at once by
+overriding accept_keys(). A consumer that would
+rather work on the Arrow batch itself is a BatchConsumer and implements
+add_batch() instead of add(); rows then never become dicts for it at all.
+"""
+from __future__ import annotations
+
+import abc
+import pathlib
+import time
+from dataclasses import dataclass
+from typing import Any, Sequence
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from analysis.claims_sources import _claims_cache as claims_cache
+from analysis.claims_sources import _csv_ranges as csv_ranges
+
+NPI_COLUMN = "Rndrng_NPI"
+PROGRESS_EVERY = 1_000_000
+# More pieces than workers, so one slow piece does not hold up the rest.
+PIECES_PER_WORKER = 4
+
+
+class Consumer(abc.ABC):
+    """One finding's share of a scan.
+
+    `column` names the key the finding filters on. accept(key) says whether
+    it wants a row, add(key, row) folds a wanted row in, and result() is
+    what the finding keeps once the file is done. The default result is the
+    consumer itself, for findings that read several of its attributes.
+
+    accept_keys(keys) answers accept() for an Arrow array of distinct keys
+    at once, and add_batch(keys, batch) receives the wanted rows of one
+    batch, with their stripped keys, as Arrow. By default they call accept()
+    and add() once per key and row. merge(other) is only needed for
+    parallel scans.
+    """
+    column = NPI_COLUMN
+
+    def accept(self, key: str) -> bool:
+        return True
+
+    @abc.abstractmethod
+    def add(self, key: str, row: dict) -> None:
+        """Fold in one wanted row."""
+
+    def accept_keys(self, keys: pa.Array) -> Sequence[bool]:
+        return [self.accept(k) for k in keys.to_pylist()]
+
+    def add_batch(self, keys: pa.Array, batch: pa.RecordBatch) -> None:
+        for key, row in zip(keys.to_pylist(), batch.to_pylist()):
+            self.add(key, row)
+
+    def merge(self, other: Consumer) -> None:
+        """Fold in `other`: a copy of this consumer fed the rows after ours.
+
+        Parallel scans call it piece by piece in file order, so a merge that
+        keeps this consumer's state first and appends or adds `other`'s
+        gives what one read of the whole file would have.
+        """
+        raise NotImplementedError(f"{type(self).__name__} cannot be scanned in parallel")
+
+    def result(self) -> Any:
+        return self
+
+
+class BatchConsumer(Consumer):
+    """A consumer that works on the Arrow batch: it implements add_batch(),
+    and add() hands it a one-row batch."""
+
+    @abc.abstractmethod
+    def add_batch(self, keys: pa.Array, batch: pa.RecordBatch) -> None:
+        """Fold in one batch's wanted rows, `keys` their stripped keys."""
+
+    def add(self, key: str, row: dict) -> None:
+        self.add_batch(pa.array([key], pa.string()), pa.RecordBatch.from_pylist([row]))
+
+
+@dataclass
+class ScanStats:
+    rows: int = 0
+    consumers: int = 0
+    seconds: float = 0.0
+    source: str = ""
+    workers: int = 1
+
+    def summary(self) -> str:
+        parallel = f" on {self.workers} workers" if self.workers > 1 else ""
+        return (f"{self.source}: {self.rows:,} rows read once for "
+                f"{self.consumers} consumer(s){parallel} in {self.seconds:,.1f}s "
+                f"({self.rows / max(self.seconds, 1e-9):,.0f} rows/s)")
+
+
+def _plan(consumers: Sequence[Consumer]) -> list[tuple[str, list[tuple]]]:
+    by_column: dict[str, list[tuple]] = {}
+    for c in consumers:
+        by_column.setdefault(c.column, []).append((c.accept_keys, c.add_batch))
+    return list(by_column.items())
+
+
+def _feed(batch: pa.RecordBatch, plan: list[tuple[str, list[tuple]]]) -> None:
+    for column, hooks in plan:
+        keys = pc.utf8_trim_whitespace(pc.fill_null(batch.column(column), ""))
+        distinct = pc.unique(keys)
+        for accept_keys, add_batch in hooks:
+            wanted = distinct.filter(pa.array(accept_keys(distinct), pa.bool_()))
+            if not len(wanted):
+                continue
+            if len(wanted) == len(distinct):
+                add_batch(keys, batch)
+            else:
+                mask = pc.is_in(keys, value_set=wanted)
+                add_batch(keys.filter(mask), batch.filter(mask))
+
+
+def _scan_piece(path: pathlib.Path, piece: claims_cache.Piece,
+                consumers: Sequence[Consumer]) -> tuple[Sequence[Consumer], int]:
+    """One worker's share of a parallel scan: its consumers and row count."""
+    plan = _plan(consumers)
+    rows = 0
+    for batch in claims_cache.batches(path, piece)[1]:
+        _feed(batch, plan)
+        rows += batch.num_rows
+    return consumers, rows
+
+
+def scan(
+    path: pathlib.Path,
+    consumers: Sequence[Consumer],
+    progress_every: int = PROGRESS_EVERY,
+    label: str = "",
+    workers: int | None = 1,
+) -> tuple[list[Any], ScanStats]:
+    """Read `path` once, feeding every row to each consumer that accepts it.
+
+    Returns each consumer's result(), in the order given, and the stats.
+    With `workers` > 1 (None: one per CPU) the file is parsed in that many
+    processes and the results come from merged copies of the consumers;
+    the ones passed in are left untouched.
+    """
+    prefix = f"  {label} " if label else "  "
+    n_workers = csv_ranges.workers(workers)
+    started = time.perf_counter()
+    rows = 0
+    if n_workers > 1:
+        unmergeable = [type(c).__name__ for c in consumers if type(c).merge is Consumer.merge]
+        if unmergeable:
+            raise NotImplementedError(f"{', '.join(unmergeable)} cannot be scanned in parallel")
+        pieces = claims_cache.pieces(path, n_workers * PIECES_PER_WORKER, workers=n_workers)
+        source = pieces[0].source
+        merged: Sequence[Consumer] | None = None
+        tasks = ((path, piece, consumers) for piece in pieces)
+        for done, (part, n) in enumerate(csv_ranges.pool_map(_scan_piece, tasks, n_workers), 1):
+            if merged is None:
+                merged = part
+            else:
+                for mine, theirs in zip(merged, part):
+                    mine.merge(theirs)
+            before, rows = rows, rows + n
+            if progress_every and rows // progress_every > before // progress_every:
+                print(f"{prefix}scanned {rows:,} rows ({done}/{len(pieces)} pieces)")
+        consumers = merged or consumers
+    else:
+        plan = _plan(consumers)
+        source, reader = claims_cache.batches(path)
+        for batch in reader:
+            _feed(batch, plan)
+            before, rows = rows, rows + batch.num_rows
+            if progress_every and rows // progress_every > before // progress_every:
+                print(f"{prefix}scanned {rows:,} rows")
+    stats = ScanStats(rows=rows, consumers=len(consumers), workers=n_workers,
+                      seconds=time.perf_counter() - started, source=source)
+    return [c.result() for c in consumers], stats
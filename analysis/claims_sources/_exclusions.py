@@ -0,0 +1,262 @@
+"""The LEIE and SAM exclusion lists as one local index, shared by every finding.
+
+H33 (DMEPOS), H34 (Open Payments), H35 (nursing-home owners) and the
+high-risk cohort each queried cms_npd.oig_leie and cms_npd.sam_exclusions
+themselves, in slightly different shapes, on every run: four sets of
+queries, four bills, for two small tables that change once a month when
+ingest_oig_leie.py or ingest_sam_exclusions.py reloads them.
+
+The index is both tables read once, kept as one zstd parquet file under
+analysis/data/exclusions/, named for the release:
+
+    source             LEIE or SAM
+    npi                as loaded, stripped; '0000000000' or blank when absent
+    lastname, firstname, midname, state, general,
+    excltype, excldate, termdate, excluding_agency, status
+                       the record, "" where the source has no such field
+    last_key, first_key, state_key
+                       the (LAST, FIRST, STATE) demographic key, upper-case
+                       and stripped; "" unless all three are present and
+                       the state is two letters
+
+Only LEIE rows with no reinstatement date (REINDATE blank or '00000000'),
+and only SAM rows carrying a ten-digit NPI, are kept. Rows are sorted by
+NPI, so by_npi() reads them in a stable order.
+
+    index = exclusions.load()                     # queries only to write the file
+    index.earliest("LEIE")                        # NPI -> MIN(EXCLDATE)
+    index.by_npi("SAM", sam_status="Active")      # NPI -> [record, ...]
+    index.by_demo()                               # (LAST, FIRST, ST) -> [LEIE record, ...]
+
+The ingest scripts rebuild it after each load (refresh=True); otherwise it
+is written the first time a release asks for it.
+"""
+from __future__ import annotations
+
+import os
+import pathlib
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from analysis import qcache, warehouse
+from analysis.release import CURRENT_RELEASE
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent.parent
+INDEX_DIR = REPO_ROOT / "analysis" / "data" / "exclusions"
+SOURCES = ("LEIE", "SAM")
+NPI_RE = re.compile(r"^[0-9]{10}$")
+NO_NPI = "0000000000"
+
+LEIE_SQL = """
+SELECT LASTNAME, FIRSTNAME, MIDNAME, GENERAL, NPI, STATE, EXCLTYPE, EXCLDATE
+FROM `thematic-fort-453901-t7.cms_npd.oig_leie`
+WHERE IFNULL(REINDATE, '') IN ('', '00000000')
+"""
+
+SAM_SQL = """
+SELECT last_name, first_name, state_province, exclusion_type, excluding_agency,
+       active_date, termination_date, record_status, npi
+FROM `thematic-fort-453901-t7.cms_npd.sam_exclusions`
+WHERE REGEXP_CONTAINS(TRIM(npi), r'^\\d{10}$')
+"""
+
+RECORD_FIELDS = ("lastname", "firstname", "midname", "state", "general",
+                 "excltype", "excldate", "termdate", "excluding_agency", "status")
+KEY_FIELDS = ("last_key", "first_key", "state_key")
+_CATEGORIES = ("source", "state", "general", "excltype", "excluding_agency", "status")
+
+# Index column <- source column; None where the source has no such field.
+_LEIE = {"npi": "NPI", "lastname": "LASTNAME", "firstname": "FIRSTNAME",
+         "midname": "MIDNAME", "state": "STATE", "general": "GENERAL",
+         "excltype": "EXCLTYPE", "excldate": "EXCLDATE"}
+_SAM = {"npi": "npi", "lastname": "last_name", "firstname": "first_name",
+        "state": "state_province", "excltype": "exclusion_type",
+        "excldate": "active_date", "termdate": "termination_date",
+        "excluding_agency": "excluding_agency", "status": "record_status"}
+
+
+def schema() -> pa.Schema:
+    dict_type = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema(
+        [("source", dict_type), ("npi", pa.string())]
+        + [(c, dict_type if c in _CATEGORIES else pa.string()) for c in RECORD_FIELDS]
+        + [(c, pa.string()) for c in KEY_FIELDS]
+    )
+
+
+def _clean(table: pa.Table, name: str | None) -> pa.Array:
+    if name is None or name not in table.column_names:
+        return pa.array([""] * table.num_rows, pa.string())
+    col = pc.cast(table.column(name), pa.string())
+    return pc.utf8_trim_whitespace(pc.fill_null(col, "")).combine_chunks()
+
+
+def _part(source: str, table: pa.Table, columns: dict[str, str]) -> pa.Table:
+    cols = {"source": pa.array([source] * table.num_rows, pa.string()),
+            "npi": _clean(table, columns["npi"])}
+    cols.update({c: _clean(table, columns.get(c)) for c in RECORD_FIELDS})
+    if source == "LEIE":
+        # Everything LEIE_SQL returns is a current exclusion.
+        cols["status"] = pa.array(["Active"] * table.num_rows, pa.string())
+        last, first, state = (pc.utf8_upper(cols[c]) for c in ("lastname", "firstname", "state"))
+        keyed = pc.and_(pc.and_(pc.not_equal(last, ""), pc.not_equal(first, "")),
+                        pc.equal(pc.utf8_length(state), 2))
+        blank = pa.scalar("", pa.string())
+        cols.update(last_key=pc.if_else(keyed, last, blank),
+                    first_key=pc.if_else(keyed, first, blank),
+                    state_key=pc.if_else(keyed, state, blank))
+    else:
+        cols.update({c: pa.array([""] * table.num_rows, pa.string()) for c in KEY_FIELDS})
+    return pa.table(cols)
+
+
+@dataclass
+class IndexStats:
+    leie_rows: int = 0
+    leie_npis: int = 0
+    demo_keys: int = 0
+    sam_rows: int = 0
+    sam_npis: int = 0
+    file_bytes: int = 0
+
+    def summary(self) -> str:
+        return (f"LEIE {self.leie_rows:,} active rows ({self.leie_npis:,} NPIs, "
+                f"{self.demo_keys:,} (LAST, FIRST, STATE) keys) · SAM {self.sam_rows:,} rows "
+                f"with NPI ({self.sam_npis:,} NPIs) · {self.file_bytes / 1e6:,.1f} MB")
+
+
+class ExclusionIndex:
+    """Active LEIE and NPI-keyed SAM exclusions, as one Arrow table."""
+
+    def __init__(self, table: pa.Table):
+        self.table = table
+
+    @classmethod
+    def from_tables(cls, leie: pa.Table, sam: pa.Table) -> ExclusionIndex:
+        """The index of LEIE_SQL's and SAM_SQL's results."""
+        table = pa.concat_tables([_part("LEIE", leie, _LEIE), _part("SAM", sam, _SAM)])
+        sam_rows = pc.equal(table.column("source"), "SAM")
+        table = table.filter(pc.invert(pc.and_(sam_rows, pc.invert(_valid(table.column("npi"))))))
+        table = table.sort_by([("npi", "ascending"), ("source", "ascending"),
+                               ("excldate", "ascending")])
+        return cls(table.cast(schema()).unify_dictionaries())
+
+    @classmethod
+    def load(cls, path: pathlib.Path) -> ExclusionIndex:
+        return cls(pq.read_table(path, read_dictionary=list(_CATEGORIES)))
+
+    def save(self, path: pathlib.Path) -> pathlib.Path:
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        pq.write_table(self.table, tmp, compression="zstd")
+        os.replace(tmp, path)
+        return path
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    def _rows(self, source: str | None, sam_status: str | None, *, keyed: bool) -> pa.Table:
+        t = self.table
+        mask = _valid(t.column("npi")) if keyed else pc.not_equal(t.column("last_key"), "")
+        if source is not None:
+            mask = pc.and_(mask, pc.equal(t.column("source"), source))
+        if sam_status is not None:
+            mask = pc.and_(mask, pc.or_(pc.not_equal(t.column("source"), "SAM"),
+                                        pc.equal(t.column("status"), sam_status)))
+        return t.filter(mask)
+
+    def records(self, source: str | None = None, *, sam_status: str | None = None) -> list[dict]:
+        """Every record with a usable NPI, in NPI order; see by_npi()."""
+        return [_record(r) for r in self._rows(source, sam_status, keyed=True).to_pylist()]
+
+    def by_npi(self, source: str | None = None, *,
+               sam_status: str | None = None) -> dict[str, list[dict]]:
+        """NPI -> its records, for rows whose NPI is ten digits and not all zeros.
+
+        `source` limits them to LEIE or SAM; `sam_status` keeps only SAM rows
+        with that record status (e.g. "Active").
+        """
+        out: dict[str, list[dict]] = defaultdict(list)
+        for rec in self.records(source, sam_status=sam_status):
+            out[rec["npi"]].append(rec)
+        return dict(out)
+
+    def by_demo(self, source: str = "LEIE") -> dict[tuple[str, str, str], list[dict]]:
+        """(LAST, FIRST, STATE) -> records, whether or not they carry an NPI."""
+        out: dict[tuple[str, str, str], list[dict]] = defaultdict(list)
+        for r in self._rows(source, None, keyed=False).to_pylist():
+            out[(r["last_key"], r["first_key"], r["state_key"])].append(_record(r))
+        return dict(out)
+
+    def earliest(self, source: str, *, sam_status: str | None = None) -> dict[str, str]:
+        """NPI -> its earliest exclusion date in `source`, "" if none is recorded.
+
+        Dates compare as the strings they were loaded as, as MIN() did in
+        the warehouse: EXCLDATE for LEIE, active_date for SAM.
+        """
+        t = self._rows(source, sam_status, keyed=True)
+        out: dict[str, str] = {}
+        for npi, date in zip(t.column("npi").to_pylist(), t.column("excldate").to_pylist()):
+            seen = out.get(npi)
+            if seen is None or (date and (not seen or date < seen)):
+                out[npi] = date
+        return out
+
+    def stats(self) -> IndexStats:
+        t = self.table
+        leie = self._rows("LEIE", None, keyed=True).column("npi")
+        sam = self._rows("SAM", None, keyed=True).column("npi")
+        demo = self._rows("LEIE", None, keyed=False).select(list(KEY_FIELDS))
+        return IndexStats(
+            leie_rows=pc.sum(pc.equal(t.column("source"), "LEIE")).as_py() or 0,
+            leie_npis=len(pc.unique(leie)),
+            demo_keys=demo.group_by(list(KEY_FIELDS)).aggregate([]).num_rows,
+            sam_rows=len(sam),
+            sam_npis=len(pc.unique(sam)),
+        )
+
+
+def _valid(npis: pa.Array | pa.ChunkedArray) -> pa.Array:
+    return pc.and_(pc.match_substring_regex(npis, NPI_RE.pattern), pc.not_equal(npis, NO_NPI))
+
+
+def _record(row: dict) -> dict:
+    rec = {"source": row["source"], "npi": row["npi"]}
+    rec.update((c, row[c]) for c in RECORD_FIELDS)
+    return rec
+
+
+def index_path(release: str = CURRENT_RELEASE) -> pathlib.Path:
+    return INDEX_DIR / f"exclusions-{release}.parquet"
+
+
+def build() -> ExclusionIndex:
+    """Query both tables on the selected warehouse backend.
+
+    The queries bypass the result cache: the index is the cache, and a
+    rebuild after an ingest must see the tables as they now are.
+    """
+    wh = warehouse.current()
+    leie, billed = wh.arrow(LEIE_SQL)
+    qcache.record(billed)
+    sam, billed = wh.arrow(SAM_SQL)
+    qcache.record(billed)
+    return ExclusionIndex.from_tables(leie, sam)
+
+
+def load(*, refresh: bool = False, release: str = CURRENT_RELEASE) -> ExclusionIndex:
+    """The index for `release`, querying the warehouse only to write it."""
+    path = index_path(release)
+    if refresh or not path.exists():
+        index = build()
+        index.save(path)
+        stats = index.stats()
+        stats.file_bytes = path.stat().st_size
+        print(f"Exclusion index written to {path.name}: {stats.summary()}")
+    return ExclusionIndex.load(path)
@@ -0,0 +1,347 @@
+"""Parallel row-group scan of the HHS Medicaid Provider Spending parquet.
+
+H29 (medicaid_provider_spending.py) and H31 (nppes_deactivation_join.py)
+both read the 238M-row file once for a cohort of NPIs, keeping rows whose
+billing or servicing NPI is in the cohort. This module does that read for
+both of them.
+
+Row groups are the unit of work. A row group whose parquet min/max
+statistics on both NPI columns leave no cohort NPI in range is never read.
+The rest go to a thread pool: decoding and `is_in` run in Arrow with the
+GIL released, so threads scale without pickling row groups between
+processes. Each worker reduces its row group to the caller's matches, and
+the matches come back in row-group order, so the merged result is what a
+serial scan in file order would have produced.
+
+The source file is in no useful order, so every cohort reads all of it.
+prepare() (run once per release by prepare_medicaid_parquet.py) rewrites it
+beside the original, sorted by billing NPI in small row groups, with page
+indexes and bloom filters on both NPI columns, and writes a side index from
+NPI to the row groups holding it on either axis. scan() uses that copy when
+it is newer than the source and reads only the row groups the index names.
+The copy keeps each row's position in the source as `_row`, and matches are
+put back in that order before the caller sees them, so results do not
+depend on which file was read.
+"""
+from __future__ import annotations
+
+import bisect
+import os
+import pathlib
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Iterable
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+NPI_COLUMNS = ("BILLING_PROVIDER_NPI_NUM", "SERVICING_PROVIDER_NPI_NUM")
+# is_in hashes the cohort again on every call, which for an all-states cohort
+# costs as much as the lookup itself, so batches are large.
+BATCH_ROWS = 1_000_000
+SORTED_SUFFIX = ".by-npi.parquet"
+INDEX_SUFFIX = ".npi-index.npz"
+PREPARED_ROW_GROUP_ROWS = 32_768
+ROW_COLUMN = "_row"
+NPI_RE = re.compile(r"^[0-9]{10}$")
+
+
+@dataclass
+class ScanStats:
+    rows: int = 0
+    row_groups: int = 0
+    skipped: int = 0
+    seconds: float = 0.0
+    bytes_read: int = 0
+    source: str = ""
+
+    def summary(self) -> str:
+        read = self.row_groups - self.skipped
+        return (f"{self.source}: {read}/{self.row_groups} row groups read "
+                f"({self.skipped} skipped) · {self.bytes_read / 1e6:,.1f} MB read · "
+                f"{self.rows:,} rows in {self.seconds:,.1f}s "
+                f"({self.rows / max(self.seconds, 1e-9):,.0f} rows/s)")
+
+
+def either_axis(batch: pa.RecordBatch, npi_set: pa.Array) -> pa.Table | None:
+    """Rows whose billing or servicing NPI is in `npi_set`; the default match."""
+    mask = pc.or_(pc.is_in(batch.column(NPI_COLUMNS[0]), value_set=npi_set),
+                  pc.is_in(batch.column(NPI_COLUMNS[1]), value_set=npi_set))
+    if not pc.any(mask).as_py():
+        return None
+    return pa.Table.from_batches([batch.filter(mask)])
+
+
+def may_contain(metadata: pq.FileMetaData, row_group: int, sorted_npis: list[str]) -> bool:
+    """False only if the row group's statistics rule out every cohort NPI.
+
+    Missing statistics prove nothing, so they keep the row group.
+    """
+    rg = metadata.row_group(row_group)
+    names = [rg.column(j).path_in_schema for j in range(rg.num_columns)]
+    for col in NPI_COLUMNS:
+        if col not in names:
+            return True
+        stats = rg.column(names.index(col)).statistics
+        if stats is None or not stats.has_min_max:
+            return True
+        lo, hi = (_text(v) for v in (stats.min, stats.max))
+        k = bisect.bisect_left(sorted_npis, lo)
+        if k < len(sorted_npis) and sorted_npis[k] <= hi:
+            return True
+    return False
+
+
+def _text(v) -> str:
+    return v.decode("utf-8", "replace") if isinstance(v, bytes) else str(v)
+
+
+def chunk_bytes(metadata: pq.FileMetaData, row_groups: Iterable[int], columns: list[str]) -> int:
+    """Compressed bytes of `columns` in `row_groups`: what reading them costs."""
+    total = 0
+    for i in row_groups:
+        rg = metadata.row_group(i)
+        for j in range(rg.num_columns):
+            if rg.column(j).path_in_schema in columns:
+                total += rg.column(j).total_compressed_size
+    return total
+
+
+def prepared_paths(path: pathlib.Path) -> tuple[pathlib.Path, pathlib.Path]:
+    """Where prepare() writes the sorted copy of `path` and its NPI index."""
+    return (path.with_name(path.stem + SORTED_SUFFIX),
+            path.with_name(path.stem + INDEX_SUFFIX))
+
+
+def prepared(path: pathlib.Path) -> tuple[pathlib.Path, pathlib.Path] | None:
+    """The sorted copy and index of `path`, if both exist and are not stale."""
+    sorted_path, index_path = prepared_paths(path)
+    if not (sorted_path.exists() and index_path.exists()):
+        return None
+    source = path.stat().st_mtime
+    if min(sorted_path.stat().st_mtime, index_path.stat().st_mtime) < source:
+        return None
+    return sorted_path, index_path
+
+
+def lookup(index_path: pathlib.Path, npis: Iterable[str]) -> list[int] | None:
+    """Row groups of the sorted copy that hold any of `npis` on either axis.
+
+    None when some NPI is not ten digits: the index only keys valid NPIs,
+    so such a cohort has to be answered by reading everything.
+    """
+    npis = [n for n in npis if n]
+    if any(not NPI_RE.match(n) for n in npis):
+        return None
+    with np.load(index_path) as data:
+        keys, offsets, groups = data["npi"], data["offsets"], data["row_groups"]
+    want = np.unique(np.array(npis, dtype=np.int64))
+    pos = np.searchsorted(keys, want)
+    pos = pos[(pos < len(keys)) & (keys[np.minimum(pos, len(keys) - 1)] == want)]
+    if not len(pos):
+        return []
+    return np.unique(np.concatenate(
+        [groups[offsets[k]:offsets[k + 1]] for k in pos.tolist()])).tolist()
+
+
+def _read(path, row_groups, columns, match, npi_set, workers, stats, progress_every, fold=None):
+    """`match` over each of `row_groups` on a thread pool, in row-group order.
+
+    Returns the matches, or with `fold` hands each to it in that order and
+    keeps none.
+    """
+    metadata = pq.ParquetFile(path).metadata
+    local = threading.local()
+
+    def read(i: int) -> tuple[int, list[pa.Table]]:
+        # ParquetFile is not safe to share between threads; one per thread.
+        pf = getattr(local, "pf", None)
+        if pf is None:
+            pf = local.pf = pq.ParquetFile(path)
+        out = []
+        for batch in pf.iter_batches(batch_size=BATCH_ROWS, row_groups=[i],
+                                     columns=columns, use_threads=False):
+            found = match(batch, npi_set)
+            if found is not None and found.num_rows:
+                out.append(found)
+        return metadata.row_group(i).num_rows, out
+
+    parts: list[pa.Table] = []
+    emit = fold or parts.append
+    matched = 0
+    stats.bytes_read += chunk_bytes(metadata, row_groups, columns)
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for n, (rows, found) in enumerate(pool.map(read, row_groups), 1):
+            stats.rows += rows
+            for part in found:
+                matched += part.num_rows
+                emit(part)
+            if n % progress_every == 0:
+                print(f"  scanned {n:>5}/{len(row_groups)} row groups · {stats.rows:>12,} rows "
+                      f"· {matched:,} matching rows so far")
+    return parts
+
+
+def scan(
+    path: pathlib.Path,
+    npis: Iterable[str],
+    columns: list[str],
+    match: Callable[[pa.RecordBatch, pa.Array], pa.Table | None] = either_axis,
+    workers: int | None = None,
+    progress_every: int = 20,
+    fold: Callable[[pa.Table], None] | None = None,
+) -> tuple[list[pa.Table], ScanStats]:
+    """Every batch's `match` result, in source file order, and what the scan cost.
+
+    `match(batch, npi_set)` returns that batch's matches (or None) for
+    batches of at most BATCH_ROWS rows. Callers aggregate the concatenated
+    matches themselves, or pass `fold`, which is handed each batch's matches
+    in source file order as they arrive; the returned list is then empty and
+    the scan never holds more than the row groups in flight. Reads the
+    prepared copy of `path` when there is one.
+    """
+    started = time.perf_counter()
+    cohort = sorted(n for n in npis if n)
+    npi_set = pa.array(cohort, type=pa.string())
+    copy = prepared(path)
+    groups = lookup(copy[1], cohort) if copy else None
+    if groups is None:
+        metadata = pq.ParquetFile(path).metadata
+        stats = ScanStats(row_groups=metadata.num_row_groups, source=path.name)
+        keep = [i for i in range(metadata.num_row_groups) if may_contain(metadata, i, cohort)]
+        stats.skipped = stats.row_groups - len(keep)
+        parts = _read(path, keep, columns, match, npi_set, workers, stats, progress_every, fold)
+    else:
+        sorted_path, index_path = copy
+        metadata = pq.ParquetFile(sorted_path).metadata
+        stats = ScanStats(row_groups=metadata.num_row_groups, source=sorted_path.name,
+                          skipped=metadata.num_row_groups - len(groups),
+                          bytes_read=index_path.stat().st_size)
+        rows = _read(sorted_path, groups, columns + [ROW_COLUMN], either_axis,
+                     npi_set, workers, stats, progress_every)
+        parts = []
+        if rows:
+            # Back to source order, then the caller's match, as a plain scan would.
+            table = pa.concat_tables(rows)
+            table = table.take(pc.sort_indices(table, [(ROW_COLUMN, "ascending")]))
+            for batch in table.drop_columns([ROW_COLUMN]).to_batches(BATCH_ROWS):
+                found = match(batch, npi_set)
+                if found is not None and found.num_rows:
+                    (fold or parts.append)(found)
+    stats.seconds = time.perf_counter() - started
+    return parts, stats
+
+
+def _npi_keys(column: pa.ChunkedArray | pa.Array) -> np.ndarray:
+    """The distinct valid NPIs in `column`, as int64."""
+    values = pc.unique(pc.drop_null(column))
+    values = values.filter(pc.match_substring_regex(values, NPI_RE.pattern))
+    return pc.cast(values, pa.int64()).to_numpy(zero_copy_only=False)
+
+
+def _bucket_bounds(src: pq.ParquetFile, rows_per_bucket: int) -> np.ndarray:
+    """Billing NPI values splitting the file into buckets of about equal rows.
+
+    Quantiles of a strided sample of the billing column; reading one column
+    costs a fraction of a full pass.
+    """
+    n_buckets = -(-src.metadata.num_rows // rows_per_bucket)
+    if n_buckets <= 1:
+        return np.array([], dtype=object)
+    step = max(src.metadata.num_rows // (n_buckets * 1000), 1)
+    sample = []
+    for batch in src.iter_batches(batch_size=BATCH_ROWS, columns=[NPI_COLUMNS[0]]):
+        col = batch.column(0)
+        sample.append(pc.drop_null(col.take(pa.array(range(0, len(col), step)))))
+    sample = np.sort(pa.chunked_array(sample, pa.string()).to_numpy().astype(object))
+    if not len(sample):
+        return np.array([], dtype=object)
+    cuts = sample[(np.arange(1, n_buckets) * len(sample)) // n_buckets]
+    return np.unique(cuts)
+
+
+def prepare(
+    path: pathlib.Path,
+    row_group_rows: int = PREPARED_ROW_GROUP_ROWS,
+    rows_per_bucket: int = 2_000_000,
+) -> tuple[pathlib.Path, pathlib.Path]:
+    """Write the NPI-sorted copy of `path` and its NPI → row-group index.
+
+    The file is larger than memory, so the sort is external: one pass splits
+    rows into billing-NPI ranges of about `rows_per_bucket` rows (cut at
+    sampled quantiles), then each range is sorted on its own and appended in
+    order. Within a billing NPI, rows keep source order. Both outputs are
+    written under temporary names and renamed into place, the index last,
+    so a half-written copy is never taken for a prepared one.
+    """
+    billing = NPI_COLUMNS[0]
+    sorted_path, index_path = prepared_paths(path)
+    src = pq.ParquetFile(path)
+    schema = src.schema_arrow.append(pa.field(ROW_COLUMN, pa.int64()))
+    bounds = _bucket_bounds(src, rows_per_bucket)
+    null_bucket = len(bounds) + 1
+    with tempfile.TemporaryDirectory(dir=path.parent, prefix=".medicaid-sort-") as tmp:
+        tmp = pathlib.Path(tmp)
+        writers: dict[int, pq.ParquetWriter] = {}
+        offset = 0
+        for batch in src.iter_batches(batch_size=BATCH_ROWS):
+            batch = batch.append_column(
+                ROW_COLUMN, pa.array(np.arange(offset, offset + batch.num_rows)))
+            offset += batch.num_rows
+            npi = batch.column(billing)
+            bucket = np.searchsorted(bounds, pc.fill_null(npi, "").to_numpy(
+                zero_copy_only=False).astype(object), side="right")
+            bucket[pc.is_null(npi).to_numpy(zero_copy_only=False)] = null_bucket
+            order = np.argsort(bucket, kind="stable")
+            batch, bucket = batch.take(pa.array(order)), bucket[order]
+            cuts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1], True])
+            for start, end in zip(cuts[:-1].tolist(), cuts[1:].tolist()):
+                key = int(bucket[start])
+                if key not in writers:
+                    writers[key] = pq.ParquetWriter(tmp / f"{key}.parquet", schema)
+                writers[key].write_batch(batch.slice(start, end - start))
+        for w in writers.values():
+            w.close()
+
+        part_sorted = sorted_path.with_name(f".{sorted_path.name}.{os.getpid()}.tmp")
+        keys, group_ids = [], []
+        n_groups = 0
+        with pq.ParquetWriter(
+                part_sorted, schema, write_page_index=True,
+                sorting_columns=[pq.SortingColumn(schema.get_field_index(billing))],
+                bloom_filter_options={c: {"ndv": row_group_rows // 4, "fpp": 0.05} for c in NPI_COLUMNS},
+        ) as out:
+            for key in sorted(writers):
+                table = pq.read_table(tmp / f"{key}.parquet")
+                table = table.take(pc.sort_indices(table, [
+                    (billing, "ascending", "at_end"), (ROW_COLUMN, "ascending")]))
+                for start in range(0, table.num_rows, row_group_rows):
+                    chunk = table.slice(start, row_group_rows)
+                    out.write_table(chunk, row_group_size=row_group_rows)
+                    for col in NPI_COLUMNS:
+                        k = _npi_keys(chunk.column(col))
+                        keys.append(k)
+                        group_ids.append(np.full(len(k), n_groups, dtype=np.int32))
+                    n_groups += 1
+                del table
+
+    keys = np.concatenate(keys) if keys else np.array([], dtype=np.int64)
+    group_ids = np.concatenate(group_ids) if group_ids else np.array([], dtype=np.int32)
+    order = np.lexsort((group_ids, keys))
+    keys, group_ids = keys[order], group_ids[order]
+    distinct = np.r_[True, (keys[1:] != keys[:-1]) | (group_ids[1:] != group_ids[:-1])]
+    keys, group_ids = keys[distinct], group_ids[distinct]
+    npi_start = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.array([], int)
+    offsets = np.r_[npi_start, len(keys)].astype(np.int64)
+
+    os.replace(part_sorted, sorted_path)
+    part_index = index_path.with_name(f".{index_path.stem}.{os.getpid()}.tmp.npz")
+    np.savez(part_index, npi=keys[npi_start], offsets=offsets, row_groups=group_ids)
+    os.replace(part_index, index_path)
+    return sorted_path, index_path
@@ -0,0 +1,137 @@
+"""Sorted NPI sets on disk, memory-mapped for membership tests.
+
+H36 pulled the NDH NPI set (about 8M NPIs, practitioner ∪ organization) out
+of the warehouse into a Python set of str on every run: hundreds of MB of
+string objects, rebuilt from a query result each time, then probed one
+`npi in ndh` at a time. An NPI is ten digits, so it fits a uint64, and a
+set of them is a sorted array.
+
+NpiSet is that array. It is written once per release as a .npy file under
+analysis/data/npi-sets/, named for the set and the release, and np.load()
+memory-maps it, so loading costs nothing until a page is touched and the
+pages are shared with every other process reading the same file.
+Membership is a binary search: contains() for one NPI, isin() for a whole
+Arrow or NumPy column at once, and `npi in s` works as it did on the set.
+
+Only ten-digit NPIs are stored. Anything else (blank, short, padded with
+spaces, non-numeric) is never a member; the claims scans strip their key
+column before asking.
+
+    ndh = npi_set.cached("ndh", fetch)     # fetch() runs once per release
+    absent = ~ndh.isin(batch.column("Rndrng_NPI"))
+"""
+from __future__ import annotations
+
+import os
+import pathlib
+import re
+from typing import Callable, Iterable, Iterator
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from analysis.release import CURRENT_RELEASE
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent.parent
+SET_DIR = REPO_ROOT / "analysis" / "data" / "npi-sets"
+NPI_RE = re.compile(r"^[0-9]{10}$")
+_LOW, _HIGH = 10**9, 10**10
+
+
+def _keys(values) -> tuple[np.ndarray, np.ndarray]:
+    """(uint64 key, is a ten-digit NPI) for each value of a column.
+
+    Accepts Arrow string or integer arrays (chunked or not), NumPy arrays
+    and plain sequences of str or int.
+    """
+    if isinstance(values, np.ndarray) and values.dtype.kind in "iu":
+        values = pa.array(values)
+    elif not isinstance(values, (pa.Array, pa.ChunkedArray)):
+        values = pa.array(list(values))
+    if isinstance(values, pa.ChunkedArray):
+        values = values.combine_chunks() if values.num_chunks else pa.array([], values.type)
+    if pa.types.is_dictionary(values.type):
+        values = values.dictionary_decode()
+    if pa.types.is_integer(values.type):
+        ints = pc.fill_null(pc.cast(values, pa.int64()), 0)
+        valid = pc.and_(pc.greater_equal(ints, _LOW), pc.less(ints, _HIGH))
+    else:
+        strings = pc.fill_null(pc.cast(values, pa.string()), "")
+        valid = pc.match_substring_regex(strings, NPI_RE.pattern)
+        ints = pc.cast(pc.if_else(valid, strings, "0"), pa.int64())
+    return (ints.to_numpy(zero_copy_only=False).astype(np.uint64),
+            valid.to_numpy(zero_copy_only=False))
+
+
+class NpiSet:
+    """A set of NPIs held as a sorted, distinct uint64 array."""
+
+    def __init__(self, keys: np.ndarray):
+        self.keys = keys
+
+    @classmethod
+    def build(cls, npis) -> NpiSet:
+        """The set of the ten-digit NPIs among `npis` (see _keys for types)."""
+        keys, valid = _keys(npis)
+        keys = np.sort(keys[valid])
+        # np.unique hashes uint64 here, which is far slower than the sort.
+        return cls(keys[np.r_[True, keys[1:] != keys[:-1]]] if len(keys) else keys)
+
+    @classmethod
+    def load(cls, path: pathlib.Path) -> NpiSet:
+        return cls(np.load(path, mmap_mode="r"))
+
+    def save(self, path: pathlib.Path) -> pathlib.Path:
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as fh:
+            np.save(fh, np.ascontiguousarray(self.keys, dtype=np.uint64))
+        os.replace(tmp, path)
+        return path
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __iter__(self) -> Iterator[str]:
+        return (f"{k:010d}" for k in self.keys.tolist())
+
+    def __contains__(self, npi) -> bool:
+        return self.contains(npi)
+
+    def contains(self, npi: str | int) -> bool:
+        if isinstance(npi, str):
+            if not NPI_RE.match(npi):
+                return False
+            npi = int(npi)
+        elif not (isinstance(npi, (int, np.integer)) and _LOW <= npi < _HIGH):
+            return False
+        key = np.uint64(npi)
+        at = int(np.searchsorted(self.keys, key))
+        return at < len(self.keys) and self.keys[at] == key
+
+    def isin(self, npis) -> np.ndarray:
+        """Boolean mask: which values of the column `npis` are in the set."""
+        keys, valid = _keys(npis)
+        if not len(self.keys):
+            return np.zeros(len(keys), dtype=bool)
+        at = np.searchsorted(self.keys, keys).clip(max=len(self.keys) - 1)
+        return valid & (self.keys[at] == keys)
+
+
+def set_path(name: str, release: str = CURRENT_RELEASE) -> pathlib.Path:
+    return SET_DIR / f"{name}-{release}.npy"
+
+
+def cached(name: str, fetch: Callable[[], Iterable], *, refresh: bool = False,
+           release: str = CURRENT_RELEASE) -> NpiSet:
+    """The `name` set for `release`, calling fetch() only to write it.
+
+    fetch() returns the NPIs as anything NpiSet.build() takes; it runs when
+    there is no file for this release yet, or when `refresh` is set.
+    """
+    path = set_path(name, release)
+    if refresh or not path.exists():
+        NpiSet.build(fetch()).save(path)
+    return NpiSet.load(path)
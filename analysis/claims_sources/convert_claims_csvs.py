@@ -0,0 +1,51 @@
+"""Convert the CMS claims CSVs to typed parquet for the claims scans.
+
+Run once per release after downloading the Part B, Part D, DMEPOS,
+Open Payments and PPEF CSVs into frontend/data/cms-claims/. Each file in
+_claims_cache.LAYOUTS is written beside itself as `<name>.typed.parquet`:
+only the columns the findings read, state / provider type / HCPCS codes
+dictionary-encoded, amounts float64, counts int64. _csv_scan.scan() reads
+that copy instead of the CSV while it is newer than the CSV, so every
+claims finding (H30a, H30b, H31, H32, H33, H36, H40, H41) and H39 pick it
+up with no flag. A copy older than its CSV is ignored; re-run this after a download.
+A CSV may be kept compressed (`<name>.csv.zst`, `.csv.gz` or `.zip`; see
+analysis/csv_source.py) and is converted from that.
+
+Run:
+    python -m analysis.claims_sources.convert_claims_csvs
+    python -m analysis.claims_sources.convert_claims_csvs --only partb-by-provider.csv
+"""
+from __future__ import annotations
+import argparse
+import pathlib
+
+from analysis import csv_source
+from analysis.claims_sources import _claims_cache as claims_cache
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent.parent
+CLAIMS_DIR = REPO_ROOT / "frontend" / "data" / "cms-claims"
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    ap.add_argument("--dir", type=pathlib.Path, default=CLAIMS_DIR)
+    ap.add_argument("--only", action="append", choices=sorted(claims_cache.LAYOUTS),
+                    help="convert just this CSV (repeatable)")
+    ap.add_argument("--force", action="store_true",
+                    help="rewrite copies that are already current")
+    args = ap.parse_args()
+
+    for name in args.only or sorted(claims_cache.LAYOUTS):
+        csv_path = args.dir / name
+        if not csv_source.exists(csv_path):
+            print(f"{name}: not downloaded, skipped")
+            continue
+        if not args.force and claims_cache.cached(csv_path):
+            print(f"{name}: typed copy is current, skipped")
+            continue
+        out, stats = claims_cache.convert(csv_path)
+        print(f"{stats.source} -> {out.name}: {stats.summary()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,7 @@ against federal exclusion lists is a direct state and federal PI signal.
 
 This is a NATIONAL finding (not VA-cohort-scoped) — the DMEPOS supplier
 file is itself the population. We match every supplier NPI against the
-active LEIE + SAM exclusion lists (queried from BigQuery). VA-state
+active LEIE + SAM exclusion lists (the local exclusion index). VA-state
 suppliers are surfaced as a per-state slice for the VA pilot.
 
 Sources:
@@ -16,7 +16,8 @@ Sources:
         5b10992b-8290-4b93-b036-0c233020d7da/
         mup_dme_ry25_p05_v10_dy23_supr.csv
     LEIE + SAM exclusion NPIs:
-      BigQuery — cms_npd.oig_leie + cms_npd.sam_exclusions
+      BigQuery — cms_npd.oig_leie + cms_npd.sam_exclusions, read through
+      the exclusion index (claims_sources/_exclusions.py)
 
 Writes:
     frontend/public/api/v1/findings/dmepos-excluded.json
@@ -31,12 +32,11 @@ import subprocess
 from collections import Counter
 from datetime import datetime, timezone
 
-from google.cloud import bigquery
+from analysis.claims_sources import _csv_scan as csv_scan
+from analysis.claims_sources import _exclusions as exclusions
 
 METHODOLOGY_VERSION = "0.6.0-draft"
 DATA_SOURCE_RELEASE = "DY 2023 (RY2025 P05)"
-PROJECT = "thematic-fort-453901-t7"
-DATASET = "cms_npd"
 
 REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent.parent
 SOURCE_CSV = REPO_ROOT / "frontend" / "data" / "cms-claims" / "dmepos-by-supplier.csv"
@@ -57,73 +57,67 @@ def get_commit_sha() -> str:
     return "pending"
 
 
-def load_exclusion_npis(client: bigquery.Client) -> dict[str, dict]:
-    """Return dict NPI -> {sources, leie_date, sam_date}."""
-    sql = f"""
-    SELECT
-      NPI,
-      MIN(EXCLDATE) AS leie_exclusion_date,
-      'leie' AS source
-    FROM `{PROJECT}.{DATASET}.oig_leie`
-    WHERE NPI IS NOT NULL AND NPI != '0000000000' AND IFNULL(REINDATE, '00000000') = '00000000'
-    GROUP BY NPI
-    UNION ALL
-    SELECT
-      NPI,
-      NULL AS leie_exclusion_date,
-      'sam' AS source
-    FROM `{PROJECT}.{DATASET}.sam_exclusions`
-    WHERE NPI IS NOT NULL AND REGEXP_CONTAINS(NPI, r'^\\d{{10}}$')
-    """
+def load_exclusion_npis(index: exclusions.ExclusionIndex) -> dict[str, dict]:
+    """Return dict NPI -> {sources, leie_date}."""
     out: dict[str, dict] = {}
-    for row in client.query(sql).result():
-        npi = row.NPI
-        slot = out.setdefault(npi, {"sources": set(), "leie_date": None})
-        slot["sources"].add(row.source)
-        if row.source == "leie" and row.leie_exclusion_date:
-            slot["leie_date"] = row.leie_exclusion_date
+    for source in exclusions.SOURCES:
+        for npi, date in index.earliest(source).items():
+            slot = out.setdefault(npi, {"sources": set(), "leie_date": None})
+            slot["sources"].add(source.lower())
+            if source == "LEIE" and date:
+                slot["leie_date"] = date
     return out
 
 
+class ExcludedSuppliers(csv_scan.Consumer):
+    """DMEPOS supplier rows whose NPI is on LEIE or SAM."""
+    column = "Suplr_NPI"
+
+    def __init__(self, excl: dict[str, dict]):
+        self.excl = excl
+        self.matches: list[dict] = []
+
+    def accept(self, npi: str) -> bool:
+        return npi in self.excl
+
+    def add(self, npi: str, row: dict) -> None:
+        slot = self.excl[npi]
+        name = " ".join(
+            filter(None, [
+                row.get("Suplr_Prvdr_Last_Name_Org", ""),
+                row.get("Suplr_Prvdr_First_Name", ""),
+            ])
+        ).strip(", ")
+        self.matches.append({
+            "npi": npi,
+            "name": name,
+            "supplier_state": row.get("Suplr_Prvdr_State_Abrvtn", ""),
+            "city": row.get("Suplr_Prvdr_City", ""),
+            "specialty": row.get("Suplr_Prvdr_Spclty_Desc", ""),
+            "medicare_paid_2023": row["Suplr_Mdcr_Pymt_Amt"] or 0.0,
+            "claims_2023": row["Tot_Suplr_Clms"] or 0,
+            "services_2023": row["Tot_Suplr_Srvcs"] or 0,
+            "beneficiaries_2023": row["Tot_Suplr_Benes"] or 0,
+            "exclusion_source": "+".join(sorted(slot["sources"])),
+            "leie_exclusion_date": slot.get("leie_date") or "",
+            "leie_lookup_url": "https://exclusions.oig.hhs.gov/",
+            "sam_lookup_url": "https://sam.gov/search/?index=ex",
+            "nppes_lookup_url": f"https://npiregistry.cms.hhs.gov/provider-view/{npi}",
+        })
+
+    def result(self) -> list[dict]:
+        return self.matches
+
+
 def main() -> None:
-    print("Loading LEIE + SAM exclusion NPIs from BigQuery...")
-    client = bigquery.Client(project=PROJECT)
-    excl = load_exclusion_npis(client)
+    print("Loading LEIE + SAM exclusion NPIs from the exclusion index...")
+    excl = load_exclusion_npis(exclusions.load())
     print(f"Excluded NPIs (LEIE ∪ SAM, NPI-keyed): {len(excl)}")
 
     print(f"Scanning {SOURCE_CSV.name}...")
-    matches: list[dict] = []
-    total_suppliers = 0
-    with open(SOURCE_CSV, newline="") as fh:
-        reader = csv.DictReader(fh)
-        for row in reader:
-            total_suppliers += 1
-            npi = (row.get("Suplr_NPI") or "").strip()
-            if npi not in excl:
-                continue
-            slot = excl[npi]
-            name = " ".join(
-                filter(None, [
-                    row.get("Suplr_Prvdr_Last_Name_Org", ""),
-                    row.get("Suplr_Prvdr_First_Name", ""),
-                ])
-            ).strip(", ")
-            matches.append({
-                "npi": npi,
-                "name": name,
-                "supplier_state": row.get("Suplr_Prvdr_State_Abrvtn", ""),
-                "city": row.get("Suplr_Prvdr_City", ""),
-                "specialty": row.get("Suplr_Prvdr_Spclty_Desc", ""),
-                "medicare_paid_2023": float(row.get("Suplr_Mdcr_Pymt_Amt") or 0),
-                "claims_2023": int(float(row.get("Tot_Suplr_Clms") or 0)),
-                "services_2023": int(float(row.get("Tot_Suplr_Srvcs") or 0)),
-                "beneficiaries_2023": int(float(row.get("Tot_Suplr_Benes") or 0)),
-                "exclusion_source": "+".join(sorted(slot["sources"])),
-                "leie_exclusion_date": slot.get("leie_date") or "",
-                "leie_lookup_url": "https://exclusions.oig.hhs.gov/",
-                "sam_lookup_url": "https://sam.gov/search/?index=ex",
-                "nppes_lookup_url": f"https://npiregistry.cms.hhs.gov/provider-view/{npi}",
-            })
+    (matches,), stats = csv_scan.scan(SOURCE_CSV, [ExcludedSuppliers(excl)])
+    total_suppliers = stats.rows
+    print(stats.summary())
 
     matches.sort(key=lambda r: r["medicare_paid_2023"], reverse=True)
     print(f"DMEPOS suppliers in directory: {total_suppliers:,}")
@@ -40,7 +40,10 @@ Run order:
     1. analysis/ingest_oig_leie.py
     2. analysis/ingest_sam_exclusions.py
     3. (download HHS parquet — see PARQUET_URL below)
-    4. python analysis/claims_sources/medicaid_provider_spending.py --state va
+    4. python -m analysis.claims_sources.prepare_medicaid_parquet
+       (optional; a sorted copy plus NPI index, so cohort lookups read
+       only the row groups holding the cohort)
+    5. python analysis/claims_sources/medicaid_provider_spending.py --state va
 
 Schema invariants (locked in 2026-05-14, see cross-audit roadmap §10):
     - Per-NPI publication = paid amount with directory-side context.
@@ -65,10 +68,13 @@ import subprocess
 from collections import defaultdict
 from datetime import datetime, timezone
 
+import numpy as np
 import pyarrow as pa
 import pyarrow.parquet as pq
 import pyarrow.compute as pc
 
+from analysis.claims_sources import _medicaid_scan as medicaid_scan
+
 METHODOLOGY_VERSION = "0.6.1-draft"
 DATA_SOURCE_RELEASE = "2026-02-09"
 
@@ -110,8 +116,162 @@ def load_cohort(csv_path: pathlib.Path) -> list[dict]:
         return list(csv.DictReader(fh))
 
 
+COLUMNS = [
+    "BILLING_PROVIDER_NPI_NUM",
+    "SERVICING_PROVIDER_NPI_NUM",
+    "HCPCS_CODE",
+    "CLAIM_FROM_MONTH",
+    "TOTAL_PATIENTS",
+    "TOTAL_CLAIM_LINES",
+    "TOTAL_PAID",
+]
+AXES = [("BILLING_PROVIDER_NPI_NUM", "billing"), ("SERVICING_PROVIDER_NPI_NUM", "servicing")]
+
+
+def _empty_slot() -> dict:
+    return {
+        "paid": 0.0,
+        "claims": 0,
+        "patients": 0,
+        "post_exclusion_paid": 0.0,
+        "post_exclusion_claims": 0,
+        "post_exclusion_first_month": None,
+        "post_exclusion_last_month": None,
+        "axes": set(),
+        "first_month": None,
+        "last_month": None,
+        "hcpcs": defaultdict(float),  # code -> paid
+    }
+
+
+def match_rows(batch: pa.RecordBatch, npi_set: pa.Array) -> pa.Table | None:
+    """One row per (source row, axis) whose NPI is in `npi_set`, in file order.
+
+    A row whose billing and servicing NPI are both in the cohort appears
+    twice, once per axis, and its billing match comes first. Nulls are
+    filled the way the aggregation reads them: no HCPCS or month is "",
+    no count or amount is 0.
+    """
+    parts = []
+    for rank, (col, _) in enumerate(AXES):
+        mask = pc.is_in(batch.column(col), value_set=npi_set)
+        idx = pc.indices_nonzero(mask)
+        if not len(idx):
+            continue
+        sub = batch.take(idx)
+        parts.append(pa.table({
+            "npi": sub.column(col),
+            "axis": pa.array([rank] * len(idx), type=pa.int8()),
+            "hcpcs": pc.fill_null(sub.column("HCPCS_CODE"), ""),
+            "month": pc.fill_null(sub.column("CLAIM_FROM_MONTH"), ""),
+            "patients": pc.fill_null(sub.column("TOTAL_PATIENTS").cast(pa.int64()), 0),
+            "claims": pc.fill_null(sub.column("TOTAL_CLAIM_LINES").cast(pa.int64()), 0),
+            "paid": pc.fill_null(sub.column("TOTAL_PAID").cast(pa.float64()), 0.0),
+            "order": pc.add(pc.multiply(idx.cast(pa.int64()), 2), rank),
+        }))
+    if not parts:
+        return None
+    table = pa.concat_tables(parts)
+    # Interleave the two axes back into row order: first-seen order decides
+    # the order of NPIs and of each NPI's HCPCS codes, which break ties later.
+    return table.take(pc.sort_indices(table, [("order", "ascending")])).drop_columns("order")
+
+
+# How each column of a running aggregate combines; see _fold.
+_FOLD = {"paid": "sum", "claims": "sum", "patients": "sum",
+         "first": "min", "last": "max", "seq": "min"}
+
+
+def _fold(state: pa.Table | None, part: pa.Table, keys: list[str]) -> pa.Table:
+    """`part` folded into the running aggregate `state`, one row per key.
+
+    The state's rows go first and group_by runs single-threaded, so each
+    sum carries on from the state's value through `part`'s rows in order:
+    exactly the additions a row-by-row loop would have made.
+    """
+    if state is not None:
+        part = pa.concat_tables([state, part.select(state.column_names)])
+    cols = [c for c in part.column_names if c not in keys]
+    out = part.group_by(keys, use_threads=False).aggregate([(c, _FOLD[c]) for c in cols])
+    return pa.table({**{k: out.column(k) for k in keys},
+                     **{c: out.column(f"{c}_{_FOLD[c]}") for c in cols}})
+
+
+class MatchAggregate:
+    """The per-NPI aggregates of filter_parquet_for_npis, built from
+    match_rows output one batch at a time, in file order.
+
+    Each add() folds a batch into four running tables (per NPI, per NPI and
+    axis, per NPI and HCPCS, per NPI after its cutoff), so only one batch
+    of matches is held at a time. The doubles come out exactly as a
+    row-by-row Python loop would have added them (see _fold). `seq` is a
+    group's first match, counted across batches, and result() puts groups
+    back in that order, which group_by does not promise and which later
+    tie-breaks depend on.
+    """
+
+    def __init__(self, cutoff_by_npi: dict[str, str] | None = None):
+        # Strict post-exclusion: claim months after the NPI's cutoff month.
+        self.cutoffs = {npi: c[:7] for npi, c in (cutoff_by_npi or {}).items() if c}
+        self.rows = 0
+        self.totals: pa.Table | None = None
+        self.axes: pa.Table | None = None
+        self.hcpcs: pa.Table | None = None
+        self.post: pa.Table | None = None
+
+    def add(self, matches: pa.Table) -> None:
+        if matches.num_rows == 0:
+            return
+        npi, month, paid, claims = (matches.column(c) for c in ("npi", "month", "paid", "claims"))
+        seq = pa.array(np.arange(self.rows, self.rows + matches.num_rows))
+        self.rows += matches.num_rows
+        self.totals = _fold(self.totals, pa.table({
+            "npi": npi, "paid": paid, "claims": claims, "patients": matches.column("patients"),
+            "first": month, "last": month, "seq": seq}), ["npi"])
+        self.axes = _fold(self.axes, pa.table({
+            "npi": npi, "axis": matches.column("axis"), "seq": seq}), ["npi", "axis"])
+        self.hcpcs = _fold(self.hcpcs, pa.table({
+            "npi": npi, "hcpcs": matches.column("hcpcs"), "paid": paid, "seq": seq}),
+            ["npi", "hcpcs"])
+        if self.cutoffs:
+            pos = pc.index_in(npi, value_set=pa.array(list(self.cutoffs), pa.string()))
+            cutoff = pc.take(pa.array(list(self.cutoffs.values()), pa.string()), pos)
+            post = pa.table({"npi": npi, "paid": paid, "claims": claims,
+                             "first": month, "last": month, "seq": seq}).filter(
+                pc.and_(pc.not_equal(month, ""), pc.greater(month, cutoff)))
+            if post.num_rows:
+                self.post = _fold(self.post, post, ["npi"])
+
+    def result(self) -> dict[str, dict]:
+        per_npi: dict[str, dict] = {}
+        if self.totals is None:
+            return per_npi
+
+        def columns(table, *names):
+            return zip(*(table.sort_by("seq").column(c).to_pylist() for c in names))
+
+        for npi, paid, claims, patients, first, last in columns(
+                self.totals, "npi", "paid", "claims", "patients", "first", "last"):
+            slot = per_npi[npi] = _empty_slot()
+            slot.update(paid=paid, claims=claims, patients=patients,
+                        first_month=first, last_month=last)
+        for npi, rank in columns(self.axes, "npi", "axis"):
+            per_npi[npi]["axes"].add(AXES[rank][1])
+        # (npi, code) is unique here, so each entry is set once.
+        for npi, code, paid in columns(self.hcpcs, "npi", "hcpcs", "paid"):
+            per_npi[npi]["hcpcs"][code] = paid
+        if self.post is not None:
+            for npi, paid, claims, first, last in columns(
+                    self.post, "npi", "paid", "claims", "first", "last"):
+                per_npi[npi].update(
+                    post_exclusion_paid=paid, post_exclusion_claims=claims,
+                    post_exclusion_first_month=first, post_exclusion_last_month=last)
+        return per_npi
+
+
 def filter_parquet_for_npis(
     npis: set[str], cutoff_by_npi: dict[str, str] | None = None,
+    workers: int | None = None,
 ) -> dict[str, dict]:
     """Single pass over the parquet, filtering on (billing|servicing) ∈ npis.
 
@@ -122,7 +282,13 @@ def filter_parquet_for_npis(
     `cutoff_by_npi` maps NPI → 'YYYY-MM' (or empty/None). When provided, we
     additionally accumulate `post_exclusion_paid` and `post_exclusion_claims`
     for claim months strictly after the NPI's cutoff. The top-level totals
-    (`paid`, `claims`) still cover the full window.
+    (`paid`, `claims`) still cover the full window. `workers` bounds the
+    scan's thread pool (default: one per CPU).
+
+    No row reaches Python: the shared row-group scan (_medicaid_scan) reduces
+    each batch to its cohort matches with Arrow kernels on a thread pool, and
+    each batch's matches are folded into running group_by aggregates as they
+    arrive (MatchAggregate), so the matches are never all held at once.
     """
     if not PARQUET_PATH.exists():
         raise SystemExit(
@@ -133,83 +299,12 @@ def filter_parquet_for_npis(
     pf = pq.ParquetFile(PARQUET_PATH)
     print(f"Scanning {PARQUET_PATH.name} — {pf.metadata.num_rows:,} rows · {pf.num_row_groups} row groups")
 
-    cutoff_by_npi = cutoff_by_npi or {}
-
-    per_npi: dict[str, dict] = defaultdict(lambda: {
-        "paid": 0.0,
-        "claims": 0,
-        "patients": 0,
-        "post_exclusion_paid": 0.0,
-        "post_exclusion_claims": 0,
-        "post_exclusion_first_month": None,
-        "post_exclusion_last_month": None,
-        "axes": set(),
-        "first_month": None,
-        "last_month": None,
-        "hcpcs": defaultdict(float),  # code -> paid
-    })
-
-    npi_set = pa.array(list(npis), type=pa.string())
-    cols = [
-        "BILLING_PROVIDER_NPI_NUM",
-        "SERVICING_PROVIDER_NPI_NUM",
-        "HCPCS_CODE",
-        "CLAIM_FROM_MONTH",
-        "TOTAL_PATIENTS",
-        "TOTAL_CLAIM_LINES",
-        "TOTAL_PAID",
-    ]
-
-    for i, batch in enumerate(pf.iter_batches(batch_size=200_000, columns=cols)):
-        # Filter rows where billing OR servicing NPI is in the cohort.
-        billing = batch.column("BILLING_PROVIDER_NPI_NUM")
-        servicing = batch.column("SERVICING_PROVIDER_NPI_NUM")
-        mask_b = pc.is_in(billing, value_set=npi_set)
-        mask_s = pc.is_in(servicing, value_set=npi_set)
-        mask = pc.or_(mask_b, mask_s)
-        if not pc.any(mask).as_py():
-            continue
-
-        sub = batch.filter(mask).to_pylist()
-        for row in sub:
-            billing_npi = row["BILLING_PROVIDER_NPI_NUM"]
-            servicing_npi = row["SERVICING_PROVIDER_NPI_NUM"]
-            paid = float(row["TOTAL_PAID"] or 0)
-            claims = int(row["TOTAL_CLAIM_LINES"] or 0)
-            patients = int(row["TOTAL_PATIENTS"] or 0)
-            hcpcs = row["HCPCS_CODE"] or ""
-            month = row["CLAIM_FROM_MONTH"] or ""
-
-            for npi, axis in [(billing_npi, "billing"), (servicing_npi, "servicing")]:
-                if not npi or npi not in npis:
-                    continue
-                slot = per_npi[npi]
-                slot["paid"] += paid
-                slot["claims"] += claims
-                slot["patients"] += patients
-                slot["axes"].add(axis)
-                slot["hcpcs"][hcpcs] += paid
-                if slot["first_month"] is None or month < slot["first_month"]:
-                    slot["first_month"] = month
-                if slot["last_month"] is None or month > slot["last_month"]:
-                    slot["last_month"] = month
-                # Strict post-exclusion accumulator
-                cutoff = cutoff_by_npi.get(npi, "")
-                if cutoff and month and month > cutoff[:7]:
-                    slot["post_exclusion_paid"] += paid
-                    slot["post_exclusion_claims"] += claims
-                    if (slot["post_exclusion_first_month"] is None
-                            or month < slot["post_exclusion_first_month"]):
-                        slot["post_exclusion_first_month"] = month
-                    if (slot["post_exclusion_last_month"] is None
-                            or month > slot["post_exclusion_last_month"]):
-                        slot["post_exclusion_last_month"] = month
-
-        if (i + 1) % 50 == 0:
-            print(f"  scanned {(i + 1) * 200_000:>12,} rows · {len(per_npi)} NPIs matched so far")
-
-    print(f"Done. {len(per_npi)} matching NPIs.")
-    return dict(per_npi)
+    aggregate = MatchAggregate(cutoff_by_npi)
+    _, stats = medicaid_scan.scan(PARQUET_PATH, npis, COLUMNS, match=match_rows,
+                                  workers=workers, fold=aggregate.add)
+    per_npi = aggregate.result()
+    print(f"Done. {len(per_npi)} matching NPIs. {stats.summary()}")
+    return per_npi
 
 
 def cutoff_for_cohort_row(row: dict) -> str:
@@ -12,7 +12,9 @@ bill Medicare AND the federal exclusion list says they shouldn't be.
 Streams the source file ONCE per refresh; partitions matches across
 all states in memory and writes a per-state CSV plus an aggregated
 national finding payload. Doing one-pass-per-state would re-read the
-470 MB CSV 51 times for no incremental information.
+470 MB CSV 51 times for no incremental information. The match is an
+ExcludedBilling consumer (_csv_scan.py), so refresh_partb.py can share
+that one read with H36 and H31.
 
 Source file (already on disk):
     frontend/data/cms-claims/partb-by-provider.csv (~470 MB, CY 2023)
@@ -29,6 +31,7 @@ import subprocess
 from collections import defaultdict
 from datetime import datetime, timezone
 
+from analysis.claims_sources import _csv_scan as csv_scan
 from analysis.claims_sources._cohorts import (
     cutoff_year,
     load_all_state_cohorts,
@@ -67,46 +70,59 @@ def get_commit_sha() -> str:
     return "pending"
 
 
+class ExcludedBilling(csv_scan.Consumer):
+    """Part B rows for cohort NPIs, partitioned by cohort state."""
+
+    def __init__(self, cohorts: dict[str, dict[str, dict]]):
+        self.cohorts = cohorts
+        self.npi_to_state = npi_to_state_map(cohorts)
+        self.per_state: dict[str, list[dict]] = defaultdict(list)
+
+    def accept(self, npi: str) -> bool:
+        return npi in self.npi_to_state
+
+    def add(self, npi: str, row: dict) -> None:
+        state = self.npi_to_state[npi]
+        cohort_row = self.cohorts[state].get(npi, {})
+        paid = row["Tot_Mdcr_Pymt_Amt"] or 0.0
+        allowed = row["Tot_Mdcr_Alowd_Amt"] or 0.0
+        services = int(row["Tot_Srvcs"]) if row["Tot_Srvcs"] is not None else None
+        benes = row["Tot_Benes"]
+        cy = cutoff_year(cohort_row)
+        post_excl = cy is not None and cy < 2023
+        self.per_state[state].append({
+            "npi": npi,
+            "name": cohort_row.get("name", ""),
+            "state": state,
+            "billing_state": row.get("Rndrng_Prvdr_State_Abrvtn", ""),
+            "medicare_paid_2023": round(paid, 2),
+            "medicare_allowed_2023": round(allowed, 2),
+            "services_2023": services if services is not None else "",
+            "beneficiaries_2023": benes if benes is not None else "",
+            "provider_type": row.get("Rndrng_Prvdr_Type", ""),
+            "exclusion_source": cohort_row.get("reasons", ""),
+            "exclusion_effective_year": cy if cy is not None else "",
+            "post_exclusion_2023_billing": "yes" if post_excl else "no",
+            "score": cohort_row.get("score", ""),
+            **lookup_urls(npi),
+        })
+
+    def result(self) -> dict[str, list[dict]]:
+        return self.per_state
+
+
 def main() -> None:
     cohorts = load_all_state_cohorts()
-    npi_to_state = npi_to_state_map(cohorts)
-    total_npis = len(npi_to_state)
-    print(f"Loaded {len(cohorts)} state cohorts, {total_npis:,} unique NPIs total")
-
-    per_state_matches: dict[str, list[dict]] = defaultdict(list)
-    seen_npis: set[str] = set()
-
-    with open(SOURCE_CSV, newline="") as fh:
-        reader = csv.DictReader(fh)
-        for row in reader:
-            npi = (row.get("Rndrng_NPI") or "").strip()
-            if not npi or npi not in npi_to_state:
-                continue
-            state = npi_to_state[npi]
-            cohort_row = cohorts[state].get(npi, {})
-            seen_npis.add(npi)
-            paid = float(row.get("Tot_Mdcr_Pymt_Amt") or 0)
-            allowed = float(row.get("Tot_Mdcr_Alowd_Amt") or 0)
-            services = int(float(row.get("Tot_Srvcs") or 0)) if row.get("Tot_Srvcs") else None
-            benes = int(float(row.get("Tot_Benes") or 0)) if row.get("Tot_Benes") else None
-            cy = cutoff_year(cohort_row)
-            post_excl = cy is not None and cy < 2023
-            per_state_matches[state].append({
-                "npi": npi,
-                "name": cohort_row.get("name", ""),
-                "state": state,
-                "billing_state": row.get("Rndrng_Prvdr_State_Abrvtn", ""),
-                "medicare_paid_2023": round(paid, 2),
-                "medicare_allowed_2023": round(allowed, 2),
-                "services_2023": services if services is not None else "",
-                "beneficiaries_2023": benes if benes is not None else "",
-                "provider_type": row.get("Rndrng_Prvdr_Type", ""),
-                "exclusion_source": cohort_row.get("reasons", ""),
-                "exclusion_effective_year": cy if cy is not None else "",
-                "post_exclusion_2023_billing": "yes" if post_excl else "no",
-                "score": cohort_row.get("score", ""),
-                **lookup_urls(npi),
-            })
+    consumer = ExcludedBilling(cohorts)
+    print(f"Loaded {len(cohorts)} state cohorts, {len(consumer.npi_to_state):,} unique NPIs total")
+    (per_state_matches,), stats = csv_scan.scan(SOURCE_CSV, [consumer])
+    print(stats.summary())
+    publish(cohorts, per_state_matches)
+
+
+def publish(cohorts: dict[str, dict[str, dict]], per_state_matches: dict[str, list[dict]]) -> None:
+    """Write the per-state CSVs and the finding JSON from a scan's matches."""
+    total_npis = len(npi_to_state_map(cohorts))
 
     # Per-state writes
     states_with_matches = 0
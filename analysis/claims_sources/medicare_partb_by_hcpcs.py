@@ -8,7 +8,9 @@ NPI × HCPCS × place_of_service per service year).
 
 Streams the source file ONCE per refresh; partitions matches across all
 state cohorts in memory. Same I/O pattern as `medicare_partb.py` — the
-source is larger (~3 GB unzipped) but the streaming approach scales.
+source is larger (~3 GB unzipped) but the streaming approach scales. The
+match is an ExcludedHcpcsBilling consumer (_csv_scan.py), so
+refresh_partb.py can share the read with H41's affinity pass.
 
 The published file's Place_Of_Srvc column is aggregated to F (Facility)
 or O (Office/non-facility) at file build time — claim-level POS codes
@@ -33,6 +35,7 @@ import subprocess
 from collections import Counter, defaultdict
 from datetime import datetime, timezone
 
+from analysis.claims_sources import _csv_scan as csv_scan
 from analysis.claims_sources._cohorts import (
     cutoff_year,
     load_all_state_cohorts,
@@ -76,88 +79,86 @@ def get_commit_sha() -> str:
     return "pending"
 
 
-def _f(v) -> float:
-    try:
-        return float(v) if v not in (None, "") else 0.0
-    except (TypeError, ValueError):
-        return 0.0
+class ExcludedHcpcsBilling(csv_scan.Consumer):
+    """(NPI, HCPCS, POS) rows for cohort NPIs, partitioned by cohort state."""
 
+    def __init__(self, cohorts: dict[str, dict[str, dict]]):
+        self.cohorts = cohorts
+        self.npi_to_state = npi_to_state_map(cohorts)
+        self.per_state_rows: dict[str, list[dict]] = defaultdict(list)
+        self.matched_npis: set[str] = set()
+        self.matched_post_excl_npis: set[str] = set()
+        self.hcpcs_counter: Counter[tuple[str, str]] = Counter()  # (hcpcs_code, description)
+        self.hcpcs_counter_post: Counter[tuple[str, str]] = Counter()
 
-def _i(v) -> int | str:
-    try:
-        return int(float(v)) if v not in (None, "") else ""
-    except (TypeError, ValueError):
-        return ""
+    def accept(self, npi: str) -> bool:
+        return npi in self.npi_to_state
 
+    def add(self, npi: str, row: dict) -> None:
+        state = self.npi_to_state[npi]
+        cohort_row = self.cohorts[state].get(npi, {})
+        hcpcs = (row.get("HCPCS_Cd") or "").strip()
+        hcpcs_desc = (row.get("HCPCS_Desc") or "").strip()
+        pos = (row.get("Place_Of_Srvc") or "").strip()
+        services = int(row["Tot_Srvcs"]) if row["Tot_Srvcs"] is not None else ""
+        benes = row["Tot_Benes"] if row["Tot_Benes"] is not None else ""
+        avg_paid = row["Avg_Mdcr_Pymt_Amt"] or 0.0
+        avg_allowed = row["Avg_Mdcr_Alowd_Amt"] or 0.0
+        avg_sbmtd = row["Avg_Sbmtd_Chrg"] or 0.0
+        services_n = services if isinstance(services, int) else 0
+        est_paid = round(avg_paid * services_n, 2)
+        cy = cutoff_year(cohort_row)
+        post_excl = cy is not None and cy < SERVICE_YEAR
 
-def main() -> None:
-    cohorts = load_all_state_cohorts()
-    npi_to_state = npi_to_state_map(cohorts)
-    total_npis = len(npi_to_state)
-    print(f"Loaded {len(cohorts)} state cohorts, {total_npis:,} unique NPIs total")
-    print(f"Streaming {SOURCE_CSV} (one pass)...")
+        self.matched_npis.add(npi)
+        if post_excl:
+            self.matched_post_excl_npis.add(npi)
+            self.hcpcs_counter_post[(hcpcs, hcpcs_desc)] += 1
+        self.hcpcs_counter[(hcpcs, hcpcs_desc)] += 1
 
-    per_state_rows: dict[str, list[dict]] = defaultdict(list)
-    matched_npis: set[str] = set()
-    matched_post_excl_npis: set[str] = set()
-    hcpcs_counter: Counter[tuple[str, str]] = Counter()  # (hcpcs_code, description)
-    hcpcs_counter_post: Counter[tuple[str, str]] = Counter()
-    rows_scanned = 0
+        self.per_state_rows[state].append({
+            "npi": npi,
+            "name": cohort_row.get("name", ""),
+            "state": state,
+            "billing_state": row.get("Rndrng_Prvdr_State_Abrvtn", ""),
+            "hcpcs_code": hcpcs,
+            "hcpcs_description": hcpcs_desc,
+            "hcpcs_drug_ind": row.get("HCPCS_Drug_Ind", ""),
+            "place_of_service": pos,
+            "services_2023": services,
+            "beneficiaries_2023": benes,
+            "avg_paid_per_service": round(avg_paid, 2),
+            "avg_allowed_per_service": round(avg_allowed, 2),
+            "avg_submitted_charge": round(avg_sbmtd, 2),
+            "estimated_paid_total": est_paid,
+            "provider_type": row.get("Rndrng_Prvdr_Type", ""),
+            "exclusion_source": cohort_row.get("reasons", ""),
+            "exclusion_effective_year": cy if cy is not None else "",
+            "post_exclusion_2023_billing": "yes" if post_excl else "no",
+            "score": cohort_row.get("score", ""),
+            **lookup_urls(npi),
+        })
 
-    with open(SOURCE_CSV, newline="") as fh:
-        reader = csv.DictReader(fh)
-        for row in reader:
-            rows_scanned += 1
-            if rows_scanned % 1_000_000 == 0:
-                print(f"  scanned {rows_scanned:,} rows, matched {len(matched_npis):,} NPIs so far")
-            npi = (row.get("Rndrng_NPI") or "").strip()
-            if not npi or npi not in npi_to_state:
-                continue
-            state = npi_to_state[npi]
-            cohort_row = cohorts[state].get(npi, {})
-            hcpcs = (row.get("HCPCS_Cd") or "").strip()
-            hcpcs_desc = (row.get("HCPCS_Desc") or "").strip()
-            pos = (row.get("Place_Of_Srvc") or "").strip()
-            services = _i(row.get("Tot_Srvcs"))
-            benes = _i(row.get("Tot_Benes"))
-            avg_paid = _f(row.get("Avg_Mdcr_Pymt_Amt"))
-            avg_allowed = _f(row.get("Avg_Mdcr_Alowd_Amt"))
-            avg_sbmtd = _f(row.get("Avg_Sbmtd_Chrg"))
-            services_n = int(services) if isinstance(services, int) else 0
-            est_paid = round(avg_paid * services_n, 2)
-            cy = cutoff_year(cohort_row)
-            post_excl = cy is not None and cy < SERVICE_YEAR
 
-            matched_npis.add(npi)
-            if post_excl:
-                matched_post_excl_npis.add(npi)
-                hcpcs_counter_post[(hcpcs, hcpcs_desc)] += 1
-            hcpcs_counter[(hcpcs, hcpcs_desc)] += 1
+def main() -> None:
+    cohorts = load_all_state_cohorts()
+    found = ExcludedHcpcsBilling(cohorts)
+    print(f"Loaded {len(cohorts)} state cohorts, {len(found.npi_to_state):,} unique NPIs total")
+    print(f"Streaming {SOURCE_CSV} (one pass)...")
+    _, stats = csv_scan.scan(SOURCE_CSV, [found])
+    print(stats.summary())
+    publish(found)
 
-            per_state_rows[state].append({
-                "npi": npi,
-                "name": cohort_row.get("name", ""),
-                "state": state,
-                "billing_state": row.get("Rndrng_Prvdr_State_Abrvtn", ""),
-                "hcpcs_code": hcpcs,
-                "hcpcs_description": hcpcs_desc,
-                "hcpcs_drug_ind": row.get("HCPCS_Drug_Ind", ""),
-                "place_of_service": pos,
-                "services_2023": services,
-                "beneficiaries_2023": benes,
-                "avg_paid_per_service": round(avg_paid, 2),
-                "avg_allowed_per_service": round(avg_allowed, 2),
-                "avg_submitted_charge": round(avg_sbmtd, 2),
-                "estimated_paid_total": est_paid,
-                "provider_type": row.get("Rndrng_Prvdr_Type", ""),
-                "exclusion_source": cohort_row.get("reasons", ""),
-                "exclusion_effective_year": cy if cy is not None else "",
-                "post_exclusion_2023_billing": "yes" if post_excl else "no",
-                "score": cohort_row.get("score", ""),
-                **lookup_urls(npi),
-            })
 
-    print(f"\nFinished scan: {rows_scanned:,} rows total.")
+def publish(found: ExcludedHcpcsBilling) -> None:
+    """Write the per-state CSVs and the finding JSON from a scan."""
+    cohorts = found.cohorts
+    total_npis = len(found.npi_to_state)
+    per_state_rows = found.per_state_rows
+    matched_npis = found.matched_npis
+    matched_post_excl_npis = found.matched_post_excl_npis
+    hcpcs_counter = found.hcpcs_counter
+    hcpcs_counter_post = found.hcpcs_counter_post
 
     states_with_matches = 0
     for state, rows in per_state_rows.items():
@@ -27,6 +27,7 @@ import subprocess
 from collections import defaultdict
 from datetime import datetime, timezone
 
+from analysis.claims_sources import _csv_scan as csv_scan
 from analysis.claims_sources._cohorts import (
     cutoff_year,
     load_all_state_cohorts,
@@ -65,44 +66,57 @@ def get_commit_sha() -> str:
     return "pending"
 
 
+class ExcludedPrescribing(csv_scan.Consumer):
+    """Part D rows for cohort NPIs, partitioned by cohort state."""
+    column = "PRSCRBR_NPI"
+
+    def __init__(self, cohorts: dict[str, dict[str, dict]]):
+        self.cohorts = cohorts
+        self.npi_to_state = npi_to_state_map(cohorts)
+        self.per_state: dict[str, list[dict]] = defaultdict(list)
+
+    def accept(self, npi: str) -> bool:
+        return npi in self.npi_to_state
+
+    def add(self, npi: str, row: dict) -> None:
+        state = self.npi_to_state[npi]
+        cohort_row = self.cohorts[state].get(npi, {})
+        drug_cost = row["Tot_Drug_Cst"] or 0.0
+        claims = row["Tot_Clms"]
+        benes = row["Tot_Benes"]
+        opioid_claims = row["Opioid_Tot_Clms"]
+        opioid_cost = row["Opioid_Tot_Drug_Cst"] or 0.0
+        cy = cutoff_year(cohort_row)
+        post_excl = cy is not None and cy < 2023
+        self.per_state[state].append({
+            "npi": npi,
+            "name": cohort_row.get("name", ""),
+            "state": state,
+            "prescribing_state": row.get("Prscrbr_State_Abrvtn", ""),
+            "drug_cost_2023": round(drug_cost, 2),
+            "claims_2023": claims if claims is not None else "",
+            "beneficiaries_2023": benes if benes is not None else "",
+            "opioid_claims_2023": opioid_claims if opioid_claims is not None else "",
+            "opioid_cost_2023": round(opioid_cost, 2) if opioid_cost else "",
+            "exclusion_source": cohort_row.get("reasons", ""),
+            "exclusion_effective_year": cy if cy is not None else "",
+            "post_exclusion_2023_prescribing": "yes" if post_excl else "no",
+            "score": cohort_row.get("score", ""),
+            **lookup_urls(npi),
+        })
+
+    def result(self) -> dict[str, list[dict]]:
+        return self.per_state
+
+
 def main() -> None:
     cohorts = load_all_state_cohorts()
-    npi_to_state = npi_to_state_map(cohorts)
-    total_npis = len(npi_to_state)
+    consumer = ExcludedPrescribing(cohorts)
+    total_npis = len(consumer.npi_to_state)
     print(f"Loaded {len(cohorts)} state cohorts, {total_npis:,} unique NPIs total")
 
-    per_state_matches: dict[str, list[dict]] = defaultdict(list)
-
-    with open(SOURCE_CSV, newline="") as fh:
-        for row in csv.DictReader(fh):
-            npi = (row.get("PRSCRBR_NPI") or "").strip()
-            if not npi or npi not in npi_to_state:
-                continue
-            state = npi_to_state[npi]
-            cohort_row = cohorts[state].get(npi, {})
-            drug_cost = float(row.get("Tot_Drug_Cst") or 0)
-            claims = int(float(row.get("Tot_Clms") or 0)) if row.get("Tot_Clms") else None
-            benes = int(float(row.get("Tot_Benes") or 0)) if row.get("Tot_Benes") else None
-            opioid_claims = int(float(row.get("Opioid_Tot_Clms") or 0)) if row.get("Opioid_Tot_Clms") else None
-            opioid_cost = float(row.get("Opioid_Tot_Drug_Cst") or 0)
-            cy = cutoff_year(cohort_row)
-            post_excl = cy is not None and cy < 2023
-            per_state_matches[state].append({
-                "npi": npi,
-                "name": cohort_row.get("name", ""),
-                "state": state,
-                "prescribing_state": row.get("Prscrbr_State_Abrvtn", ""),
-                "drug_cost_2023": round(drug_cost, 2),
-                "claims_2023": claims if claims is not None else "",
-                "beneficiaries_2023": benes if benes is not None else "",
-                "opioid_claims_2023": opioid_claims if opioid_claims is not None else "",
-                "opioid_cost_2023": round(opioid_cost, 2) if opioid_cost else "",
-                "exclusion_source": cohort_row.get("reasons", ""),
-                "exclusion_effective_year": cy if cy is not None else "",
-                "post_exclusion_2023_prescribing": "yes" if post_excl else "no",
-                "score": cohort_row.get("score", ""),
-                **lookup_urls(npi),
-            })
+    (per_state_matches,), stats = csv_scan.scan(SOURCE_CSV, [consumer])
+    print(stats.summary())
 
     for state, rows in per_state_matches.items():
         rows.sort(key=lambda r: r["drug_cost_2023"], reverse=True)
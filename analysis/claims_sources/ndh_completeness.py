@@ -6,8 +6,12 @@ federal system, distinct from H10 (NPPES match rate) and worth
 surfacing.
 
 Method:
-    1. Load every NPI from the AINPI NDH practitioner table into a set.
-    2. Stream the Medicare Part B by-Provider file (CY 2023, ~1.25M NPIs).
+    1. Load every NPI from the AINPI NDH practitioner and organization
+       tables as an _npi_set.NpiSet, queried once per release and
+       memory-mapped from analysis/data/npi-sets/ after that.
+    2. Stream the Medicare Part B by-Provider file (CY 2023, ~1.25M NPIs)
+       through an AbsentFromNdh consumer (_csv_scan.py; refresh_partb.py
+       shares the read with H30a and H31).
     3. For each NPI absent from NDH, capture name, state, paid amount,
        services, provider type.
     4. Surface the "material" cohort = NPIs absent from NDH with paid
@@ -25,6 +29,7 @@ Writes:
     frontend/public/api/v1/states/va/h36-billers-absent-from-ndh.csv
 """
 from __future__ import annotations
+import argparse
 import csv
 import json
 import pathlib
@@ -32,19 +37,19 @@ import subprocess
 from collections import defaultdict
 from datetime import datetime, timezone
 
-from google.cloud import bigquery
-
 METHODOLOGY_VERSION = "0.6.0-draft"
 import sys as _sys, pathlib as _pathlib
 _sys.path.insert(0, str(_pathlib.Path(__file__).resolve().parent.parent))
 from release import CURRENT_RELEASE as _NDH_RELEASE  # noqa: E402
-from claims_sources._cohorts import bq_job_config  # noqa: E402
+import warehouse  # noqa: E402
+
+from analysis.claims_sources import _csv_scan as csv_scan  # noqa: E402
+from analysis.claims_sources import _npi_set as npi_set  # noqa: E402
 
 # The claims year is fixed by the source file; the NDH side is whatever the
 # warehouse currently holds, so it must not be a literal. This label read
 # "NDH 2026-05-08" while the tables held 2026-08-20.
 DATA_SOURCE_RELEASE = f"CY 2023 (RY2025 P05) Part B × NDH {_NDH_RELEASE}"
-PROJECT = "thematic-fort-453901-t7"
 MATERIAL_THRESHOLD = 10_000  # paid USD
 
 REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent.parent
@@ -66,59 +71,91 @@ def get_commit_sha() -> str:
     return "pending"
 
 
-def load_ndh_npis() -> set[str]:
-    """Load all NDH NPIs (practitioner ∪ organization) as a Python set.
+NDH_NPIS_SQL = """
+SELECT DISTINCT _npi FROM `thematic-fort-453901-t7.cms_npd.practitioner` WHERE _npi IS NOT NULL
+UNION DISTINCT
+SELECT DISTINCT _npi FROM `thematic-fort-453901-t7.cms_npd.organization` WHERE _npi IS NOT NULL
+"""
+
+
+def load_ndh_npis() -> npi_set.NpiSet:
+    """Load all NDH NPIs (practitioner ∪ organization) as an NpiSet.
 
     Part B billing NPIs can be either individuals (entity_type=1, NDH
     practitioner table) or organizations (entity_type=2, NDH organization
     table — big labs, IDTFs, group practices billing in aggregate). To
     measure "absent from NDH" honestly we need the union of both NDH
     NPI sets.
+
+    The set only changes with the release, so it is queried once per
+    release and memory-mapped afterwards; --no-cache queries it again.
     """
-    client = bigquery.Client(project=PROJECT)
-    print("Loading NDH practitioner + organization NPIs from BigQuery...")
-    sql = """
-    SELECT DISTINCT _npi FROM `thematic-fort-453901-t7.cms_npd.practitioner` WHERE _npi IS NOT NULL
-    UNION DISTINCT
-    SELECT DISTINCT _npi FROM `thematic-fort-453901-t7.cms_npd.organization` WHERE _npi IS NOT NULL
-    """
-    ndh = {row._npi for row in client.query(
-        sql, job_config=bq_job_config()).result()}
+    def fetch():
+        print("Loading NDH practitioner + organization NPIs from BigQuery...")
+        return warehouse.query_arrow(NDH_NPIS_SQL).column("_npi")
+
+    ndh = npi_set.cached("ndh", fetch, refresh=not warehouse.qcache.enabled())
     print(f"  loaded {len(ndh):,} NDH NPIs (practitioner ∪ organization)")
     return ndh
 
 
+class AbsentFromNdh(csv_scan.Consumer):
+    """Part B rows whose NPI is not in NDH.
+
+    The denominator is every row of the file, which is the scan's row count.
+    """
+
+    def __init__(self, ndh: npi_set.NpiSet):
+        self.ndh = ndh
+        self.absent: list[dict] = []
+        self.total_paid_absent = 0.0
+
+    def accept(self, npi: str) -> bool:
+        return npi not in self.ndh
+
+    def accept_keys(self, npis):
+        return ~self.ndh.isin(npis)
+
+    def add(self, npi: str, row: dict) -> None:
+        paid = row["Tot_Mdcr_Pymt_Amt"] or 0.0
+        services = int(row["Tot_Srvcs"] or 0)
+        self.absent.append({
+            "npi": npi,
+            "name": " ".join(filter(None, [
+                row.get("Rndrng_Prvdr_Last_Org_Name", ""),
+                row.get("Rndrng_Prvdr_First_Name", ""),
+            ])).strip(", "),
+            "billing_state": row.get("Rndrng_Prvdr_State_Abrvtn", ""),
+            "provider_type": row.get("Rndrng_Prvdr_Type", ""),
+            "entity_type": row.get("Rndrng_Prvdr_Ent_Cd", ""),  # I=individual, O=organization
+            "medicare_paid_2023": round(paid, 2),
+            "medicare_allowed_2023": round(row["Tot_Mdcr_Alowd_Amt"] or 0.0, 2),
+            "services_2023": services,
+            "beneficiaries_2023": row["Tot_Benes"] or 0,
+            "nppes_lookup_url": f"https://npiregistry.cms.hhs.gov/provider-view/{npi}",
+        })
+        self.total_paid_absent += paid
+
+
 def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--no-cache", action="store_true",
+                    help="re-query the NDH NPI set even if qcache.py holds it")
+    if ap.parse_args().no_cache:
+        warehouse.qcache.disable()
     ndh = load_ndh_npis()
 
     print(f"\nScanning {PARTB_CSV.name}...")
-    absent: list[dict] = []
-    total_partb = 0
-    total_paid_absent = 0.0
-    with open(PARTB_CSV, newline="") as fh:
-        for row in csv.DictReader(fh):
-            total_partb += 1
-            npi = (row.get("Rndrng_NPI") or "").strip()
-            if npi in ndh:
-                continue
-            paid = float(row.get("Tot_Mdcr_Pymt_Amt") or 0)
-            services = int(float(row.get("Tot_Srvcs") or 0)) if row.get("Tot_Srvcs") else 0
-            absent.append({
-                "npi": npi,
-                "name": " ".join(filter(None, [
-                    row.get("Rndrng_Prvdr_Last_Org_Name", ""),
-                    row.get("Rndrng_Prvdr_First_Name", ""),
-                ])).strip(", "),
-                "billing_state": row.get("Rndrng_Prvdr_State_Abrvtn", ""),
-                "provider_type": row.get("Rndrng_Prvdr_Type", ""),
-                "entity_type": row.get("Rndrng_Prvdr_Ent_Cd", ""),  # I=individual, O=organization
-                "medicare_paid_2023": round(paid, 2),
-                "medicare_allowed_2023": round(float(row.get("Tot_Mdcr_Alowd_Amt") or 0), 2),
-                "services_2023": services,
-                "beneficiaries_2023": int(float(row.get("Tot_Benes") or 0)) if row.get("Tot_Benes") else 0,
-                "nppes_lookup_url": f"https://npiregistry.cms.hhs.gov/provider-view/{npi}",
-            })
-            total_paid_absent += paid
+    (found,), stats = csv_scan.scan(PARTB_CSV, [AbsentFromNdh(ndh)])
+    print(stats.summary())
+    publish(found, stats.rows)
+
+
+def publish(found: AbsentFromNdh, total_partb: int) -> None:
+    """Write the national and VA CSVs and the finding JSONs from a scan."""
+    absent = found.absent
+    total_paid_absent = found.total_paid_absent
 
     print(f"\nPart B billing NPIs in CY 2023:       {total_partb:,}")
     print(f"Absent from NDH:                       {len(absent):,}")
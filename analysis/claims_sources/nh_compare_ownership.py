@@ -57,8 +57,9 @@ Sources:
     2026-04-01, 2.98M rows, ~2.47M individual NPIs + 433K orgs):
         PPEF_Enrollment_Extract_2026.04.01.csv
 
-    OIG LEIE active exclusions (BigQuery cms_npd.oig_leie).
-    SAM.gov active exclusions (BigQuery cms_npd.sam_exclusions).
+    OIG LEIE active exclusions (BigQuery cms_npd.oig_leie) and
+    SAM.gov active exclusions (BigQuery cms_npd.sam_exclusions), both read
+    through the exclusion index (claims_sources/_exclusions.py).
 
 Writes:
     frontend/public/api/v1/findings/nh-hospice-hh-ownership-flags.json
@@ -74,11 +75,11 @@ import subprocess
 from collections import defaultdict
 from datetime import datetime, timezone
 
-from google.cloud import bigquery
+from analysis import csv_source
+from analysis.claims_sources import _exclusions as exclusions
 
 METHODOLOGY_VERSION = "0.6.1-draft"
 DATA_SOURCE_RELEASE = "CMS Quarterly All Owners + PPEF (both 2026-04-01)"
-PROJECT = "thematic-fort-453901-t7"
 
 REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent.parent
 DATA_DIR = REPO_ROOT / "frontend" / "data" / "cms-claims"
@@ -118,7 +119,7 @@ def load_ppef() -> tuple[dict, dict]:
     """
     assoc_to_npi: dict[str, dict] = {}
     enrl_to_state: dict[str, str] = {}
-    with open(PPEF_CSV, newline="", encoding="latin-1") as fh:
+    with csv_source.open_text(PPEF_CSV, encoding="latin-1") as fh:
         for row in csv.DictReader(fh):
             assoc = (row.get("PECOS_ASCT_CNTL_ID") or "").strip()
             npi = (row.get("NPI") or "").strip()
@@ -140,71 +141,20 @@ def load_ppef() -> tuple[dict, dict]:
     return assoc_to_npi, enrl_to_state
 
 
-def load_leie(client: bigquery.Client) -> tuple[dict, dict]:
+def load_leie(index: exclusions.ExclusionIndex) -> tuple[dict, dict]:
     """Return (leie_by_npi, leie_by_demo)."""
-    sql = """
-    SELECT
-      LASTNAME, FIRSTNAME, MIDNAME, STATE, GENERAL, EXCLDATE, EXCLTYPE, NPI
-    FROM `thematic-fort-453901-t7.cms_npd.oig_leie`
-    WHERE IFNULL(REINDATE, '00000000') = '00000000'
-      AND LASTNAME IS NOT NULL AND LASTNAME != ''
-      AND FIRSTNAME IS NOT NULL AND FIRSTNAME != ''
-      AND STATE IS NOT NULL AND LENGTH(STATE) = 2
-    """
-    by_npi: dict[str, list] = defaultdict(list)
-    by_demo: dict[tuple, list] = defaultdict(list)
-    for row in client.query(sql).result():
-        rec = {
-            "source": "LEIE",
-            "lastname": row.LASTNAME,
-            "firstname": row.FIRSTNAME,
-            "midname": row.MIDNAME,
-            "state": row.STATE,
-            "general": row.GENERAL,
-            "excldate": row.EXCLDATE,
-            "excltype": row.EXCLTYPE,
-            "npi": row.NPI or "",
-        }
-        npi = (row.NPI or "").strip()
-        if npi and npi != "0000000000" and len(npi) == 10:
-            by_npi[npi].append(rec)
-        key = (row.LASTNAME.upper().strip(), row.FIRSTNAME.upper().strip(),
-               row.STATE.upper().strip())
-        by_demo[key].append(rec)
+    by_npi = index.by_npi("LEIE")
+    by_demo = index.by_demo("LEIE")
     print(f"LEIE: {sum(len(v) for v in by_npi.values()):,} rows with NPI ({len(by_npi):,} distinct NPIs)")
     print(f"LEIE: {len(by_demo):,} demographic keys (LAST, FIRST, STATE)")
-    return dict(by_npi), dict(by_demo)
+    return by_npi, by_demo
 
 
-def load_sam(client: bigquery.Client) -> dict:
+def load_sam(index: exclusions.ExclusionIndex) -> dict:
     """Return sam_by_npi: NPI → [record, ...]."""
-    sql = """
-    SELECT
-      first_name, last_name, state_province, exclusion_type,
-      excluding_agency, active_date, termination_date, npi
-    FROM `thematic-fort-453901-t7.cms_npd.sam_exclusions`
-    WHERE record_status = 'Active'
-      AND npi IS NOT NULL AND npi != '' AND npi != '0000000000'
-    """
-    out: dict[str, list] = defaultdict(list)
-    for row in client.query(sql).result():
-        npi = (row.npi or "").strip()
-        if not npi or len(npi) != 10:
-            continue
-        out[npi].append({
-            "source": "SAM",
-            "lastname": row.last_name or "",
-            "firstname": row.first_name or "",
-            "state": row.state_province or "",
-            "excluding_agency": row.excluding_agency or "",
-            "excltype": row.exclusion_type or "",
-            "excldate": str(row.active_date)[:10] if row.active_date else "",
-            "termdate": str(row.termination_date)[:10] if row.termination_date else "",
-            "npi": npi,
-            "general": "",
-        })
+    out = index.by_npi("SAM", sam_status="Active")
     print(f"SAM: {sum(len(v) for v in out.values()):,} active exclusions with NPI ({len(out):,} distinct NPIs)")
-    return dict(out)
+    return out
 
 
 def scan_owner_file(
@@ -215,11 +165,11 @@ def scan_owner_file(
     leie_by_demo: dict,
     sam_by_npi: dict,
 ) -> list[dict]:
-    if not path.exists():
+    if not csv_source.exists(path):
         print(f"WARN: {path.name} missing — skipping")
         return []
     matches: list[dict] = []
-    with open(path, newline="", encoding="latin-1") as fh:
+    with csv_source.open_text(path, encoding="latin-1") as fh:
         for row in csv.DictReader(fh):
             # Only individual-owner rows are matchable against LEIE/SAM.
             type_owner = (row.get("TYPE - OWNER") or "").strip().upper()
@@ -311,10 +261,10 @@ def _build_row(path, owner_row, assoc, owner_npi, ppef_rec, facility_state, ex,
 
 
 def main() -> None:
-    client = bigquery.Client(project=PROJECT)
     assoc_to_npi, enrl_to_state = load_ppef()
-    leie_by_npi, leie_by_demo = load_leie(client)
-    sam_by_npi = load_sam(client)
+    index = exclusions.load()
+    leie_by_npi, leie_by_demo = load_leie(index)
+    sam_by_npi = load_sam(index)
 
     all_matches: list[dict] = []
     per_type_counts: dict[str, dict[str, int]] = {}
@@ -37,11 +37,14 @@ import subprocess
 from collections import defaultdict
 from datetime import datetime, timezone
 
-import pyarrow as pa
 import pyarrow.parquet as pq
-import pyarrow.compute as pc
 from google.cloud import bigquery
 
+from analysis import csv_source
+from analysis.claims_sources import _csv_scan as csv_scan
+from analysis.claims_sources import _medicaid_scan as medicaid_scan
+from analysis.claims_sources._cohorts import bq_job_config
+
 METHODOLOGY_VERSION = "0.6.1-draft"
 PROJECT = "thematic-fort-453901-t7"
 
@@ -98,7 +101,7 @@ def load_cohort_from_bq() -> dict[str, dict]:
       AND LENGTH(p._state) = 2
     """
     cohort = {}
-    for row in client.query(sql).result():
+    for row in client.query(sql, job_config=bq_job_config()).result():
         cohort[row.npi] = {
             "npi": row.npi,
             "name": f"{row.family_name}, {row.given_name}".strip(", "),
@@ -112,15 +115,17 @@ def load_cohort_from_bq() -> dict[str, dict]:
     return cohort
 
 
-def filter_medicaid_parquet(cohort: dict[str, dict]) -> dict[str, dict]:
-    """Aggregate post-deactivation paid amount + claim lines per NPI."""
+def filter_medicaid_parquet(cohort: dict[str, dict], workers: int | None = None) -> dict[str, dict]:
+    """Aggregate post-deactivation paid amount + claim lines per NPI.
+
+    The parquet is read by the row-group scan shared with H29
+    (_medicaid_scan); only the cohort's rows reach the loop below.
+    """
     if not PARQUET_PATH.exists():
         print(f"WARN: Medicaid parquet missing at {PARQUET_PATH}; skipping H31 Medicaid slice.")
         return {}
     pf = pq.ParquetFile(PARQUET_PATH)
     print(f"Scanning Medicaid parquet ({pf.metadata.num_rows:,} rows)...")
-    npis = list(cohort.keys())
-    npi_set = pa.array(npis, type=pa.string())
 
     per_npi: dict[str, dict] = defaultdict(lambda: {
         "paid": 0.0, "claims": 0, "patients": 0,
@@ -128,17 +133,12 @@ def filter_medicaid_parquet(cohort: dict[str, dict]) -> dict[str, dict]:
         "first_month": None, "last_month": None,
     })
 
-    for i, batch in enumerate(pf.iter_batches(batch_size=200_000, columns=[
+    parts, stats = medicaid_scan.scan(PARQUET_PATH, cohort, columns=[
         "BILLING_PROVIDER_NPI_NUM", "SERVICING_PROVIDER_NPI_NUM",
         "CLAIM_FROM_MONTH", "TOTAL_PATIENTS", "TOTAL_CLAIM_LINES", "TOTAL_PAID",
-    ])):
-        billing = batch.column("BILLING_PROVIDER_NPI_NUM")
-        servicing = batch.column("SERVICING_PROVIDER_NPI_NUM")
-        mask = pc.or_(pc.is_in(billing, value_set=npi_set), pc.is_in(servicing, value_set=npi_set))
-        if not pc.any(mask).as_py():
-            continue
-        sub = batch.filter(mask).to_pylist()
-        for row in sub:
+    ], workers=workers)
+    for part in parts:
+        for row in part.to_pylist():
             billing_npi = row["BILLING_PROVIDER_NPI_NUM"]
             servicing_npi = row["SERVICING_PROVIDER_NPI_NUM"]
             month = row["CLAIM_FROM_MONTH"] or ""  # YYYY-MM
@@ -168,59 +168,76 @@ def filter_medicaid_parquet(cohort: dict[str, dict]) -> dict[str, dict]:
                     slot["first_month"] = month
                 if not slot["last_month"] or month > slot["last_month"]:
                     slot["last_month"] = month
-        if (i + 1) % 100 == 0:
-            print(f"  scanned {(i+1)*200_000:>12,} rows · {len(per_npi)} cohort matches so far")
-    print(f"  Medicaid: {len(per_npi)} cohort NPIs with any Medicaid payment.")
+    print(f"  Medicaid: {len(per_npi)} cohort NPIs with any Medicaid payment. {stats.summary()}")
     return dict(per_npi)
 
 
-def filter_partb(cohort: dict[str, dict]) -> dict[str, dict]:
+class PartBBilling(csv_scan.Consumer):
     """CY 2023 Part B aggregate match; strict filter = deactivation_year < 2023."""
-    if not PARTB_CSV.exists():
+
+    def __init__(self, cohort: dict[str, dict]):
+        self.cohort = cohort
+        self.out: dict[str, dict] = {}
+
+    def accept(self, npi: str) -> bool:
+        return npi in self.cohort
+
+    def add(self, npi: str, row: dict) -> None:
+        cohort_row = self.cohort[npi]
+        paid = row["Tot_Mdcr_Pymt_Amt"] or 0.0
+        services = int(row["Tot_Srvcs"] or 0)
+        post = cohort_row["deactivation_year"] < 2023
+        self.out[npi] = {
+            "partb_2023_paid": paid,
+            "partb_2023_services": services,
+            "partb_2023_post_deactivation": post,
+            "partb_2023_state": row.get("Rndrng_Prvdr_State_Abrvtn", ""),
+            "partb_2023_provider_type": row.get("Rndrng_Prvdr_Type", ""),
+        }
+
+    def result(self) -> dict[str, dict]:
+        return self.out
+
+
+def filter_partb(cohort: dict[str, dict]) -> dict[str, dict]:
+    """CY 2023 Part B aggregate match, read on its own (see PartBBilling)."""
+    if not csv_source.exists(PARTB_CSV):
         return {}
-    out: dict[str, dict] = {}
-    with open(PARTB_CSV, newline="") as fh:
-        for row in csv.DictReader(fh):
-            npi = (row.get("Rndrng_NPI") or "").strip()
-            if npi not in cohort:
-                continue
-            cohort_row = cohort[npi]
-            paid = float(row.get("Tot_Mdcr_Pymt_Amt") or 0)
-            services = int(float(row.get("Tot_Srvcs") or 0)) if row.get("Tot_Srvcs") else 0
-            post = cohort_row["deactivation_year"] < 2023
-            out[npi] = {
-                "partb_2023_paid": paid,
-                "partb_2023_services": services,
-                "partb_2023_post_deactivation": post,
-                "partb_2023_state": row.get("Rndrng_Prvdr_State_Abrvtn", ""),
-                "partb_2023_provider_type": row.get("Rndrng_Prvdr_Type", ""),
-            }
+    (out,), _ = csv_scan.scan(PARTB_CSV, [PartBBilling(cohort)])
     print(f"  Part B: {len(out)} cohort NPIs with Medicare Part B billing in CY 2023.")
     return out
 
 
-def filter_partd(cohort: dict[str, dict]) -> dict[str, dict]:
+class PartDBilling(csv_scan.Consumer):
     """CY 2023 Part D aggregate match."""
-    if not PARTD_CSV.exists():
+    column = "PRSCRBR_NPI"
+
+    def __init__(self, cohort: dict[str, dict]):
+        self.cohort = cohort
+        self.out: dict[str, dict] = {}
+
+    def accept(self, npi: str) -> bool:
+        return npi in self.cohort
+
+    def add(self, npi: str, row: dict) -> None:
+        post = self.cohort[npi]["deactivation_year"] < 2023
+        self.out[npi] = {
+            "partd_2023_drug_cost": row["Tot_Drug_Cst"] or 0.0,
+            "partd_2023_opioid_claims": row["Opioid_Tot_Clms"] or 0,
+            "partd_2023_opioid_cost": row["Opioid_Tot_Drug_Cst"] or 0.0,
+            "partd_2023_post_deactivation": post,
+            "partd_2023_state": row.get("Prscrbr_State_Abrvtn", ""),
+        }
+
+    def result(self) -> dict[str, dict]:
+        return self.out
+
+
+def filter_partd(cohort: dict[str, dict]) -> dict[str, dict]:
+    """CY 2023 Part D aggregate match, read on its own (see PartDBilling)."""
+    if not csv_source.exists(PARTD_CSV):
         return {}
-    out: dict[str, dict] = {}
-    with open(PARTD_CSV, newline="") as fh:
-        for row in csv.DictReader(fh):
-            npi = (row.get("PRSCRBR_NPI") or "").strip()
-            if npi not in cohort:
-                continue
-            cohort_row = cohort[npi]
-            cost = float(row.get("Tot_Drug_Cst") or 0)
-            opioid_claims = int(float(row.get("Opioid_Tot_Clms") or 0)) if row.get("Opioid_Tot_Clms") else 0
-            opioid_cost = float(row.get("Opioid_Tot_Drug_Cst") or 0)
-            post = cohort_row["deactivation_year"] < 2023
-            out[npi] = {
-                "partd_2023_drug_cost": cost,
-                "partd_2023_opioid_claims": opioid_claims,
-                "partd_2023_opioid_cost": opioid_cost,
-                "partd_2023_post_deactivation": post,
-                "partd_2023_state": row.get("Prscrbr_State_Abrvtn", ""),
-            }
+    (out,), _ = csv_scan.scan(PARTD_CSV, [PartDBilling(cohort)])
     print(f"  Part D: {len(out)} cohort NPIs with Medicare Part D prescribing in CY 2023.")
     return out
 
@@ -230,7 +247,16 @@ def main() -> None:
     medicaid = filter_medicaid_parquet(cohort)
     partb = filter_partb(cohort)
     partd = filter_partd(cohort)
+    publish(cohort, medicaid, partb, partd)
+
 
+def publish(
+    cohort: dict[str, dict],
+    medicaid: dict[str, dict],
+    partb: dict[str, dict],
+    partd: dict[str, dict],
+) -> None:
+    """Compose the per-source matches and write the CSVs and finding JSONs."""
     all_npis = set(medicaid) | set(partb) | set(partd)
     print(f"\nCohort NPIs with billing in ≥1 public claims source: {len(all_npis)}")
     print(f"  Medicaid only: {len(set(medicaid) - set(partb) - set(partd))}")
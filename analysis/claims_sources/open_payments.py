@@ -15,8 +15,9 @@ Source file:
     Aggregated 2024 General Payments grouped by Covered Recipient and
     Nature of Payment Type (~98 MB CSV, ~one row per recipient × payment type).
 
-Cohort: full active LEIE ∪ SAM exclusion set (queried from BigQuery, single
-scan whether one state or all). Per-NPI matches are partitioned by NDH
+Cohort: full active LEIE ∪ SAM exclusion set (the local exclusion index,
+claims_sources/_exclusions.py; NDH names and states are queried for those
+NPIs only, whether one state or all). Per-NPI matches are partitioned by NDH
 practice state and written to per-state CSVs in one pass.
 
 Writes:
@@ -33,7 +34,9 @@ import subprocess
 from collections import defaultdict
 from datetime import datetime, timezone
 
-from google.cloud import bigquery
+from analysis import warehouse
+from analysis.claims_sources import _csv_scan as csv_scan
+from analysis.claims_sources import _exclusions as exclusions
 
 METHODOLOGY_VERSION = "0.6.1-draft"
 DATA_SOURCE_RELEASE = "PGYR2024 P01232026 (released 2026-01-10)"
@@ -59,100 +62,108 @@ def get_commit_sha() -> str:
     return "pending"
 
 
-def load_exclusion_npis_with_state(client: bigquery.Client) -> dict[str, dict]:
+NDH_NAMES_SQL = f"""
+SELECT _npi, _state, _family_name, _given_name
+FROM `{PROJECT}.cms_npd.practitioner`
+WHERE _npi IN UNNEST(@npis)
+"""
+
+
+def load_exclusion_npis_with_state(index: exclusions.ExclusionIndex) -> dict[str, dict]:
     """LEIE ∪ SAM active exclusion NPIs with effective dates + NDH practice state."""
-    sql = f"""
-    WITH leie AS (
-      SELECT NPI, MIN(EXCLDATE) AS leie_excldate
-      FROM `{PROJECT}.cms_npd.oig_leie`
-      WHERE NPI IS NOT NULL AND NPI != '0000000000' AND IFNULL(REINDATE, '00000000') = '00000000'
-      GROUP BY NPI
-    ),
-    sam AS (
-      SELECT npi AS NPI, CAST(MIN(active_date) AS STRING) AS sam_active_date
-      FROM `{PROJECT}.cms_npd.sam_exclusions`
-      WHERE npi IS NOT NULL AND REGEXP_CONTAINS(npi, r'^\\d{{10}}$')
-      GROUP BY npi
-    ),
-    merged AS (
-      SELECT COALESCE(leie.NPI, sam.NPI) AS NPI, leie.leie_excldate, sam.sam_active_date
-      FROM leie FULL OUTER JOIN sam USING (NPI)
-    )
-    SELECT
-      m.NPI AS npi,
-      m.leie_excldate,
-      m.sam_active_date,
-      p._state AS ndh_state,
-      p._family_name,
-      p._given_name
-    FROM merged m
-    LEFT JOIN `{PROJECT}.cms_npd.practitioner` p ON m.NPI = p._npi
-    """
+    leie = index.earliest("LEIE")
+    sam = index.earliest("SAM")
+    npis = sorted(leie.keys() | sam.keys())
+    ndh = {r._npi: r for r in warehouse.query(NDH_NAMES_SQL, {"npis": npis})}
     out: dict[str, dict] = {}
-    for row in client.query(sql).result():
+    for npi in npis:
+        leie_excldate, sam_active_date = leie.get(npi), sam.get(npi)
+        p = ndh.get(npi)
         # Earliest exclusion year — format EXCLDATE YYYYMMDD → year int
         years: list[int] = []
-        if row.leie_excldate and len(row.leie_excldate) >= 4 and row.leie_excldate[:4].isdigit():
-            years.append(int(row.leie_excldate[:4]))
-        if row.sam_active_date and len(row.sam_active_date) >= 4 and row.sam_active_date[:4].isdigit():
-            years.append(int(row.sam_active_date[:4]))
+        if leie_excldate and len(leie_excldate) >= 4 and leie_excldate[:4].isdigit():
+            years.append(int(leie_excldate[:4]))
+        if sam_active_date and len(sam_active_date) >= 4 and sam_active_date[:4].isdigit():
+            years.append(int(sam_active_date[:4]))
         sources = []
-        if row.leie_excldate: sources.append("leie")
-        if row.sam_active_date: sources.append("sam")
-        out[row.npi] = {
-            "npi": row.npi,
+        if leie_excldate: sources.append("leie")
+        if sam_active_date: sources.append("sam")
+        family = (p._family_name or "").strip() if p else ""
+        given = (p._given_name or "").strip() if p else ""
+        out[npi] = {
+            "npi": npi,
             "sources": "+".join(sources) or "unknown",
-            "leie_excldate": row.leie_excldate,
-            "sam_active_date": row.sam_active_date,
+            "leie_excldate": leie_excldate or None,
+            "sam_active_date": sam_active_date or None,
             "earliest_exclusion_year": min(years) if years else None,
-            "ndh_state": row.ndh_state or "",
-            "name": f"{(row._family_name or '').strip()}, {(row._given_name or '').strip()}".strip(", "),
+            "ndh_state": (p._state if p else "") or "",
+            "name": f"{family}, {given}".strip(", "),
         }
     return out
 
 
+class IndustryPayments(csv_scan.Consumer):
+    """Open Payments totals per excluded NPI, across nature-of-payment rows.
+
+    The matched rows (a few per excluded NPI) are kept in file order and
+    totalled in result(), so a parallel scan's merge() only has to append
+    them and the sums come out exactly as one read would add them.
+    """
+    column = "Covered_Recipient_NPI"
+
+    def __init__(self, excl: dict[str, dict]):
+        self.excl = excl
+        self.rows: dict[str, list[tuple]] = {}
+
+    def accept(self, npi: str) -> bool:
+        return npi in self.excl
+
+    def add(self, npi: str, row: dict) -> None:
+        self.rows.setdefault(npi, []).append((
+            row["Total_Amount"] or 0.0,
+            row["Number_of_Transaction"] or 0,
+            row.get("Nature_Of_Payment_Type_Code", ""),
+            row.get("Covered_Recipient_Profile_First_Name", ""),
+            row.get("Covered_Recipient_Profile_Last_Name", ""),
+            row.get("Recipient_Type", ""),
+        ))
+
+    def merge(self, other: IndustryPayments) -> None:
+        for npi, rows in other.rows.items():
+            self.rows.setdefault(npi, []).extend(rows)
+
+    def result(self) -> dict[str, dict]:
+        per_npi: dict[str, dict] = {}
+        for npi, rows in self.rows.items():
+            slot = per_npi[npi] = {
+                "transactions": 0,
+                "total_amount": 0.0,
+                "nature_breakdown": defaultdict(float),
+                "first_name": "",
+                "last_name": "",
+                "recipient_type": "",
+            }
+            for amt, transactions, nature, first, last, recipient_type in rows:
+                slot["transactions"] += transactions
+                slot["total_amount"] += amt
+                if nature:
+                    slot["nature_breakdown"][nature] += amt
+                slot["first_name"] = first or slot["first_name"]
+                slot["last_name"] = last or slot["last_name"]
+                slot["recipient_type"] = recipient_type or slot["recipient_type"]
+        return per_npi
+
+
 def main() -> None:
-    print("Loading LEIE + SAM exclusion NPIs from BigQuery...")
-    client = bigquery.Client(project=PROJECT)
-    excl = load_exclusion_npis_with_state(client)
+    print("Loading LEIE + SAM exclusion NPIs from the exclusion index...")
+    excl = load_exclusion_npis_with_state(exclusions.load())
     print(f"Excluded NPIs: {len(excl)}")
     va_in_cohort = sum(1 for r in excl.values() if r["ndh_state"] == "VA")
     print(f"  of which VA-resident per NDH: {va_in_cohort}")
 
     print(f"Scanning {SOURCE_CSV.name}...")
-    # Aggregate per NPI across nature-of-payment rows
-    per_npi: dict[str, dict] = defaultdict(lambda: {
-        "transactions": 0,
-        "total_amount": 0.0,
-        "nature_breakdown": defaultdict(float),
-        "first_name": "",
-        "last_name": "",
-        "recipient_type": "",
-    })
-    rows_scanned = 0
-    with open(SOURCE_CSV, newline="") as fh:
-        for row in csv.DictReader(fh):
-            rows_scanned += 1
-            npi = (row.get("Covered_Recipient_NPI") or "").strip()
-            if npi not in excl:
-                continue
-            slot = per_npi[npi]
-            try:
-                amt = float(row.get("Total_Amount", "0") or 0)
-            except ValueError:
-                amt = 0.0
-            try:
-                n = int(float(row.get("Number_of_Transaction", "0") or 0))
-            except ValueError:
-                n = 0
-            slot["transactions"] += n
-            slot["total_amount"] += amt
-            nature = row.get("Nature_Of_Payment_Type_Code", "")
-            if nature:
-                slot["nature_breakdown"][nature] += amt
-            slot["first_name"] = row.get("Covered_Recipient_Profile_First_Name", "") or slot["first_name"]
-            slot["last_name"] = row.get("Covered_Recipient_Profile_Last_Name", "") or slot["last_name"]
-            slot["recipient_type"] = row.get("Recipient_Type", "") or slot["recipient_type"]
+    (per_npi,), stats = csv_scan.scan(SOURCE_CSV, [IndustryPayments(excl)], workers=None)
+    rows_scanned = stats.rows
 
     print(f"  scanned {rows_scanned:,} OP rows · {len(per_npi)} cohort NPIs matched")
 
@@ -0,0 +1,52 @@
+"""Prepare the HHS Medicaid Provider Spending parquet for cohort lookups.
+
+H29 and H31 look up a few thousand NPIs in a 238M-row file that is in no
+useful order, so every lookup reads all of it. Run this once per release
+after downloading the parquet. It writes two files beside the source:
+
+    medicaid-provider-spending.by-npi.parquet
+        The same rows sorted by BILLING_PROVIDER_NPI_NUM in small row
+        groups, with page indexes and parquet bloom filters on both NPI
+        columns, and each row's source position in `_row`.
+    medicaid-provider-spending.npi-index.npz
+        NPI -> the row groups of the sorted copy holding it as billing or
+        servicing NPI.
+
+_medicaid_scan.scan() then reads only the row groups the index names, and
+restores source row order, so every published number is unchanged. The
+copy is ignored once the source is newer; re-run this after a download.
+
+Run:
+    python -m analysis.claims_sources.prepare_medicaid_parquet
+"""
+from __future__ import annotations
+import argparse
+import pathlib
+import time
+
+import pyarrow.parquet as pq
+
+from analysis.claims_sources import _medicaid_scan as medicaid_scan
+from analysis.claims_sources.medicaid_provider_spending import PARQUET_PATH
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    ap.add_argument("--parquet", type=pathlib.Path, default=PARQUET_PATH)
+    ap.add_argument("--row-group-rows", type=int,
+                    default=medicaid_scan.PREPARED_ROW_GROUP_ROWS)
+    args = ap.parse_args()
+    if not args.parquet.exists():
+        raise SystemExit(f"Parquet file not found at {args.parquet}")
+
+    started = time.perf_counter()
+    sorted_path, index_path = medicaid_scan.prepare(args.parquet, args.row_group_rows)
+    md = pq.ParquetFile(sorted_path).metadata
+    print(f"Wrote {sorted_path} ({md.num_rows:,} rows · {md.num_row_groups:,} row groups · "
+          f"{sorted_path.stat().st_size / 1e6:,.0f} MB)")
+    print(f"Wrote {index_path} ({index_path.stat().st_size / 1e6:,.1f} MB) "
+          f"in {time.perf_counter() - started:,.0f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Refresh every finding built on the Medicare Part B files, one read per file.
+
+H30a, H36 and H31 each stream partb-by-provider.csv; H40 and H41 stream
+partb-by-provider-and-service.csv. Run on their own, a refresh parses the
+first file three times and the second twice.
+This script loads each finding's inputs, registers its consumer with
+_csv_scan.scan(), and reads:
+
+    partb-by-provider.csv                 once: H30a + H36 + H31 Part B
+    partb-by-provider-and-service.csv     once: H40 + H41 (both passes)
+
+Every finding then writes exactly what its own main() writes.
+
+Run:
+    python -m analysis.claims_sources.refresh_partb
+"""
+from __future__ import annotations
+import argparse
+
+from analysis import h41_specialty_drift as h41
+from analysis import csv_source, qcache
+from analysis.claims_sources import _csv_scan as csv_scan
+from analysis.claims_sources import medicare_partb as h30a
+from analysis.claims_sources import medicare_partb_by_hcpcs as h40
+from analysis.claims_sources import ndh_completeness as h36
+from analysis.claims_sources import nppes_deactivation_join as h31
+from analysis.claims_sources._cohorts import load_all_state_cohorts
+
+
+def refresh_by_provider() -> None:
+    if not csv_source.exists(h30a.SOURCE_CSV):
+        print(f"Source file not found at {h30a.SOURCE_CSV}; skipping H30a, H36 and H31.")
+        return
+    cohorts = load_all_state_cohorts()
+    print(f"Loaded {len(cohorts)} state cohorts")
+    ndh = h36.load_ndh_npis()
+    deactivated = h31.load_cohort_from_bq()
+
+    print(f"\nScanning {h30a.SOURCE_CSV.name} for H30a, H36, H31...")
+    (excluded, absent, partb), stats = csv_scan.scan(h30a.SOURCE_CSV, [
+        h30a.ExcludedBilling(cohorts),
+        h36.AbsentFromNdh(ndh),
+        h31.PartBBilling(deactivated),
+    ])
+    print(stats.summary())
+
+    print("\nH30a:")
+    h30a.publish(cohorts, excluded)
+    print("\nH36:")
+    h36.publish(absent, stats.rows)
+    print("\nH31:")
+    print(f"  Part B: {len(partb)} cohort NPIs with Medicare Part B billing in CY 2023.")
+    medicaid = h31.filter_medicaid_parquet(deactivated)
+    partd = h31.filter_partd(deactivated)
+    h31.publish(deactivated, medicaid, partb, partd)
+
+
+def refresh_by_service() -> None:
+    if not csv_source.exists(h40.SOURCE_CSV):
+        print(f"\nSource file not found at {h40.SOURCE_CSV}; skipping H40 and H41.")
+        return
+    cohorts = load_all_state_cohorts()
+    print("\nLoading NPPES taxonomy from BigQuery (~7.4M rows)...")
+    primary = h41.load_nppes_primary_taxonomy()
+    nppes_set = h41.load_nppes_taxonomy_set()
+
+    print(f"\nScanning {h40.SOURCE_CSV.name} for H40 and H41...")
+    (found, (affinity, per_npi)), stats = csv_scan.scan(h40.SOURCE_CSV, [
+        h40.ExcludedHcpcsBilling(cohorts),
+        h41.SpecialtyDrift(primary, nppes_set),
+    ], progress_every=2_000_000)
+    print(stats.summary())
+    print("\nH40:")
+    h40.publish(found)
+    print("\nH41:")
+    print(f"  {len(affinity):,} HCPCS codes resolved, {len(per_npi):,} NPIs evaluated")
+    h41.publish(per_npi, nppes_set)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    ap.add_argument("--no-cache", action="store_true",
+                    help="re-run the NDH and NPPES queries even if qcache.py holds them")
+    args = ap.parse_args()
+    if args.no_cache:
+        qcache.disable()
+    refresh_by_provider()
+    refresh_by_service()
+
+
+if __name__ == "__main__":
+    main()
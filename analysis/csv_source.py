@@ -0,0 +1,334 @@
+"""Open a CMS CSV whether it is on disk plain, zstd'd, gzipped or zipped.
+
+The claims extracts under frontend/data/cms-claims/ and the PECOS files
+under analysis/data/pecos/ are read as CSVs, so they used to sit on disk
+uncompressed: tens of GB of text that compresses several-fold. Every
+script that reads one now goes through this module, and a file can be
+kept in any of these forms under its CSV name:
+
+    name.csv          as downloaded
+    name.csv.zst      zstd -19 --long name.csv
+    name.csv.gz       gzip name.csv (what some CMS mirrors serve)
+    name.zip          a zip holding name.csv, or exactly one CSV
+
+locate() picks the first of those that exists, in that order, so a script
+keeps naming `name.csv` and a plain copy, when present, wins.
+
+Decompression runs in a background thread that keeps PREFETCH_BLOCKS
+blocks ready ahead of the reader. zstandard and zlib both release the GIL
+while they inflate, so the parse of one block overlaps the decompression
+of the next. A plain CSV is opened directly, with no thread.
+
+    with csv_source.open_text(path, encoding="latin-1") as fh:
+        for row in csv.DictReader(fh):
+            ...
+    with csv_source.open_binary(path) as fh:   # e.g. for pyarrow.csv.open_csv
+        ...
+
+A file of unknown encoding (CMS ships some latin-1, some UTF-8, and says
+neither) is opened with open_text(path, encoding=DETECT). Its bytes pass
+through unchanged while they are valid UTF-8; from the first byte that is
+not, the rest is read as latin-1. It is one pass and nothing is read
+twice. A latin-1 file is pure ASCII up to its first accented byte, and
+ASCII reads the same either way, so it comes out exactly as a latin-1
+read would. detected_encoding(fh) says, once the file is read, which it was.
+
+Run directly to compare a compressed copy's read with the plain CSV's:
+
+    python -m analysis.csv_source frontend/data/cms-claims/partd-by-provider.csv
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import io
+import pathlib
+import queue
+import threading
+import time
+import zipfile
+from typing import BinaryIO, Iterator, TextIO
+
+from analysis import ndjson_zst
+
+# Decompressed bytes per block handed from the thread to the reader.
+BLOCK_BYTES = 4 << 20
+PREFETCH_BLOCKS = 4
+COMPRESSED_SUFFIXES = (".zst", ".gz", ".zip")
+# open_text's encoding for "UTF-8 if it is, else latin-1"; see Utf8OrLatin1.
+DETECT = "detect"
+
+
+def candidates(path: pathlib.Path | str) -> list[pathlib.Path]:
+    """The files locate() looks for, in order, for a CSV named `path`."""
+    path = pathlib.Path(path)
+    if compressed(path):
+        return [path]
+    return [path, path.with_name(path.name + ".zst"), path.with_name(path.name + ".gz"),
+            path.with_suffix(".zip")]
+
+
+def locate(path: pathlib.Path | str) -> pathlib.Path | None:
+    """The file holding the CSV `path` names, or None if there is none."""
+    return next((p for p in candidates(path) if p.exists()), None)
+
+
+def exists(path: pathlib.Path | str) -> bool:
+    return locate(path) is not None
+
+
+def compressed(path: pathlib.Path | str) -> bool:
+    return pathlib.PurePath(path).suffix in COMPRESSED_SUFFIXES
+
+
+def zip_member(path: pathlib.Path) -> str:
+    """The CSV inside zip `path`: `<stem>.csv`, else its only CSV."""
+    with zipfile.ZipFile(path) as zf:
+        names = [n for n in zf.namelist() if not n.endswith("/")]
+    want = path.stem + ".csv"
+    for name in names:
+        if pathlib.PurePosixPath(name).name == want:
+            return name
+    csvs = [n for n in names if n.lower().endswith(".csv")]
+    if len(csvs) != 1:
+        raise FileNotFoundError(f"{path.name} holds no {want} and {len(csvs)} other CSVs")
+    return csvs[0]
+
+
+def _file_blocks(fh: BinaryIO, block_bytes: int) -> Iterator[bytes]:
+    while True:
+        block = fh.read(block_bytes)
+        if not block:
+            return
+        yield block
+
+
+def blocks(path: pathlib.Path, block_bytes: int = BLOCK_BYTES,
+           member: str | None = None) -> Iterator[bytes]:
+    """Decompressed blocks of `path`, a file locate() returned, in order.
+
+    `member` names the CSV in a zip; by default it is zip_member(path).
+    """
+    suffix = path.suffix
+    if suffix == ".zst":
+        yield from ndjson_zst.blocks(path, block_bytes)
+    elif suffix == ".gz":
+        with gzip.open(path, "rb") as fh:
+            yield from _file_blocks(fh, block_bytes)
+    elif suffix == ".zip":
+        with zipfile.ZipFile(path) as zf, zf.open(member or zip_member(path)) as fh:
+            yield from _file_blocks(fh, block_bytes)
+    else:
+        with open(path, "rb") as fh:
+            yield from _file_blocks(fh, block_bytes)
+
+
+class _BlockStream(io.RawIOBase):
+    """A raw stream over the blocks _next() returns, None at the end."""
+
+    def __init__(self):
+        super().__init__()
+        self.bytes = 0
+        self._block = memoryview(b"")
+        self._eof = False
+
+    def _next(self) -> bytes | None:
+        raise NotImplementedError
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._block:
+            if self._eof:
+                return 0
+            block = self._next()
+            if block is None:
+                self._eof = True
+                return 0
+            self._block = memoryview(block)
+        n = min(len(b), len(self._block))
+        b[:n] = self._block[:n]
+        self._block = self._block[n:]
+        self.bytes += n
+        return n
+
+
+class Reader(_BlockStream):
+    """A compressed file's bytes, decompressed PREFETCH_BLOCKS ahead in a thread.
+
+    An error in the thread (a truncated download, a corrupt frame) is
+    raised from the read that reaches it. Closing early stops the thread.
+    """
+
+    def __init__(self, path: pathlib.Path, block_bytes: int = BLOCK_BYTES,
+                 prefetch: int = PREFETCH_BLOCKS):
+        super().__init__()
+        self.path = pathlib.Path(path)
+        # Resolved here so a zip without its CSV fails on open, not on read.
+        self.member = zip_member(self.path) if self.path.suffix == ".zip" else None
+        self.compressed_bytes = self.path.stat().st_size
+        self.started = time.perf_counter()
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, prefetch))
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._fill, args=(block_bytes,),
+                                        name=f"decompress {self.path.name}", daemon=True)
+        self._thread.start()
+
+    def _put(self, item: object) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _fill(self, block_bytes: int) -> None:
+        source = blocks(self.path, block_bytes, self.member)
+        try:
+            for block in source:
+                if not self._put(block):
+                    return
+            self._put(None)
+        except BaseException as exc:  # handed to the reading thread
+            self._put(exc)
+        finally:
+            source.close()
+
+    def _next(self) -> bytes | None:
+        item = self._queue.get()
+        if isinstance(item, BaseException):
+            self._eof = True
+            raise item
+        return item
+
+    def close(self) -> None:
+        if not self.closed:
+            self._stop.set()
+            self._thread.join()
+        super().close()
+
+    def summary(self) -> str:
+        secs = max(time.perf_counter() - self.started, 1e-9)
+        return (f"{self.path.name}: {self.bytes / 1e6:,.0f} MB from {self.compressed_bytes / 1e6:,.0f} MB "
+                f"on disk in {secs:.1f}s ({self.bytes / 1e6 / secs:,.0f} MB/s)")
+
+
+class Utf8OrLatin1(_BlockStream):
+    """`raw`'s bytes as UTF-8: passed through while they are valid UTF-8,
+    and read as latin-1 (and re-encoded) from the first byte that is not.
+
+    `detected` is "utf-8" while every byte has been valid UTF-8; "latin-1"
+    once an invalid byte has been met with only ASCII before it, so the
+    whole file read as latin-1; "utf-8+latin-1" if UTF-8 characters came
+    before the switch, a file mixing the two. `switched_at` is the offset
+    of the first byte that was not UTF-8.
+    """
+
+    def __init__(self, raw: BinaryIO, block_bytes: int = BLOCK_BYTES):
+        super().__init__()
+        self.raw = raw
+        self.switched_at: int | None = None
+        self.non_ascii = False
+        self._blocks = self._transcoded(block_bytes)
+
+    @property
+    def detected(self) -> str:
+        if self.switched_at is None:
+            return "utf-8"
+        return "utf-8+latin-1" if self.non_ascii else "latin-1"
+
+    def _switch(self, offset: int, rest: bytes) -> bytes:
+        self.switched_at = offset
+        return rest.decode("latin-1").encode("utf-8")
+
+    def _transcoded(self, block_bytes: int) -> Iterator[bytes]:
+        offset, carry = 0, b""
+        for block in _file_blocks(self.raw, block_bytes):
+            if self.switched_at is not None:
+                yield block.decode("latin-1").encode("utf-8")
+                continue
+            data = carry + block if carry else block
+            carry = b""
+            try:
+                data.decode("utf-8")
+            except UnicodeDecodeError as exc:
+                valid = data[:exc.start]
+                if exc.end == len(data) and exc.reason == "unexpected end of data":
+                    # A character cut by the block boundary; finish it next block.
+                    carry = data[exc.start:]
+                else:
+                    self.non_ascii = self.non_ascii or not valid.isascii()
+                    yield valid + self._switch(offset + exc.start, data[exc.start:])
+                    continue
+                data = valid
+            self.non_ascii = self.non_ascii or not data.isascii()
+            offset += len(data)
+            yield data
+        if carry:
+            yield self._switch(offset, carry)
+
+    def _next(self) -> bytes | None:
+        return next(self._blocks, None)
+
+    def close(self) -> None:
+        if not self.closed:
+            self.raw.close()
+        super().close()
+
+
+def open_binary(path: pathlib.Path | str, block_bytes: int = BLOCK_BYTES) -> BinaryIO:
+    """The bytes of the CSV `path` names, decompressed if need be (see locate())."""
+    source = locate(path)
+    if source is None:
+        raise FileNotFoundError(f"{path} (nor .zst, .gz or .zip beside it)")
+    if not compressed(source):
+        return open(source, "rb")
+    return io.BufferedReader(Reader(source, block_bytes), buffer_size=block_bytes)
+
+
+def open_text(path: pathlib.Path | str, encoding: str = "utf-8", errors: str = "strict") -> TextIO:
+    """open_binary() decoded, with newline="" as the csv module wants.
+
+    With encoding=DETECT the file is read as UTF-8 or latin-1, whichever it
+    turns out to be (see Utf8OrLatin1), and a UTF-8 byte-order mark is
+    dropped.
+    """
+    if encoding == DETECT:
+        detect = Utf8OrLatin1(open_binary(path), BLOCK_BYTES)
+        return io.TextIOWrapper(io.BufferedReader(detect, buffer_size=BLOCK_BYTES),
+                                encoding="utf-8-sig", errors=errors, newline="")
+    return io.TextIOWrapper(open_binary(path), encoding=encoding, errors=errors, newline="")
+
+
+def detected_encoding(fh: TextIO) -> str:
+    """What open_text(..., encoding=DETECT) has found `fh` to be so far;
+    final once the file has been read to the end. Any other text file
+    reports the encoding it was opened with."""
+    raw = getattr(getattr(fh, "buffer", None), "raw", None)
+    return raw.detected if isinstance(raw, Utf8OrLatin1) else fh.encoding
+
+
+def _bench(path: pathlib.Path) -> tuple[int, float]:
+    started = time.perf_counter()
+    n = 0
+    with open_binary(path) as fh:
+        for block in iter(lambda: fh.read(BLOCK_BYTES), b""):
+            n += block.count(b"\n")
+    return n, time.perf_counter() - started
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Time reading each stored form of a CSV.")
+    ap.add_argument("path", type=pathlib.Path, help="the CSV's name; its other forms are found beside it")
+    args = ap.parse_args()
+    for path in candidates(args.path):
+        if path.exists():
+            lines, secs = _bench(path)
+            size = path.stat().st_size
+            print(f"{path.name}: {size / 1e6:,.0f} MB on disk, {lines:,} lines in {secs:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -31,7 +31,6 @@ import argparse
 import csv
 import json
 import pathlib
-import subprocess
 import sys
 import time
 
@@ -40,6 +39,8 @@ import pyarrow.parquet as pq
 
 # Reuse the exact extraction logic the BQ ingest uses.
 from fast_ingest_ndh import RESOURCES  # (name, table, extractor)
+from ndjson_zst import NdjsonZstReader
+import json_codec
 
 REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent
 OUT_ROOT = REPO_ROOT / "frontend" / "data" / "parquet-export"
@@ -51,6 +52,11 @@ RELEASE_DIRS = {
 }
 
 BATCH_ROWS = 100_000
+COLUMN_TYPES = {
+    "_active": pa.bool_(),
+    "_position_lat": pa.float64(),
+    "_position_lng": pa.float64(),
+}
 
 
 def schema_for(extractor) -> pa.Schema:
@@ -58,12 +64,16 @@ def schema_for(extractor) -> pa.Schema:
 
     Every extractor is total on `{}` (uses .get throughout), so calling it on
     an empty resource yields the full column list. `_active` is the only
-    boolean; everything else is a nullable string, matching the BQ pattern.
+    boolean and the `_position_*` coordinates the only floats, as in BQ;
+    everything else is a nullable string. The coordinates have to stay
+    numeric: ORG_POINT_SQL orders by latitude, and as strings "9.5" sorts
+    above "40.4" and moves every map pin (analysis/warehouse.py runs that SQL
+    on these files).
     """
     keys = list(extractor({}).keys())
     fields = [pa.field("resource", pa.string())]
     for k in keys:
-        fields.append(pa.field(k, pa.bool_() if k == "_active" else pa.string()))
+        fields.append(pa.field(k, COLUMN_TYPES.get(k, pa.string())))
     return pa.schema(fields)
 
 
@@ -78,7 +88,7 @@ def export_resource(name: str, table: str, extractor, src_dir: pathlib.Path, out
     schema = schema_for(extractor)
     cols = [f.name for f in schema]
 
-    proc = subprocess.Popen(["zstdcat", str(zst)], stdout=subprocess.PIPE)
+    reader = NdjsonZstReader(zst)
     writer = pq.ParquetWriter(out_path, schema, compression="zstd")
 
     batch: dict[str, list] = {c: [] for c in cols}
@@ -93,20 +103,21 @@ def export_resource(name: str, table: str, extractor, src_dir: pathlib.Path, out
         for c in cols:
             batch[c].clear()
 
-    assert proc.stdout is not None
-    for line_bytes in proc.stdout:
+    for line_bytes in reader:
         try:
             line = line_bytes.decode("utf-8").strip()
             if not line:
                 continue
-            resource = json.loads(line)
+            resource = json_codec.loads(line)
             row = extractor(resource)
             batch["resource"].append(line)
             for k, v in row.items():
                 if k == "_active":
                     batch[k].append(bool(v))
+                elif k in COLUMN_TYPES or v is None:
+                    batch[k].append(v)
                 else:
-                    batch[k].append(v if v is None else str(v))
+                    batch[k].append(str(v))
             n += 1
             if n % BATCH_ROWS == 0:
                 flush()
@@ -116,7 +127,7 @@ def export_resource(name: str, table: str, extractor, src_dir: pathlib.Path, out
             errors += 1
     flush()
     writer.close()
-    proc.wait()
+    print(f"    {name}: read {reader.summary()}")
 
     mb = out_path.stat().st_size / 1e6
     print(f"  {name}: {n:,} rows -> {out_path.name} ({mb:,.0f} MB, {errors} errors, {time.time() - t0:,.0f}s)")
@@ -5,30 +5,71 @@ frontend/scripts/ingest-cms-npd.ts (which moves at ~1.3K rows/s and
 takes 3-4 hours total) with bq load jobs (~5-10x faster, ~30 min total).
 
 Pipeline per resource:
-  zstdcat <file>.ndjson.zst
+  <file>.ndjson.zst, decompressed in-process (analysis/ndjson_zst.py)
     -> Python transformation: each FHIR JSON line becomes
        {"resource": <original>, "_id": "...", "_npi": "...", ...}
        so it matches the existing BQ table schema (resource:JSON +
        extracted flat _* columns)
-    -> writes /tmp/ndh-load/<table>.ndjson
+    -> writes /tmp/ndh-load/<table>-NNNNN.ndjson.gz shards
+       (or one plaintext <table>.ndjson with --load-format ndjson)
     -> bq load --replace --source_format=NEWLINE_DELIMITED_JSON
 
+Resources are pipelined, not run one after another: while Practitioner
+transforms, Organization can download and PractitionerRole can load. Each
+stage has its own concurrency (--download-jobs, --transform-jobs,
+--load-jobs), and a per-stage timing report prints at the end. Every stage in
+flight can hold a load file in /tmp/ndh-load at once, so disk use peaks at
+(transform-jobs + load-jobs) load files rather than one.
+
 Usage:
     python analysis/fast_ingest_ndh.py [--data-dir DIR] [--resource NAME]
+                                       [--workers N] [--passthrough]
+                                       [--download-jobs N] [--transform-jobs N]
+                                       [--load-jobs N]
+                                       [--load-format ndjson|ndjson.gz]
+                                       [--shard-mb N] [--gcs-stage gs://...]
+                                       [--delta-from RELEASE]
+
+Load files are gzip shards by default. Plaintext Practitioner alone is tens of
+GB in /tmp, which fills small disks and shows up as I/O time in every run.
+bq load reads gzip natively, but takes one local file per job, so local
+shards load as one --replace job followed by appends. With --gcs-stage the
+shards are copied to Cloud Storage and loaded by one wildcard job, which
+replaces the table atomically.
+
+The transform is CPU-bound: one interpreter decodes, parses, flattens and
+re-serializes every line. --workers N hands line-aligned chunks of the
+decompressed stream to N processes and writes their output back in input
+order, so the load file is byte-identical to the serial path.
 
 Required:
     BigQuery jobUser + dataEditor on cms_npd dataset.
     Local file at <data-dir>/<resource>.ndjson.zst (downloads from
     directory.cms.gov if missing).
+
+Most resources do not change between releases. With --delta-from RELEASE the
+transform compares each line with RELEASE's content-hash index and writes
+only added and changed rows, and the load applies them plus the removed ids
+with one DELETE + MERGE transaction (analysis/ndh_delta.py). That needs the
+previous release indexed once: `python analysis/ndh_delta.py --release R
+--data-dir DIR`. Every delta run writes the index for the next one.
 """
 from __future__ import annotations
 import argparse
+import collections
+import gzip
 import json
 import pathlib
 import subprocess
 import sys
 import time
-from typing import Callable
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import Callable, Iterable, Iterator
 
 # Manifest-driven URL resolution per the 2026-06-05 CMS NDH Slack
 # discussion (Fred Trotter): manifest.json is the stable indirection;
@@ -40,11 +81,27 @@ from ndh_manifest import (  # type: ignore[import-not-found]
     parse_release_date,
     expected_compressed_size,
 )
+from ndjson_zst import NdjsonZstReader  # type: ignore[import-not-found]
+import json_codec  # type: ignore[import-not-found]
 
 PROJECT = "thematic-fort-453901-t7"
 DATASET = "cms_npd"
 DOWNLOADS_BASE = "https://directory.cms.gov/downloads"
 LOAD_DIR = pathlib.Path("/tmp/ndh-load")
+# Lines per unit of work for --workers. Large enough that pickling a chunk to
+# a worker is noise next to parsing it, small enough that a worker holds a
+# few tens of MB of Practitioner JSON at most.
+CHUNK_LINES = 20_000
+PROGRESS_EVERY = 500_000
+LOAD_FORMATS = ("ndjson.gz", "ndjson")
+# Uncompressed bytes per gzip shard. BigQuery caps a gzip JSON source file at
+# 4 GB compressed; NDH rows compress ~8-10x at level 1, so 4 GB raw stays far
+# below that while keeping all but Practitioner and PractitionerRole to one
+# shard.
+DEFAULT_SHARD_MB = 4000
+# Level 1: the transform is the bottleneck and the writer runs in its parent
+# process. Level 6 buys ~15% smaller files for roughly 3x the compress time.
+GZIP_LEVEL = 1
 # DEFAULT_DATA_DIR is no longer hardcoded — the release date is read
 # from the manifest at runtime and the data dir is derived as
 # `frontend/data/cms-npd-<release-date>`. Pass --data-dir to override.
@@ -296,56 +353,215 @@ def download_if_missing(
     return path
 
 
+def loadable_row(
+    raw: bytes,
+    resource: dict,
+    extractor: Callable[[dict], dict],
+    passthrough: bool = False,
+) -> bytes:
+    """One load-file line for a parsed resource whose source bytes are `raw`."""
+    if passthrough:
+        flat = json_codec.dumps(extractor(resource))
+        return b'{"resource":' + raw + b"," + flat[1:] + b"\n"
+    row = {"resource": resource}
+    row.update(extractor(resource))
+    return json_codec.dumps(row) + b"\n"
+
+
+def transform_lines(
+    lines: list[bytes],
+    extractor: Callable[[dict], dict],
+    passthrough: bool = False,
+) -> tuple[bytes, int, int]:
+    """Flatten a chunk of raw NDJSON lines into loadable rows.
+
+    This is the unit of work for both the serial and the --workers path, so
+    the two produce the same bytes by construction rather than by care.
+    Returns (utf-8 bytes, rows, errors). Blank lines are skipped, not counted.
+
+    With `passthrough`, the resource is spliced into the row as the original
+    line bytes and only the small flattened dict is serialized.
+    Re-serializing a whole FHIR document that is already valid JSON was about
+    half the transform's CPU. The row is the same JSON value either way; the
+    bytes differ only in whitespace and in non-ASCII being left as UTF-8
+    rather than \\u-escaped, neither of which a JSON column preserves.
+    The line is still parsed in full, because the extractors need the dict and
+    a line that does not parse must still count as an error, not be loaded.
+    """
+    out: list[bytes] = []
+    errors = 0
+    for line_bytes in lines:
+        try:
+            raw = line_bytes.strip()
+            if not raw:
+                continue
+            # Decode explicitly: json.loads(bytes) would also accept a BOM and
+            # lone surrogates, which the serial path has always counted as errors.
+            resource = json_codec.loads(raw.decode("utf-8"))
+            out.append(loadable_row(raw, resource, extractor, passthrough))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            errors += 1
+    return b"".join(out), len(out), errors
+
+
+def transform_chunks(
+    chunks: Iterable[list[bytes]],
+    extractor: Callable[[dict], dict],
+    workers: int = 1,
+    passthrough: bool = False,
+) -> Iterator[tuple[bytes, int, int]]:
+    """Yield transform_lines results for each chunk, in input order.
+
+    With workers > 1 the chunks go to a process pool. At most 2 x workers
+    chunks are in flight, so a slow writer backs the reader off instead of
+    the whole decompressed file piling up in the parent. Extractors are
+    module-level functions, so they pickle by reference.
+    """
+    if workers <= 1:
+        for chunk in chunks:
+            yield transform_lines(chunk, extractor, passthrough)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: collections.deque = collections.deque()
+        for chunk in chunks:
+            pending.append(pool.submit(transform_lines, chunk, extractor, passthrough))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class LoadWriter:
+    """Write transformed rows as one plaintext file or as rotating gzip shards.
+
+    `out_path` names the plaintext file, `<table>.ndjson`. Shards take its
+    stem: `<table>-00000.ndjson.gz`, `<table>-00001.ndjson.gz`, ... A shard
+    rotates between writes once it holds `shard_bytes` of raw rows, and every
+    write is whole lines, so no row is split across shards.
+    """
+
+    def __init__(
+        self,
+        out_path: pathlib.Path,
+        fmt: str = "ndjson.gz",
+        shard_bytes: int = DEFAULT_SHARD_MB * 1_000_000,
+    ):
+        if fmt not in LOAD_FORMATS:
+            raise ValueError(f"unknown load format {fmt!r}; expected one of {LOAD_FORMATS}")
+        self.out_path = out_path
+        self.fmt = fmt
+        self.shard_bytes = shard_bytes
+        self.paths: list[pathlib.Path] = []
+        self.raw_bytes = 0
+        self._fh = None
+        self._shard_raw = 0
+
+    def _open(self) -> None:
+        if self.fmt == "ndjson":
+            path = self.out_path
+            self._fh = open(path, "wb")
+        else:
+            path = self.out_path.with_name(
+                f"{self.out_path.stem}-{len(self.paths):05d}.ndjson.gz"
+            )
+            self._fh = gzip.open(path, "wb", compresslevel=GZIP_LEVEL)
+        self.paths.append(path)
+        self._shard_raw = 0
+
+    def write(self, data: bytes) -> None:
+        if self._fh is None or (self.fmt != "ndjson" and self._shard_raw >= self.shard_bytes):
+            self.close()
+            self._open()
+        self._fh.write(data)
+        self._shard_raw += len(data)
+        self.raw_bytes += len(data)
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    @property
+    def disk_bytes(self) -> int:
+        return sum(p.stat().st_size for p in self.paths if p.exists())
+
+    def __enter__(self) -> "LoadWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def load_files(out_path: pathlib.Path) -> list[pathlib.Path]:
+    """Every load file transform_to_loadable wrote for `out_path`, in order."""
+    shards = sorted(out_path.parent.glob(f"{out_path.stem}-[0-9]*.ndjson.gz"))
+    return shards or ([out_path] if out_path.exists() else [])
+
+
+def removed_file(out_path: pathlib.Path) -> pathlib.Path:
+    """Where a delta ingest lists the ids that left the release (ndh_delta.py)."""
+    return out_path.with_name(f"{out_path.stem}-removed.ndjson.gz")
+
+
 def transform_to_loadable(
     zst_path: pathlib.Path,
     out_path: pathlib.Path,
     extractor: Callable[[dict], dict],
     name: str,
+    workers: int = 1,
+    passthrough: bool = False,
+    load_format: str = "ndjson.gz",
+    shard_mb: int = DEFAULT_SHARD_MB,
 ) -> int:
+    """Transform one resource file into load files next to `out_path`.
+
+    Writes `out_path` itself for load_format "ndjson", or gzip shards of
+    `shard_mb` raw MB each for "ndjson.gz"; load_files(out_path) lists them.
+    Returns the row count.
+    """
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    proc = subprocess.Popen(
-        ["zstdcat", str(zst_path)],
-        stdout=subprocess.PIPE,
-    )
+    for stale in load_files(out_path):
+        stale.unlink()
+    reader = NdjsonZstReader(zst_path)
     count = 0
     errors = 0
     t0 = time.time()
-    with open(out_path, "w", encoding="utf-8") as out:
-        for line_bytes in proc.stdout:  # type: ignore[union-attr]
-            try:
-                line = line_bytes.decode("utf-8")
-                if not line.strip():
-                    continue
-                resource = json.loads(line)
-                row = {"resource": resource}
-                row.update(extractor(resource))
-                out.write(json.dumps(row, separators=(",", ":")) + "\n")
-                count += 1
-            except (json.JSONDecodeError, UnicodeDecodeError):
-                errors += 1
-            if count % 500_000 == 0 and count > 0:
+    with LoadWriter(out_path, load_format, shard_mb * 1_000_000) as out:
+        chunks = reader.batches(CHUNK_LINES)
+        for data, rows, bad in transform_chunks(chunks, extractor, workers, passthrough):
+            out.write(data)
+            if (count + rows) // PROGRESS_EVERY > count // PROGRESS_EVERY:
                 elapsed = time.time() - t0
-                rate = count / elapsed if elapsed else 0
-                print(f"    {name}: transformed {count:,} rows ({rate:,.0f}/s)")
-    proc.wait()
+                rate = (count + rows) / elapsed if elapsed else 0
+                print(f"    {name}: transformed {count + rows:,} rows ({rate:,.0f}/s)")
+            count += rows
+            errors += bad
+    print(f"    {name}: read {reader.summary()}")
+    print(
+        f"    {name}: wrote {len(out.paths)} {load_format} file(s), "
+        f"{out.disk_bytes / 1e6:,.0f} MB on disk for {out.raw_bytes / 1e6:,.0f} MB of rows"
+    )
     elapsed = time.time() - t0
     rate = count / elapsed if elapsed else 0
-    print(f"    {name}: transform done — {count:,} rows in {elapsed:.1f}s ({rate:,.0f}/s, {errors} errors)")
+    print(
+        f"    {name}: transform done — {count:,} rows in {elapsed:.1f}s "
+        f"({rate:,.0f}/s, {errors} errors, {workers} worker{'s' if workers != 1 else ''}"
+        f"{', passthrough' if passthrough else ''})"
+    )
     return count
 
 
-def bq_load(table: str, ndjson_path: pathlib.Path) -> None:
+def _bq_load_one(table: str, source: str, replace: bool) -> None:
     cmd = [
         "bq", "load",
         "--source_format=NEWLINE_DELIMITED_JSON",
-        "--replace",
+        "--replace" if replace else "--noreplace",
         "--ignore_unknown_values",
         "--max_bad_records=100",
         f"{PROJECT}:{DATASET}.{table}",
-        str(ndjson_path),
+        source,
     ]
     print(f"    bq load: {' '.join(cmd)}")
-    t0 = time.time()
     result = subprocess.run(cmd, capture_output=True, text=True)
     if result.stdout:
         print(f"    bq stdout: {result.stdout}")
@@ -353,7 +569,178 @@ def bq_load(table: str, ndjson_path: pathlib.Path) -> None:
         print(f"    bq stderr: {result.stderr}")
     if result.returncode != 0:
         raise RuntimeError(f"bq load failed for {table} (exit {result.returncode})")
-    print(f"    bq load done in {time.time() - t0:.1f}s")
+
+
+def bq_load(table: str, out_path: pathlib.Path, gcs_stage: str | None = None) -> None:
+    """Load every file transform_to_loadable wrote for `out_path` into `table`.
+
+    With `gcs_stage` (gs://bucket/prefix) the files are copied there and one
+    wildcard job replaces the table atomically. Without it each local file is
+    its own job, because bq load takes one local path: the first replaces the
+    table and the rest append, so a failure partway leaves the table partial,
+    and the error says so.
+    """
+    paths = load_files(out_path)
+    if not paths:
+        raise RuntimeError(f"no load files for {table} at {out_path}")
+    t0 = time.time()
+    if gcs_stage:
+        prefix = f"{gcs_stage.rstrip('/')}/{table}"
+        subprocess.run(["gcloud", "storage", "rm", "--quiet", f"{prefix}/*"],
+                       capture_output=True)
+        subprocess.run(["gcloud", "storage", "cp", *map(str, paths), f"{prefix}/"],
+                       check=True)
+        _bq_load_one(table, f"{prefix}/*", replace=True)
+    else:
+        for i, path in enumerate(paths):
+            try:
+                _bq_load_one(table, str(path), replace=(i == 0))
+            except RuntimeError as exc:
+                if i:
+                    raise RuntimeError(
+                        f"{exc}; {table} holds only shards 0-{i - 1} of {len(paths)}"
+                    ) from exc
+                raise
+    print(f"    bq load done in {time.time() - t0:.1f}s ({len(paths)} file(s))")
+
+
+STAGES = ("download", "transform", "load")
+
+
+def _timed(fn, *args, **kwargs):
+    """Run fn and return (result, start, end) in wall-clock seconds.
+
+    Module-level so it pickles into the transform process pool; time.time()
+    is the same clock in every process on the box.
+    """
+    start = time.time()
+    result = fn(*args, **kwargs)
+    return result, start, time.time()
+
+
+def run_pipeline(
+    targets: list[tuple[str, str, Callable[[dict], dict]]],
+    manifest: dict,
+    data_dir: pathlib.Path,
+    *,
+    download_jobs: int = 1,
+    transform_jobs: int = 1,
+    load_jobs: int = 1,
+    workers: int = 1,
+    passthrough: bool = False,
+    keep_load_files: bool = False,
+    load_format: str = "ndjson.gz",
+    shard_mb: int = DEFAULT_SHARD_MB,
+    gcs_stage: str | None = None,
+    delta_from: str | None = None,
+    release: str | None = None,
+) -> tuple[dict[str, dict[str, tuple[float, float]]], dict[str, str]]:
+    """Download, transform and load every target, overlapping the stages.
+
+    Downloads and loads run in threads: both wait on the network or on bq.
+    Transforms run in processes, because a transform is CPU-bound and two of
+    them in one interpreter would share the GIL. A resource moves to its next
+    stage as soon as its current one finishes, so stage order holds per
+    resource and nothing else is serialized.
+
+    Returns (timings, failures): timings[name][stage] = (start, end), and
+    failures[name] = "stage: error". A failed resource stops there; the
+    others run to completion, as the first tables of a sequential run did.
+
+    With `delta_from` (a release with an index, see ndh_delta.py) the
+    transform writes only rows added or changed since that release, and the
+    load merges them in place of a --replace. `release` names this run's
+    index. The delta transform is single-process; `workers` does not apply.
+    """
+    if delta_from:
+        import ndh_delta  # type: ignore[import-not-found]
+    timings: dict[str, dict[str, tuple[float, float]]] = collections.defaultdict(dict)
+    failures: dict[str, str] = {}
+    in_flight: dict = {}
+
+    def discard(load_path: pathlib.Path) -> None:
+        if not keep_load_files:
+            for path in load_files(load_path):
+                path.unlink()
+            removed_file(load_path).unlink(missing_ok=True)
+
+    with ThreadPoolExecutor(max_workers=download_jobs) as downloads, \
+            ProcessPoolExecutor(max_workers=transform_jobs) as transforms, \
+            ThreadPoolExecutor(max_workers=load_jobs) as loads:
+        for name, table, extractor in targets:
+            url, basename = resolve_file_url(manifest, name)
+            exp_bytes = expected_compressed_size(manifest, name)
+            fut = downloads.submit(
+                _timed, download_if_missing, url, basename, data_dir, exp_bytes,
+            )
+            in_flight[fut] = ("download", name, table, extractor)
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for fut in done:
+                stage, name, table, extractor = in_flight.pop(fut)
+                load_path = LOAD_DIR / f"{table}.ndjson"
+                try:
+                    result, start, end = fut.result()
+                except Exception as exc:  # noqa: BLE001 - reported, then raised by main
+                    failures[name] = f"{stage}: {exc}"
+                    print(f"  !! {name} failed in {stage}: {exc}", file=sys.stderr)
+                    discard(load_path)
+                    continue
+                timings[name][stage] = (start, end)
+                print(f"  -- {name}: {stage} done in {end - start:.1f}s")
+                if stage == "download" and delta_from:
+                    nxt = transforms.submit(
+                        _timed, ndh_delta.delta_to_loadable, result, load_path, extractor,
+                        name, delta_from, release, passthrough, shard_mb,
+                    )
+                elif stage == "download":
+                    nxt = transforms.submit(
+                        _timed, transform_to_loadable, result, load_path, extractor,
+                        name, workers, passthrough, load_format, shard_mb,
+                    )
+                elif stage == "transform" and delta_from:
+                    nxt = loads.submit(
+                        _timed, ndh_delta.bq_merge, table, load_path, extractor, gcs_stage,
+                        release,
+                    )
+                elif stage == "transform":
+                    nxt = loads.submit(_timed, bq_load, table, load_path, gcs_stage)
+                else:
+                    discard(load_path)
+                    continue
+                in_flight[nxt] = (STAGES[STAGES.index(stage) + 1], name, table, extractor)
+    return timings, failures
+
+
+def timing_report(
+    timings: dict[str, dict[str, tuple[float, float]]],
+    t0: float,
+    wall: float,
+) -> list[str]:
+    """Per-resource stage windows, per-stage busy time, and overlap achieved."""
+    lines = [f"  {'resource':25s}" + "".join(f"{s:>22s}" for s in STAGES)]
+    busy = dict.fromkeys(STAGES, 0.0)
+    for name, stages in timings.items():
+        cells = []
+        for s in STAGES:
+            if s in stages:
+                start, end = stages[s]
+                busy[s] += end - start
+                cells.append(f"{start - t0:7.1f}-{end - t0:7.1f} ({end - start:5.0f})")
+            else:
+                cells.append("—")
+        lines.append(f"  {name:25s}" + "".join(f"{c:>22s}" for c in cells))
+    serial = sum(busy.values())
+    lines.append(
+        "  busy: " + ", ".join(f"{s} {busy[s]:.1f}s" for s in STAGES)
+        + f"; sequential sum {serial:.1f}s"
+    )
+    lines.append(
+        f"  wall-clock {wall:.1f}s"
+        + (f" ({serial / wall:.2f}x overlap)" if wall > 0 else "")
+    )
+    return lines
 
 
 def main():
@@ -374,7 +761,66 @@ def main():
     parser.add_argument(
         "--keep-load-files",
         action="store_true",
-        help="don't delete /tmp/ndh-load/*.ndjson after bq load (debug)",
+        help="don't delete /tmp/ndh-load/* load files after bq load (debug)",
+    )
+    parser.add_argument(
+        "--load-format",
+        choices=LOAD_FORMATS,
+        default="ndjson.gz",
+        help="gzip shards (default) or one plaintext NDJSON per table",
+    )
+    parser.add_argument(
+        "--shard-mb",
+        type=int,
+        default=DEFAULT_SHARD_MB,
+        help=f"raw MB of rows per gzip shard. Default: {DEFAULT_SHARD_MB}",
+    )
+    parser.add_argument(
+        "--gcs-stage",
+        default=None,
+        metavar="GS_URI",
+        help=(
+            "gs://bucket/prefix to stage shards in, so each table loads in one "
+            "atomic wildcard job instead of one local job per shard"
+        ),
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help=(
+            "transform processes. Output is byte-identical to the serial "
+            "path; rows/s scales with cores up to what decompression can feed. "
+            "Default: 1"
+        ),
+    )
+    parser.add_argument(
+        "--passthrough",
+        action="store_true",
+        help=(
+            "splice each original line into the row as `resource` instead of "
+            "re-serializing the parsed document. Same JSON value, less CPU."
+        ),
+    )
+    for stage, default, what in (
+        ("download", 2, "concurrent downloads from directory.cms.gov"),
+        ("transform", 1, "resources transforming at once, each with --workers processes"),
+        ("load", 2, "concurrent bq load jobs"),
+    ):
+        parser.add_argument(
+            f"--{stage}-jobs",
+            type=int,
+            default=default,
+            help=f"{what}. Default: {default}",
+        )
+    parser.add_argument(
+        "--delta-from",
+        default=None,
+        metavar="RELEASE",
+        help=(
+            "merge only rows added, changed or removed since RELEASE instead "
+            "of replacing each table. Needs RELEASE's index; see ndh_delta.py"
+        ),
     )
     parser.add_argument(
         "--print-manifest-only",
@@ -415,20 +861,33 @@ def main():
     LOAD_DIR.mkdir(parents=True, exist_ok=True)
 
     overall_t0 = time.time()
-    for name, table, extractor in targets:
-        print(f"\n=== {name} -> {table} ===")
-        url, basename = resolve_file_url(manifest, name)
-        exp_bytes = expected_compressed_size(manifest, name)
-        zst_path = download_if_missing(url, basename, data_dir, expected_bytes=exp_bytes)
-        load_path = LOAD_DIR / f"{table}.ndjson"
-        try:
-            transform_to_loadable(zst_path, load_path, extractor, name)
-            bq_load(table, load_path)
-        finally:
-            if not args.keep_load_files and load_path.exists():
-                load_path.unlink()
-
-    print(f"\nAll done in {time.time() - overall_t0:.1f}s")
+    print(
+        f"\nPipelining {len(targets)} resource(s): download x{args.download_jobs}, "
+        f"transform x{args.transform_jobs} (workers={args.workers}), load x{args.load_jobs}"
+    )
+    timings, failures = run_pipeline(
+        targets, manifest, data_dir,
+        download_jobs=args.download_jobs,
+        transform_jobs=args.transform_jobs,
+        load_jobs=args.load_jobs,
+        workers=args.workers,
+        passthrough=args.passthrough,
+        keep_load_files=args.keep_load_files,
+        load_format=args.load_format,
+        shard_mb=args.shard_mb,
+        gcs_stage=args.gcs_stage,
+        delta_from=args.delta_from,
+        release=release_date,
+    )
+    wall = time.time() - overall_t0
+    print("\nStage timings (seconds from start):")
+    for line in timing_report(timings, overall_t0, wall):
+        print(line)
+    if failures:
+        raise RuntimeError(
+            "ingest incomplete: " + "; ".join(f"{n} ({e})" for n, e in failures.items())
+        )
+    print(f"\nAll done in {wall:.1f}s")
 
 
 if __name__ == "__main__":
@@ -15,8 +15,10 @@ are a flag. State Medicaid systems must demonstrate alignment with PECOS.
 A stale-record-winning-the-check is a real risk.
 
 Method:
-    1. Stream PPEF once.
-    2. Build NPI → list of (ENRLMT_ID, STATE_CD, PROVIDER_TYPE_DESC) tuples.
+    1. Stream PPEF once (_csv_scan, parsed in one process per CPU; the
+       typed parquet copy from convert_claims_csvs.py when there is one).
+    2. Build NPI → list of (ENRLMT_ID, STATE_CD, PROVIDER_TYPE_DESC) tuples
+       for the NPIs with ≥2 distinct STATE_CD values.
     3. For each NPI: if it has ≥2 enrollments AND ≥2 distinct STATE_CD
        values, it's a multi-state record.
     4. Partition output by each state the NPI is enrolled in (so a
@@ -29,6 +31,9 @@ Writes:
     frontend/public/api/v1/findings/pecos-multi-enrollment-state-mismatch.json
     frontend/public/api/v1/findings/pecos-multi-enrollment-state-mismatch-detail.json
     frontend/public/api/v1/states/<state>/h39-pecos-multi-state.csv
+
+Run:
+    python -m analysis.h39_pecos_multi_enrollment
 """
 from __future__ import annotations
 import csv
@@ -38,6 +43,11 @@ import subprocess
 from collections import defaultdict
 from datetime import datetime, timezone
 
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from analysis.claims_sources import _csv_scan as csv_scan
+
 METHODOLOGY_VERSION = "0.7.0-draft"
 DATA_SOURCE_RELEASE = "PPEF 2026-04-01"
 
@@ -71,30 +81,70 @@ def get_commit_sha() -> str:
     return "pending"
 
 
-def main() -> None:
-    # NPI -> list of (enrlmt_id, state_cd, provider_type_desc, first_name, last_name, org_name)
-    npi_enrollments: dict[str, list[dict]] = defaultdict(list)
-    total_rows = 0
+# Enrollment field -> PPEF column.
+ENROLLMENT_FIELDS = {
+    "enrlmt_id": "ENRLMT_ID",
+    "state": "STATE_CD",
+    "provider_type_cd": "PROVIDER_TYPE_CD",
+    "provider_type_desc": "PROVIDER_TYPE_DESC",
+    "first_name": "FIRST_NAME",
+    "last_name": "LAST_NAME",
+    "org_name": "ORG_NAME",
+}
+
+
+class Enrollments(csv_scan.BatchConsumer):
+    """PPEF enrollment records of NPIs enrolled in two or more states.
+
+    Batches are cleaned and kept as Arrow until result(), so the part a
+    parallel scan sends back from each worker is cheap to pass along, and
+    only the NPIs with two or more distinct STATE_CDs (a few percent) ever
+    become dicts.
+    """
+    column = "NPI"
+
+    def __init__(self):
+        self.batches: list[pa.RecordBatch] = []
 
+    def accept(self, npi: str) -> bool:
+        return len(npi) == 10
+
+    def add_batch(self, keys: pa.Array, batch: pa.RecordBatch) -> None:
+        columns = [keys]
+        for field, name in ENROLLMENT_FIELDS.items():
+            col = pc.utf8_trim_whitespace(pc.cast(batch.column(name), pa.string()))
+            columns.append(pc.utf8_upper(col) if field == "state" else col)
+        self.batches.append(pa.RecordBatch.from_arrays(columns, ["npi", *ENROLLMENT_FIELDS]))
+
+    def merge(self, other: Enrollments) -> None:
+        self.batches.extend(other.batches)
+
+    def result(self) -> tuple[int, dict[str, list[dict]]]:
+        """(distinct NPIs, NPI -> enrollments in file order for the multi-state ones)."""
+        schema = pa.schema([(c, pa.string()) for c in ["npi", *ENROLLMENT_FIELDS]])
+        table = pa.Table.from_batches(self.batches, schema)
+        distinct = pc.count_distinct(table.column("npi")).as_py()
+        states = (table.filter(pc.not_equal(table.column("state"), ""))
+                  .group_by("npi").aggregate([("state", "count_distinct")]))
+        multi = states.filter(pc.greater_equal(states.column("state_count_distinct"), 2))
+        table = table.filter(pc.is_in(table.column("npi"), value_set=multi.column("npi")))
+
+        by_npi: dict[str, list[dict]] = {}
+        fields = list(ENROLLMENT_FIELDS)
+        columns = [table.column(f).to_pylist() for f in fields]
+        for npi, *values in zip(table.column("npi").to_pylist(), *columns):
+            by_npi.setdefault(npi, []).append(dict(zip(fields, values)))
+        return distinct, by_npi
+
+
+def main() -> None:
     print(f"Streaming {PPEF_CSV.name}...")
-    with open(PPEF_CSV, newline="", encoding="latin-1") as fh:
-        for row in csv.DictReader(fh):
-            total_rows += 1
-            npi = (row.get("NPI") or "").strip()
-            if not npi or len(npi) != 10:
-                continue
-            state = (row.get("STATE_CD") or "").strip().upper()
-            npi_enrollments[npi].append({
-                "enrlmt_id": (row.get("ENRLMT_ID") or "").strip(),
-                "state": state,
-                "provider_type_cd": (row.get("PROVIDER_TYPE_CD") or "").strip(),
-                "provider_type_desc": (row.get("PROVIDER_TYPE_DESC") or "").strip(),
-                "first_name": (row.get("FIRST_NAME") or "").strip(),
-                "last_name": (row.get("LAST_NAME") or "").strip(),
-                "org_name": (row.get("ORG_NAME") or "").strip(),
-            })
+    ((distinct_npis, npi_enrollments),), stats = csv_scan.scan(
+        PPEF_CSV, [Enrollments()], workers=None)
+    total_rows = stats.rows
+    print(stats.summary())
     print(f"  total PPEF rows: {total_rows:,}")
-    print(f"  distinct NPIs:   {len(npi_enrollments):,}")
+    print(f"  distinct NPIs:   {distinct_npis:,}")
 
     # Identify NPIs with multiple distinct STATE_CDs across enrollments.
     multi_state_npis: list[dict] = []
@@ -188,7 +238,7 @@ def main() -> None:
         print(f"  {entry['npi']}  {entry['name'][:30]:30s}  {len(entry['states'])} states  {entry['enrollment_count']} enrollments")
 
     headline = (
-        f"{len(multi_state_npis):,} of {len(npi_enrollments):,} individual NPIs "
+        f"{len(multi_state_npis):,} of {distinct_npis:,} individual NPIs "
         f"in the CMS Public Provider Enrollment Extract (PPEF, {DATA_SOURCE_RELEASE}) "
         f"have enrollment records in 2 or more distinct US states. Many are "
         f"legitimate multi-state practitioners (telehealth, hospital + private, "
@@ -213,9 +263,9 @@ def main() -> None:
         "commit_sha": get_commit_sha(),
         "headline": headline,
         "numerator": len(multi_state_npis),
-        "denominator": len(npi_enrollments),
+        "denominator": distinct_npis,
         "denominator_note": (
-            f"Denominator = {len(npi_enrollments):,} distinct individual NPIs "
+            f"Denominator = {distinct_npis:,} distinct individual NPIs "
             f"in PPEF {DATA_SOURCE_RELEASE}. Numerator = NPIs with ≥2 distinct "
             f"US-jurisdiction STATE_CD values across their enrollment records. "
             f"Non-US addresses (PPEF allows them) are filtered out so per-state "
@@ -228,7 +278,7 @@ def main() -> None:
             "unit": "count",
             "data": [
                 {"label": "Multi-state NPIs", "value": len(multi_state_npis)},
-                {"label": "Single-state NPIs", "value": len(npi_enrollments) - len(multi_state_npis)},
+                {"label": "Single-state NPIs", "value": distinct_npis - len(multi_state_npis)},
             ],
         },
         "per_state": state_counts,
@@ -254,7 +304,7 @@ def main() -> None:
     detail = {
         "queried_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
         "total_ppef_rows": total_rows,
-        "distinct_npis": len(npi_enrollments),
+        "distinct_npis": distinct_npis,
         "multi_state_npis": len(multi_state_npis),
         "states_with_matches": len(per_state_rows),
         "top_states": state_counts[:15],
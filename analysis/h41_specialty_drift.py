@@ -6,7 +6,7 @@ in Medicare Part B, does the actual procedure mix match what the NPPES-
 registered taxonomy would predict?
 
 Two passes over the CMS Medicare Physician & Other Practitioners by
-Provider AND Service file (same source as H40):
+Provider AND Service file (same source as H40), made in one read:
 
   Pass 1: Build an HCPCS → modal NUCC affinity table. For each HCPCS
   code, the NPPES primary taxonomy that the largest plurality of
@@ -17,6 +17,13 @@ Provider AND Service file (same source as H40):
   codes whose modal NUCC is NOT in the NPI's NPPES taxonomy set.
   "Drift" = modal NUCC outside the NPI's registered NUCC set.
 
+Pass 2 needs the finished affinity table, so the file used to be read
+twice. SpecialtyDrift, a consumer of the shared CSV scan
+(claims_sources/_csv_scan.py), instead keeps the rows either pass counts
+as interned integer ids and runs both passes over those in NumPy once the
+read is done; claims_sources/refresh_partb.py shares that read
+with H40.
+
 The drift threshold is publishable at >= 80% (matches H40/H42); 60-79%
 banded as sensitivity sidecar; >= 95% as high-confidence. The 80%
 threshold is the publishable falsification line; sensitivity bands
@@ -36,23 +43,27 @@ Writes:
     frontend/public/api/v1/states/<state>/h41-specialty-drift.csv         (per-state, publishable + sensitivity)
 """
 from __future__ import annotations
+import argparse
 import csv
 import json
-import os
 import pathlib
 import subprocess
+from array import array
 from collections import Counter, defaultdict
 from datetime import datetime, timezone
 
-from google.cloud import bigquery
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
 
+from analysis import csv_source, qcache, warehouse
+from analysis.claims_sources import _csv_scan as csv_scan
 from analysis.claims_sources._cohorts import (
     VALID_US_JURISDICTIONS,
     is_valid_us_state,
     state_output_dir,
 )
 
-PROJECT = os.environ.get("GCP_PROJECT_ID", "thematic-fort-453901-t7")
 METHODOLOGY_VERSION = "0.7.0-draft"
 DATA_SOURCE_RELEASE = "CY 2023 (RY2025)"
 SERVICE_YEAR = 2023
@@ -93,78 +104,69 @@ def get_commit_sha() -> str:
     return "pending"
 
 
-def load_nppes_primary_taxonomy(client: bigquery.Client) -> dict[str, str]:
+# One query feeds both loaders below. They used to scan npi_optimized
+# separately, with different column lists; with the same SQL the second call
+# is a result-cache hit (analysis/qcache.py) and the run pays for one scan.
+NPPES_TAXONOMY_SQL = f"""
+SELECT npi,
+  {", ".join(f"healthcare_provider_taxonomy_code_{i}" for i in range(1, 16))},
+  {", ".join(f"healthcare_provider_primary_taxonomy_switch_{i}" for i in range(1, 16))}
+FROM `bigquery-public-data.nppes.npi_optimized`
+WHERE npi IS NOT NULL
+"""
+
+
+def _nppes_batches():
+    """NPPES taxonomy rows as column dicts, one record batch at a time."""
+    for batch in warehouse.query_arrow(NPPES_TAXONOMY_SQL).to_batches():
+        yield batch.num_rows, batch.to_pydict()
+
+
+def load_nppes_primary_taxonomy() -> dict[str, str]:
     """{npi -> primary NUCC code}.
 
     Primary = taxonomy slot with healthcare_provider_primary_taxonomy_switch_<n> = 'Y'.
     Falls back to slot 1 if no primary marker is set (some practitioners
     don't mark a primary).
     """
-    code_cols = ", ".join(f"healthcare_provider_taxonomy_code_{i}" for i in range(1, 16))
-    switch_cols = ", ".join(f"healthcare_provider_primary_taxonomy_switch_{i}" for i in range(1, 16))
-    sql = f"""
-    SELECT npi, {code_cols}, {switch_cols}
-    FROM `bigquery-public-data.nppes.npi_optimized`
-    WHERE npi IS NOT NULL
-    """
     out: dict[str, str] = {}
     n_rows = 0
-    for row in client.query(sql).result():
-        primary_code: str | None = None
-        first_code: str | None = None
-        for i in range(1, 16):
-            code = getattr(row, f"healthcare_provider_taxonomy_code_{i}", None)
-            switch = getattr(row, f"healthcare_provider_primary_taxonomy_switch_{i}", None)
-            if code and code.strip():
-                code = code.strip()
-                if first_code is None:
-                    first_code = code
-                if switch and switch.strip().upper() == "Y":
-                    primary_code = code
-                    break
-        chosen = primary_code or first_code
-        if chosen:
-            out[row.npi] = chosen
-        n_rows += 1
+    for n, cols in _nppes_batches():
+        codes = [cols[f"healthcare_provider_taxonomy_code_{i}"] for i in range(1, 16)]
+        switches = [cols[f"healthcare_provider_primary_taxonomy_switch_{i}"] for i in range(1, 16)]
+        for j, npi in enumerate(cols["npi"]):
+            primary_code: str | None = None
+            first_code: str | None = None
+            for code_col, switch_col in zip(codes, switches):
+                code, switch = code_col[j], switch_col[j]
+                if code and code.strip():
+                    code = code.strip()
+                    if first_code is None:
+                        first_code = code
+                    if switch and switch.strip().upper() == "Y":
+                        primary_code = code
+                        break
+            chosen = primary_code or first_code
+            if chosen:
+                out[npi] = chosen
+        n_rows += n
     print(f"NPPES primary: {n_rows:,} rows scanned, {len(out):,} with >=1 taxonomy code")
     return out
 
 
-def load_nppes_taxonomy_set(client: bigquery.Client) -> dict[str, frozenset[str]]:
+def load_nppes_taxonomy_set() -> dict[str, frozenset[str]]:
     """{npi -> frozenset(NUCC codes)} across all 15 slots."""
-    cols = ", ".join(f"healthcare_provider_taxonomy_code_{i}" for i in range(1, 16))
-    sql = f"""
-    SELECT npi, {cols}
-    FROM `bigquery-public-data.nppes.npi_optimized`
-    WHERE npi IS NOT NULL
-    """
     out: dict[str, frozenset[str]] = {}
-    for row in client.query(sql).result():
-        codes: set[str] = set()
-        for i in range(1, 16):
-            val = getattr(row, f"healthcare_provider_taxonomy_code_{i}", None)
-            if val and val.strip():
-                codes.add(val.strip())
-        if codes:
-            out[row.npi] = frozenset(codes)
+    for _, cols in _nppes_batches():
+        codes = [cols[f"healthcare_provider_taxonomy_code_{i}"] for i in range(1, 16)]
+        for j, npi in enumerate(cols["npi"]):
+            found = {c[j].strip() for c in codes if c[j] and c[j].strip()}
+            if found:
+                out[npi] = frozenset(found)
     print(f"NPPES set: {len(out):,} NPIs with >=1 taxonomy")
     return out
 
 
-def _int(v) -> int:
-    try:
-        return int(float(v)) if v not in (None, "") else 0
-    except (TypeError, ValueError):
-        return 0
-
-
-def _float(v) -> float:
-    try:
-        return float(v) if v not in (None, "") else 0.0
-    except (TypeError, ValueError):
-        return 0.0
-
-
 def _band(share: float) -> str:
     if share >= SENSITIVITY_BANDS[1]:
         return ">=95% (high-confidence)"
@@ -175,92 +177,234 @@ def _band(share: float) -> str:
     return "<60%"
 
 
-def build_affinity_table(primary: dict[str, str]) -> dict[str, str]:
-    """Pass 1: HCPCS -> modal NUCC weighted by service volume.
+# Composite keys pack a second id into the low 20 bits; HCPCS, NUCC and
+# state vocabularies are far smaller than 2**20.
+_LOW20 = (1 << 20) - 1
 
-    Only counts NPIs that have a NPPES primary taxonomy. NPIs without
-    NPPES data don't vote on the affinity table.
-    """
-    print(f"\nPass 1: building HCPCS->NUCC affinity table from {SOURCE_CSV.name}...")
-    counts: dict[str, Counter[str]] = defaultdict(Counter)
-    rows_scanned = 0
-    with open(SOURCE_CSV, newline="") as fh:
-        for row in csv.DictReader(fh):
-            rows_scanned += 1
-            if rows_scanned % 2_000_000 == 0:
-                print(f"  pass 1 scanned {rows_scanned:,} rows")
-            npi = (row.get("Rndrng_NPI") or "").strip()
-            hcpcs = (row.get("HCPCS_Cd") or "").strip()
-            nucc = primary.get(npi)
-            if not (npi and hcpcs and nucc):
-                continue
-            srvcs = _int(row.get("Tot_Srvcs"))
-            if srvcs > 0:
-                counts[hcpcs][nucc] += srvcs
 
-    affinity: dict[str, str] = {}
-    for hcpcs, ctr in counts.items():
-        if ctr:
-            affinity[hcpcs] = ctr.most_common(1)[0][0]
-    print(f"Pass 1 done: {rows_scanned:,} rows scanned, {len(affinity):,} HCPCS codes resolved")
-    return affinity
+def _intern(ids: dict[str, int], values: list[str]) -> np.ndarray:
+    """Ids for `values`, numbering unseen ones in order; "" is -1."""
+    return np.fromiter((ids.setdefault(v, len(ids)) if v else -1 for v in values),
+                       dtype=np.int32, count=len(values))
 
 
-def compute_per_npi_drift(
-    affinity: dict[str, str],
-    nppes_set: dict[str, frozenset[str]],
-) -> dict[str, dict]:
-    """Pass 2: per-NPI drift services / total services.
+def _codes(col: pa.Array, ids: dict[str, int], clean) -> np.ndarray:
+    """Per-row ids of a category column, cleaning each distinct value once."""
+    if not pa.types.is_dictionary(col.type):
+        col = pc.dictionary_encode(col)
+    local = _intern(ids, [clean(v or "") for v in col.dictionary.to_pylist()])
+    return local[col.indices.to_numpy(zero_copy_only=False)]
+
 
-    Returns {npi -> {total, drift, billing_states, name, provider_type,
-    paid_at_drift, drift_hcpcs Counter}}.
+def _append(column: array, values: np.ndarray) -> None:
+    column.frombytes(values.astype(column.typecode, copy=False).tobytes())
+
+
+def _view(column: array) -> np.ndarray:
+    return np.frombuffer(column, dtype=column.typecode)
+
+
+def _first(keys: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(distinct keys in order of first appearance, that row, row -> group)."""
+    uniq, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    order = np.argsort(first, kind="stable")
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return uniq[order], first[order], rank[inverse.reshape(-1)]
+
+
+def _tally(owner: np.ndarray, code: np.ndarray, weight: np.ndarray):
+    """(owner, code, summed weight) per distinct pair.
+
+    Each owner's pairs come in order of first appearance, the order a
+    Counter filled row by row would hold them in.
     """
-    print(f"\nPass 2: computing per-NPI drift...")
-    per_npi: dict[str, dict] = {}
-    rows_scanned = 0
-    with open(SOURCE_CSV, newline="") as fh:
-        for row in csv.DictReader(fh):
-            rows_scanned += 1
-            if rows_scanned % 2_000_000 == 0:
-                print(f"  pass 2 scanned {rows_scanned:,} rows, {len(per_npi):,} NPIs tracked")
-            npi = (row.get("Rndrng_NPI") or "").strip()
-            hcpcs = (row.get("HCPCS_Cd") or "").strip()
-            if not (npi and hcpcs):
-                continue
-            nucc_set = nppes_set.get(npi)
-            if not nucc_set:
-                continue
-            modal = affinity.get(hcpcs)
-            if not modal:
-                continue
-            srvcs = _int(row.get("Tot_Srvcs"))
-            if srvcs <= 0:
+    pairs, first, group = _first(owner.astype(np.int64) << 20 | code)
+    sums = np.bincount(group, weights=weight).astype(np.int64)
+    order = np.lexsort((first, pairs >> 20))
+    pairs = pairs[order]
+    return pairs >> 20, pairs & _LOW20, sums[order]
+
+
+def _first_label(owner: np.ndarray, code: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(owner, code) for each owner's first row with a non-blank code."""
+    named = code >= 0
+    owners, first, _ = _first(owner[named])
+    return owners, code[named][first]
+
+
+class SpecialtyDrift(csv_scan.BatchConsumer):
+    """Both passes in one read: HCPCS -> modal NUCC, then per-NPI drift.
+
+    Pass 2 cannot judge a row until pass 1 has seen the whole file, so rows
+    are not judged as they arrive. NPIs, HCPCS codes, NUCC codes, states,
+    names and provider types are interned to integer ids, and each row that
+    could count in pass 2 is kept as those ids plus its services and
+    services x average payment. Pass 1 is summed per batch into a COO
+    table of services per (HCPCS, primary NUCC). result() picks each
+    code's modal NUCC from the table, then judges the kept rows against it
+    in NumPy, summing in file order, so affinity and per_npi are exactly
+    what the two reads produced.
+
+    Only NPIs with a NPPES primary taxonomy vote on the affinity table; only
+    NPIs with a NPPES taxonomy set are evaluated for drift. result() is
+    (affinity, {npi -> {total, drift, billing_states, name, provider_type,
+    paid_at_drift, drift_hcpcs Counter}}).
+    """
+
+    def __init__(self, primary: dict[str, str], nppes_set: dict[str, frozenset[str]]):
+        self.primary = primary
+        self.nppes_set = nppes_set
+        self.npi_ids: dict[str, int] = {}
+        self.hcpcs_ids: dict[str, int] = {}
+        self.nucc_ids: dict[str, int] = {}
+        self.state_ids: dict[str, int] = {}
+        self.name_ids: dict[str, int] = {}
+        self.type_ids: dict[str, int] = {}
+        # Per NPI id: its primary NUCC id (-1 if none), and whether it has
+        # a taxonomy set; the sets themselves as (npi id, NUCC id) pairs.
+        self.npi_primary = array("q")
+        self.npi_has_set = array("b")
+        self.npi_nucc: list[int] = []
+        # Pass 1's COO table, summed per batch: (HCPCS id, NUCC id) packed
+        # into one key, in order of first vote, and its services. The kept
+        # rows grow in place as typed arrays rather than as batch pieces.
+        self.votes = {"pair": array("q"), "srvcs": array("d")}
+        self.rows = {"npi": array("i"), "hcpcs": array("i"), "srvcs": array("q"),
+                     "paid": array("d"), "state": array("i"), "name": array("i"),
+                     "type": array("i")}
+
+    def accept(self, npi: str) -> bool:
+        return bool(npi) and (npi in self.primary or bool(self.nppes_set.get(npi)))
+
+    def _npi_ids(self, keys: pa.Array) -> np.ndarray:
+        enc = pc.dictionary_encode(keys)
+        local = enc.dictionary.to_pylist()
+        seen = len(self.npi_ids)
+        ids = _intern(self.npi_ids, local)
+        for npi, i in zip(local, ids.tolist()):
+            if i < seen:
                 continue
-            avg_paid = _float(row.get("Avg_Mdcr_Pymt_Amt"))
-            data = per_npi.setdefault(npi, {
-                "total": 0,
-                "drift": 0,
-                "paid_at_drift": 0.0,
+            nucc = self.primary.get(npi)
+            self.npi_primary.append(self.nucc_ids.setdefault(nucc, len(self.nucc_ids)) if nucc else -1)
+            codes = self.nppes_set.get(npi)
+            self.npi_has_set.append(bool(codes))
+            for code in codes or ():
+                self.npi_nucc.append(i << 20 | self.nucc_ids.setdefault(code, len(self.nucc_ids)))
+        return ids[enc.indices.to_numpy(zero_copy_only=False)]
+
+    def add_batch(self, keys: pa.Array, batch: pa.RecordBatch) -> None:
+        npi = self._npi_ids(keys)
+        hcpcs = _codes(batch.column("HCPCS_Cd"), self.hcpcs_ids, str.strip)
+        srvcs = pc.cast(pc.fill_null(batch.column("Tot_Srvcs"), 0.0), pa.int64(),
+                        safe=False).to_numpy()
+        counted = (hcpcs >= 0) & (srvcs > 0)
+
+        nucc = np.frombuffer(self.npi_primary, dtype=np.int64)[npi]
+        votes = counted & (nucc >= 0)
+        if votes.any():
+            pair, _, group = _first(hcpcs[votes].astype(np.int64) << 20 | nucc[votes])
+            _append(self.votes["pair"], pair)
+            _append(self.votes["srvcs"], np.bincount(group, weights=srvcs[votes]))
+
+        keep = counted & np.frombuffer(self.npi_has_set, dtype=np.int8)[npi].astype(bool)
+        if not keep.any():
+            return
+        rows = batch.filter(pa.array(keep))
+        avg_paid = pc.fill_null(rows.column("Avg_Mdcr_Pymt_Amt"), 0.0).to_numpy()
+        name = pc.utf8_trim(pc.binary_join_element_wise(
+            pc.utf8_trim_whitespace(rows.column("Rndrng_Prvdr_Last_Org_Name")),
+            pc.utf8_trim_whitespace(rows.column("Rndrng_Prvdr_First_Name")),
+            ", "), characters=", ")
+        out = self.rows
+        _append(out["npi"], npi[keep])
+        _append(out["hcpcs"], hcpcs[keep])
+        _append(out["srvcs"], srvcs[keep])
+        _append(out["paid"], avg_paid * srvcs[keep])
+        _append(out["state"], _codes(rows.column("Rndrng_Prvdr_State_Abrvtn"), self.state_ids,
+                                     lambda v: v.strip().upper()))
+        _append(out["name"], _codes(name, self.name_ids, str))
+        _append(out["type"], _codes(rows.column("Rndrng_Prvdr_Type"), self.type_ids, str.strip))
+
+    def _modal(self) -> np.ndarray:
+        """Modal NUCC id per HCPCS id (-1 where no NPI voted).
+
+        Ties go to the NUCC that voted first, as Counter.most_common does.
+        """
+        pair, first, group = _first(_view(self.votes["pair"]))
+        total = np.bincount(group, weights=_view(self.votes["srvcs"]))
+        best = np.lexsort((first, -total, pair >> 20))
+        pair = pair[best]
+        leader = np.ones(len(pair), dtype=bool)
+        leader[1:] = (pair[1:] >> 20) != (pair[:-1] >> 20)
+        modal = np.full(len(self.hcpcs_ids), -1, dtype=np.int64)
+        modal[pair[leader] >> 20] = pair[leader] & _LOW20
+        return modal
+
+    def result(self) -> tuple[dict[str, str], dict[str, dict]]:
+        modal = self._modal()
+        nucc_codes = list(self.nucc_ids)
+        hcpcs_codes = list(self.hcpcs_ids)
+        affinity = {hcpcs_codes[h]: nucc_codes[n] for h, n in enumerate(modal) if n >= 0}
+
+        cols = {k: _view(v) for k, v in self.rows.items()}
+        judged = modal[cols["hcpcs"]] >= 0
+        if not judged.all():
+            cols = {k: v[judged] for k, v in cols.items()}
+        hcpcs = cols["hcpcs"]
+        npi, srvcs, state = cols["npi"], cols["srvcs"], cols["state"]
+        registered = np.array(self.npi_nucc, dtype=np.int64)
+        drift = ~np.isin(npi.astype(np.int64) << 20 | modal[hcpcs], registered)
+
+        n_ids = len(self.npi_ids)
+        order = _first(npi)[0]
+        total = np.bincount(npi, weights=srvcs, minlength=n_ids)[order]
+        drifted = np.bincount(npi[drift], weights=srvcs[drift], minlength=n_ids)[order]
+        # bincount adds in row order, as the per-row += did.
+        paid = np.bincount(npi[drift], weights=cols["paid"][drift], minlength=n_ids)[order]
+        has_state = state >= 0
+        counters = {
+            "billing_states": (_tally(npi[has_state], state[has_state], srvcs[has_state]),
+                               list(self.state_ids)),
+            "drift_hcpcs": (_tally(npi[drift], hcpcs[drift], srvcs[drift]), hcpcs_codes),
+        }
+        labels = {"name": (_first_label(npi, cols["name"]), list(self.name_ids)),
+                  "provider_type": (_first_label(npi, cols["type"]), list(self.type_ids))}
+
+        npi_codes = list(self.npi_ids)
+        per_npi: dict[str, dict] = {}
+        by_id: dict[int, dict] = {}
+        for i, t, d, p in zip(order.tolist(), total.astype(np.int64).tolist(),
+                              drifted.astype(np.int64).tolist(), paid.tolist()):
+            by_id[i] = per_npi[npi_codes[i]] = {
+                "total": t,
+                "drift": d,
+                "paid_at_drift": p,
                 "billing_states": Counter(),
                 "drift_hcpcs": Counter(),
                 "name": "",
                 "provider_type": "",
-            })
-            data["total"] += srvcs
-            state = (row.get("Rndrng_Prvdr_State_Abrvtn") or "").strip().upper()
-            if state:
-                data["billing_states"][state] += srvcs
-            if not data["name"]:
-                last = (row.get("Rndrng_Prvdr_Last_Org_Name") or "").strip()
-                first = (row.get("Rndrng_Prvdr_First_Name") or "").strip()
-                data["name"] = f"{last}, {first}".strip(", ")
-            if not data["provider_type"]:
-                data["provider_type"] = (row.get("Rndrng_Prvdr_Type") or "").strip()
-            if modal not in nucc_set:
-                data["drift"] += srvcs
-                data["paid_at_drift"] += avg_paid * srvcs
-                data["drift_hcpcs"][hcpcs] += srvcs
-    print(f"Pass 2 done: {rows_scanned:,} rows scanned, {len(per_npi):,} NPIs with NPPES + drift evaluation")
+            }
+        for field, ((owner, code, n), codes) in counters.items():
+            for i, c, k in zip(owner.tolist(), code.tolist(), n.tolist()):
+                by_id[i][field][codes[c]] = k
+        for field, ((owner, code), codes) in labels.items():
+            for i, c in zip(owner.tolist(), code.tolist()):
+                by_id[i][field] = codes[c]
+        return affinity, per_npi
+
+
+def compute_drift(
+    primary: dict[str, str],
+    nppes_set: dict[str, frozenset[str]],
+) -> dict[str, dict]:
+    """Both passes in one read on its own (see SpecialtyDrift)."""
+    print(f"\nScanning {SOURCE_CSV.name} for the affinity table and per-NPI drift...")
+    ((affinity, per_npi),), stats = csv_scan.scan(
+        SOURCE_CSV, [SpecialtyDrift(primary, nppes_set)], progress_every=2_000_000)
+    print(stats.summary())
+    print(f"{len(affinity):,} HCPCS codes resolved, "
+          f"{len(per_npi):,} NPIs with NPPES + drift evaluation")
     return per_npi
 
 
@@ -286,18 +430,26 @@ def _format_record(npi: str, data: dict, nppes_set: dict[str, frozenset[str]]) -
 
 
 def main() -> None:
-    if not SOURCE_CSV.exists():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--no-cache", action="store_true",
+                    help="re-run the NPPES scan even if qcache.py holds it")
+    if ap.parse_args().no_cache:
+        qcache.disable()
+    if not csv_source.exists(SOURCE_CSV):
         print(f"Source file not found at {SOURCE_CSV}. Download it first; see docstring.")
         return
 
-    client = bigquery.Client(project=PROJECT)
     print("Loading NPPES taxonomy from BigQuery (~7.4M rows)...")
-    primary = load_nppes_primary_taxonomy(client)
-    nppes_set = load_nppes_taxonomy_set(client)
+    primary = load_nppes_primary_taxonomy()
+    nppes_set = load_nppes_taxonomy_set()
+
+    per_npi = compute_drift(primary, nppes_set)
+    publish(per_npi, nppes_set)
 
-    affinity = build_affinity_table(primary)
-    per_npi = compute_per_npi_drift(affinity, nppes_set)
 
+def publish(per_npi: dict[str, dict], nppes_set: dict[str, frozenset[str]]) -> None:
+    """Band the per-NPI drift and write the CSVs and finding JSON."""
     print("\nClassifying NPIs into bands...")
     all_records: list[dict] = []
     publishable: list[dict] = []
@@ -452,9 +604,9 @@ def main() -> None:
             "Drift = modal NUCC for the billed HCPCS is NOT in the NPI's NPPES NUCC "
             "set. Sensitivity bands (60% / 95%) published alongside the publishable "
             "(80%) headline so consumers can choose their own falsification threshold. "
-            "Source file streamed TWICE (one pass to build the affinity table, one "
-            "pass to compute per-NPI drift); memory pressure capped at the per-HCPCS "
-            "modal-NUCC Counter (~10K HCPCS codes) and per-NPI accumulator (~1M NPIs)."
+            "Source file streamed once; the affinity table and per-NPI drift are "
+            "both computed from compact per-row integer aggregates (interned NPI, "
+            "HCPCS and NUCC ids) held in memory after the read."
         ),
     }
     out = FINDINGS_DIR / "specialty-billing-drift.json"
@@ -27,11 +27,9 @@ from __future__ import annotations
 
 import argparse
 import collections
-import io
 import json
 import pathlib
 import re
-import subprocess
 import sys
 
 sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
@@ -43,6 +41,8 @@ from h49_ndh_payer_endpoints import (  # noqa: E402
     PAYER_HOST_RE,
     probe,
 )
+import json_codec  # noqa: E402
+from ndjson_zst import NdjsonZstReader  # noqa: E402
 
 REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent
 PUBLISHED = (REPO_ROOT / "frontend" / "public" / "api" / "v1" / "findings"
@@ -52,16 +52,12 @@ PUBLISHED = (REPO_ROOT / "frontend" / "public" / "api" / "v1" / "findings"
 def stream(path: pathlib.Path):
     """Yield parsed resources from a .ndjson.zst without holding it in memory.
 
-    zstd -dc rather than a Python decompressor: the Organization file is
-    ~2 GB decompressed and there is no reason to materialise it.
+    The Organization file is ~2 GB decompressed and there is no reason to
+    materialise it; NdjsonZstReader decompresses in bounded blocks.
     """
-    proc = subprocess.Popen(["zstd", "-dc", str(path)], stdout=subprocess.PIPE)
-    assert proc.stdout is not None
-    for line in io.TextIOWrapper(proc.stdout, encoding="utf-8"):
-        line = line.strip()
-        if line:
-            yield json.loads(line)
-    proc.wait()
+    for line in NdjsonZstReader(path):
+        if line.strip():
+            yield json_codec.loads(line)
 
 
 def main():
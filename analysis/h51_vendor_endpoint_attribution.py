@@ -55,6 +55,7 @@ from google.cloud import bigquery
 
 sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
 from claims_sources._cohorts import bq_job_config  # noqa: E402
+import json_codec  # noqa: E402
 
 PROJECT = "thematic-fort-453901-t7"
 from release import CURRENT_RELEASE as RELEASE_DATE  # noqa: E402
@@ -116,7 +117,7 @@ def fetch(url: str, dest: pathlib.Path) -> dict:
         if r.returncode != 0:
             dest.unlink(missing_ok=True)
             raise RuntimeError(f"curl exit {r.returncode}: {r.stderr.strip()[:160]}")
-    return json.loads(dest.read_text(errors="ignore"))
+    return json_codec.loads(dest.read_text(errors="ignore"))
 
 
 def parse_bundle(bundle: dict, brands: bool) -> tuple[dict, dict, int, int]:
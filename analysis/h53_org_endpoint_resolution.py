@@ -64,7 +64,9 @@ import subprocess
 import sys
 
 sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
 
+import json_codec  # noqa: E402
 from analysis.claims_sources._cohorts import bq_job_config  # noqa: E402
 from analysis.org_systems import GENERIC_OPENERS, normalize  # noqa: E402
 
@@ -154,7 +156,7 @@ def load_epic():
     path = CACHE / EPIC_FILE
     if not path.exists():
         return []
-    bundle = json.loads(path.read_text(errors="ignore"))
+    bundle = json_codec.loads(path.read_text(errors="ignore"))
     by_ref = {}
     orgs = {}
     endpoints = {}
@@ -215,7 +217,7 @@ def load_flat():
         if not path.exists():
             continue
         try:
-            doc = json.loads(path.read_text(errors="ignore"))
+            doc = json_codec.loads(path.read_text(errors="ignore"))
         except json.JSONDecodeError:
             continue
         entries = (doc.get("entry") if isinstance(doc, dict) else None) or []
@@ -264,6 +266,85 @@ def load_aliases():
             for a in doc.get("aliases", [])}
 
 
+class BrandTrie:
+    """One state's vendor brands as a token trie, for brand_match in resolve().
+
+    Scanning every brand in the state for every organization is
+    O(orgs x brands), which is what made CA, TX and the enrollment pass slow.
+    Here an organization name walks down the trie one token at a time, and
+    the brands sharing exactly `d` leading tokens with it are the brands under
+    the depth-`d` node, less those under the child its next token leads to.
+
+    Each node keeps up to two brands from its subtree, and up to two from its
+    subtree without each child. Two is all a match needs: one brand at the
+    winning depth resolves, and two means ambiguous. A lookup is O(tokens).
+    """
+
+    __slots__ = ("children", "own", "all", "without")
+
+    def __init__(self):
+        self.children = {}
+        self.own = ()      # the brand whose tokens end exactly here, if any
+        self.all = ()      # up to two brands anywhere in this subtree
+        self.without = {}  # child token -> up to two brands not under it
+
+    @classmethod
+    def build(cls, brands):
+        """`brands` maps a brand's token tuple to its vendor row."""
+        root = cls()
+        for toks, v in brands.items():
+            node = root
+            for t in toks:
+                node = node.children.setdefault(t, cls())
+            node.own = (v,)
+        root._summarize()
+        return root
+
+    def _summarize(self):
+        for child in self.children.values():
+            child._summarize()
+        # prefix[i] holds the brands before child i, suffix[i] those from it on.
+        kids = list(self.children.items())
+        prefix = [self.own]
+        for _, child in kids:
+            prefix.append((prefix[-1] + child.all)[:2])
+        suffix = [()]
+        for _, child in reversed(kids):
+            suffix.append((child.all + suffix[-1])[:2])
+        suffix.reverse()
+        self.all = prefix[-1]
+        self.without = {t: (prefix[i] + suffix[i + 1])[:2]
+                        for i, (t, _) in enumerate(kids)}
+
+    def match(self, org_toks):
+        """(brands sharing the longest usable prefix, its length), else ((), 0).
+
+        The rules are resolve()'s: a prefix made only of generic openers or
+        short tokens identifies nothing, and a single shared token counts only
+        for a brand that is that one token.
+        """
+        first = next((i for i, t in enumerate(org_toks)
+                      if t not in GENERIC_OPENERS and len(t) >= 3), len(org_toks))
+        path = []
+        node = self
+        for t in org_toks:
+            node = node.children.get(t)
+            if node is None:
+                break
+            path.append(node)
+        for d in range(len(path), first, -1):
+            node = path[d - 1]
+            if d == 1:
+                found = node.own
+            elif d == len(path):
+                found = node.all
+            else:
+                found = node.without[org_toks[d]]
+            if found:
+                return found, d
+        return (), 0
+
+
 def resolve(org_rows, vendor_rows, ep_by_npi, npi_url, aliases=None):
     aliases = aliases or {}
     vendor_by_brand = {}
@@ -298,6 +379,7 @@ def resolve(org_rows, vendor_rows, ep_by_npi, npi_url, aliases=None):
             vendor_by_brand.setdefault((normalize(label), st), v)
 
     ambiguous = 0
+    tries = {}
 
     def brand_match(org_name, state):
         """Longest distinctive shared prefix, refused when it is ambiguous.
@@ -310,41 +392,23 @@ def resolve(org_rows, vendor_rows, ep_by_npi, npi_url, aliases=None):
         """
         nonlocal ambiguous
         org_toks = tuple(normalize(org_name).split())
-        if not org_toks:
+        if not org_toks or state not in brands_by_state:
             return None
-        best = {}
-        best_len = 0
-        for toks, v in brands_by_state.get(state, {}).items():
-            shared = 0
-            for a, b in zip(org_toks, toks):
-                if a != b:
-                    break
-                shared += 1
-            if shared == 0:
-                continue
-            prefix = org_toks[:shared]
-            if all(t in GENERIC_OPENERS or len(t) < 3 for t in prefix):
-                continue  # a shared "THE COMMUNITY" prefix identifies nothing
-            # One shared token is only enough when the vendor's whole brand IS
-            # that token, meaning the vendor treats it as the complete identity
-            # ("Geisinger", "WellSpan", "Guthrie"). Otherwise a single token
-            # off the front of a longer brand is far too weak: "Penn Medicine"
-            # and "Penn State Health" are different systems, and ambiguity
-            # rejection cannot catch it because Penn State Health is absent
-            # from Epic's Pennsylvania set, which makes the wrong match look
-            # unique.
-            if shared == 1 and len(toks) > 1:
-                continue
-            if shared > best_len:
-                best_len, best = shared, {normalize(v["brand"] or v["name"]): v}
-            elif shared == best_len:
-                best.setdefault(normalize(v["brand"] or v["name"]), v)
+        if state not in tries:
+            tries[state] = BrandTrie.build(brands_by_state[state])
+        # Generic-only prefixes and the single-token rule live in match():
+        # a shared "THE COMMUNITY" prefix identifies nothing, and one token
+        # off the front of a longer brand is far too weak. "Penn Medicine"
+        # and "Penn State Health" are different systems, and ambiguity
+        # rejection cannot catch it because Penn State Health is absent from
+        # Epic's Pennsylvania set, which makes the wrong match look unique.
+        best, best_len = tries[state].match(org_toks)
         if not best:
             return None
         if len(best) > 1:
             ambiguous += 1
             return None
-        return next(iter(best.values())), best_len
+        return best[0], best_len
 
     out = []
     tiers = collections.Counter()
@@ -26,25 +26,25 @@ from __future__ import annotations
 import argparse
 import collections
 import datetime as dt
-import io
 import json
 import pathlib
 import subprocess
 import sys
 
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+
+import json_codec  # noqa: E402
+from ndjson_zst import NdjsonZstReader  # noqa: E402
+
 REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent
 OUT = REPO_ROOT / "frontend" / "public" / "api" / "v1" / "findings"
 METHODOLOGY = "0.7.2-draft"
 
 
 def stream(path: pathlib.Path):
-    proc = subprocess.Popen(["zstd", "-dc", str(path)], stdout=subprocess.PIPE)
-    assert proc.stdout is not None
-    for line in io.TextIOWrapper(proc.stdout, encoding="utf-8"):
-        line = line.strip()
-        if line:
-            yield json.loads(line)
-    proc.wait()
+    for line in NdjsonZstReader(path):
+        if line.strip():
+            yield json_codec.loads(line)
 
 
 def _commit_sha():
@@ -68,6 +68,10 @@ import threading
 import time
 from concurrent.futures import ThreadPoolExecutor
 
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+
+import json_codec  # noqa: E402
+
 REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent
 DATA_DIR = REPO_ROOT / "analysis" / "data" / "payer"
 
@@ -115,7 +119,13 @@ RESOURCES = ("Practitioner", "Organization", "Location", "PractitionerRole")
 
 
 def _digest(rid, blob):
-    """64-bit digest of a resource id plus its canonical JSON."""
+    """64-bit digest of a resource id plus its canonical JSON.
+
+    `blob` must come from json_codec.dumps_canonical, which stays on the
+    standard library whatever parser is installed: a resume rebuilds the
+    seen-set from parts an earlier run wrote, so the bytes must not depend on
+    which JSON backend either run happened to have.
+    """
     return int.from_bytes(
         hashlib.blake2b(f"{rid}\x00{blob}".encode(), digest_size=8).digest(), "big"
     )
@@ -143,7 +153,7 @@ def read_resources(out_dir, resource):
                     if not line:
                         continue
                     try:
-                        yield json.loads(line)
+                        yield json_codec.loads(line)
                     except json.JSONDecodeError:
                         continue  # partial trailing line from a killed run
         except (EOFError, OSError):
@@ -203,7 +213,7 @@ class Harvester:
         if code != "200":
             return None, code
         try:
-            return json.loads(body), code
+            return json_codec.loads(body), code
         except json.JSONDecodeError:
             return None, code
 
@@ -236,7 +246,7 @@ class Harvester:
             if not isinstance(res, dict):
                 continue
             rid = res.get("id")
-            blob = json.dumps(res, sort_keys=True, separators=(",", ":"))
+            blob = json_codec.dumps_canonical(res)
             rows.append((rid, _digest(rid, blob), blob))
 
         with self.lock:
@@ -266,7 +276,7 @@ class Harvester:
         # Rebuild the dedup set from what is already on disk so a resumed run
         # cannot re-write rows it already has.
         for res in read_resources(self.out_dir, self.resource):
-            blob = json.dumps(res, sort_keys=True, separators=(",", ":"))
+            blob = json_codec.dumps_canonical(res)
             rid = res.get("id")
             self.seen.add(_digest(rid, blob))
             self.ids_seen.add(rid)
@@ -458,7 +468,7 @@ class RoleFetcher:
         if resume and done_path.exists():
             self.done_ids = set(done_path.read_text().split())
             for res in read_resources(self.out_dir, "PractitionerRole"):
-                blob = json.dumps(res, sort_keys=True, separators=(",", ":"))
+                blob = json_codec.dumps_canonical(res)
                 self.h.seen.add(_digest(res.get("id"), blob))
                 self.h.ids_seen.add(res.get("id"))
             self.h.n_written = len(self.h.seen)
@@ -52,12 +52,12 @@ from google.cloud import bigquery
 PROJECT = "thematic-fort-453901-t7"
 DATASET = "cms_npd"
 NPPES_DATASET = "bigquery-public-data.nppes"
-LEIE_TABLE = f"{PROJECT}.{DATASET}.oig_leie"
-SAM_TABLE = f"{PROJECT}.{DATASET}.sam_exclusions"
 import sys
 
 sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
 from claims_sources._cohorts import bq_job_config  # noqa: E402
+from analysis.claims_sources import _exclusions as exclusions  # noqa: E402
 from release import CURRENT_RELEASE as RELEASE_DATE  # noqa: E402
 METHODOLOGY_VERSION = "0.4.0"
 CRITICAL_RISK_THRESHOLD = 1.5
@@ -105,7 +105,8 @@ def luhn_check(npi: str) -> bool:
 def run() -> None:
     client = bigquery.Client(project=PROJECT)
 
-    # Single CTE-based query computes all four signals at once. We score
+    # One CTE-based query computes the NDH and NPPES signals; LEIE and SAM
+    # come from the exclusion index (claims_sources/_exclusions.py). We score
     # only practitioner NPIs because the SMD letter's high-risk focus is on
     # provider-type screening (42 CFR 455.450). Organization revalidation
     # is a separate workflow.
@@ -119,22 +120,6 @@ def run() -> None:
       FROM `{PROJECT}.{DATASET}.practitioner`
       WHERE _npi IS NOT NULL
     ),
-    active_leie AS (
-      SELECT NPI, MIN(EXCLDATE) AS leie_excldate
-      FROM `{LEIE_TABLE}`
-      WHERE NPI != '' AND NPI != '0000000000'
-        AND (REINDATE = '00000000' OR REINDATE IS NULL OR REINDATE = '')
-      GROUP BY NPI
-    ),
-    active_sam AS (
-      SELECT
-        npi,
-        CAST(MIN(active_date) AS STRING) AS sam_active_date
-      FROM `{SAM_TABLE}`
-      WHERE REGEXP_CONTAINS(npi, r'^[1-9]\\d{{9}}$')
-        AND record_status = 'Active'
-      GROUP BY npi
-    ),
     nppes_join AS (
       SELECT
         p._npi,
@@ -143,18 +128,10 @@ def run() -> None:
         p._state,
         nppes.npi IS NOT NULL                       AS in_nppes,
         nppes.npi_deactivation_date IS NOT NULL     AS nppes_deactivated,
-        CAST(nppes.npi_deactivation_date AS STRING) AS nppes_deactivation_date,
-        leie.NPI IS NOT NULL                        AS oig_excluded,
-        leie.leie_excldate                          AS leie_excldate,
-        sam.npi IS NOT NULL                         AS sam_excluded,
-        sam.sam_active_date                         AS sam_active_date
+        CAST(nppes.npi_deactivation_date AS STRING) AS nppes_deactivation_date
       FROM ndh_practitioners p
       LEFT JOIN `{NPPES_DATASET}.npi_raw` nppes
         ON p._npi = CAST(nppes.npi AS STRING)
-      LEFT JOIN active_leie leie
-        ON p._npi = leie.NPI
-      LEFT JOIN active_sam sam
-        ON p._npi = sam.npi
     )
     SELECT
       _npi,
@@ -163,16 +140,17 @@ def run() -> None:
       _state,
       in_nppes,
       nppes_deactivated,
-      nppes_deactivation_date,
-      oig_excluded,
-      leie_excldate,
-      sam_excluded,
-      sam_active_date
+      nppes_deactivation_date
     FROM nppes_join
     """
     print(f"Running composite cohort query — this may take ~3-5 min on 7.4M practitioners...")
     rows = list(client.query(sql).result())
     print(f"  Loaded {len(rows):,} practitioner NPIs")
+    index = exclusions.load()
+    leie_excldates = index.earliest("LEIE")
+    sam_active_dates = index.earliest("SAM", sam_status="Active")
+    print(f"  Exclusion index: {len(leie_excldates):,} LEIE and "
+          f"{len(sam_active_dates):,} SAM active NPIs")
 
     # Score each NPI in Python (Luhn check is Python-side; remaining signals
     # come from the BQ row).
@@ -216,15 +194,17 @@ def run() -> None:
 
     for r in rows:
         npi = r._npi
+        leie_excldate = leie_excldates.get(npi)
+        sam_active_date = sam_active_dates.get(npi)
         score = 0.0
         reasons = []
 
-        if r.oig_excluded:
+        if leie_excldate is not None:
             score += 1.5
             reasons.append("oig_excluded")
             reason_counts["oig_excluded"] += 1
 
-        if r.sam_excluded:
+        if sam_active_date is not None:
             score += 1.5
             reasons.append("sam_excluded")
             reason_counts["sam_excluded"] += 1
@@ -271,8 +251,8 @@ def run() -> None:
             given = (r._given_name or "").strip()
             # Format LEIE date: YYYYMMDD string → YYYY-MM-DD
             leie_dt = ""
-            if r.leie_excldate and len(r.leie_excldate) == 8:
-                leie_dt = f"{r.leie_excldate[:4]}-{r.leie_excldate[4:6]}-{r.leie_excldate[6:8]}"
+            if leie_excldate and len(leie_excldate) == 8:
+                leie_dt = f"{leie_excldate[:4]}-{leie_excldate[4:6]}-{leie_excldate[6:8]}"
             cohort.append({
                 "npi": npi,
                 "name": f"{family}, {given}".strip(", "),
@@ -281,7 +261,7 @@ def run() -> None:
                 "reasons": reasons,
                 "bucket": bucket,
                 "leie_excldate": leie_dt,
-                "sam_active_date": r.sam_active_date or "",
+                "sam_active_date": sam_active_date or "",
                 "nppes_deactivation_date": r.nppes_deactivation_date or "",
             })
 
@@ -35,6 +35,7 @@ Usage:
 
 Loads to:
     thematic-fort-453901-t7.cms_npd.oig_leie
+    then rebuilds analysis/data/exclusions/ (claims_sources/_exclusions.py)
 
 Required:
     BigQuery jobUser + dataEditor on cms_npd dataset.
@@ -46,10 +47,15 @@ import io
 import json
 import pathlib
 import shutil
+import sys
 import urllib.request
 from datetime import datetime, timezone
 from google.cloud import bigquery
 
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+from analysis.claims_sources._cohorts import bq_job_config  # noqa: E402
+from analysis.claims_sources import _exclusions as exclusions  # noqa: E402
+
 PROJECT = "thematic-fort-453901-t7"
 DATASET = "cms_npd"
 TABLE = f"{PROJECT}.{DATASET}.oig_leie"
@@ -127,7 +133,7 @@ def report_quality(client: bigquery.Client) -> dict:
       COUNT(DISTINCT STATE)                                            AS distinct_states
     FROM `{TABLE}`
     """
-    row = next(iter(client.query(sql).result()))
+    row = next(iter(client.query(sql, job_config=bq_job_config()).result()))
     stats = {
         "total": int(row.total),
         "with_real_npi": int(row.with_real_npi),
@@ -157,6 +163,8 @@ def run(from_csv: str | None = None) -> None:
     stats["loaded_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
     stats["source"] = from_csv or LEIE_URL
     print(f"\n{json.dumps(stats, indent=2)}")
+    # Findings read LEIE through the exclusion index; rebuild it from the new load.
+    exclusions.load(refresh=True)
 
 
 if __name__ == "__main__":
@@ -39,6 +39,10 @@ the directory is measured per state rather than assumed.
 
 Cost: zero. Four public CSV downloads, no BigQuery, no paid API.
 
+The downloads are cached under analysis/data/pecos/ and may be compressed
+there to save disk (`zstd --rm ppef_enrollment.csv`, or `.gz` / `.zip`);
+they are read through analysis/csv_source.py in whichever form is present.
+
 Usage:
     python analysis/ingest_pecos_affiliations.py
     python analysis/ingest_pecos_affiliations.py --state PA --print-top 20
@@ -60,6 +64,9 @@ import subprocess
 import sys
 
 REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+from analysis import csv_source  # noqa: E402
+
 OUT_DIR = REPO_ROOT / "frontend" / "public" / "api" / "v1" / "findings"
 CACHE = REPO_ROOT / "analysis" / "data" / "pecos"
 
@@ -77,6 +84,9 @@ PPEF_TITLE = "Medicare Fee-For-Service  Public Provider Enrollment"
 
 METHODOLOGY_VERSION = "0.7.3-draft"
 
+# File name -> the encoding read_csv found it in, for the payload's sources.
+ENCODINGS: dict[str, str] = {}
+
 SOURCES = {
     "dac": ("dac_national.csv", "provider-data", DAC_ID),
     "facility": ("facility_affiliation.csv", "provider-data", FACILITY_ID),
@@ -150,16 +160,16 @@ def resolve_url(kind, key):
 def read_csv(path):
     """CMS ships some of these latin-1 and some utf-8, with no way to tell
     from the response. Reading the wrong one raises partway through a 400 MB
-    file, which looks exactly like a truncated download."""
-    try:
-        with open(path, encoding="utf-8-sig", newline="") as fh:
-            for row in csv.DictReader(fh):
-                yield row
-        return
-    except UnicodeDecodeError:
-        pass
-    with open(path, encoding="latin-1", newline="") as fh:
+    file, which looks exactly like a truncated download.
+
+    Trying utf-8 and starting over in latin-1 on the first bad byte handed
+    the caller every row before it twice. The file is read once instead,
+    as utf-8 until a byte says otherwise (csv_source's DETECT), and the
+    encoding it turned out to be is recorded in ENCODINGS by file name."""
+    path = pathlib.Path(path)
+    with csv_source.open_text(path, encoding=csv_source.DETECT) as fh:
         yield from csv.DictReader(fh)
+        ENCODINGS[path.name] = csv_source.detected_encoding(fh)
 
 
 def categorize(provider_type):
@@ -313,13 +323,14 @@ def main():
     paths, modified = {}, {}
     for name, (filename, kind, key) in SOURCES.items():
         dest = CACHE / filename
-        if args.refresh or not dest.exists() or dest.stat().st_size == 0:
+        cached = csv_source.locate(dest)
+        if args.refresh or cached is None or cached.stat().st_size == 0:
             url, mod = resolve_url(kind, key)
             print(f"Downloading {name} (modified {mod})")
             _curl(url, dest)
             modified[name] = mod
         else:
-            print(f"Using cached {dest.name}")
+            print(f"Using cached {cached.name}")
             try:
                 _, modified[name] = resolve_url(kind, key)
             except Exception:
@@ -368,7 +379,8 @@ def main():
         "release_date": "CMS enrollment files (see sources)",
         "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
         "methodology_version": METHODOLOGY_VERSION,
-        "sources": {k: {"file": SOURCES[k][0], "modified": modified.get(k)}
+        "sources": {k: {"file": SOURCES[k][0], "modified": modified.get(k),
+                        "encoding": ENCODINGS.get(SOURCES[k][0])}
                     for k in SOURCES},
         "states": {},
     }
@@ -24,6 +24,8 @@ License notes:
 
 Once ingested, BigQuery destination:
    thematic-fort-453901-t7.cms_npd.sam_exclusions
+and the local exclusion index (analysis/data/exclusions/, see
+analysis/claims_sources/_exclusions.py) is rebuilt from it.
 
 Then update analysis/high_risk_cohort.py to add the SAM signal at weight 1.5
 (reason code: sam_excluded), and analysis/h25_sam_exclusions.py for the
@@ -66,6 +68,9 @@ REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent
 SAMPLE_DATA_DIR = REPO_ROOT / "sample-data"
 SAM_CSV_GLOB = "SAM_Exclusions_Public_Extract_V2_*.CSV"
 
+sys.path.insert(0, str(REPO_ROOT))
+from analysis.claims_sources import _exclusions as exclusions  # noqa: E402
+
 
 def _latest_local_extract() -> pathlib.Path | None:
     matches = sorted(SAMPLE_DATA_DIR.glob(SAM_CSV_GLOB))
@@ -191,6 +196,8 @@ def main() -> None:
 
     print(f"Done in {(datetime.now(timezone.utc) - started).total_seconds():.1f}s. "
           f"{rows:,} rows in {TABLE}.")
+    # Findings read SAM through the exclusion index; rebuild it from the new load.
+    exclusions.load(refresh=True)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,225 @@
+"""One JSON codec for the streaming scripts, fast when it can be.
+
+The streaming paths (fast_ingest_ndh, export_parquet, the payer harvester,
+h55, h49_recheck_release and the vendor bundle loaders in h51/h53) spend most
+of their CPU in `json.loads`, and the ingest spends much of the rest in
+`json.dumps`. orjson and msgspec do both several times faster. Neither is a
+hard dependency: this module picks the first one installed, in that order, and
+falls back to the standard library, so every script runs either way.
+
+    from json_codec import loads, dumps, dumps_canonical
+
+    loads(b'{"id": "1"}')       # bytes or str in, Python objects out
+    dumps({"id": "1"})          # compact UTF-8 bytes
+    dumps_canonical(resource)   # str, always byte-identical to stdlib
+
+Set AINPI_JSON_BACKEND=json|orjson|msgspec to force a backend.
+
+**What is and is not the same across backends.** Parsed values are: every
+backend reads the same objects, keeps object key order, and lets the last of a
+duplicated key win. Where a fast backend rejects input the standard library
+accepts (NaN, Infinity, a BOM on bytes), `loads` retries with the standard
+library, so what parses and what raises is unchanged. The one known value
+difference: some orjson releases read an integer past 64 bits as a float
+rather than refusing it. No valid FHIR value is that wide (`integer` is 32-bit
+and `integer64` is a JSON string), so it is documented, not guarded. Encoded
+bytes are not the same: the fast backends write non-ASCII as raw UTF-8 where
+the standard library writes `\\u00f1`, and format some floats differently
+(`1e-5`, not `1e-05`). So a load file written through `dumps` with orjson or
+msgspec installed is not byte-identical to one written before this module
+existed: a name like "Muñoz" is now its UTF-8 bytes, not `Mu\\u00f1oz`. That
+is fine for a load file, whose consumer (BigQuery, pyarrow) parses it to the
+same value, and wrong for anything hashed. `dumps_canonical` is therefore always
+the standard library with sorted keys and `(",", ":")` separators, because the
+payer harvester's dedup digest is computed over exactly those bytes, and a
+resumed harvest rebuilds its seen-set from files an earlier run wrote.
+
+Run directly to compare backends on NDH-shaped lines, or on a real file:
+
+    python analysis/json_codec.py
+    python analysis/json_codec.py --file frontend/data/cms-npd-2026-08-20/Practitioner.ndjson.zst
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from typing import Any, Callable
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional speedup
+    msgspec = None
+
+
+def _json_loads(data: bytes | str) -> Any:
+    return json.loads(data)
+
+
+def _json_dumps(obj: Any) -> bytes:
+    # ASCII-escaped, as these scripts wrote before the fast backends, so a
+    # lone surrogate (which json.loads will happily produce) cannot fail the
+    # encode and abort a multi-million-row file.
+    return json.dumps(obj, separators=(",", ":")).encode("ascii")
+
+
+_BACKENDS: dict[str, tuple[Callable[[bytes | str], Any], Callable[[Any], bytes]]] = {}
+if orjson is not None:
+    _BACKENDS["orjson"] = (orjson.loads, orjson.dumps)
+if msgspec is not None:
+    _msgspec_decoder = msgspec.json.Decoder()
+    _msgspec_encoder = msgspec.json.Encoder()
+    _BACKENDS["msgspec"] = (_msgspec_decoder.decode, _msgspec_encoder.encode)
+_BACKENDS["json"] = (_json_loads, _json_dumps)
+
+
+def available() -> list[str]:
+    """Installed backends, fastest first. "json" is always last."""
+    return list(_BACKENDS)
+
+
+def _pick() -> str:
+    forced = os.environ.get("AINPI_JSON_BACKEND")
+    if forced:
+        if forced not in _BACKENDS:
+            raise RuntimeError(
+                f"AINPI_JSON_BACKEND={forced!r} is not installed; have {available()}"
+            )
+        return forced
+    return available()[0]
+
+
+BACKEND = _pick()
+_loads, _dumps = _BACKENDS[BACKEND]
+
+
+def loads(data: bytes | str) -> Any:
+    """Parse JSON text. Accepts and rejects exactly what `json.loads` does.
+
+    Raises json.JSONDecodeError (or UnicodeDecodeError for undecodable bytes),
+    whichever backend is active, so existing except clauses keep working.
+    """
+    if _loads is _json_loads:
+        return json.loads(data)
+    try:
+        return _loads(data)
+    except (ValueError, TypeError):
+        # orjson.JSONDecodeError and msgspec.DecodeError are both ValueErrors.
+        # Input the fast parser refuses is rare; let the standard library
+        # decide, so acceptance and the error type match it exactly.
+        return json.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    """Compact UTF-8 JSON. For output a parser reads, never for hashing.
+
+    Non-ASCII is raw UTF-8 with a fast backend and `\\u`-escaped with the
+    standard library; see the module docstring.
+    """
+    if _dumps is _json_dumps:
+        return _json_dumps(obj)
+    try:
+        return _dumps(obj)
+    except (TypeError, ValueError, OverflowError):
+        # Integers past 64 bits and other shapes only the stdlib encodes.
+        return _json_dumps(obj)
+
+
+def dumps_canonical(obj: Any) -> str:
+    """Sorted-key, compact, ASCII-escaped JSON: stable across backends and runs."""
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"))
+
+
+# Representative NDH line shapes, used when no --file is given. Lengths and
+# nesting follow the bulk export: Practitioner is the widest, Endpoint the
+# flattest, PractitionerRole the most numerous.
+_SAMPLE_LINES = [
+    json.dumps({
+        "resourceType": "Practitioner", "id": "1234567890",
+        "meta": {"lastUpdated": "2026-08-20T21:28:00Z",
+                 "profile": ["http://hl7.org/fhir/us/ndh/StructureDefinition/ndh-Practitioner"]},
+        "identifier": [{"use": "official", "system": "http://hl7.org/fhir/sid/us-npi",
+                        "value": "1234567890",
+                        "type": {"coding": [{"system": "http://terminology.hl7.org/CodeSystem/v2-0203",
+                                             "code": "NPI"}]}}],
+        "active": True,
+        "name": [{"use": "official", "family": "Muñoz", "given": ["José", "A"],
+                  "text": "José A Muñoz"}],
+        "telecom": [{"system": "phone", "value": "412-555-0101", "use": "work"},
+                    {"system": "fax", "value": "412-555-0102", "use": "work"}],
+        "address": [{"use": "work", "line": ["100 Main St", "Suite 200"],
+                     "city": "Pittsburgh", "state": "PA", "postalCode": "15213",
+                     "country": "US"}],
+        "gender": "female",
+        "qualification": [{"code": {"coding": [{"system": "http://nucc.org/provider-taxonomy",
+                                                "code": "207Q00000X",
+                                                "display": "Family Medicine Physician"}]},
+                           "issuer": {"display": "PA Board of Medicine"}}] * 2,
+        "extension": [{"url": "http://hl7.org/fhir/us/ndh/StructureDefinition/base-ext-verification-status",
+                       "valueCodeableConcept": {"coding": [{"code": "complete"}]}}],
+    }),
+    json.dumps({
+        "resourceType": "PractitionerRole", "id": "pr-000017",
+        "active": True,
+        "practitioner": {"reference": "Practitioner/1234567890"},
+        "organization": {"reference": "Organization/1987654321"},
+        "specialty": [{"coding": [{"system": "http://nucc.org/provider-taxonomy",
+                                   "code": "207Q00000X", "display": "Family Medicine"}]}],
+        "location": [{"reference": "Location/loc-1"}, {"reference": "Location/loc-2"}],
+        "telecom": [{"system": "phone", "value": "412-555-0101"}],
+    }),
+    json.dumps({
+        "resourceType": "Endpoint", "id": "ep-42", "status": "active",
+        "connectionType": {"system": "http://terminology.hl7.org/CodeSystem/endpoint-connection-type",
+                           "code": "hl7-fhir-rest"},
+        "name": "FHIR R4 base", "address": "https://fhir.example.org/r4",
+        "managingOrganization": {"reference": "Organization/1987654321"},
+        "payloadType": [{"coding": [{"code": "any"}]}],
+        "position": {"latitude": 40.4406, "longitude": -79.9959},
+    }),
+]
+
+
+def _bench_lines(path: str | None, limit: int) -> list[bytes]:
+    if path is None:
+        reps = max(1, limit // len(_SAMPLE_LINES))
+        return [s.encode() for s in _SAMPLE_LINES] * reps
+    from ndjson_zst import NdjsonZstReader
+    out = []
+    for line in NdjsonZstReader(path):
+        out.append(line)
+        if len(out) >= limit:
+            break
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Compare JSON backends on NDH lines.")
+    ap.add_argument("--file", help="a .ndjson.zst to sample lines from")
+    ap.add_argument("--lines", type=int, default=200_000)
+    args = ap.parse_args()
+
+    lines = _bench_lines(args.file, args.lines)
+    mb = sum(len(l) for l in lines) / 1e6
+    print(f"{len(lines):,} lines, {mb:,.0f} MB, default backend: {BACKEND}")
+    print(f"  {'backend':8s} {'loads/s':>12s} {'MB/s':>8s} {'dumps/s':>12s}")
+    for name, (lo, du) in _BACKENDS.items():
+        t0 = time.perf_counter()
+        objs = [lo(l) for l in lines]
+        t_load = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for o in objs:
+            du(o)
+        t_dump = time.perf_counter() - t0
+        print(f"  {name:8s} {len(lines) / t_load:>12,.0f} {mb / t_load:>8,.0f} "
+              f"{len(lines) / t_dump:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
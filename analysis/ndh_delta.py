@@ -0,0 +1,486 @@
+"""Release-over-release delta for the NDH bulk tables.
+
+Every release used to be reloaded in full with `--replace`, although most of
+the ~30M resources do not change between releases. This keeps a compact
+(id -> content hash) index per table per release, streams the next release
+against it, and classifies every row as added, changed, unchanged or removed.
+Only added and changed rows are written as load files; removed ids go to a
+separate list. fast_ingest_ndh.py --delta-from applies the two with a
+DELETE + MERGE in one BigQuery transaction instead of replacing the table.
+
+The index, per table:
+
+    frontend/data/ndh-index/<release>/<table>.idx.parquet
+        id_hash       uint64   blake2b-64 of the resource id, sorted, unique
+        content_hash  uint64   blake2b-64 of the raw NDJSON line
+        id            string   the resource id, for naming removed rows
+
+The content hash is over the line CMS shipped, not over a re-serialization, so
+it costs one hash per line and no second json.dumps. The trade: if CMS changes
+its exporter's formatting, every row reads as changed once, which is loud and
+safe. Lookups go through NumPy searchsorted over the sorted id hashes one chunk
+at a time, so the previous release costs 16 bytes per resource in memory
+rather than a 16M-entry Python dict. At 30M ids the chance of any two sharing
+a 64-bit id hash is about 1 in 40,000.
+
+Rows without a string `id` cannot be matched across releases and are counted
+as `no_id`, not loaded; a full --replace reload still carries them. An id that
+appears twice in one release is counted in `duplicate_ids`, and only its last
+occurrence counts: it is the one the index keeps, the one classified against
+the previous release, and the only one the delta files carry, so the MERGE
+sees one source row per id and the warehouse ends up holding the content the
+index hashed.
+
+In fast_ingest_ndh --delta-from, the new release's index is a baseline claim
+about what the warehouse holds, so it is only put in place once the MERGE has
+committed: the transform writes it beside the final name (pending_index_path)
+and bq_merge renames it in. A failed merge leaves the previous release as the
+baseline, and the next run diffs against it again.
+
+Everything here runs locally. No warehouse access is needed to build an index
+or to produce delta files:
+
+    # baseline: index the release currently in the warehouse
+    python analysis/ndh_delta.py --release 2026-05-08 \\
+        --data-dir frontend/data/cms-npd-2026-05-08
+
+    # delta files for the next release, plus its own index
+    python analysis/ndh_delta.py --release 2026-08-20 --from 2026-05-08 \\
+        --data-dir frontend/data/cms-npd-2026-08-20
+
+Outputs:
+    frontend/data/ndh-index/<release>/<table>.idx.parquet
+    frontend/data/ndh-index/<release>/<table>.delta.json   (counts, with --from)
+    frontend/data/ndh-delta/<from>..<release>/<table>-NNNNN.ndjson.gz
+    frontend/data/ndh-delta/<from>..<release>/<table>-removed.ndjson.gz
+
+release_snapshot.py reads the per-table counts into its snapshot.
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import pathlib
+import re
+import subprocess
+import sys
+import time
+from typing import Callable
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+
+import json_codec  # noqa: E402
+from claims_sources._cohorts import DEFAULT_MAX_BYTES_BILLED  # noqa: E402
+from fast_ingest_ndh import (  # noqa: E402
+    CHUNK_LINES,
+    DATASET,
+    DEFAULT_SHARD_MB,
+    GZIP_LEVEL,
+    PROJECT,
+    RESOURCES,
+    LoadWriter,
+    bq_load,
+    load_files,
+    loadable_row,
+    removed_file,
+    _bq_load_one,
+)
+from ndjson_zst import NdjsonZstReader  # noqa: E402
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent
+INDEX_ROOT = REPO_ROOT / "frontend" / "data" / "ndh-index"
+DELTA_ROOT = REPO_ROOT / "frontend" / "data" / "ndh-delta"
+INDEX_SCHEMA = pa.schema([
+    ("id_hash", pa.uint64()),
+    ("content_hash", pa.uint64()),
+    ("id", pa.string()),
+])
+COUNT_KEYS = ("rows", "added", "changed", "unchanged", "removed",
+              "duplicate_ids", "no_id", "errors")
+
+
+def h64(data: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+class HashIndex:
+    """Sorted, unique (id_hash, content_hash) arrays for one table of one release."""
+
+    def __init__(self, id_hash: np.ndarray, content_hash: np.ndarray, ids: pa.Array):
+        self.id_hash = id_hash
+        self.content_hash = content_hash
+        self.ids = ids
+
+    @staticmethod
+    def last_rows(id_hash: np.ndarray) -> np.ndarray:
+        """Positions of the last row per id, in id-hash order."""
+        order = np.argsort(id_hash, kind="stable")
+        sorted_ids = id_hash[order]
+        last = np.ones(len(order), dtype=bool)
+        last[:-1] = sorted_ids[1:] != sorted_ids[:-1]
+        return order[last]
+
+    @classmethod
+    def build(cls, id_hash: np.ndarray, content_hash: np.ndarray, ids: pa.Array) -> tuple["HashIndex", int]:
+        """Sort by id hash and keep the last row per id. Returns (index, duplicates)."""
+        keep = cls.last_rows(id_hash)
+        return (
+            cls(id_hash[keep], content_hash[keep], ids.take(pa.array(keep))),
+            int(len(id_hash) - len(keep)),
+        )
+
+    def __len__(self) -> int:
+        return len(self.id_hash)
+
+    def lookup(self, id_hash: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """(positions, found) for each hash; positions are only valid where found."""
+        if not len(self.id_hash):
+            return np.zeros(len(id_hash), np.intp), np.zeros(len(id_hash), bool)
+        pos = np.minimum(np.searchsorted(self.id_hash, id_hash), len(self.id_hash) - 1)
+        return pos, self.id_hash[pos] == id_hash
+
+    def save(self, path: pathlib.Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        table = pa.table([pa.array(self.id_hash), pa.array(self.content_hash), self.ids],
+                         schema=INDEX_SCHEMA)
+        pq.write_table(table, path, compression="zstd")
+
+    @classmethod
+    def load(cls, path: pathlib.Path) -> "HashIndex":
+        table = pq.read_table(path)
+        return cls(
+            table["id_hash"].to_numpy(),
+            table["content_hash"].to_numpy(),
+            table["id"].combine_chunks(),
+        )
+
+
+def index_path(release: str, table: str) -> pathlib.Path:
+    return INDEX_ROOT / release / f"{table}.idx.parquet"
+
+
+def pending_index_path(release: str, table: str) -> pathlib.Path:
+    """Where delta_to_loadable leaves the index until bq_merge has applied it."""
+    path = index_path(release, table)
+    return path.with_name(f".{path.name}.pending")
+
+
+def diff_resource(
+    zst_path: pathlib.Path,
+    extractor: Callable[[dict], dict],
+    prev: HashIndex | None,
+    out_path: pathlib.Path | None,
+    passthrough: bool = True,
+    shard_mb: int = DEFAULT_SHARD_MB,
+) -> tuple[HashIndex, dict]:
+    """Stream one release file against the previous index.
+
+    With `prev` None this only builds the index (a baseline); every id counts
+    as added and nothing is written. Otherwise added and changed rows go to
+    gzip shards at `out_path` (see fast_ingest_ndh.LoadWriter) and removed ids
+    to removed_file(out_path). Returns (this release's index, counts).
+
+    Ids are classified by their last occurrence, as HashIndex.build keeps
+    them. Rows are written as they stream, so an id seen again later may
+    already have a row in the shards; once the release is read, those
+    superseded rows are dropped (drop_superseded).
+    """
+    counts = dict.fromkeys(COUNT_KEYS, 0)
+    seen = np.zeros(len(prev), dtype=bool) if prev is not None else None
+    id_parts: list[np.ndarray] = []
+    content_parts: list[np.ndarray] = []
+    id_arrays: list[pa.Array] = []
+    # Row number, within this release, of every row written to the shards.
+    written: list[np.ndarray] = []
+
+    writer = None
+    if prev is not None and out_path is not None:
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        for stale in [*load_files(out_path), removed_file(out_path)]:
+            stale.unlink(missing_ok=True)
+        writer = LoadWriter(out_path, "ndjson.gz", shard_mb * 1_000_000)
+
+    try:
+        for lines in NdjsonZstReader(zst_path).batches(CHUNK_LINES):
+            parsed, ids, id_h, content_h = [], [], [], []
+            for line_bytes in lines:
+                raw = line_bytes.strip()
+                if not raw:
+                    continue
+                try:
+                    resource = json_codec.loads(raw.decode("utf-8"))
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    counts["errors"] += 1
+                    continue
+                rid = resource.get("id") if isinstance(resource, dict) else None
+                if not isinstance(rid, str) or not rid:
+                    counts["no_id"] += 1
+                    continue
+                parsed.append((raw, resource))
+                ids.append(rid)
+                id_h.append(h64(rid.encode("utf-8")))
+                content_h.append(h64(raw))
+            if not ids:
+                continue
+            id_h_arr = np.array(id_h, dtype=np.uint64)
+            content_arr = np.array(content_h, dtype=np.uint64)
+            id_parts.append(id_h_arr)
+            content_parts.append(content_arr)
+            id_arrays.append(pa.array(ids, pa.string()))
+            first_row = counts["rows"]
+            counts["rows"] += len(ids)
+
+            if prev is None:
+                continue
+            pos, found = prev.lookup(id_h_arr)
+            same = found.copy()
+            same[found] = prev.content_hash[pos[found]] == content_arr[found]
+            seen[pos[found]] = True
+            if writer is not None:
+                written.append(first_row + np.flatnonzero(~same))
+                data = b"".join(
+                    loadable_row(raw, resource, extractor, passthrough)
+                    for (raw, resource), keep in zip(parsed, ~same) if keep
+                )
+                if data:
+                    writer.write(data)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    all_ids = np.concatenate(id_parts) if id_parts else np.zeros(0, np.uint64)
+    keep = HashIndex.last_rows(all_ids)
+    index = HashIndex(
+        all_ids[keep],
+        np.concatenate(content_parts)[keep] if content_parts else np.zeros(0, np.uint64),
+        pa.concat_arrays(id_arrays).take(pa.array(keep)) if id_arrays else pa.array([], pa.string()),
+    )
+    counts["duplicate_ids"] = int(len(all_ids) - len(keep))
+
+    if prev is None:
+        counts["added"] = len(index)
+    else:
+        pos, found = prev.lookup(index.id_hash)
+        same = found.copy()
+        same[found] = prev.content_hash[pos[found]] == index.content_hash[found]
+        counts["unchanged"] = int(same.sum())
+        counts["changed"] = int((found & ~same).sum())
+        counts["added"] = int((~found).sum())
+        if writer is not None and counts["duplicate_ids"]:
+            rows = np.concatenate(written) if written else np.zeros(0, np.intp)
+            drop_superseded(out_path, ~np.isin(rows, keep), shard_mb)
+
+    if prev is not None:
+        removed = prev.ids.filter(pa.array(~seen))
+        counts["removed"] = len(removed)
+        if out_path is not None and len(removed):
+            with gzip.open(removed_file(out_path), "wb", compresslevel=GZIP_LEVEL) as fh:
+                for rid in removed.to_pylist():
+                    fh.write(json_codec.dumps({"_id": rid}) + b"\n")
+    return index, counts
+
+
+def drop_superseded(out_path: pathlib.Path, drop: np.ndarray, shard_mb: int = DEFAULT_SHARD_MB) -> int:
+    """Rewrite the delta shards at `out_path` without the rows `drop` marks.
+
+    `drop` has one flag per row written, in write order. Returns rows dropped.
+    """
+    if not drop.any():
+        return 0
+    stage = out_path.parent / f".{out_path.stem}.superseded"
+    stage.mkdir(exist_ok=True)
+    old = [path.rename(stage / path.name) for path in load_files(out_path)]
+    writer = LoadWriter(out_path, "ndjson.gz", shard_mb * 1_000_000)
+    try:
+        row = 0
+        for path in old:
+            with gzip.open(path, "rb") as fh:
+                for line in fh:
+                    if not drop[row]:
+                        writer.write(line)
+                    row += 1
+    finally:
+        writer.close()
+    for path in old:
+        path.unlink()
+    stage.rmdir()
+    return int(drop.sum())
+
+
+def delta_to_loadable(
+    zst_path: pathlib.Path,
+    out_path: pathlib.Path,
+    extractor: Callable[[dict], dict],
+    name: str,
+    prev_release: str,
+    release: str,
+    passthrough: bool = True,
+    shard_mb: int = DEFAULT_SHARD_MB,
+) -> int:
+    """fast_ingest_ndh's transform stage in --delta-from mode.
+
+    Writes the delta load files, this release's index (pending until
+    bq_merge applies the delta) and its counts. Returns the number of rows
+    to upsert.
+    """
+    table = out_path.stem
+    t0 = time.time()
+    prev = HashIndex.load(index_path(prev_release, table))
+    index, counts = diff_resource(zst_path, extractor, prev, out_path, passthrough, shard_mb)
+    index.save(pending_index_path(release, table))
+    write_counts(release, prev_release, table, counts)
+    print(f"    {name}: delta vs {prev_release} in {time.time() - t0:.1f}s — {format_counts(counts)}")
+    return counts["added"] + counts["changed"]
+
+
+def write_counts(release: str, prev_release: str, table: str, counts: dict) -> pathlib.Path:
+    path = INDEX_ROOT / release / f"{table}.delta.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"from": prev_release, "to": release, "table": table,
+                                **counts}, indent=2) + "\n")
+    return path
+
+
+def format_counts(c: dict) -> str:
+    return (f"{c['rows']:,} rows: +{c['added']:,} added, ~{c['changed']:,} changed, "
+            f"-{c['removed']:,} removed, {c['unchanged']:,} unchanged"
+            f" ({c['duplicate_ids']:,} duplicate ids, {c['no_id']:,} without id, "
+            f"{c['errors']:,} errors)")
+
+
+def merge_sql(table: str, columns: list[str]) -> str:
+    """DELETE removed ids and MERGE the delta rows into `table`, atomically.
+
+    `columns` is every column of the table: `resource` plus the extractor's
+    keys. diff_resource writes one delta row per id (its last occurrence in
+    the release), so the delta table is the MERGE source as it stands.
+    """
+    target = f"`{PROJECT}.{DATASET}.{table}`"
+    delta = f"`{PROJECT}.{DATASET}.{table}__delta`"
+    removed = f"`{PROJECT}.{DATASET}.{table}__removed`"
+    updates = ",\n      ".join(f"{c} = S.{c}" for c in columns if c != "_id")
+    return f"""BEGIN TRANSACTION;
+DELETE FROM {target} WHERE _id IN (SELECT _id FROM {removed});
+MERGE {target} T
+USING (
+  SELECT * FROM {delta}
+) S
+ON T._id = S._id
+WHEN MATCHED THEN UPDATE SET
+      {updates}
+WHEN NOT MATCHED THEN INSERT ROW;
+COMMIT TRANSACTION;
+DROP TABLE {delta};
+DROP TABLE {removed};
+"""
+
+
+def _bq_query(sql: str) -> None:
+    cmd = ["bq", "query", "--use_legacy_sql=false", "--nouse_cache",
+           f"--maximum_bytes_billed={DEFAULT_MAX_BYTES_BILLED}", sql]
+    print(f"    bq query: {sql.splitlines()[0]} ...")
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.stderr:
+        print(f"    bq stderr: {result.stderr}")
+    if result.returncode != 0:
+        raise RuntimeError(f"bq query failed (exit {result.returncode})")
+
+
+def bq_merge(
+    table: str,
+    out_path: pathlib.Path,
+    extractor: Callable[[dict], dict],
+    gcs_stage: str | None = None,
+    release: str | None = None,
+) -> None:
+    """fast_ingest_ndh's load stage in --delta-from mode.
+
+    Stages the delta rows and removed ids in `<table>__delta` and
+    `<table>__removed` (created LIKE the target, so the JSON column keeps its
+    type), then applies merge_sql. The live table is only touched inside the
+    transaction. Once it has committed, `release`'s pending index becomes its
+    index.
+    """
+    t0 = time.time()
+    target = f"`{PROJECT}.{DATASET}.{table}`"
+    _bq_query(
+        f"CREATE OR REPLACE TABLE `{PROJECT}.{DATASET}.{table}__delta` LIKE {target};\n"
+        f"CREATE OR REPLACE TABLE `{PROJECT}.{DATASET}.{table}__removed` (_id STRING);"
+    )
+    if load_files(out_path):
+        bq_load(f"{table}__delta", out_path, gcs_stage)
+    removed = removed_file(out_path)
+    if removed.exists():
+        _bq_load_one(f"{table}__removed", str(removed), replace=False)
+    _bq_query(merge_sql(table, ["resource", *extractor({}).keys()]))
+    if release is not None:
+        os.replace(pending_index_path(release, table), index_path(release, table))
+    print(f"    {table}: delta merged in {time.time() - t0:.1f}s")
+
+
+def find_release_file(data_dir: pathlib.Path, name: str) -> pathlib.Path | None:
+    """The .ndjson.zst for `name`, under any naming CMS or this repo has used.
+
+    Seen so far: `Practitioner.ndjson.zst`, `Practitioner_2026-05-07_2128.ndjson.zst`
+    (manifest basenames) and `01-Organization.ndjson.zst`. The pattern is
+    anchored so Organization never picks up OrganizationAffiliation.
+    """
+    pat = re.compile(rf"(\d+-)?{name}(_[^.]*)?\.ndjson\.zst")
+    hits = sorted(p for p in data_dir.glob("*.ndjson.zst") if pat.fullmatch(p.name))
+    return hits[-1] if hits else None
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--release", required=True, help="release the files in --data-dir belong to")
+    ap.add_argument("--data-dir", type=pathlib.Path, required=True)
+    ap.add_argument("--from", dest="prev", default=None,
+                    help="previous release to diff against; omit to build a baseline index")
+    ap.add_argument("--resource", help="single resource name; default all six")
+    ap.add_argument("--out", type=pathlib.Path, default=None,
+                    help="delta file directory. Default: frontend/data/ndh-delta/<from>..<release>")
+    args = ap.parse_args()
+
+    targets = [r for r in RESOURCES if not args.resource or r[0].lower() == args.resource.lower()]
+    if not targets:
+        print(f"unknown resource: {args.resource}", file=sys.stderr)
+        return 2
+    out_dir = args.out or DELTA_ROOT / f"{args.prev}..{args.release}"
+
+    t0 = time.time()
+    for name, table, extractor in targets:
+        zst = find_release_file(args.data_dir, name)
+        if zst is None:
+            print(f"  {name}: SKIP (no {name} .ndjson.zst in {args.data_dir})")
+            continue
+        prev = None
+        if args.prev:
+            prev_path = index_path(args.prev, table)
+            if not prev_path.exists():
+                raise SystemExit(f"no index for {args.prev}/{table} at {prev_path}; "
+                                 f"build it with --release {args.prev} first")
+            prev = HashIndex.load(prev_path)
+        t1 = time.time()
+        index, counts = diff_resource(zst, extractor, prev,
+                                      out_dir / f"{table}.ndjson" if prev else None)
+        index.save(index_path(args.release, table))
+        if prev is not None:
+            write_counts(args.release, args.prev, table, counts)
+            print(f"  {name}: {format_counts(counts)} in {time.time() - t1:.1f}s")
+        else:
+            print(f"  {name}: indexed {len(index):,} ids in {time.time() - t1:.1f}s")
+    print(f"Done in {time.time() - t0:.1f}s"
+          + (f"; delta files in {out_dir}" if args.prev else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,187 @@
+"""Read NDH bulk-export `.ndjson.zst` files in-process, one line at a time.
+
+Four scripts used to shell out to `zstdcat` / `zstd -dc` and pull lines
+through a pipe: fast_ingest_ndh, export_parquet, h55 and h49_recheck_release.
+That is an extra process, a pipe copy of every decompressed byte (19 GB for
+Practitioner), and in two of them a TextIOWrapper decoding every line before
+json.loads, which accepts bytes anyway. This module is the one place that
+reads these files now.
+
+Decompression happens in this process with the `zstandard` package, in large
+blocks, and lines are split out of each block as raw bytes with no trailing
+newline. Nothing is materialised beyond one block, so the ~2 GB Organization
+file streams in the same few MB as before. If `zstandard` is not installed the
+reader falls back to the old `zstdcat` pipe, read in the same large blocks, so
+callers never need to care which backend ran.
+
+Usage:
+
+    from ndjson_zst import NdjsonZstReader
+
+    reader = NdjsonZstReader(path)
+    for line in reader:               # bytes, no b"\\n"
+        resource = json.loads(line)
+    print(reader.summary())           # lines, MB, lines/s, MB/s
+
+    for batch in NdjsonZstReader(path).batches(20_000):   # list[bytes]
+        ...
+
+Run directly to benchmark against the pipe it replaced:
+
+    python analysis/ndjson_zst.py frontend/data/cms-npd-2026-08-20/Practitioner.ndjson.zst
+"""
+from __future__ import annotations
+
+import argparse
+import pathlib
+import subprocess
+import time
+from typing import Iterator
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - exercised only without zstandard
+    zstandard = None
+
+# Decompressed bytes per block. Lines are split out of each block, so this is
+# also the working-set bound. 8 MB amortises the per-block split and the
+# partial-line carry across thousands of NDH lines (median ~2 KB).
+BLOCK_BYTES = 8 * 1024 * 1024
+# Compressed bytes per read from disk.
+READ_BYTES = 4 * 1024 * 1024
+
+
+def backend() -> str:
+    """Which decompressor NdjsonZstReader will use: "zstandard" or "zstdcat"."""
+    return "zstandard" if zstandard is not None else "zstdcat"
+
+
+def _zstandard_blocks(path: pathlib.Path, block_bytes: int) -> Iterator[bytes]:
+    # CMS writes one frame per file today; read_across_frames keeps a
+    # multi-frame file (e.g. concatenated parts) from stopping after frame 1.
+    dctx = zstandard.ZstdDecompressor()
+    with open(path, "rb") as fh, dctx.stream_reader(
+        fh, read_size=READ_BYTES, read_across_frames=True
+    ) as src:
+        while True:
+            block = src.read(block_bytes)
+            if not block:
+                return
+            yield block
+
+
+def blocks(path: pathlib.Path, block_bytes: int = BLOCK_BYTES) -> Iterator[bytes]:
+    """Decompressed blocks of any `.zst` file, from whichever backend() is available."""
+    if zstandard is not None:
+        return _zstandard_blocks(path, block_bytes)
+    return _zstdcat_blocks(path, block_bytes)
+
+
+def _zstdcat_blocks(path: pathlib.Path, block_bytes: int) -> Iterator[bytes]:
+    proc = subprocess.Popen(["zstdcat", str(path)], stdout=subprocess.PIPE)
+    assert proc.stdout is not None
+    try:
+        while True:
+            block = proc.stdout.read(block_bytes)
+            if not block:
+                break
+            yield block
+    finally:
+        proc.stdout.close()
+        proc.wait()
+
+
+class NdjsonZstReader:
+    """Iterate the lines of a `.ndjson.zst` file as bytes, with throughput stats.
+
+    Empty lines are skipped. Lines are yielded without their newline, ready
+    for json.loads or for splicing into output as-is. Counters are live, so a
+    caller can report progress mid-stream as well as at the end.
+    """
+
+    def __init__(self, path: pathlib.Path | str, block_bytes: int = BLOCK_BYTES):
+        self.path = pathlib.Path(path)
+        self.block_bytes = block_bytes
+        self.backend = backend()
+        self.compressed_bytes = self.path.stat().st_size
+        self.bytes = 0
+        self.lines = 0
+        self.elapsed = 0.0
+
+    def __iter__(self) -> Iterator[bytes]:
+        t0 = time.time()
+        carry = b""
+        try:
+            for block in blocks(self.path, self.block_bytes):
+                self.bytes += len(block)
+                parts = block.split(b"\n")
+                parts[0] = carry + parts[0]
+                carry = parts.pop()
+                for line in parts:
+                    if line:
+                        self.lines += 1
+                        yield line
+                self.elapsed = time.time() - t0
+            if carry:
+                self.lines += 1
+                yield carry
+        finally:
+            self.elapsed = time.time() - t0
+
+    def batches(self, size: int) -> Iterator[list[bytes]]:
+        """Yield lists of at most `size` lines, in file order."""
+        batch: list[bytes] = []
+        for line in self:
+            batch.append(line)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def summary(self) -> str:
+        secs = self.elapsed or 1e-9
+        mb = self.bytes / 1e6
+        return (
+            f"{self.lines:,} lines, {mb:,.0f} MB decompressed "
+            f"({self.compressed_bytes / 1e6:,.0f} MB on disk) in {self.elapsed:.1f}s "
+            f"— {self.lines / secs:,.0f} lines/s, {mb / secs:,.0f} MB/s [{self.backend}]"
+        )
+
+
+def _bench_pipe(path: pathlib.Path) -> tuple[int, int, float]:
+    """The approach this module replaced: zstdcat | per-line decode."""
+    t0 = time.time()
+    proc = subprocess.Popen(["zstdcat", str(path)], stdout=subprocess.PIPE)
+    assert proc.stdout is not None
+    n = nbytes = 0
+    for line_bytes in proc.stdout:
+        nbytes += len(line_bytes)
+        if line_bytes.decode("utf-8").strip():
+            n += 1
+    proc.wait()
+    return n, nbytes, time.time() - t0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Benchmark in-process zstd vs the zstdcat pipe.")
+    ap.add_argument("path", type=pathlib.Path)
+    ap.add_argument("--skip-pipe", action="store_true", help="time the reader only")
+    args = ap.parse_args()
+
+    reader = NdjsonZstReader(args.path)
+    for _ in reader:
+        pass
+    print(f"reader : {reader.summary()}")
+    if args.skip_pipe:
+        return
+    n, nbytes, secs = _bench_pipe(args.path)
+    print(
+        f"pipe   : {n:,} lines, {nbytes / 1e6:,.0f} MB in {secs:.1f}s "
+        f"— {n / secs:,.0f} lines/s, {nbytes / 1e6 / secs:,.0f} MB/s [zstdcat + decode]"
+    )
+    print(f"speedup: {secs / (reader.elapsed or 1e-9):.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""Content-addressed cache of warehouse query results.
+
+Scripts re-run the same expensive queries on every invocation: the full NDH
+NPI set in ndh_completeness, the 7.4M-row NPPES taxonomy scan in h41, the
+per-state connectivity queries while a payload is being iterated on. None of
+those answers can change until the warehouse is reloaded, so paying for them
+again is pure cost.
+
+analysis/warehouse.py consults this cache before running anything. An entry
+is one Arrow IPC file, zstd-compressed, named by a hash of
+
+    (normalized SQL, parameters, CURRENT_RELEASE, backend)
+
+"Normalized" drops comments and collapses whitespace, so reformatting a query
+does not miss. Bumping CURRENT_RELEASE (release.py) invalidates everything
+measured against the old release without anyone deleting files. Queries that
+read a table outside cms_npd, such as the public NPPES dataset, also expire
+after EXTERNAL_TTL_DAYS, because that data is refreshed on Google's schedule
+rather than ours.
+
+The directory is bounded: after every write the least-recently-used entries
+(by mtime, which a hit refreshes) are evicted until it fits in
+AINPI_QCACHE_MB, default DEFAULT_MAX_MB. Writes go to a temp file and are
+renamed into place, so concurrent scripts never read a partial entry.
+
+Turn it off for one run with --no-cache on the scripts that use it, or
+AINPI_NO_CACHE=1 anywhere. Each run prints what the cache saved.
+
+    python analysis/qcache.py            # list entries
+    python analysis/qcache.py --clear    # delete them all
+"""
+from __future__ import annotations
+
+import argparse
+import atexit
+import datetime as dt
+import hashlib
+import json
+import os
+import pathlib
+import time
+from typing import Any
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent
+CACHE_DIR = REPO_ROOT / "analysis" / "data" / "qcache"
+# The NPPES taxonomy scan is the largest entry, a few hundred MB as zstd IPC.
+DEFAULT_MAX_MB = 4000
+EXTERNAL_TTL_DAYS = 7
+_META = b"qcache"
+
+
+class Stats:
+    def __init__(self) -> None:
+        self.queries = 0  # run on the backend, cached or not
+        self.hits = 0
+        self.misses = 0
+        self.bytes_billed = 0
+        self.bytes_billed_avoided = 0
+
+
+stats = Stats()
+_enabled = os.environ.get("AINPI_NO_CACHE", "").lower() not in ("1", "true", "yes")
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def disable() -> None:
+    """Bypass the cache for the rest of this process (the --no-cache flag)."""
+    global _enabled
+    _enabled = False
+
+
+def max_bytes() -> int:
+    return int(os.environ.get("AINPI_QCACHE_MB", DEFAULT_MAX_MB)) * 1_000_000
+
+
+def make_key(*parts: Any) -> str:
+    blob = json.dumps(parts, sort_keys=True, default=repr, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:40]
+
+
+def _path(key: str) -> pathlib.Path:
+    return CACHE_DIR / f"{key}.arrow"
+
+
+def _meta(schema: pa.Schema) -> dict:
+    raw = (schema.metadata or {}).get(_META)
+    return json.loads(raw) if raw else {}
+
+
+def meta(table: pa.Table) -> dict:
+    """What put() recorded with a table get() returned: bytes_billed, created,
+    expires, rows and sql. Empty for a table that did not come from the cache."""
+    return _meta(table.schema)
+
+
+def get(key: str) -> pa.Table | None:
+    """The cached result for `key`, or None. Counts the hit or the miss."""
+    path = _path(key)
+    try:
+        # Not closed here: uncompressed buffers in the table point into the map.
+        table = ipc.open_file(pa.memory_map(str(path))).read_all()
+    except (FileNotFoundError, pa.ArrowInvalid, OSError):
+        stats.misses += 1
+        return None
+    meta = _meta(table.schema)
+    if meta.get("expires") and meta["expires"] < time.time():
+        path.unlink(missing_ok=True)
+        stats.misses += 1
+        return None
+    os.utime(path)
+    stats.hits += 1
+    stats.bytes_billed_avoided += meta.get("bytes_billed", 0)
+    return table
+
+
+def put(key: str, table: pa.Table, *, bytes_billed: int = 0,
+        ttl_days: float | None = None, sql: str = "") -> None:
+    """Store `table` under `key`, then evict down to the size bound."""
+    meta = {
+        "bytes_billed": bytes_billed,
+        "created": dt.datetime.now(dt.timezone.utc).replace(microsecond=0).isoformat(),
+        "expires": time.time() + ttl_days * 86400 if ttl_days else None,
+        "rows": table.num_rows,
+        "sql": sql[:2000],
+    }
+    table = table.replace_schema_metadata(
+        {**(table.schema.metadata or {}), _META: json.dumps(meta).encode()})
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = _path(key)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    options = ipc.IpcWriteOptions(compression="zstd")
+    with pa.OSFile(str(tmp), "wb") as sink, ipc.new_file(sink, table.schema, options=options) as w:
+        w.write_table(table)
+    os.replace(tmp, path)
+    evict()
+
+
+def entries() -> list[pathlib.Path]:
+    """Cache files, least recently used first."""
+    if not CACHE_DIR.exists():
+        return []
+    return sorted(CACHE_DIR.glob("*.arrow"), key=lambda p: p.stat().st_mtime)
+
+
+def evict(limit: int | None = None) -> int:
+    """Delete least-recently-used entries until the cache fits. Returns bytes freed."""
+    limit = max_bytes() if limit is None else limit
+    files = entries()
+    total = sum(p.stat().st_size for p in files)
+    freed = 0
+    for p in files:
+        if total - freed <= limit:
+            break
+        size = p.stat().st_size
+        p.unlink(missing_ok=True)
+        freed += size
+    return freed
+
+
+def fmt_bytes(n: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1000:
+            return f"{n:,.0f} {unit}" if unit == "B" else f"{n:,.1f} {unit}"
+        n /= 1000
+    return f"{n:,.2f} TB"
+
+
+def record(bytes_billed: int) -> None:
+    """Count one query that actually ran on the backend."""
+    stats.queries += 1
+    stats.bytes_billed += bytes_billed
+
+
+def summary() -> str:
+    return (f"qcache: {stats.hits} hit(s), {stats.misses} miss(es); "
+            f"{fmt_bytes(stats.bytes_billed_avoided)} billed avoided, "
+            f"{fmt_bytes(stats.bytes_billed)} billed")
+
+
+@atexit.register
+def _report() -> None:
+    if stats.hits or stats.misses:
+        print(summary())
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Inspect or clear the query result cache.")
+    ap.add_argument("--clear", action="store_true")
+    args = ap.parse_args()
+    files = entries()
+    if args.clear:
+        for p in files:
+            p.unlink(missing_ok=True)
+        print(f"removed {len(files)} entries from {CACHE_DIR}")
+        return 0
+    total = 0
+    for p in reversed(files):
+        meta = _meta(ipc.open_file(pa.memory_map(str(p))).schema)
+        total += p.stat().st_size
+        first = " ".join(meta.get("sql", "").split())[:60]
+        print(f"{p.stem[:10]}  {fmt_bytes(p.stat().st_size):>10}  {meta.get('rows', 0):>11,} rows  "
+              f"{fmt_bytes(meta.get('bytes_billed', 0)):>10} billed  {meta.get('created', '')}  {first}")
+    print(f"{len(files)} entries, {fmt_bytes(total)} of {fmt_bytes(max_bytes())} in {CACHE_DIR}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -36,6 +36,9 @@ REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent
 # control. Each file is a few KB.
 SNAP_DIR = REPO_ROOT / "analysis" / "release-snapshots"
 API = REPO_ROOT / "frontend" / "public" / "api" / "v1"
+# Per-table added/changed/removed counts, written by ndh_delta.py when a
+# release is ingested with fast_ingest_ndh.py --delta-from.
+INDEX_DIR = REPO_ROOT / "frontend" / "data" / "ndh-index"
 PROJECT = "thematic-fort-453901-t7"
 DATASET = "cms_npd"
 
@@ -95,6 +98,20 @@ def shape(client):
     return out
 
 
+def resource_delta(release, since):
+    """Row-level churn per table from the delta ingest, or {} if there was none.
+
+    Row counts alone hide churn: a table that gained 10K rows may have had
+    300K rewritten. Only present when `release` was diffed against `since`.
+    """
+    out = {}
+    for path in sorted((INDEX_DIR / release).glob("*.delta.json")):
+        doc = json.loads(path.read_text())
+        if doc.get("from") == since:
+            out[doc["table"]] = {k: doc[k] for k in ("added", "changed", "removed", "unchanged")}
+    return out
+
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--release", required=True)
@@ -124,6 +141,7 @@ def main():
         if not prev_path.exists():
             raise SystemExit(f"no snapshot for {args.compare} at {prev_path}")
         prev = json.loads(prev_path.read_text())
+        churn = resource_delta(args.release, args.compare)
         rows = []
         for t in sorted(TABLES):
             a = prev["tables"].get(t, {}).get("rows")
@@ -133,13 +151,16 @@ def main():
             rows.append({
                 "table": t, "before": a, "after": b, "delta": b - a,
                 "pct": round(100.0 * (b - a) / a, 1) if a else None,
+                **churn.get(t, {}),
             })
         payload = {
             "from": args.compare, "to": args.release,
             "generated_at": snap["captured_at"],
             "note": ("Row-count deltas between two NDH bulk releases. Captured "
                      "before and after ingest because the tables carry no "
-                     "release column and the load replaces them."),
+                     "release column and the load replaces them. added/changed/"
+                     "removed are per-resource counts, present when the release "
+                     "was ingested as a delta."),
             "tables": rows,
             "before_shape": prev["shape"], "after_shape": snap["shape"],
         }
@@ -21,13 +21,22 @@ hospital connectivity from H47's payload. That keeps this dashboard consistent
 with the findings by construction. If it disagreed with H50, one of them would
 be wrong and a reader would have no way to tell which.
 
-Cost: one capped BigQuery query per state. Everything else is a local join
-against files already in the repo.
+Cost: five capped BigQuery queries per state. Everything else is a local join
+against files already in the repo. With more than one state (--all), each of
+the five runs once for every state, grouped by `_state`, and is split per
+state locally; --per-state restores one set of queries per state. Assembly,
+the county layers and the JSON write are per state and independent, so
+--jobs N runs them in N worker processes. With --backend duckdb the same queries run
+on the local parquet export instead, at no cost (analysis/warehouse.py).
+Results are cached per release (analysis/qcache.py), so re-running a state
+while iterating on the payload costs nothing; --no-cache forces the queries.
 
 Usage:
     python analysis/state_connectivity.py pa
     python analysis/state_connectivity.py pa va oh
     python analysis/state_connectivity.py --all
+    python analysis/state_connectivity.py --all --jobs 8
+    python analysis/state_connectivity.py pa --backend duckdb
 
 Outputs:
     frontend/public/api/v1/states/<state>-connectivity.json
@@ -36,19 +45,24 @@ from __future__ import annotations
 
 import argparse
 import collections
+import contextlib
 import csv
 import datetime as dt
+import io
 import json
 import pathlib
 import subprocess
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
 
-from analysis.claims_sources._cohorts import bq_job_config  # noqa: E402
+from analysis import qcache, warehouse  # noqa: E402
 from analysis.org_systems import (  # noqa: E402
     build_systems,
     describe_affiliation_graph,
+    describe_affiliation_graphs,
 )
 from analysis.pa_rural_health import load_counties  # noqa: E402
 from analysis.zip_county import STATE_FIPS, load_zip_county  # noqa: E402
@@ -287,9 +301,9 @@ SELECT
   COUNTIF(o._id IS NOT NULL)                               AS n_resolved_orgs,
   COUNTIF(o._npi IS NOT NULL)                              AS n_orgs_with_npi,
   COUNTIF(r.loc_ids IS NOT NULL AND r.loc_ids != '')       AS n_roles_with_location,
-  ARRAY_AGG(DISTINCT o._id IGNORE NULLS)                   AS org_ids,
-  ARRAY_AGG(DISTINCT o._npi IGNORE NULLS)                  AS org_npis,
-  ARRAY_AGG(DISTINCT o._name IGNORE NULLS)                 AS org_names
+  ARRAY_AGG(DISTINCT o._id IGNORE NULLS ORDER BY o._id)     AS org_ids,
+  ARRAY_AGG(DISTINCT o._npi IGNORE NULLS ORDER BY o._npi)   AS org_npis,
+  ARRAY_AGG(DISTINCT o._name IGNORE NULLS ORDER BY o._name) AS org_names
 FROM prac p
 LEFT JOIN roles r ON r.pref = CONCAT('Practitioner/', p.pid)
 LEFT JOIN orgs  o ON r.oref = CONCAT('Organization/', o._id)
@@ -324,7 +338,7 @@ FROM prac p
 JOIN roles r ON r.pref = CONCAT('Practitioner/', p.pid)
 JOIN orgs  o ON r.oref = CONCAT('Organization/', o._id)
 GROUP BY org_id, org_npi, org_name, org_city, org_state
-ORDER BY practitioners DESC
+ORDER BY practitioners DESC, org_id
 """
 
 
@@ -377,7 +391,7 @@ SELECT
   s.sites, s.site.lat AS lat, s.site.lng AS lng, s.site.city AS city
 FROM org_prac op
 LEFT JOIN sites s ON s.oref = CONCAT('Organization/', op.org_id)
-ORDER BY op.practitioners DESC
+ORDER BY op.practitioners DESC, op.org_id
 """
 
 
@@ -399,6 +413,8 @@ FROM `{PROJECT}.{DATASET}.organization_affiliation` oa
 JOIN orgs a ON oa._org_id = CONCAT('Organization/', a._id)
 JOIN orgs b ON oa._participating_org_id = CONCAT('Organization/', b._id)
 WHERE oa._active AND a._id != b._id
+-- Ordered so ties among the top hubs break the same way on every run.
+ORDER BY org_a, org_b
 """
 
 
@@ -425,15 +441,218 @@ WHERE CAST(entity_type_code AS STRING) = "2"
 """
 
 
-def run_query(sql, state):
-    from google.cloud import bigquery
+# --------------------------------------------------------------------------
+# national mode: the same five queries, once each, grouped by state
+# --------------------------------------------------------------------------
+#
+# Per state, every query above rescans practitioner_role and organization in
+# full, because only practitioner and location are filtered by state. --all
+# therefore paid for the two largest tables 51 times over. These are the same
+# queries with the state carried as a column instead of bound as a parameter:
+# each row is exactly the row the per-state query returns for that state, plus
+# `state`. An NPI or organization active in two states appears once per state,
+# as it did across two per-state runs.
+
+PRACTITIONER_BY_STATE_SQL = f"""
+WITH prac AS (
+  SELECT _state AS state, _id AS pid, _npi AS npi, _postal_code AS zip
+  FROM `{PROJECT}.{DATASET}.practitioner`
+  WHERE _active AND _state IN UNNEST(@states) AND _npi IS NOT NULL
+),
+roles AS (
+  SELECT
+    _practitioner_id AS pref,
+    _org_id          AS oref,
+    _location_ids    AS loc_ids
+  FROM `{PROJECT}.{DATASET}.practitioner_role`
+  WHERE _active
+),
+orgs AS (
+  SELECT _id, _npi, _name, _city, _state
+  FROM `{PROJECT}.{DATASET}.organization`
+  WHERE _active
+)
+SELECT
+  p.state,
+  p.npi,
+  ANY_VALUE(p.zip)                                         AS zip,
+  COUNTIF(r.pref IS NOT NULL)                              AS n_roles,
+  COUNTIF(o._id IS NOT NULL)                               AS n_resolved_orgs,
+  COUNTIF(o._npi IS NOT NULL)                              AS n_orgs_with_npi,
+  COUNTIF(r.loc_ids IS NOT NULL AND r.loc_ids != '')       AS n_roles_with_location,
+  ARRAY_AGG(DISTINCT o._id IGNORE NULLS ORDER BY o._id)     AS org_ids,
+  ARRAY_AGG(DISTINCT o._npi IGNORE NULLS ORDER BY o._npi)   AS org_npis,
+  ARRAY_AGG(DISTINCT o._name IGNORE NULLS ORDER BY o._name) AS org_names
+FROM prac p
+LEFT JOIN roles r ON r.pref = CONCAT('Practitioner/', p.pid)
+LEFT JOIN orgs  o ON r.oref = CONCAT('Organization/', o._id)
+GROUP BY p.state, p.npi
+"""
 
-    client = bigquery.Client(project=PROJECT)
-    cfg = bq_job_config()
-    cfg.query_parameters = [
-        bigquery.ScalarQueryParameter("state", "STRING", state.upper())
-    ]
-    return list(client.query(sql, job_config=cfg).result())
+ORG_BY_STATE_SQL = f"""
+WITH prac AS (
+  SELECT _state AS state, _id AS pid, _npi AS npi
+  FROM `{PROJECT}.{DATASET}.practitioner`
+  WHERE _active AND _state IN UNNEST(@states) AND _npi IS NOT NULL
+),
+roles AS (
+  SELECT _practitioner_id AS pref, _org_id AS oref, _location_ids AS loc_ids
+  FROM `{PROJECT}.{DATASET}.practitioner_role`
+  WHERE _active
+),
+orgs AS (
+  SELECT _id, _npi, _name, _city, _state
+  FROM `{PROJECT}.{DATASET}.organization`
+  WHERE _active
+)
+SELECT
+  p.state,
+  o._id   AS org_id,
+  o._npi  AS org_npi,
+  o._name AS org_name,
+  o._city AS org_city,
+  o._state AS org_state,
+  COUNT(DISTINCT p.npi) AS practitioners,
+  COUNT(DISTINCT NULLIF(r.loc_ids, '')) AS location_sets
+FROM prac p
+JOIN roles r ON r.pref = CONCAT('Practitioner/', p.pid)
+JOIN orgs  o ON r.oref = CONCAT('Organization/', o._id)
+GROUP BY p.state, org_id, org_npi, org_name, org_city, org_state
+ORDER BY p.state, practitioners DESC, org_id
+"""
+
+ORG_POINT_BY_STATE_SQL = f"""
+WITH prac AS (
+  SELECT _state AS state, _id AS pid, _npi AS npi
+  FROM `{PROJECT}.{DATASET}.practitioner`
+  WHERE _active AND _state IN UNNEST(@states) AND _npi IS NOT NULL
+),
+roles AS (
+  SELECT _practitioner_id AS pref, _org_id AS oref
+  FROM `{PROJECT}.{DATASET}.practitioner_role`
+  WHERE _active
+),
+org_prac AS (
+  SELECT p.state, o._id AS org_id, o._name AS org_name, o._npi AS org_npi,
+         COUNT(DISTINCT p.npi) AS practitioners
+  FROM prac p
+  JOIN roles r ON r.pref = CONCAT('Practitioner/', p.pid)
+  JOIN `{PROJECT}.{DATASET}.organization` o
+    ON r.oref = CONCAT('Organization/', o._id) AND o._active
+  GROUP BY p.state, org_id, org_name, org_npi
+),
+sites AS (
+  SELECT
+    _state AS state,
+    _managing_org_id AS oref,
+    COUNT(*) AS sites,
+    ARRAY_AGG(STRUCT(_position_lat AS lat, _position_lng AS lng, _city AS city)
+              ORDER BY _position_lat DESC LIMIT 1)[OFFSET(0)] AS site
+  FROM `{PROJECT}.{DATASET}.location`
+  WHERE _state IN UNNEST(@states)
+    AND _position_lat IS NOT NULL AND _position_lng IS NOT NULL
+  GROUP BY state, oref
+)
+SELECT
+  op.state, op.org_id, op.org_name, op.org_npi, op.practitioners,
+  s.sites, s.site.lat AS lat, s.site.lng AS lng, s.site.city AS city
+FROM org_prac op
+LEFT JOIN sites s
+  ON s.state = op.state AND s.oref = CONCAT('Organization/', op.org_id)
+ORDER BY op.state, op.practitioners DESC, op.org_id
+"""
+
+AFFILIATION_BY_STATE_SQL = f"""
+WITH orgs AS (
+  SELECT _state AS state, _id, _name
+  FROM `{PROJECT}.{DATASET}.organization`
+  WHERE _active AND _state IN UNNEST(@states)
+)
+SELECT DISTINCT
+  a.state,
+  a._id AS org_a,
+  a._name AS name_a,
+  b._id AS org_b,
+  b._name AS name_b
+FROM `{PROJECT}.{DATASET}.organization_affiliation` oa
+JOIN orgs a ON oa._org_id = CONCAT('Organization/', a._id)
+JOIN orgs b ON oa._participating_org_id = CONCAT('Organization/', b._id)
+  AND b.state = a.state
+WHERE oa._active AND a._id != b._id
+ORDER BY a.state, org_a, org_b
+"""
+
+PARENT_BY_STATE_SQL = """
+-- npi_raw for the reasons given on PARENT_SQL; the TIN is still not selected.
+SELECT
+  provider_business_practice_location_address_state_name AS state,
+  CAST(npi AS STRING)                        AS org_npi,
+  CAST(parent_organization_lbn AS STRING)    AS parent_lbn
+FROM `bigquery-public-data.nppes.npi_raw`
+WHERE CAST(entity_type_code AS STRING) = "2"
+  AND provider_business_practice_location_address_state_name IN UNNEST(@states)
+  AND CAST(parent_organization_lbn AS STRING) NOT IN ("", "null")
+"""
+
+QUERIES = {
+    "practitioners": (PRACTITIONER_SQL, PRACTITIONER_BY_STATE_SQL),
+    "orgs": (ORG_SQL, ORG_BY_STATE_SQL),
+    "edges": (AFFILIATION_SQL, AFFILIATION_BY_STATE_SQL),
+    "parents": (PARENT_SQL, PARENT_BY_STATE_SQL),
+    "org_points": (ORG_POINT_SQL, ORG_POINT_BY_STATE_SQL),
+}
+
+
+def partition_by_state(table):
+    """{state: table slice without the state column}, row order kept.
+
+    The sort is stable, so a query ordered within each state stays ordered.
+    Slices are zero-copy; rows are only materialized per state, as it is built.
+    """
+    if table.num_rows == 0:
+        return {}
+    table = table.sort_by("state")
+    out = {}
+    states = table.column("state").to_pylist()
+    start = 0
+    for i in range(1, len(states) + 1):
+        if i == len(states) or states[i] != states[start]:
+            out[states[start]] = table.slice(start, i - start).drop_columns(["state"])
+            start = i
+    return out
+
+
+def national_results(codes, names):
+    """Run each named query once for all `codes`: {name: {state: table}}."""
+    return {name: partition_by_state(
+                warehouse.query_arrow(QUERIES[name][1], {"states": list(codes)}))
+            for name in names}
+
+
+def national_affiliation(national):
+    """describe_affiliation_graphs over every state's edges in one pass."""
+    edges_by_state = {}
+    names = {}
+    for code, t in national["edges"].items():
+        a, b = t.column("org_a").to_pylist(), t.column("org_b").to_pylist()
+        edges_by_state[code] = list(zip(a, b))
+        names.update(zip(a, t.column("name_a").to_pylist()))
+        names.update(zip(b, t.column("name_b").to_pylist()))
+    return describe_affiliation_graphs(edges_by_state, names)
+
+
+def state_table(national, name, code):
+    """One state's result of query `name`, from national mode or its own query.
+
+    None when national mode returned no rows for the state.
+    """
+    if national is None:
+        return warehouse.query_arrow(QUERIES[name][0], {"state": code.upper()})
+    return national[name].get(code)
+
+
+def as_rows(table):
+    return [] if table is None else [dict(r.items()) for r in warehouse.rows(table)]
 
 
 # --------------------------------------------------------------------------
@@ -569,7 +788,8 @@ def build_geo(state, prac_bands, org_points, counties, categories, zip_xw):
 
 def build(state, rows, org_rows, edges, edge_names, parent_by_npi, owner_by_npi,
           org_resolution, ep_by_id, ep_by_npi, url_vendor, npi_url, name_url,
-          hospitals, enrollment_endpoints=None, geo_inputs=None):
+          hospitals, enrollment_endpoints=None, geo_inputs=None,
+          affiliation=None):
     enrollment_endpoints = enrollment_endpoints or {}
     prac_bands = []
     total = len(rows)
@@ -823,7 +1043,9 @@ def build(state, rows, org_rows, edges, edge_names, parent_by_npi, owner_by_npi,
     # which is weaker than a direct one and is reported as its own number.
     org_by_id = {o["org_id"]: o for o in org_rows}
     systems = build_systems(org_rows, parent_by_npi, owner_by_npi)
-    affiliation = describe_affiliation_graph(edges, edge_names)
+    # National mode describes every state's graph in one pass and passes it in.
+    if affiliation is None:
+        affiliation = describe_affiliation_graph(edges, edge_names)
     for sysrow in systems:
         # Collect every endpoint anywhere in the system, not the first one
         # found. A health system does not have "an endpoint": UPMC publishes an
@@ -1072,6 +1294,106 @@ def _commit_sha():
         return "pending"
 
 
+def assemble_state(shared, code, results, out_dir, geo=True, affiliation=None):
+    """Build one state's payload from its query results and write it.
+
+    `results` maps QUERIES names to that state's result table. `shared` holds
+    the reused artifacts every state needs, loaded once by main().
+    `affiliation` is the state's describe_affiliation_graphs entry, if any.
+    Without "org_points" in `results`, the point query runs here, as part of
+    the geo layer, so a state whose geo cannot be built never runs it and a
+    failed query costs the state its map, not its payload.
+    """
+    rows = as_rows(results["practitioners"])
+    org_rows = as_rows(results["orgs"])
+    edge_rows = as_rows(results["edges"])
+    edges = [(r["org_a"], r["org_b"]) for r in edge_rows]
+    # Hub names must come from the edge query, not from org_rows: org_rows
+    # only holds organizations that have practitioners, and the biggest
+    # hubs in this graph are pharmacy chains that have none.
+    edge_names = {}
+    for r in edge_rows:
+        edge_names[r["org_a"]] = r["name_a"]
+        edge_names[r["org_b"]] = r["name_b"]
+    print(f"  {len(rows):,} practitioners, {len(org_rows):,} organizations, "
+          f"{len(edges):,} affiliation edges")
+    parent_by_npi = {r["org_npi"]: r["parent_lbn"]
+                     for r in as_rows(results["parents"])}
+    print(f"  {len(parent_by_npi):,} organizations with an NPPES corporate parent")
+    owner_by_npi = load_hospital_owners(code)
+    print(f"  {len(owner_by_npi):,} organizations with a CMS-attested owner")
+    org_resolution = load_org_resolution(code)
+    print(f"  {len(org_resolution):,} organizations resolved to an endpoint "
+          f"by name or brand (H53)")
+    enrollment = load_enrollment_endpoints(code)
+    print(f"  {len(enrollment):,} practitioners with an endpoint via their "
+          f"CMS-enrolled group (H54)")
+
+    geo_inputs = None
+    if geo:
+        try:
+            fips = STATE_FIPS[code]
+            zip_xw = load_zip_county(fips)
+            counties = load_counties(False, state=code, state_fips=fips)
+            org_points = as_rows(results["org_points"] if "org_points" in results
+                                 else state_table(None, "org_points", code))
+            geo_inputs = {
+                "zip_xw": zip_xw, "counties": counties,
+                "org_points": org_points,
+                "categories": load_npi_categories(code),
+            }
+            print(f"  geo: {len(counties):,} counties, {len(zip_xw):,} ZIPs, "
+                  f"{len(org_points):,} organizations to plot")
+        except Exception as exc:
+            # The map is an addition to the ledger, not a precondition for
+            # it. A county file that moves or a state with no ERS row must
+            # not take the whole state slice down with it.
+            print(f"  geo unavailable, continuing without it: {exc}")
+
+    payload = build(code, rows, org_rows, edges, edge_names, parent_by_npi,
+                    owner_by_npi, org_resolution, shared["ep_by_id"],
+                    shared["ep_by_npi"], shared["url_vendor"], shared["npi_url"],
+                    shared["name_url"], load_hospitals(code), enrollment,
+                    geo_inputs, affiliation)
+    path = pathlib.Path(out_dir) / f"{code.lower()}-connectivity.json"
+    path.write_text(json.dumps(payload, indent=2) + "\n")
+    s = payload["summary"]
+    print(f"  role {s['with_role_pct']}%  "
+          f"endpoint {s['reaches_endpoint_pct']}% of all, "
+          f"{s['reaches_endpoint_pct_of_affiliated']}% of affiliated")
+    print(f"    NDH alone {s['reaches_endpoint_ndh_only']:,} -> "
+          f"+vendor NPI {s['reaches_endpoint_after_vendor_npi_fill']:,} -> "
+          f"+resolution {s['reaches_endpoint_after_resolution']:,} -> "
+          f"+CMS enrollment {s['reaches_endpoint_after_cms_enrollment']:,}")
+    print(f"  wrote {path}")
+    return path
+
+
+# Set once per worker process by the pool initializer, so the reused artifacts
+# are pickled to each worker once rather than with every state.
+_shared = None
+
+
+def _init_worker(shared):
+    global _shared
+    _shared = shared
+
+
+def _assemble_logged(code, results, out_dir, geo, affiliation=None):
+    """assemble_state in a worker, its output returned as one block.
+
+    Printing from the workers directly would interleave the states' lines.
+    """
+    buf = io.StringIO()
+    print(f"\n{code} ...", file=buf)
+    try:
+        with contextlib.redirect_stdout(buf):
+            assemble_state(_shared, code, results, out_dir, geo, affiliation)
+    except Exception as exc:
+        raise RuntimeError(f"{code} failed:\n{buf.getvalue()}") from exc
+    return buf.getvalue()
+
+
 def main():
     ap = argparse.ArgumentParser(description=__doc__,
                                  formatter_class=argparse.RawDescriptionHelpFormatter)
@@ -1081,7 +1403,21 @@ def main():
                     help="skip the county and point layers (one extra capped "
                          "query and three federal file downloads per state)")
     ap.add_argument("--out-dir", default=str(STATES_DIR))
+    ap.add_argument("--backend", choices=warehouse.BACKENDS, default=None,
+                    help="where the queries run: bigquery (default) or duckdb "
+                         "over the export_parquet.py files; see warehouse.py")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="run every query even if qcache.py holds its result")
+    ap.add_argument("--jobs", type=int, default=1,
+                    help="assemble and write this many states at once, in "
+                         "worker processes; queries still run in this one")
+    ap.add_argument("--per-state", action="store_true",
+                    help="with several states, still run five queries per "
+                         "state instead of five grouped by state")
     args = ap.parse_args()
+    warehouse.use(args.backend)
+    if args.no_cache:
+        qcache.disable()
 
     codes = [s.upper() for s in args.states]
     if args.all:
@@ -1099,69 +1435,58 @@ def main():
     out_dir = pathlib.Path(args.out_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    for code in codes:
-        print(f"\n{code} ...")
-        rows = [dict(r.items()) for r in run_query(PRACTITIONER_SQL, code)]
-        org_rows = [dict(r.items()) for r in run_query(ORG_SQL, code)]
-        edge_rows = [dict(r.items()) for r in run_query(AFFILIATION_SQL, code)]
-        edges = [(r["org_a"], r["org_b"]) for r in edge_rows]
-        # Hub names must come from the edge query, not from org_rows: org_rows
-        # only holds organizations that have practitioners, and the biggest
-        # hubs in this graph are pharmacy chains that have none.
-        edge_names = {}
-        for r in edge_rows:
-            edge_names[r["org_a"]] = r["name_a"]
-            edge_names[r["org_b"]] = r["name_b"]
-        print(f"  {len(rows):,} practitioners, {len(org_rows):,} organizations, "
-              f"{len(edges):,} affiliation edges")
-        parent_by_npi = {r["org_npi"]: r["parent_lbn"]
-                         for r in run_query(PARENT_SQL, code)}
-        print(f"  {len(parent_by_npi):,} organizations with an NPPES corporate parent")
-        owner_by_npi = load_hospital_owners(code)
-        print(f"  {len(owner_by_npi):,} organizations with a CMS-attested owner")
-        org_resolution = load_org_resolution(code)
-        print(f"  {len(org_resolution):,} organizations resolved to an endpoint "
-              f"by name or brand (H53)")
-        enrollment = load_enrollment_endpoints(code)
-        print(f"  {len(enrollment):,} practitioners with an endpoint via their "
-              f"CMS-enrolled group (H54)")
-
-        geo_inputs = None
-        if not args.no_geo:
+    t0 = time.time()
+    # The point layer belongs to geo: per state it is queried while the geo
+    # layer is built (assemble_state), where a failure only drops the map.
+    names = [n for n in QUERIES if n != "org_points"]
+    national = None
+    affiliations = {}
+    if len(codes) > 1 and not args.per_state:
+        print(f"\nNational mode: {len(names) + (not args.no_geo)} queries grouped by state "
+              f"for {len(codes)} states")
+        national = national_results(codes, names)
+        affiliations = national_affiliation(national)
+        mapped = [c for c in codes if c in STATE_FIPS]
+        if not args.no_geo and mapped:
             try:
-                fips = STATE_FIPS[code]
-                zip_xw = load_zip_county(fips)
-                counties = load_counties(False, state=code, state_fips=fips)
-                org_points = [dict(r.items())
-                              for r in run_query(ORG_POINT_SQL, code)]
-                geo_inputs = {
-                    "zip_xw": zip_xw, "counties": counties,
-                    "org_points": org_points,
-                    "categories": load_npi_categories(code),
-                }
-                print(f"  geo: {len(counties):,} counties, {len(zip_xw):,} ZIPs, "
-                      f"{len(org_points):,} organizations to plot")
+                national.update(national_results(mapped, ["org_points"]))
+                names.append("org_points")
             except Exception as exc:
-                # The map is an addition to the ledger, not a precondition for
-                # it. A county file that moves or a state with no ERS row must
-                # not take the whole state slice down with it.
-                print(f"  geo unavailable, continuing without it: {exc}")
-
-        payload = build(code, rows, org_rows, edges, edge_names, parent_by_npi,
-                        owner_by_npi, org_resolution, ep_by_id, ep_by_npi,
-                        url_vendor, npi_url, name_url, load_hospitals(code),
-                        enrollment, geo_inputs)
-        path = out_dir / f"{code.lower()}-connectivity.json"
-        path.write_text(json.dumps(payload, indent=2) + "\n")
-        s = payload["summary"]
-        print(f"  role {s['with_role_pct']}%  "
-              f"endpoint {s['reaches_endpoint_pct']}% of all, "
-              f"{s['reaches_endpoint_pct_of_affiliated']}% of affiliated")
-        print(f"    NDH alone {s['reaches_endpoint_ndh_only']:,} -> "
-              f"+vendor NPI {s['reaches_endpoint_after_vendor_npi_fill']:,} -> "
-              f"+resolution {s['reaches_endpoint_after_resolution']:,} -> "
-              f"+CMS enrollment {s['reaches_endpoint_after_cms_enrollment']:,}")
-        print(f"  wrote {path}")
+                print(f"  grouped point query failed, states will run their own: {exc}")
+
+    shared = {"ep_by_id": ep_by_id, "ep_by_npi": ep_by_npi,
+              "url_vendor": url_vendor, "npi_url": npi_url, "name_url": name_url}
+
+    def inputs():
+        for code in codes:
+            yield code, {n: state_table(national, n, code) for n in names}
+
+    if args.jobs <= 1:
+        for code, results in inputs():
+            print(f"\n{code} ...")
+            assemble_state(shared, code, results, out_dir, not args.no_geo,
+                           affiliations.get(code))
+    else:
+        print(f"\nAssembling {len(codes)} states on {args.jobs} processes")
+        with ProcessPoolExecutor(max_workers=args.jobs, initializer=_init_worker,
+                                 initargs=(shared,)) as pool:
+            pending = collections.deque()
+            for code, results in inputs():
+                pending.append(pool.submit(_assemble_logged, code, results,
+                                           out_dir, not args.no_geo,
+                                           affiliations.get(code)))
+                # At most 2 x jobs states held, so per-state queries in the
+                # parent do not run arbitrarily far ahead of the builds.
+                if len(pending) >= 2 * args.jobs:
+                    print(pending.popleft().result(), end="")
+            while pending:
+                print(pending.popleft().result(), end="")
+
+    st = qcache.stats
+    print(f"\n{'per-state' if national is None else 'national'} mode: "
+          f"{st.queries:,} queries run, {st.hits:,} answered from cache, "
+          f"{qcache.fmt_bytes(st.bytes_billed)} billed, "
+          f"{time.time() - t0:,.1f}s for {len(codes)} state(s)")
     return 0
 
 
@@ -0,0 +1,102 @@
+"""Tests for analysis/claims_sources/_claims_cache.py — typed claims CSV copies.
+
+A typed row must carry the value the DictReader-era code computed from the
+string: float(v) for amounts, int(float(v)) for counts, and nothing for a
+blank or unparseable number. The CSV and its parquet copy must read back as
+the same rows, and a copy that is older than its CSV, or written for other
+columns, must not be read.
+"""
+from __future__ import annotations
+
+import os
+import pathlib
+import sys
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent.parent))
+
+from analysis.claims_sources import _claims_cache as claims_cache  # noqa: E402
+
+PARTD = (
+    "PRSCRBR_NPI,Prscrbr_Last_Org_Name,Prscrbr_State_Abrvtn,Tot_Clms,Tot_Benes,"
+    "Tot_Drug_Cst,Opioid_Tot_Clms,Opioid_Tot_Drug_Cst\n"
+    '1000000001,"SMITH, JR",VA,12,15,1234.56,,\n'
+    " 1000000002 ,DOE,MD,12.0,,0.1, 3 ,*\n"
+    '1000000003,"LINE\nBREAK",VA,3.6,11,1e3,0,0\n'
+)
+
+
+def _rows(csv_path):
+    source, reader = claims_cache.batches(csv_path)
+    return source, [r for b in reader for r in b.to_pylist()]
+
+
+def test_types_follow_the_old_string_parsing(tmp_path):
+    path = tmp_path / "partd-by-provider.csv"
+    path.write_text(PARTD)
+    source, rows = _rows(path)
+    assert source == path.name
+    # Projection drops the name column; the key is not stripped here.
+    assert list(rows[0]) == list(claims_cache.LAYOUTS[path.name].columns)
+    assert [r["PRSCRBR_NPI"] for r in rows] == ["1000000001", " 1000000002 ", "1000000003"]
+    assert [r["Tot_Clms"] for r in rows] == [12, 12, 3]
+    assert [r["Tot_Benes"] for r in rows] == [15, None, 11]
+    assert [r["Tot_Drug_Cst"] for r in rows] == [1234.56, 0.1, 1000.0]
+    assert [r["Opioid_Tot_Clms"] for r in rows] == [None, 3, 0]
+    assert [r["Opioid_Tot_Drug_Cst"] for r in rows] == [None, None, 0.0]
+    assert [r["Prscrbr_State_Abrvtn"] for r in rows] == ["VA", "MD", "VA"]
+
+
+def test_copy_reads_back_the_same_rows(tmp_path):
+    path = tmp_path / "partd-by-provider.csv"
+    path.write_text(PARTD.splitlines(keepends=True)[0] + "".join(
+        f"{1000000000 + i},N{i},{['VA', 'MD', 'DC'][i % 3]},{i},{i % 7 or ''},{i * 1.25},{i % 5},{i / 3}\n"
+        for i in range(5000)))
+    _, want = _rows(path)
+    out, stats = claims_cache.convert(path, block_bytes=16 << 10)
+    assert stats.rows == 5000 and stats.parquet_bytes == out.stat().st_size
+    assert claims_cache.cached(path) == out
+    source, got = _rows(path)
+    assert source == out.name and got == want
+
+    schema = pq.read_schema(out)
+    assert schema.field("Prscrbr_State_Abrvtn").type == pa.dictionary(pa.int32(), pa.string())
+    assert schema.field("Tot_Drug_Cst").type == pa.float64()
+    assert schema.field("Tot_Clms").type == pa.int64()
+
+
+def test_stale_or_foreign_copies_are_ignored(tmp_path):
+    path = tmp_path / "partd-by-provider.csv"
+    path.write_text(PARTD)
+    out, _ = claims_cache.convert(path)
+    later = out.stat().st_mtime + 10
+    os.utime(path, (later, later))
+    assert claims_cache.cached(path) is None
+    assert _rows(path)[0] == path.name
+
+    earlier = later - 20
+    os.utime(path, (earlier, earlier))
+    assert claims_cache.cached(path) == out
+    pq.write_table(pa.table({"PRSCRBR_NPI": ["1"]}), out)
+    assert claims_cache.cached(path) is None
+
+    claims_cache.convert(path)
+    path.unlink()
+    assert claims_cache.cached(path) == out
+
+
+def test_missing_columns_and_unknown_files(tmp_path):
+    path = tmp_path / "partd-by-provider.csv"
+    path.write_text("PRSCRBR_NPI,Tot_Clms\n1000000001,4\n")
+    _, rows = _rows(path)
+    assert rows == [{"PRSCRBR_NPI": "1000000001", "Prscrbr_State_Abrvtn": "",
+                     "Tot_Drug_Cst": None, "Opioid_Tot_Drug_Cst": None,
+                     "Tot_Clms": 4, "Tot_Benes": None, "Opioid_Tot_Clms": None}]
+
+    other = tmp_path / "other.csv"
+    other.write_text("NPI,Amount\n0012,\n")
+    assert _rows(other) == ("other.csv", [{"NPI": "0012", "Amount": ""}])
@@ -0,0 +1,155 @@
+"""Tests for analysis/claims_sources/_csv_ranges.py — record-aligned CSV ranges.
+
+A range must begin on a record even when a nominal cut lands inside a
+quoted field that holds newlines, commas or doubled quotes, so the ranges
+parsed one by one give the rows of the whole file, in order. A parallel
+scan built on them must hand back what a single read gives, for the CSV
+and for its typed copy, and a consumer that cannot merge must say so.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import pathlib
+import random
+import sys
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent.parent))
+
+from analysis import h39_pecos_multi_enrollment as h39  # noqa: E402
+from analysis.claims_sources import _claims_cache as claims_cache  # noqa: E402
+from analysis.claims_sources import _csv_ranges as csv_ranges  # noqa: E402
+from analysis.claims_sources import _csv_scan as csv_scan  # noqa: E402
+from analysis.claims_sources import open_payments  # noqa: E402
+
+OP_HEADER = ["Covered_Recipient_NPI", "Covered_Recipient_Profile_First_Name",
+             "Covered_Recipient_Profile_Last_Name", "Recipient_Type",
+             "Nature_Of_Payment_Type_Code", "Total_Amount", "Number_of_Transaction"]
+
+
+def _text(rows, newline="\n"):
+    out = io.StringIO()
+    csv.writer(out, lineterminator=newline).writerows(rows)
+    return out.getvalue()
+
+
+def _awkward_rows(n, seed=1):
+    rng = random.Random(seed)
+    notes = ["plain", 'say ""hi""', "two\nlines", "comma, inside", '"\n"', ""]
+    return [[str(1000000000 + rng.randint(0, 50)), rng.choice(notes), f"{i}",
+             rng.choice(notes) * rng.randint(1, 40)] for i in range(n)]
+
+
+@pytest.fixture
+def small_ranges(monkeypatch):
+    monkeypatch.setattr(csv_ranges, "MIN_RANGE_BYTES", 256)
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+@pytest.mark.parametrize("workers", [1, 2])
+def test_ranges_start_on_records(tmp_path, small_ranges, newline, workers):
+    rows = [["npi", "note", "seq", "long"]] + _awkward_rows(600)
+    path = tmp_path / "awkward.csv"
+    path.write_bytes(_text(rows, newline).encode())
+
+    ranges = csv_ranges.split(path, 16, workers=workers)
+    assert len(ranges) > 8
+    assert ranges[0][0] == 0 and ranges[-1][1] == path.stat().st_size
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+    got = []
+    for start, stop in ranges:
+        text = csv_ranges.buffer(path, start, stop).to_pybytes().decode()
+        got += list(csv.reader(io.StringIO(text, newline="")))
+    assert got == rows
+
+
+def test_small_files_are_one_range(tmp_path):
+    path = tmp_path / "tiny.csv"
+    path.write_text("a,b\n1,2\n")
+    assert csv_ranges.split(path, 8) == [(0, path.stat().st_size)]
+    empty = tmp_path / "empty.csv"
+    empty.write_text("")
+    assert csv_ranges.split(empty, 8) == [(0, 0)]
+
+
+def _op_file(tmp_path, n=3000):
+    rng = random.Random(2)
+    natures = ["Food and Beverage", "Travel, Lodging", 'Consulting "Fee"', "Gift\nOther"]
+    rows = [OP_HEADER] + [[
+        str(1000000000 + rng.randint(0, 40)), rng.choice(["ANN", "", "BO"]),
+        rng.choice(["LEE", "", "NG"]), rng.choice(["Physician", ""]), rng.choice(natures),
+        f"{rng.random() * 1000:.2f}", str(rng.randint(1, 9)),
+    ] for _ in range(n)]
+    path = tmp_path / "openpayments-2024-by-recipient-nature.csv"
+    path.write_text(_text(rows))
+    return path
+
+
+def _payments(path, workers):
+    excl = {str(1000000000 + i): {} for i in range(0, 40, 3)}
+    (per_npi,), stats = csv_scan.scan(path, [open_payments.IndustryPayments(excl)],
+                                      progress_every=0, workers=workers)
+    return per_npi, stats
+
+
+def test_parallel_scan_matches_one_read(tmp_path, small_ranges, monkeypatch):
+    path = _op_file(tmp_path)
+    want, stats = _payments(path, 1)
+    got, pstats = _payments(path, 3)
+    assert pstats.rows == stats.rows == 3000 and pstats.workers == 3
+    assert got == want
+    assert [list(v["nature_breakdown"]) for v in got.values()] == \
+        [list(v["nature_breakdown"]) for v in want.values()]
+
+    monkeypatch.setattr(claims_cache, "ROW_GROUP_ROWS", 400)
+    claims_cache.convert(path)
+    assert len(claims_cache.pieces(path, 4)) == 4
+    got, pstats = _payments(path, 3)
+    assert pstats.source.endswith(claims_cache.TYPED_SUFFIX)
+    assert got == want
+
+
+def test_h39_enrollments_in_parallel(tmp_path, small_ranges):
+    header = ["NPI", "ENRLMT_ID", "STATE_CD", "PROVIDER_TYPE_CD", "PROVIDER_TYPE_DESC",
+              "FIRST_NAME", "LAST_NAME", "ORG_NAME"]
+    rng = random.Random(3)
+    rows = [header] + [[
+        rng.choice([f" {1000000000 + i % 97} ", "", "12345"]), f"I{i}", rng.choice(["va", "MD ", ""]),
+        "14-08", "PRACTITIONER - INTERNAL MEDICINE", rng.choice(["JOSÉ", ""]), "NUÑEZ", "",
+    ] for i in range(2500)]
+    path = tmp_path / "PPEF_Enrollment_Extract_2026.04.01.csv"
+    path.write_bytes(_text(rows).encode("latin-1"))
+
+    want = {}
+    for row in rows[1:]:
+        npi = row[0].strip()
+        if len(npi) == 10:
+            want.setdefault(npi, []).append({
+                field: (row[header.index(col)].strip().upper() if field == "state"
+                        else row[header.index(col)].strip())
+                for field, col in h39.ENROLLMENT_FIELDS.items()})
+    multi = {npi: e for npi, e in want.items() if len({x["state"] for x in e} - {""}) >= 2}
+    assert 0 < len(multi) < len(want)
+    for workers in (1, 2):
+        ((distinct, got),), stats = csv_scan.scan(path, [h39.Enrollments()], progress_every=0,
+                                                  workers=workers)
+        assert stats.rows == 2500 and distinct == len(want)
+        assert got == multi and list(got) == list(multi)
+
+
+def test_consumers_without_merge_refuse_parallel_scans(tmp_path, small_ranges):
+    class Count(csv_scan.Consumer):
+        column = "Covered_Recipient_NPI"
+
+        def __init__(self):
+            self.n = 0
+
+        def add(self, key, row):
+            self.n += 1
+
+    with pytest.raises(NotImplementedError, match="Count"):
+        csv_scan.scan(_op_file(tmp_path), [Count()], progress_every=0, workers=2)
@@ -0,0 +1,304 @@
+"""Tests for analysis/claims_sources/_csv_scan.py — the shared Part B read.
+
+Consumers that share one read must each end up with what a read of their
+own produces, and with what the per-script DictReader loops they replaced
+produced; those loops are kept here as references. Every check runs twice,
+reading the CSV and reading its typed parquet copy. H31's consumer is left
+out: its module needs google-cloud-bigquery at import time.
+"""
+from __future__ import annotations
+
+import csv
+import pathlib
+import random
+import sys
+from collections import Counter, defaultdict
+
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent.parent))
+
+from analysis import h41_specialty_drift as h41  # noqa: E402
+from analysis.claims_sources import _claims_cache as claims_cache  # noqa: E402
+from analysis.claims_sources import _csv_scan as csv_scan  # noqa: E402
+from analysis.claims_sources import _npi_set as npi_set  # noqa: E402
+from analysis.claims_sources import medicare_partb as h30a  # noqa: E402
+from analysis.claims_sources import medicare_partb_by_hcpcs as h40  # noqa: E402
+from analysis.claims_sources import ndh_completeness as h36  # noqa: E402
+
+POOL = [f"{1000000000 + i}" for i in range(80)]
+STATES = ["VA", "MD", "DC", "PA", ""]
+
+
+def _maybe(rng, value):
+    return "" if rng.random() < 0.05 else value
+
+
+def _row(rng, npi):
+    return {
+        "Rndrng_NPI": f" {npi} " if rng.random() < 0.1 else npi,
+        "Rndrng_Prvdr_Last_Org_Name": rng.choice(["SMITH", "DOE", "ACME LAB", ""]),
+        "Rndrng_Prvdr_First_Name": rng.choice(["ANN", "BO", ""]),
+        "Rndrng_Prvdr_Ent_Cd": rng.choice(["I", "O"]),
+        "Rndrng_Prvdr_State_Abrvtn": rng.choice(STATES),
+        "Rndrng_Prvdr_Type": rng.choice(["Internal Medicine", "Cardiology", ""]),
+        "Tot_Srvcs": _maybe(rng, str(rng.choice([0, 3, 3.6, 12.0, 250]))),
+        "Tot_Benes": _maybe(rng, str(rng.randint(11, 90))),
+        "Tot_Mdcr_Pymt_Amt": _maybe(rng, f"{rng.uniform(0, 50000):.2f}"),
+        "Tot_Mdcr_Alowd_Amt": _maybe(rng, f"{rng.uniform(0, 60000):.2f}"),
+        "HCPCS_Cd": _maybe(rng, rng.choice(["99213", "99214", "93000", "G2012", "J3490"])),
+        "HCPCS_Desc": "desc",
+        "HCPCS_Drug_Ind": rng.choice(["Y", "N"]),
+        "Place_Of_Srvc": rng.choice(["F", "O"]),
+        "Avg_Mdcr_Pymt_Amt": _maybe(rng, f"{rng.uniform(1, 300):.2f}"),
+        "Avg_Mdcr_Alowd_Amt": _maybe(rng, f"{rng.uniform(1, 400):.2f}"),
+        "Avg_Sbmtd_Chrg": _maybe(rng, f"{rng.uniform(1, 900):.2f}"),
+    }
+
+
+def _write(path, rng, n_rows):
+    rows = [_row(rng, _maybe(rng, rng.choice(POOL))) for _ in range(n_rows)]
+    with open(path, "w", newline="") as fh:
+        w = csv.DictWriter(fh, fieldnames=list(rows[0]))
+        w.writeheader()
+        w.writerows(rows)
+
+
+def _cohorts(rng):
+    cohorts = {st: {} for st in ("VA", "MD")}
+    for npi in rng.sample(POOL, 25):
+        cohorts[rng.choice(["VA", "MD"])][npi] = {
+            "name": f"N{npi[-2:]}", "reasons": "LEIE", "score": "2.0",
+            "leie_excldate": rng.choice(["2019-04-01", "2023-02-01", ""]),
+        }
+    return cohorts
+
+
+def _int(v):
+    """h41_specialty_drift._int before the typed cache."""
+    try:
+        return int(float(v)) if v not in (None, "") else 0
+    except (TypeError, ValueError):
+        return 0
+
+
+def _float(v):
+    try:
+        return float(v) if v not in (None, "") else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _read(path):
+    with open(path, newline="") as fh:
+        return list(csv.DictReader(fh))
+
+
+def reference_h30a(path, cohorts):
+    """medicare_partb.main's loop before the shared scan, paid/state only."""
+    npi_to_state = h30a.npi_to_state_map(cohorts)
+    out = defaultdict(list)
+    for row in _read(path):
+        npi = (row.get("Rndrng_NPI") or "").strip()
+        if not npi or npi not in npi_to_state:
+            continue
+        cy = h30a.cutoff_year(cohorts[npi_to_state[npi]][npi])
+        services = int(float(row.get("Tot_Srvcs") or 0)) if row.get("Tot_Srvcs") else ""
+        benes = int(float(row.get("Tot_Benes") or 0)) if row.get("Tot_Benes") else ""
+        out[npi_to_state[npi]].append(
+            (npi, round(float(row.get("Tot_Mdcr_Pymt_Amt") or 0), 2), services, benes,
+             row.get("Rndrng_Prvdr_Type", ""),
+             "yes" if cy is not None and cy < 2023 else "no"))
+    return dict(out)
+
+
+def reference_h36(path, ndh):
+    absent, total = [], 0
+    for row in _read(path):
+        total += 1
+        npi = (row.get("Rndrng_NPI") or "").strip()
+        if npi not in ndh:
+            services = int(float(row.get("Tot_Srvcs") or 0)) if row.get("Tot_Srvcs") else 0
+            absent.append((npi, round(float(row.get("Tot_Mdcr_Pymt_Amt") or 0), 2), services))
+    return absent, total
+
+
+def reference_h41(path, primary, nppes_set):
+    """Both passes of h41_specialty_drift as two reads, before the shared scan."""
+    counts = defaultdict(Counter)
+    rows = _read(path)
+    for row in rows:
+        npi = (row.get("Rndrng_NPI") or "").strip()
+        hcpcs = (row.get("HCPCS_Cd") or "").strip()
+        nucc = primary.get(npi)
+        if npi and hcpcs and nucc and _int(row.get("Tot_Srvcs")) > 0:
+            counts[hcpcs][nucc] += _int(row.get("Tot_Srvcs"))
+    affinity = {h: c.most_common(1)[0][0] for h, c in counts.items() if c}
+    per_npi = {}
+    for row in rows:
+        npi = (row.get("Rndrng_NPI") or "").strip()
+        hcpcs = (row.get("HCPCS_Cd") or "").strip()
+        srvcs = _int(row.get("Tot_Srvcs"))
+        if not (npi and hcpcs and nppes_set.get(npi) and affinity.get(hcpcs)) or srvcs <= 0:
+            continue
+        data = per_npi.setdefault(npi, {"total": 0, "drift": 0, "paid": 0.0, "states": Counter(),
+                                        "hcpcs": Counter(), "name": "", "type": ""})
+        data["total"] += srvcs
+        if not data["name"]:
+            last = (row.get("Rndrng_Prvdr_Last_Org_Name") or "").strip()
+            first = (row.get("Rndrng_Prvdr_First_Name") or "").strip()
+            data["name"] = f"{last}, {first}".strip(", ")
+        if not data["type"]:
+            data["type"] = (row.get("Rndrng_Prvdr_Type") or "").strip()
+        state = (row.get("Rndrng_Prvdr_State_Abrvtn") or "").strip().upper()
+        if state:
+            data["states"][state] += srvcs
+        if affinity[hcpcs] not in nppes_set[npi]:
+            data["drift"] += srvcs
+            data["paid"] += _float(row.get("Avg_Mdcr_Pymt_Amt")) * srvcs
+            data["hcpcs"][hcpcs] += srvcs
+    return affinity, per_npi
+
+
+@pytest.fixture
+def reads(monkeypatch):
+    """Files the scan read, in order."""
+    seen = []
+    batches = claims_cache.batches
+
+    def counting(path):
+        source, reader = batches(path)
+        seen.append(source)
+        return source, reader
+
+    monkeypatch.setattr(claims_cache, "batches", counting)
+    return seen
+
+
+def _source(path, typed):
+    if typed:
+        claims_cache.convert(path, block_bytes=4096)
+    return claims_cache.typed_path(path).name if typed else path.name
+
+
+@pytest.mark.parametrize("typed", [False, True])
+@pytest.mark.parametrize("seed", range(4))
+def test_by_provider_consumers_share_one_read(tmp_path, reads, seed, typed):
+    rng = random.Random(seed)
+    path = tmp_path / "partb-by-provider.csv"
+    _write(path, rng, 600)
+    source = _source(path, typed)
+    cohorts = _cohorts(rng)
+    ndh = set(rng.sample(POOL, 50))
+
+    (excluded, absent), stats = csv_scan.scan(
+        path, [h30a.ExcludedBilling(cohorts), h36.AbsentFromNdh(npi_set.NpiSet.build(ndh))],
+        progress_every=0)
+    assert reads == [source] == [stats.source] and stats.rows == 600 and stats.consumers == 2
+
+    assert {st: [(r["npi"], r["medicare_paid_2023"], r["services_2023"], r["beneficiaries_2023"],
+                  r["provider_type"], r["post_exclusion_2023_billing"])
+                 for r in rows] for st, rows in excluded.items()} == reference_h30a(path, cohorts)
+    assert ([(r["npi"], r["medicare_paid_2023"], r["services_2023"]) for r in absent.absent],
+            stats.rows) == reference_h36(path, ndh)
+
+    (alone,), _ = csv_scan.scan(path, [h30a.ExcludedBilling(cohorts)], progress_every=0)
+    assert alone == excluded
+
+
+@pytest.mark.parametrize("typed", [False, True])
+@pytest.mark.parametrize("seed", range(4))
+def test_by_service_consumers_match_their_own_reads(tmp_path, seed, typed):
+    rng = random.Random(seed)
+    path = tmp_path / "partb-by-provider-and-service.csv"
+    _write(path, rng, 1500)
+    _source(path, typed)
+    nucc = ["207R00000X", "207RC0000X", "363L00000X"]
+    primary = {npi: rng.choice(nucc) for npi in rng.sample(POOL, 60)}
+    nppes_set = {npi: frozenset(rng.sample(nucc, rng.randint(1, 2))) for npi in rng.sample(POOL, 60)}
+    cohorts = _cohorts(rng)
+
+    (found, (affinity, per_npi)), stats = csv_scan.scan(
+        path, [h40.ExcludedHcpcsBilling(cohorts), h41.SpecialtyDrift(primary, nppes_set)],
+        progress_every=0)
+
+    want_affinity, want = reference_h41(path, primary, nppes_set)
+    assert affinity == want_affinity
+    assert list(per_npi) == list(want)
+    for npi, data in per_npi.items():
+        ref = want[npi]
+        assert (data["total"], data["drift"], data["paid_at_drift"]) == \
+            (ref["total"], ref["drift"], ref["paid"]), npi
+        assert list(data["billing_states"].items()) == list(ref["states"].items())
+        assert list(data["drift_hcpcs"].items()) == list(ref["hcpcs"].items())
+        assert (data["name"], data["provider_type"]) == (ref["name"], ref["type"]), npi
+
+    (alone,), _ = csv_scan.scan(path, [h40.ExcludedHcpcsBilling(cohorts)], progress_every=0)
+    assert alone.per_state_rows == found.per_state_rows
+    assert list(alone.hcpcs_counter.items()) == list(found.hcpcs_counter.items())
+    assert sum(len(r) for r in found.per_state_rows.values()) == sum(found.hcpcs_counter.values())
+
+
+def test_key_column_is_stripped_once_per_row(tmp_path):
+    path = tmp_path / "p.csv"
+    path.write_text("Rndrng_NPI,Other\n 1000000001 ,x\n,y\n1000000002,z\n")
+
+    class Keys(csv_scan.Consumer):
+        def __init__(self):
+            self.keys = []
+
+        def add(self, key, row):
+            self.keys.append(key)
+
+        def result(self):
+            return self.keys
+
+    class Other(Keys):
+        column = "Other"
+
+        def accept(self, key):
+            return key != "y"
+
+    (keys, other), stats = csv_scan.scan(path, [Keys(), Other()])
+    assert keys == ["1000000001", "", "1000000002"] and other == ["x", "z"]
+    assert stats.rows == 3
+
+
+def test_a_consumer_must_say_what_it_does_with_a_row():
+    class Nothing(csv_scan.Consumer):
+        pass
+
+    class Batches(csv_scan.BatchConsumer):
+        def __init__(self):
+            self.batches = []
+
+        def add_batch(self, keys, batch):
+            self.batches.append((keys.to_pylist(), batch.to_pylist()))
+
+    with pytest.raises(TypeError, match="abstract"):
+        Nothing()
+    with pytest.raises(TypeError, match="abstract"):
+        type("NoBatch", (csv_scan.BatchConsumer,), {})()
+    batches = Batches()
+    batches.add("1000000001", {"Rndrng_NPI": "1000000001", "Tot_Srvcs": 3})
+    assert batches.batches == [(["1000000001"], [{"Rndrng_NPI": "1000000001", "Tot_Srvcs": 3}])]
+
+
+def test_affinity_ties_go_to_the_first_vote(tmp_path):
+    path = tmp_path / "partb-by-provider-and-service.csv"
+    path.write_text(
+        "Rndrng_NPI,HCPCS_Cd,Tot_Srvcs,Avg_Mdcr_Pymt_Amt,Rndrng_Prvdr_State_Abrvtn\n"
+        "1000000002,99213,5,1.5,va\n"
+        "1000000001,99213,5,2.0,md\n"
+        "1000000003,93000,0,9.0,VA\n"
+        "1000000001,93000,2,1.0,VA\n")
+    primary = {"1000000001": "B", "1000000002": "A", "1000000003": "C"}
+    nppes_set = {"1000000001": frozenset({"B"}), "1000000003": frozenset({"C"})}
+    ((affinity, per_npi),), _ = csv_scan.scan(
+        path, [h41.SpecialtyDrift(primary, nppes_set)], progress_every=0)
+    assert affinity == {"99213": "A", "93000": "B"}
+    assert list(per_npi) == ["1000000001"]
+    data = per_npi["1000000001"]
+    assert (data["total"], data["drift"], data["paid_at_drift"]) == (7, 5, 10.0)
+    assert list(data["billing_states"].items()) == [("MD", 5), ("VA", 2)]
+    assert data["drift_hcpcs"] == {"99213": 5} and data["name"] == ""
@@ -0,0 +1,199 @@
+"""Tests for analysis/csv_source.py — CSVs kept compressed on disk.
+
+Whichever form a CSV is stored in, a reader must get the same bytes: the
+background thread's blocks must join back seamlessly, an error in the
+thread must reach the reader rather than look like the end of the file,
+and a reader closed early must not leave the thread behind. The claims
+scans and the PECOS ingest must read a compressed copy as they read the
+CSV itself. A file of unknown encoding must be read once, each row handed
+over once, and come out as the encoding it turned out to be.
+"""
+from __future__ import annotations
+
+import csv
+import gzip
+import io
+import pathlib
+import sys
+import threading
+import zipfile
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+zstandard = pytest.importorskip("zstandard")
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent.parent))
+
+from analysis import csv_source  # noqa: E402
+from analysis import ingest_pecos_affiliations as pecos  # noqa: E402
+from analysis.claims_sources import _claims_cache as claims_cache  # noqa: E402
+from analysis.claims_sources import _csv_scan as csv_scan  # noqa: E402
+
+PARTD = "PRSCRBR_NPI,Prscrbr_State_Abrvtn,Tot_Clms,Tot_Benes,Tot_Drug_Cst,Opioid_Tot_Clms,Opioid_Tot_Drug_Cst\n" + "".join(
+    f'{1000000000 + i % 37},{["VA", "MD", "DC"][i % 3]},{i},{i % 7 or ""},{i * 1.25},{i % 5},"{i / 3}"\n'
+    for i in range(3000))
+
+
+def _store(path: pathlib.Path, form: str, data: bytes, member: str | None = None) -> pathlib.Path:
+    """Write `data` as the `form` copy of the CSV `path`; return the file written."""
+    if form == "csv":
+        path.write_bytes(data)
+        return path
+    if form == "zst":
+        out = path.with_name(path.name + ".zst")
+        out.write_bytes(zstandard.ZstdCompressor(level=3).compress(data))
+    elif form == "gz":
+        out = path.with_name(path.name + ".gz")
+        out.write_bytes(gzip.compress(data))
+    else:
+        out = path.with_suffix(".zip")
+        with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("README.txt", "not this one")
+            zf.writestr(member or f"data/{path.name}", data)
+    return out
+
+
+@pytest.mark.parametrize("form", ["csv", "zst", "gz", "zip"])
+def test_every_form_reads_back_the_csv(tmp_path, form, monkeypatch):
+    monkeypatch.setattr(csv_source, "BLOCK_BYTES", 1000)
+    path = tmp_path / "partd-by-provider.csv"
+    stored = _store(path, form, PARTD.encode())
+    assert csv_source.locate(path) == stored
+    assert csv_source.compressed(stored) == (form != "csv")
+    with csv_source.open_binary(path, block_bytes=777) as fh:
+        assert fh.read() == PARTD.encode()
+    with csv_source.open_text(path) as fh:
+        assert list(csv.reader(fh)) == list(csv.reader(io.StringIO(PARTD)))
+
+
+def test_plain_copy_wins_and_missing_files_say_so(tmp_path):
+    path = tmp_path / "x.csv"
+    assert csv_source.locate(path) is None and not csv_source.exists(path)
+    with pytest.raises(FileNotFoundError):
+        csv_source.open_binary(path)
+    _store(path, "gz", b"a\n2\n")
+    _store(path, "zst", b"a\n1\n")
+    assert csv_source.locate(path).name == "x.csv.zst"
+    _store(path, "csv", b"a\n0\n")
+    assert csv_source.locate(path) == path
+    assert csv_source.candidates(path.with_name("x.csv.gz")) == [path.with_name("x.csv.gz")]
+
+
+def test_zip_holding_another_name_must_hold_one_csv(tmp_path):
+    path = tmp_path / "x.csv"
+    _store(path, "zip", b"a\n1\n", member="Extract 2026.csv")
+    assert csv_source.zip_member(path.with_suffix(".zip")) == "Extract 2026.csv"
+    with zipfile.ZipFile(path.with_suffix(".zip"), "a") as zf:
+        zf.writestr("other.csv", "b\n")
+    with pytest.raises(FileNotFoundError, match="2 other CSVs"):
+        csv_source.open_binary(path)
+
+
+def test_thread_errors_reach_the_reader(tmp_path):
+    path = tmp_path / "x.csv"
+    stored = _store(path, "gz", PARTD.encode())
+    stored.write_bytes(stored.read_bytes()[:2000])
+    with pytest.raises(EOFError), csv_source.open_binary(path, block_bytes=100) as fh:
+        fh.read()
+
+
+def test_closing_early_stops_the_thread(tmp_path):
+    path = tmp_path / "x.csv"
+    _store(path, "zst", PARTD.encode() * 20)
+    before = threading.active_count()
+    fh = csv_source.open_binary(path, block_bytes=64)
+    assert fh.read(10) == PARTD.encode()[:10]
+    fh.close()
+    assert threading.active_count() == before
+
+
+@pytest.mark.parametrize("form", ["zst", "gz", "zip"])
+def test_scans_read_a_compressed_csv_whole(tmp_path, form):
+    plain = tmp_path / "plain" / "partd-by-provider.csv"
+    plain.parent.mkdir()
+    _store(plain, "csv", PARTD.encode())
+    path = tmp_path / "partd-by-provider.csv"
+    stored = _store(path, form, PARTD.encode())
+
+    want = [r for b in claims_cache.batches(plain)[1] for r in b.to_pylist()]
+    source, reader = claims_cache.batches(path)
+    assert source == stored.name and [r for b in reader for r in b.to_pylist()] == want
+    assert claims_cache.pieces(path, 8) == [claims_cache.Piece(stored.name, 0, stored.stat().st_size)]
+
+    class Rows(csv_scan.Consumer):
+        column = "PRSCRBR_NPI"
+
+        def __init__(self):
+            self.rows = []
+
+        def add(self, key, row):
+            self.rows.append(row)
+
+        def merge(self, other):
+            self.rows += other.rows
+
+    (rows,), stats = csv_scan.scan(path, [Rows()], progress_every=0, workers=2)
+    assert stats.source == stored.name and [r for r in rows.rows] == want
+
+    out, cstats = claims_cache.convert(path)
+    assert cstats.source == stored.name and cstats.csv_bytes == stored.stat().st_size
+    assert claims_cache.cached(path) == out
+
+
+def test_pecos_read_csv_reads_a_compressed_download(tmp_path):
+    path = tmp_path / "ppef_enrollment.csv"
+    _store(path, "gz", "NPI,LAST_NAME\n1000000001,NUÑEZ\n".encode("latin-1"))
+    assert list(pecos.read_csv(path)) == [{"NPI": "1000000001", "LAST_NAME": "NUÑEZ"}]
+
+
+ROWS = [["NPI", "LAST_NAME"]] + [[str(1000000000 + i), f"NAME{i}"] for i in range(400)]
+
+
+def _csv_bytes(rows, encoding):
+    out = io.StringIO()
+    csv.writer(out, lineterminator="\r\n").writerows(rows)
+    return out.getvalue().encode(encoding)
+
+
+def _detect(path):
+    with csv_source.open_text(path, encoding=csv_source.DETECT) as fh:
+        return list(csv.reader(fh)), csv_source.detected_encoding(fh), fh.buffer.raw.switched_at
+
+
+@pytest.mark.parametrize("block_bytes", [1, 2, 5, 1 << 20])
+def test_latin1_deep_in_the_file_is_read_once(tmp_path, monkeypatch, block_bytes):
+    monkeypatch.setattr(csv_source, "BLOCK_BYTES", block_bytes)
+    rows = ROWS[:300] + [["1000000300", "NUÑEZ"], ["1000000301", "ÉCOLE"]] + ROWS[300:]
+    path = tmp_path / "ppef_enrollment.csv"
+    path.write_bytes(_csv_bytes(rows, "latin-1"))
+    got, encoding, at = _detect(path)
+    assert got == rows and encoding == "latin-1"
+    assert at == path.read_bytes().index("Ñ".encode("latin-1"))
+
+
+@pytest.mark.parametrize("block_bytes", [1, 2, 5, 1 << 20])
+def test_utf8_split_across_blocks_stays_utf8(tmp_path, monkeypatch, block_bytes):
+    monkeypatch.setattr(csv_source, "BLOCK_BYTES", block_bytes)
+    rows = ROWS[:50] + [["1000000050", "NUÑEZ €"], ["1000000051", "😀"]] + ROWS[50:]
+    path = tmp_path / "dac_national.csv"
+    path.write_bytes(b"\xef\xbb\xbf" + _csv_bytes(rows, "utf-8"))
+    assert _detect(path) == (rows, "utf-8", None)
+
+
+def test_mixed_files_say_so(tmp_path):
+    path = tmp_path / "x.csv"
+    path.write_bytes("a\nNUÑEZ\n".encode() + "NUÑEZ\n".encode("latin-1") + b"\xe2\x82")
+    got, encoding, at = _detect(path)
+    assert got == [["a"], ["NUÑEZ"], ["NUÑEZ"], ["â\x82"]] and encoding == "utf-8+latin-1"
+    assert at == len("a\nNUÑEZ\nNU".encode())
+
+
+def test_pecos_read_csv_yields_each_row_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(csv_source, "BLOCK_BYTES", 64)
+    rows = ROWS + [["1000000999", "NUÑEZ"]]
+    path = tmp_path / "ppef_enrollment.csv"
+    _store(path, "zst", _csv_bytes(rows, "latin-1"))
+    got = list(pecos.read_csv(path))
+    assert [[r["NPI"], r["LAST_NAME"]] for r in got] == rows[1:]
+    assert pecos.ENCODINGS["ppef_enrollment.csv"] == "latin-1"
@@ -0,0 +1,136 @@
+"""Tests for analysis/claims_sources/_exclusions.py — the shared LEIE/SAM index.
+
+The index replaced four scripts' own queries, so each lookup must give the
+answer those queries gave: only unreinstated LEIE rows, NPIs that are ten
+digits and not the '0000000000' placeholder, MIN() of the date strings,
+SAM record status applied only where a script asked for it, and the
+(LAST, FIRST, STATE) key as H35 built it. It must be written once per
+release from the warehouse and read back unchanged.
+"""
+from __future__ import annotations
+
+import pathlib
+import sys
+
+import pytest
+
+duckdb = pytest.importorskip("duckdb")
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent.parent))
+
+from analysis import warehouse  # noqa: E402
+from analysis.claims_sources import _exclusions as exclusions  # noqa: E402
+from analysis.claims_sources import dmepos  # noqa: E402
+from analysis.claims_sources import open_payments  # noqa: E402
+
+LEIE = {
+    "LASTNAME": ["SMITH", "ACME", "DOE", " smith ", "OLD", None],
+    "FIRSTNAME": ["JOHN", None, "JANE", "john", "GONE", "X"],
+    "MIDNAME": ["Q", None, None, None, None, None],
+    "GENERAL": ["NURSE", "DME", "MD", "NURSE", "MD", "MD"],
+    "NPI": ["1000000001", "1000000002", "0000000000", "1000000001", "1000000005", "100000000"],
+    "STATE": ["VA", "TX", "MD", "va ", "VA", "VA"],
+    "EXCLTYPE": ["1128a1"] * 6,
+    "EXCLDATE": ["20200101", None, "20190505", "20180101", "20100101", "20200101"],
+    "REINDATE": ["00000000", None, "", "00000000", "20150101", "00000000"],
+}
+SAM = {
+    "last_name": ["SMITH", "ROE", "NOPE", "LAPSED", "BLANK"],
+    "first_name": ["JOHN", "RAY", "N", "L", "B"],
+    "state_province": ["VA", None, "VA", "MD", "VA"],
+    "exclusion_type": ["Prohibition/Restriction"] * 5,
+    "excluding_agency": ["HHS", "OPM", "HHS", "DOD", "HHS"],
+    "active_date": ["2021-03-04", "2022-01-01", "2020-01-01", "2019-01-01", None],
+    "termination_date": ["Indefinite", None, None, "2020-01-01", None],
+    "record_status": ["Active", "Active", "Active", "Inactive", "Active"],
+    "npi": ["1000000001", " 1000000003", "NA", "1000000004", "1000000006"],
+}
+
+
+@pytest.fixture
+def local(tmp_path, monkeypatch):
+    data = tmp_path / "parquet"
+    data.mkdir()
+    pq.write_table(pa.table(LEIE), data / "oig_leie.parquet")
+    pq.write_table(pa.table(SAM), data / "sam_exclusions.parquet")
+    pq.write_table(pa.table({
+        "_npi": ["1000000001", "1000000003"], "_state": ["VA", None],
+        "_family_name": [" Smith ", "Roe"], "_given_name": ["John", None],
+    }), data / "practitioner.parquet")
+    wh = warehouse.DuckDBWarehouse(parquet_dir=data, external_dir=data)
+    calls = []
+
+    def current():
+        calls.append(1)
+        return wh
+
+    monkeypatch.setattr(exclusions.warehouse, "current", current)
+    monkeypatch.setattr(warehouse.qcache, "_enabled", False)
+    monkeypatch.setattr(exclusions, "INDEX_DIR", tmp_path / "index")
+    return calls
+
+
+def test_load_writes_the_index_once_per_release(local):
+    first = exclusions.load(release="2026-01-01")
+    again = exclusions.load(release="2026-01-01")
+    assert len(local) == 1
+    assert again.table.equals(first.table)
+    assert again.table.schema == exclusions.schema()
+    assert exclusions.index_path("2026-01-01").parent == exclusions.INDEX_DIR
+
+    exclusions.load(release="2026-02-01")
+    exclusions.load(release="2026-01-01", refresh=True)
+    assert len(local) == 3
+    assert sorted(p.name for p in exclusions.INDEX_DIR.iterdir()) == [
+        "exclusions-2026-01-01.parquet", "exclusions-2026-02-01.parquet"]
+
+
+def test_lookups_answer_as_the_old_queries_did(local):
+    index = exclusions.load()
+    # Reinstated (OLD) and short-NPI LEIE rows never count; the placeholder
+    # NPI is a demographic-only row.
+    assert index.earliest("LEIE") == {"1000000001": "20180101", "1000000002": ""}
+    assert index.earliest("SAM") == {"1000000001": "2021-03-04", "1000000003": "2022-01-01",
+                                     "1000000004": "2019-01-01", "1000000006": ""}
+    assert "1000000004" not in index.earliest("SAM", sam_status="Active")
+
+    by_npi = index.by_npi("LEIE")
+    assert [r["excldate"] for r in by_npi["1000000001"]] == ["20180101", "20200101"]
+    sam = index.by_npi("SAM", sam_status="Active")
+    assert sorted(sam) == ["1000000001", "1000000003", "1000000006"]
+    assert sam["1000000003"][0] == {
+        "source": "SAM", "npi": "1000000003", "lastname": "ROE", "firstname": "RAY",
+        "midname": "", "state": "", "general": "", "excltype": "Prohibition/Restriction",
+        "excldate": "2022-01-01", "termdate": "", "excluding_agency": "OPM", "status": "Active",
+    }
+
+    by_demo = index.by_demo()
+    assert sorted(by_demo) == [("DOE", "JANE", "MD"), ("SMITH", "JOHN", "VA")]
+    assert len(by_demo[("SMITH", "JOHN", "VA")]) == 2
+    assert by_demo[("DOE", "JANE", "MD")][0]["npi"] == "0000000000"
+
+    stats = index.stats()
+    assert (stats.leie_rows, stats.leie_npis, stats.demo_keys) == (5, 2, 2)
+    assert (stats.sam_rows, stats.sam_npis) == (4, 4)
+
+
+def test_script_loaders_keep_their_shapes(local):
+    index = exclusions.load()
+    excl = dmepos.load_exclusion_npis(index)
+    assert excl["1000000001"] == {"sources": {"leie", "sam"}, "leie_date": "20180101"}
+    assert excl["1000000002"] == {"sources": {"leie"}, "leie_date": None}
+    assert excl["1000000004"]["sources"] == {"sam"}
+
+    cohort = open_payments.load_exclusion_npis_with_state(index)
+    assert sorted(cohort) == ["1000000001", "1000000002", "1000000003",
+                              "1000000004", "1000000006"]
+    assert cohort["1000000001"] == {
+        "npi": "1000000001", "sources": "leie+sam", "leie_excldate": "20180101",
+        "sam_active_date": "2021-03-04", "earliest_exclusion_year": 2018,
+        "ndh_state": "VA", "name": "Smith, John",
+    }
+    assert cohort["1000000003"]["name"] == "Roe"
+    assert cohort["1000000006"]["sources"] == "unknown"
+    assert cohort["1000000002"]["ndh_state"] == ""
@@ -17,13 +17,19 @@ Run: python -m pytest analysis/tests/test_fast_ingest_flatteners.py
 """
 from __future__ import annotations
 
+import gzip
+import json
 import pathlib
+import shutil
+import subprocess
 import sys
 
 import pytest
 
 sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
 
+import fast_ingest_ndh  # noqa: E402
+import json_codec  # noqa: E402
 from fast_ingest_ndh import (  # noqa: E402
     extract_endpoint,
     extract_location,
@@ -31,6 +37,7 @@ from fast_ingest_ndh import (  # noqa: E402
     extract_practitioner,
     extract_practitioner_role,
     first_address,
+    transform_to_loadable,
 )
 
 ALL_EXTRACTORS = [
@@ -139,3 +146,135 @@ def test_extractors_never_raise_on_malformed_input(extractor, record):
     """One raise here aborts a multi-million-row load. Degrade, never throw."""
     out = extractor(record)
     assert out["_id"] == "X"
+
+
+@pytest.mark.skipif(shutil.which("zstd") is None, reason="zstd CLI not installed")
+def test_workers_output_is_byte_identical_to_serial(tmp_path, monkeypatch):
+    """--workers must change throughput, never the load file.
+
+    A small CHUNK_LINES forces many chunks across the pool, so an ordering
+    bug shows up as a diff rather than hiding inside one chunk. Blank and
+    undecodable lines are included so skip and error handling stay aligned.
+    """
+    monkeypatch.setattr(fast_ingest_ndh, "CHUNK_LINES", 7)
+    lines = []
+    for i in range(100):
+        lines.append(json.dumps({"id": f"P{i}", "telecom": [
+            {"system": "fax", "value": f"{i}-0"}, {"system": "phone", "value": f"{i}-1"}],
+            "address": [{"line": [f"{i} Main St"], "state": "PA"}]}))
+        if i % 17 == 0:
+            lines.append("")
+        if i % 29 == 0:
+            lines.append("{not json")
+    raw = tmp_path / "Practitioner.ndjson"
+    raw.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    subprocess.run(["zstd", "-q", str(raw)], check=True)
+    zst = tmp_path / "Practitioner.ndjson.zst"
+
+    serial = tmp_path / "serial.ndjson"
+    pooled = tmp_path / "pooled.ndjson"
+    n1 = transform_to_loadable(zst, serial, extract_practitioner, "Practitioner")
+    n2 = transform_to_loadable(zst, pooled, extract_practitioner, "Practitioner", workers=3)
+    assert n1 == n2 == 100
+
+    def rows(out):
+        return b"".join(gzip.decompress(p.read_bytes()) for p in fast_ingest_ndh.load_files(out))
+
+    assert rows(serial) and rows(serial) == rows(pooled)
+
+
+def test_passthrough_rows_are_semantically_identical():
+    """--passthrough splices the original bytes; the row must parse the same.
+
+    Covers the ways the raw line differs from json.dumps output: spacing,
+    key order, non-ASCII left unescaped, and a trailing CR.
+    """
+    lines = [
+        b'{"id": "P1", "name": [{"family": "Mu\xc3\xb1oz", "given": ["Jos\xc3\xa9"]}]}',
+        b'{"telecom":[{"value":"1","system":"phone"}],"id":"P2"}\r',
+        b"   ",
+        b'{"id": "P3", "address": [{"line": ["1 \\u00e9 St"], "state": "PA"}]}',
+        b"{broken",
+    ]
+    serial, n1, e1 = fast_ingest_ndh.transform_lines(lines, extract_practitioner)
+    spliced, n2, e2 = fast_ingest_ndh.transform_lines(lines, extract_practitioner, passthrough=True)
+    assert (n1, e1) == (n2, e2) == (3, 1)
+    a, b = serial.splitlines(), spliced.splitlines()
+    assert [json.loads(x) for x in a] == [json.loads(x) for x in b]
+    assert list(json.loads(b[0]))[0] == "resource"
+
+
+def test_non_ascii_names_in_load_rows(monkeypatch):
+    """A load row holds non-ASCII as the active backend encodes it: raw UTF-8
+    from orjson/msgspec, \\u-escaped from the standard library. Either way
+    the row parses to the same names."""
+    line = '{"id":"P1","name":[{"family":"Muñoz","given":["José"]}]}'.encode("utf-8")
+    rows = {}
+    for backend in json_codec.available():
+        monkeypatch.setattr(json_codec, "_dumps", json_codec._BACKENDS[backend][1])
+        rows[backend], _, _ = fast_ingest_ndh.transform_lines([line], extract_practitioner)
+    assert b"Mu\\u00f1oz" in rows["json"] and "Muñoz".encode() not in rows["json"]
+    for backend in set(rows) - {"json"}:
+        assert "Muñoz".encode() in rows[backend] and b"\\u00f1" not in rows[backend]
+    assert len({json.dumps(json.loads(r), sort_keys=True) for r in rows.values()}) == 1
+
+
+def _fake_download(url, basename, data_dir, expected_bytes=None):
+    return data_dir / basename
+
+
+def _fake_transform(zst_path, out_path, extractor, name, *args):
+    out_path.write_text(name)
+    return 1
+
+
+def _fake_load(table, path, gcs_stage=None):
+    assert path.read_text()  # the transform's file, still on disk
+    if table == "endpoint":
+        raise RuntimeError("bq exit 1")
+
+
+def test_pipeline_runs_stages_in_order_and_isolates_failures(tmp_path, monkeypatch):
+    """Stages may overlap across resources but never reorder within one, and a
+    failed load must not stop the other tables or leave its file behind."""
+    monkeypatch.setattr(fast_ingest_ndh, "LOAD_DIR", tmp_path)
+    monkeypatch.setattr(fast_ingest_ndh, "resolve_file_url", lambda m, n: (f"u/{n}", f"{n}.zst"))
+    monkeypatch.setattr(fast_ingest_ndh, "expected_compressed_size", lambda m, n: None)
+    monkeypatch.setattr(fast_ingest_ndh, "download_if_missing", _fake_download)
+    monkeypatch.setattr(fast_ingest_ndh, "transform_to_loadable", _fake_transform)
+    monkeypatch.setattr(fast_ingest_ndh, "bq_load", _fake_load)
+
+    timings, failures = fast_ingest_ndh.run_pipeline(
+        fast_ingest_ndh.RESOURCES, {}, tmp_path,
+        download_jobs=2, transform_jobs=2, load_jobs=2,
+    )
+    assert set(failures) == {"Endpoint"} and failures["Endpoint"].startswith("load:")
+    assert len(timings) == 6
+    for name, stages in timings.items():
+        expected = ("download", "transform") if name == "Endpoint" else fast_ingest_ndh.STAGES
+        assert tuple(stages) == expected
+        ends = [stages[s][1] for s in expected]
+        starts = [stages[s][0] for s in expected]
+        assert all(e <= s for e, s in zip(ends, starts[1:]))
+    assert not list(tmp_path.glob("*.ndjson"))
+    report = fast_ingest_ndh.timing_report(timings, 0.0, 1.0)
+    assert len(report) == 1 + 6 + 2
+
+
+@pytest.mark.skipif(shutil.which("zstd") is None, reason="zstd CLI not installed")
+def test_gzip_shards_hold_the_same_rows_as_plaintext(tmp_path, monkeypatch):
+    """Shards rotate on whole chunks, so concatenated they are the plaintext file."""
+    lines = [json.dumps({"id": f"P{i}", "name": [{"family": "F" * (i % 50)}]}) for i in range(3000)]
+    raw = tmp_path / "Practitioner.ndjson"
+    raw.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    subprocess.run(["zstd", "-q", str(raw)], check=True)
+    zst = tmp_path / "Practitioner.ndjson.zst"
+
+    plain = tmp_path / "plain" / "practitioner.ndjson"
+    sharded = tmp_path / "gz" / "practitioner.ndjson"
+    transform_to_loadable(zst, plain, extract_practitioner, "Practitioner", load_format="ndjson")
+    monkeypatch.setattr(fast_ingest_ndh, "CHUNK_LINES", 100)
+    transform_to_loadable(zst, sharded, extract_practitioner, "Practitioner", shard_mb=0)
+    shards = fast_ingest_ndh.load_files(sharded)
+    assert len(shards) == 30 and all(p.suffix == ".gz" for p in shards)
+    assert b"".join(gzip.decompress(p.read_bytes()) for p in shards) == plain.read_bytes()
@@ -0,0 +1,100 @@
+"""Differential tests for the H53 brand trie.
+
+brand-state is the weakest tier that ships, and its two refusals (a shared
+prefix of generic openers, and a lone shared token off the front of a longer
+brand) plus the ambiguity refusal are what keep Penn State Health away from
+Penn Medicine's endpoint. The trie must therefore decide exactly what the
+all-brands scan it replaced decided. That scan is kept here as the reference
+and both are run over random names drawn from a vocabulary dense in generic
+openers, short tokens and shared prefixes.
+"""
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from analysis.h53_org_endpoint_resolution import BrandTrie, resolve
+from analysis.org_systems import GENERIC_OPENERS, normalize
+
+
+def reference(org_toks, brands):
+    """resolve().brand_match before the trie: (brand keys at best depth, depth)."""
+    best, best_len = {}, 0
+    for toks, v in brands.items():
+        shared = 0
+        for a, b in zip(org_toks, toks):
+            if a != b:
+                break
+            shared += 1
+        if shared == 0:
+            continue
+        if all(t in GENERIC_OPENERS or len(t) < 3 for t in org_toks[:shared]):
+            continue
+        if shared == 1 and len(toks) > 1:
+            continue
+        key = normalize(v["brand"] or v["name"])
+        if shared > best_len:
+            best_len, best = shared, {key: v}
+        elif shared == best_len:
+            best.setdefault(key, v)
+    return set(best), best_len
+
+
+VOCAB = ["PENN", "STATE", "HEALTH", "MEDICINE", "THE", "ST", "UNIVERSITY",
+         "OF", "GEISINGER", "UPMC", "COMMUNITY", "MT", "NORTH", "CLINIC",
+         "AB", "WELLSPAN", "CARE"]
+
+
+def _name(rng):
+    return " ".join(rng.choice(VOCAB) for _ in range(rng.randint(1, 5)))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_trie_agrees_with_the_scan(seed):
+    rng = random.Random(seed)
+    brands = {}
+    for _ in range(rng.randint(1, 60)):
+        label = _name(rng)
+        brands.setdefault(tuple(normalize(label).split()), {"brand": label, "name": label})
+    trie = BrandTrie.build(brands)
+    for _ in range(300):
+        org_toks = tuple(normalize(_name(rng)).split())
+        found, depth = trie.match(org_toks)
+        keys, best_len = reference(org_toks, brands)
+        assert depth == best_len, org_toks
+        if len(keys) > 1:
+            assert len(found) == 2, org_toks
+        else:
+            assert {normalize(v["brand"]) for v in found} == keys, org_toks
+
+
+def _vendor(brand, url, states=("PA",)):
+    return {"name": brand, "brand": brand, "url": url, "vendor": "Epic",
+            "states": set(states)}
+
+
+def test_resolve_keeps_the_refusals():
+    vendors = [_vendor("Penn Medicine", "https://penn"),
+               _vendor("Geisinger", "https://geisinger"),
+               _vendor("UPMC Passavant", "https://upmc1"),
+               _vendor("UPMC Passavant Cranberry", "https://upmc3"),
+               _vendor("UPMC Mercy", "https://upmc2"),
+               _vendor("UPMC", "https://upmc", states=("OH",))]
+    orgs = [{"org_id": str(i), "org_npi": None, "org_name": name, "org_state": st,
+             "practitioners": 1}
+            for i, (name, st) in enumerate([
+                ("PENN STATE HEALTH MEDICAL GROUP", "PA"),  # lone PENN: refused
+                ("GEISINGER CLINIC", "PA"),                 # whole brand: ok
+                ("UPMC PASSAVANT CRANBERRY SURGERY", "PA"),  # longest prefix wins
+                ("UPMC PASSAVANT MCCANDLESS", "PA"),        # two brands at depth 2
+                ("UPMC COMMUNITY MEDICINE INC", "PA"),      # lone UPMC: refused
+                ("UPMC COMMUNITY MEDICINE INC", "OH"),      # one brand there
+                ("THE COMMUNITY HOSPITAL", "PA"),
+            ])]
+    rows, tiers, _, ambiguous = resolve(orgs, vendors, {}, {})
+    assert [r["endpoint"] for r in rows] == [
+        None, "https://geisinger", "https://upmc3", None, None, "https://upmc", None]
+    # UPMC COMMUNITY in PA fails the single-token rule; only MCCANDLESS is ambiguous.
+    assert ambiguous == 1
+    assert tiers["brand-state"] == 3
@@ -0,0 +1,115 @@
+"""Differential tests for the H29 Medicaid spending scan.
+
+filter_parquet_for_npis aggregates with Arrow group_by instead of a Python
+loop over matched rows, and its output must be the dict the loop produced,
+down to the last bit of every paid sum and the order of NPIs and HCPCS codes
+(compose_rows breaks ties by that order). The loop is kept here as the
+reference, and both run over a small random parquet with nulls, rows where
+billing and servicing are the same cohort NPI, and cutoffs with and without
+a month, read both from the source and from its NPI-sorted copy.
+"""
+from __future__ import annotations
+
+import pathlib
+import random
+import sys
+from collections import defaultdict
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent.parent))
+
+from analysis.claims_sources import _medicaid_scan as medicaid_scan  # noqa: E402
+from analysis.claims_sources import medicaid_provider_spending as h29  # noqa: E402
+
+
+def reference(path, npis, cutoff_by_npi):
+    """filter_parquet_for_npis before group_by: a loop over every row."""
+    per_npi = defaultdict(h29._empty_slot)
+    for row in pq.read_table(path).to_pylist():
+        paid = float(row["TOTAL_PAID"] or 0)
+        claims = int(row["TOTAL_CLAIM_LINES"] or 0)
+        patients = int(row["TOTAL_PATIENTS"] or 0)
+        hcpcs = row["HCPCS_CODE"] or ""
+        month = row["CLAIM_FROM_MONTH"] or ""
+        for npi, axis in [(row["BILLING_PROVIDER_NPI_NUM"], "billing"),
+                          (row["SERVICING_PROVIDER_NPI_NUM"], "servicing")]:
+            if not npi or npi not in npis:
+                continue
+            slot = per_npi[npi]
+            slot["paid"] += paid
+            slot["claims"] += claims
+            slot["patients"] += patients
+            slot["axes"].add(axis)
+            slot["hcpcs"][hcpcs] += paid
+            if slot["first_month"] is None or month < slot["first_month"]:
+                slot["first_month"] = month
+            if slot["last_month"] is None or month > slot["last_month"]:
+                slot["last_month"] = month
+            cutoff = cutoff_by_npi.get(npi, "")
+            if cutoff and month and month > cutoff[:7]:
+                slot["post_exclusion_paid"] += paid
+                slot["post_exclusion_claims"] += claims
+                if (slot["post_exclusion_first_month"] is None
+                        or month < slot["post_exclusion_first_month"]):
+                    slot["post_exclusion_first_month"] = month
+                if (slot["post_exclusion_last_month"] is None
+                        or month > slot["post_exclusion_last_month"]):
+                    slot["post_exclusion_last_month"] = month
+    return dict(per_npi)
+
+
+def _maybe(rng, value):
+    return None if rng.random() < 0.05 else value
+
+
+def _write(path, rng, n_rows, pool):
+    months = [f"{y}-{m:02d}" for y in range(2018, 2025) for m in (1, 4, 7, 12)]
+    cols = {c: [] for c in h29.COLUMNS}
+    for _ in range(n_rows):
+        billing = rng.choice(pool)
+        cols["BILLING_PROVIDER_NPI_NUM"].append(_maybe(rng, billing))
+        cols["SERVICING_PROVIDER_NPI_NUM"].append(
+            _maybe(rng, billing if rng.random() < 0.2 else rng.choice(pool)))
+        cols["HCPCS_CODE"].append(_maybe(rng, rng.choice(["99213", "99214", "T1019", "J3490"])))
+        cols["CLAIM_FROM_MONTH"].append(_maybe(rng, rng.choice(months)))
+        cols["TOTAL_PATIENTS"].append(_maybe(rng, rng.randint(0, 40)))
+        cols["TOTAL_CLAIM_LINES"].append(_maybe(rng, rng.randint(1, 500)))
+        cols["TOTAL_PAID"].append(_maybe(rng, round(rng.uniform(-50, 10 ** rng.randint(1, 6)), 2)))
+    schema = pa.schema([(c, pa.int64() if c in ("TOTAL_PATIENTS", "TOTAL_CLAIM_LINES")
+                         else pa.float64() if c == "TOTAL_PAID" else pa.string())
+                        for c in h29.COLUMNS])
+    pq.write_table(pa.table(cols, schema=schema), path, row_group_size=700)
+
+
+@pytest.mark.parametrize("prepared", [False, True])
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_the_row_loop(tmp_path, monkeypatch, seed, prepared):
+    rng = random.Random(seed)
+    path = tmp_path / "spending.parquet"
+    pool = [f"{1000000000 + i}" for i in range(60)]
+    _write(path, rng, 5000, pool)
+    if prepared:
+        medicaid_scan.prepare(path, row_group_rows=256, rows_per_bucket=1500)
+    monkeypatch.setattr(h29, "PARQUET_PATH", path)
+    monkeypatch.setattr(medicaid_scan, "BATCH_ROWS", 300)
+    npis = set(rng.sample(pool, 20)) | {"9999999999"}
+    cutoffs = {n: rng.choice(["", "2020-06-15", "2022-01-01", "2016-03-01"]) for n in npis}
+
+    got = h29.filter_parquet_for_npis(npis, cutoff_by_npi=cutoffs)
+    want = reference(path, npis, cutoffs)
+    assert list(got) == list(want)
+    for npi, slot in want.items():
+        assert got[npi] == slot, npi
+        assert list(got[npi]["hcpcs"]) == list(slot["hcpcs"]), npi
+    assert h29.compose_rows([], got) == h29.compose_rows([], want)
+
+
+def test_no_matches(tmp_path, monkeypatch):
+    path = tmp_path / "spending.parquet"
+    _write(path, random.Random(0), 100, ["1000000000"])
+    monkeypatch.setattr(h29, "PARQUET_PATH", path)
+    assert h29.filter_parquet_for_npis({"2000000000"}) == {}
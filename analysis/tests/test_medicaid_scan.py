@@ -0,0 +1,129 @@
+"""Tests for analysis/claims_sources/_medicaid_scan.py — the shared row-group scan.
+
+The scan may skip a row group only when its NPI statistics prove no cohort
+NPI is inside, and it must hand back exactly the rows a serial filter finds,
+in file order, however many threads read them. The same holds when it reads
+the NPI-sorted copy from prepare(), which must be a sorted permutation of
+the source whose index names exactly the row groups holding each NPI.
+"""
+from __future__ import annotations
+
+import os
+import pathlib
+import random
+import sys
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent.parent))
+
+from analysis.claims_sources import _medicaid_scan as medicaid_scan  # noqa: E402
+
+COLUMNS = ["BILLING_PROVIDER_NPI_NUM", "SERVICING_PROVIDER_NPI_NUM", "TOTAL_PAID"]
+
+
+def _write(path, billing, servicing, row_group_size, statistics=True):
+    table = pa.table({
+        "BILLING_PROVIDER_NPI_NUM": billing,
+        "SERVICING_PROVIDER_NPI_NUM": servicing,
+        "TOTAL_PAID": [float(i) for i in range(len(billing))],
+    })
+    pq.write_table(table, path, row_group_size=row_group_size, write_statistics=statistics)
+    return table
+
+
+def serial(table, npis):
+    return [r for r in table.to_pylist()
+            if r["BILLING_PROVIDER_NPI_NUM"] in npis or r["SERVICING_PROVIDER_NPI_NUM"] in npis]
+
+
+def _rows(parts):
+    return [r for p in parts for r in p.to_pylist()]
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_matches_a_serial_filter_in_file_order(tmp_path, monkeypatch, workers):
+    rng = random.Random(5)
+    pool = [f"{1000000000 + i}" for i in range(500)]
+    billing = [rng.choice(pool) for _ in range(3000)]
+    servicing = [None if rng.random() < 0.1 else rng.choice(pool) for _ in range(3000)]
+    table = _write(tmp_path / "m.parquet", billing, servicing, 250)
+    monkeypatch.setattr(medicaid_scan, "BATCH_ROWS", 100)
+    npis = set(rng.sample(pool, 30)) | {""}
+    parts, stats = medicaid_scan.scan(tmp_path / "m.parquet", npis, COLUMNS, workers=workers)
+    assert _rows(parts) == serial(table, npis)
+    assert (stats.rows, stats.row_groups) == (3000, 12)
+
+    folded = []
+    kept, _ = medicaid_scan.scan(tmp_path / "m.parquet", npis, COLUMNS, workers=workers,
+                                 fold=folded.append)
+    assert kept == [] and _rows(folded) == serial(table, npis)
+
+
+def test_skips_row_groups_the_statistics_rule_out(tmp_path):
+    billing = [f"{1000000000 + i}" for i in range(1000)]  # sorted: 10 disjoint ranges
+    servicing = [f"{2000000000 + i}" for i in range(1000)]
+    table = _write(tmp_path / "m.parquet", billing, servicing, 100)
+    npis = {"1000000150", "2000000420", "1000000151", "3000000000"}
+    parts, stats = medicaid_scan.scan(tmp_path / "m.parquet", npis, COLUMNS)
+    assert _rows(parts) == serial(table, npis)
+    assert (stats.skipped, stats.rows) == (8, 200)
+
+
+def test_missing_statistics_keep_every_row_group(tmp_path):
+    billing = [f"{1000000000 + i}" for i in range(300)]
+    _write(tmp_path / "m.parquet", billing, billing, 100, statistics=False)
+    parts, stats = medicaid_scan.scan(tmp_path / "m.parquet", {"1000000001"}, COLUMNS)
+    assert stats.skipped == 0 and len(_rows(parts)) == 1
+
+
+def _realistic(path, rng, n_rows=4000, n_npis=400):
+    pool = [f"1{4 * i:09d}" for i in range(n_npis)]
+    billing = [None if rng.random() < 0.01 else rng.choice(pool) for _ in range(n_rows)]
+    servicing = [b if rng.random() < 0.4 else None if rng.random() < 0.5 else rng.choice(pool)
+                 for b in billing]
+    return _write(path, billing, servicing, 1000), pool
+
+
+def test_prepared_copy_is_sorted_indexed_and_read_selectively(tmp_path):
+    rng = random.Random(9)
+    src = tmp_path / "m.parquet"
+    table, pool = _realistic(src, rng)
+    sorted_path, index_path = medicaid_scan.prepare(src, row_group_rows=100, rows_per_bucket=700)
+    assert medicaid_scan.prepared(src) == (sorted_path, index_path)
+
+    copy = pq.read_table(sorted_path)
+    assert sorted(copy.column("_row").to_pylist()) == list(range(table.num_rows))
+    billing = copy.column("BILLING_PROVIDER_NPI_NUM").to_pylist()
+    assert billing == sorted(billing, key=lambda v: (v is None, v or ""))
+    assert copy.drop_columns(["_row"]).take(
+        pa.array(sorted(range(copy.num_rows), key=copy.column("_row").to_pylist().__getitem__))
+    ).equals(table)
+
+    md = pq.ParquetFile(sorted_path).metadata
+    npis = set(rng.sample(pool, 5))
+    groups = medicaid_scan.lookup(index_path, npis)
+    for i in range(md.num_row_groups):
+        rows = pq.ParquetFile(sorted_path).read_row_group(i).to_pylist()
+        holds = any(r["BILLING_PROVIDER_NPI_NUM"] in npis
+                    or r["SERVICING_PROVIDER_NPI_NUM"] in npis for r in rows)
+        assert holds == (i in groups), i
+
+    parts, stats = medicaid_scan.scan(src, npis, COLUMNS)
+    assert _rows(parts) == serial(table, npis)
+    assert stats.source == sorted_path.name and stats.skipped == md.num_row_groups - len(groups)
+    assert medicaid_scan.lookup(index_path, {"not-an-npi"}) is None
+
+
+def test_stale_copy_is_ignored(tmp_path):
+    src = tmp_path / "m.parquet"
+    table, pool = _realistic(src, random.Random(2))
+    medicaid_scan.prepare(src, row_group_rows=100)
+    later = src.stat().st_mtime + 10
+    os.utime(src, (later, later))
+    assert medicaid_scan.prepared(src) is None
+    parts, stats = medicaid_scan.scan(src, {pool[0]}, COLUMNS)
+    assert stats.source == src.name and _rows(parts) == serial(table, {pool[0]})
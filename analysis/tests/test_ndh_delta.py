@@ -0,0 +1,141 @@
+"""Tests for analysis/ndh_delta.py — release-over-release delta ingest.
+
+A delta load is only safe if applying it to the old table gives the new one.
+So the thing under test is the classification: every id in the new release
+is added, changed or unchanged, every id only in the old one is removed, and
+the delta files carry exactly the added and changed rows plus the removed
+ids. Duplicate ids and rows without one must be counted, not crash the run;
+a duplicated id is its last occurrence, in the counts and in the delta.
+
+Run: python -m pytest analysis/tests/test_ndh_delta.py
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import pathlib
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import ndh_delta  # noqa: E402
+from fast_ingest_ndh import extract_endpoint, load_files, removed_file  # noqa: E402
+
+pytestmark = pytest.mark.skipif(shutil.which("zstd") is None, reason="zstd CLI not installed")
+
+
+def _release(tmp_path, tag, resources) -> pathlib.Path:
+    raw = tmp_path / tag / "Endpoint.ndjson"
+    raw.parent.mkdir()
+    raw.write_text("".join(json.dumps(r) + "\n" for r in resources))
+    subprocess.run(["zstd", "-qf", str(raw)], check=True)
+    return raw.with_name("Endpoint.ndjson.zst")
+
+
+def _ep(i, status="active"):
+    return {"resourceType": "Endpoint", "id": f"ep-{i}", "status": status,
+            "address": f"https://fhir{i}.example.org/r4"}
+
+
+def _rows(paths):
+    return [json.loads(line) for p in paths for line in gzip.open(p, "rt")]
+
+
+def test_delta_classifies_every_row(tmp_path):
+    old = _release(tmp_path, "old", [_ep(i) for i in range(100)])
+    new = _release(tmp_path, "new",
+                   [_ep(i, "off" if i % 10 == 0 else "active") for i in range(5, 120)]
+                   + [{"resourceType": "Endpoint"}, _ep(50, "replaced")])
+
+    base, counts = ndh_delta.diff_resource(old, extract_endpoint, None, None)
+    assert len(base) == 100 and counts["added"] == 100
+
+    out = tmp_path / "delta" / "endpoint.ndjson"
+    index, counts = ndh_delta.diff_resource(new, extract_endpoint, base, out)
+    # ids 5..119 plus a second ep-50; 0..4 dropped; 100..119 new;
+    # 10, 20, ..., 90 changed status (ep-50 to its last copy's "replaced")
+    assert counts["rows"] == 116
+    assert counts["removed"] == 5
+    assert counts["added"] == 20
+    assert counts["changed"] == 9
+    assert counts["unchanged"] == 115 - 20 - 9
+    assert counts["duplicate_ids"] == 1
+    assert counts["no_id"] == 1
+    assert len(index) == 115
+
+    upserts = _rows(load_files(out))
+    assert len(upserts) == counts["added"] + counts["changed"]
+    assert {r["_id"] for r in upserts} == (
+        {f"ep-{i}" for i in range(100, 120)} | {f"ep-{i}" for i in range(10, 100, 10)}
+    )
+    assert all(r["resource"]["id"] == r["_id"] for r in upserts)
+    assert [r["_status"] for r in upserts if r["_id"] == "ep-50"] == ["replaced"]
+    assert sorted(r["_id"] for r in _rows([removed_file(out)])) == [f"ep-{i}" for i in range(5)]
+
+    # The new index keeps the last ep-50, so an unchanged re-run is empty.
+    again_out = tmp_path / "again" / "endpoint.ndjson"
+    _, again = ndh_delta.diff_resource(new, extract_endpoint, index, again_out)
+    assert again["added"] == again["removed"] == 0
+    assert again["changed"] == 0 and again["unchanged"] == 115
+    assert load_files(again_out) == []
+    assert not removed_file(again_out).exists()
+
+
+def test_index_round_trips(tmp_path):
+    zst = _release(tmp_path, "r", [_ep(i) for i in range(30)])
+    index, _ = ndh_delta.diff_resource(zst, extract_endpoint, None, None)
+    path = tmp_path / "endpoint.idx.parquet"
+    index.save(path)
+    loaded = ndh_delta.HashIndex.load(path)
+    assert (loaded.id_hash == index.id_hash).all()
+    assert (loaded.content_hash == index.content_hash).all()
+    assert loaded.ids.to_pylist() == index.ids.to_pylist()
+
+
+def test_find_release_file_does_not_confuse_prefixed_names(tmp_path):
+    for n in ("01-Organization.ndjson.zst", "OrganizationAffiliation_2026-08-20.ndjson.zst"):
+        (tmp_path / n).touch()
+    assert ndh_delta.find_release_file(tmp_path, "Organization").name == "01-Organization.ndjson.zst"
+    assert ndh_delta.find_release_file(tmp_path, "OrganizationAffiliation").name.startswith("Org")
+    assert ndh_delta.find_release_file(tmp_path, "Endpoint") is None
+
+
+def test_merge_sql_updates_every_column_but_the_key():
+    sql = ndh_delta.merge_sql("endpoint", ["resource", *extract_endpoint({}).keys()])
+    assert "DELETE FROM `thematic-fort-453901-t7.cms_npd.endpoint`" in sql
+    assert "PARTITION BY" not in sql
+    assert "_id = S._id" not in sql.split("UPDATE SET")[1]
+    assert "_status = S._status" in sql and "resource = S.resource" in sql
+    assert sql.index("BEGIN TRANSACTION") < sql.index("MERGE") < sql.index("COMMIT")
+
+
+def test_index_is_only_in_place_once_the_merge_commits(tmp_path, monkeypatch):
+    monkeypatch.setattr(ndh_delta, "INDEX_ROOT", tmp_path / "ndh-index")
+    base, _ = ndh_delta.diff_resource(
+        _release(tmp_path, "old", [_ep(i) for i in range(10)]), extract_endpoint, None, None)
+    base.save(ndh_delta.index_path("r1", "endpoint"))
+    new = _release(tmp_path, "new", [_ep(i, "off") for i in range(10)])
+    out = tmp_path / "delta" / "endpoint.ndjson"
+    assert ndh_delta.delta_to_loadable(new, out, extract_endpoint, "Endpoint", "r1", "r2") == 10
+    final = ndh_delta.index_path("r2", "endpoint")
+    assert ndh_delta.pending_index_path("r2", "endpoint").exists() and not final.exists()
+
+    queries = []
+
+    def bq_query(sql):
+        queries.append(sql)
+        if "MERGE" in sql and len(queries) == 2:
+            raise RuntimeError("bq query failed (exit 1)")
+
+    monkeypatch.setattr(ndh_delta, "_bq_query", bq_query)
+    monkeypatch.setattr(ndh_delta, "bq_load", lambda *a: None)
+    with pytest.raises(RuntimeError):
+        ndh_delta.bq_merge("endpoint", out, extract_endpoint, release="r2")
+    assert not final.exists()
+    ndh_delta.bq_merge("endpoint", out, extract_endpoint, release="r2")
+    assert final.exists() and not ndh_delta.pending_index_path("r2", "endpoint").exists()
+    assert len(ndh_delta.HashIndex.load(final)) == 10
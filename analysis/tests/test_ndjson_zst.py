@@ -0,0 +1,62 @@
+"""Tests for analysis/ndjson_zst.py — the shared .ndjson.zst line reader.
+
+The reader splits lines out of fixed-size decompressed blocks, so the thing
+worth protecting is the seam: a line that straddles two blocks must come out
+whole, once, and a file without a trailing newline must not lose its last
+line. A tiny block size puts a seam inside almost every line.
+"""
+from __future__ import annotations
+
+import json
+import pathlib
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import ndjson_zst  # noqa: E402
+from ndjson_zst import NdjsonZstReader  # noqa: E402
+
+pytestmark = pytest.mark.skipif(shutil.which("zstd") is None, reason="zstd CLI not installed")
+
+LINES = [json.dumps({"id": f"R{i}", "name": "x" * (i % 13)}).encode() for i in range(50)]
+
+
+def _write(tmp_path, payload: bytes) -> pathlib.Path:
+    raw = tmp_path / "Endpoint.ndjson"
+    raw.write_bytes(payload)
+    subprocess.run(["zstd", "-qf", str(raw)], check=True)
+    return tmp_path / "Endpoint.ndjson.zst"
+
+
+@pytest.mark.parametrize("block_bytes", [1, 7, 64, 1 << 20])
+def test_lines_survive_block_seams(tmp_path, block_bytes):
+    path = _write(tmp_path, b"\n".join(LINES) + b"\n")
+    reader = NdjsonZstReader(path, block_bytes=block_bytes)
+    assert list(reader) == LINES
+    assert reader.lines == len(LINES)
+    assert reader.bytes == sum(len(l) + 1 for l in LINES)
+
+
+def test_last_line_without_newline_and_blank_lines(tmp_path):
+    path = _write(tmp_path, b"\n\n".join(LINES[:3]))
+    assert list(NdjsonZstReader(path, block_bytes=5)) == LINES[:3]
+
+
+def test_batches_are_bounded_and_ordered(tmp_path):
+    path = _write(tmp_path, b"\n".join(LINES) + b"\n")
+    batches = list(NdjsonZstReader(path).batches(20))
+    assert [len(b) for b in batches] == [20, 20, 10]
+    assert [l for b in batches for l in b] == LINES
+
+
+def test_zstdcat_fallback_matches(tmp_path, monkeypatch):
+    """Without the zstandard package the pipe backend must read the same lines."""
+    path = _write(tmp_path, b"\n".join(LINES) + b"\n")
+    monkeypatch.setattr(ndjson_zst, "zstandard", None)
+    reader = NdjsonZstReader(path, block_bytes=9)
+    assert reader.backend == "zstdcat"
+    assert list(reader) == LINES
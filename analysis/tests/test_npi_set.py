@@ -0,0 +1,91 @@
+"""Tests for analysis/claims_sources/_npi_set.py — memory-mapped NPI sets.
+
+An NpiSet must answer membership exactly as the Python set of str it
+replaces, for one NPI or a whole column, whatever the column's type, and
+must read back from disk as the same set without re-running its query.
+"""
+from __future__ import annotations
+
+import pathlib
+import random
+import sys
+
+import numpy as np
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent.parent))
+
+from analysis.claims_sources import _npi_set as npi_set  # noqa: E402
+
+ODD = ["", " 1000000001", "1000000001 ", "100000000", "10000000010", "10000000a1",
+       "0000000001", "-100000000", "１０００００００01"]
+
+
+@pytest.fixture
+def members():
+    rng = random.Random(3)
+    return sorted({str(rng.randint(10**9, 10**10 - 1)) for _ in range(2000)})
+
+
+def _probe(members):
+    rng = random.Random(4)
+    return members[::3] + [str(rng.randint(10**9, 10**10 - 1)) for _ in range(500)] + ODD
+
+
+def test_build_keeps_ten_digit_npis(members):
+    s = npi_set.NpiSet.build(members + members[:10] + ODD + [None])
+    assert len(s) == len(members) + 1  # "0000000001" is ten digits
+    assert list(s) == sorted(members + ["0000000001"])
+    assert s.keys.dtype == np.uint64
+
+
+def test_membership_matches_a_python_set(members):
+    s = npi_set.NpiSet.build(members)
+    ref = set(members)
+    probe = _probe(members)
+    want = [p in ref for p in probe]
+    assert [p in s for p in probe] == want
+    assert [s.contains(int(p)) for p in members[:50]] == [True] * 50
+    assert not s.contains(123) and not s.contains(None)
+
+    column = pa.array(probe + [None])
+    assert s.isin(column).tolist() == want + [False]
+    chunked = pa.chunked_array([column.slice(0, 100), column.slice(100)])
+    assert s.isin(chunked).tolist() == want + [False]
+    assert s.isin(pa.chunked_array([], pa.string())).tolist() == []
+    assert s.isin(column.dictionary_encode()).tolist() == want + [False]
+    assert s.isin(np.array(probe, dtype=object)).tolist() == want
+    assert s.isin(probe).tolist() == want
+
+    ints = [int(p) for p in members[::7]] + [5, 10**10, 123456789]
+    assert s.isin(np.array(ints, dtype=np.int64)).tolist() == [str(i) in ref for i in ints]
+    assert s.isin(pa.array(ints, pa.int64())).tolist() == [str(i) in ref for i in ints]
+
+
+def test_empty_set():
+    s = npi_set.NpiSet.build([])
+    assert len(s) == 0 and "1000000001" not in s
+    assert s.isin(["1000000001", ""]).tolist() == [False, False]
+
+
+def test_cached_writes_once_per_release(tmp_path, monkeypatch, members):
+    monkeypatch.setattr(npi_set, "SET_DIR", tmp_path)
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return pa.array(members)
+
+    first = npi_set.cached("ndh", fetch, release="2026-01-01")
+    again = npi_set.cached("ndh", fetch, release="2026-01-01")
+    assert len(calls) == 1
+    assert isinstance(again.keys, np.memmap)
+    assert list(again) == list(first) == members
+    assert npi_set.set_path("ndh", "2026-01-01") == tmp_path / "ndh-2026-01-01.npy"
+
+    npi_set.cached("ndh", fetch, release="2026-02-01")
+    npi_set.cached("ndh", fetch, release="2026-01-01", refresh=True)
+    assert len(calls) == 3
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["ndh-2026-01-01.npy", "ndh-2026-02-01.npy"]
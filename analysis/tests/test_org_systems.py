@@ -0,0 +1,87 @@
+"""Tests for the array-backed union-find in analysis/org_systems.py.
+
+Components are checked against a breadth-first search over the same random
+graph, with single and bulk unions mixed, since the two use different merge
+rules over one parent array. describe_affiliation_graphs must say for every
+state exactly what describe_affiliation_graph says about that state alone.
+"""
+from __future__ import annotations
+
+import collections
+import pathlib
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent.parent))
+
+from analysis.org_systems import (  # noqa: E402
+    Components, describe_affiliation_graph, describe_affiliation_graphs)
+
+
+def reference(edges):
+    """{node: frozenset of its component} by breadth-first search."""
+    adj = collections.defaultdict(set)
+    for a, b in edges:
+        adj[a].add(b)
+        adj[b].add(a)
+    out = {}
+    for start in adj:
+        if start in out:
+            continue
+        seen, queue = {start}, [start]
+        while queue:
+            for nxt in adj[queue.pop()] - seen:
+                seen.add(nxt)
+                queue.append(nxt)
+        comp = frozenset(seen)
+        out.update(dict.fromkeys(comp, comp))
+    return out
+
+
+def _edges(rng, n_nodes, n_edges):
+    return [(f"o{rng.randrange(n_nodes)}", f"o{rng.randrange(n_nodes)}")
+            for _ in range(n_edges)]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_components_match_bfs(seed):
+    rng = random.Random(seed)
+    edges = _edges(rng, rng.randint(2, 300), rng.randint(1, 400))
+    split = rng.randrange(len(edges) + 1)
+    uf = Components()
+    for a, b in edges[:split]:
+        uf.union(a, b)
+    assert uf.union_edges(edges[split:]) == len(edges) - split
+
+    expected = reference(edges)
+    groups = {frozenset(members) for members in uf.groups().values()}
+    assert groups == set(expected.values())
+    assert all(uf.find(x) in expected[x] for x in expected)
+    sizes = sorted((len(c) for c in set(expected.values())), reverse=True)
+    assert uf.sizes().tolist() == sizes
+    assert uf.size_histogram() == dict(sorted(collections.Counter(sizes).items()))
+
+
+def test_missing_ends_and_unknown_nodes():
+    uf = Components()
+    assert uf.union_edges([("a", "b"), ("c", None), ("", "d")]) == 1
+    assert len(uf) == 2
+    assert uf.find("z") == "z"
+    assert uf.sizes().tolist() == [2, 1]
+    assert Components().size_histogram() == {}
+
+
+def test_national_pass_matches_each_state_alone():
+    rng = random.Random(3)
+    # The same ids in two states must not join across the state line.
+    by_state = {st: _edges(rng, 40, rng.randint(0, 60)) for st in ("PA", "OH", "WV")}
+    by_state["DE"] = [("x", None)]
+    names = {f"o{i}": f"ORG {i}" for i in range(40)}
+    national = describe_affiliation_graphs(by_state, names, top_n=5)
+    for state, edges in by_state.items():
+        alone = describe_affiliation_graph(edges, names, top_n=5)
+        assert national[state] == alone
+        hist = alone["component_size_histogram"]
+        assert sum(int(k) * v for k, v in hist.items()) == alone["organizations_in_graph"]
@@ -0,0 +1,112 @@
+"""Tests for analysis/qcache.py — the query result cache behind warehouse.query.
+
+A cache that answers the wrong question is worse than none, so the key is
+what is protected: reformatting or re-commenting a query must hit, and a
+different parameter, release or table must miss. Then the bookkeeping that
+keeps the directory honest: LRU eviction under the size bound, expiry for
+queries on data we do not control, and --no-cache really running the query.
+
+Run: python -m pytest analysis/tests/test_qcache.py
+"""
+from __future__ import annotations
+
+import os
+import pathlib
+import sys
+import time
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent.parent))
+
+from analysis import qcache, warehouse  # noqa: E402
+
+
+class FakeWarehouse:
+    name = "fake"
+
+    def __init__(self):
+        self.calls = 0
+
+    def cache_tag(self, sql):
+        return "fake"
+
+    def arrow(self, sql, params=None, maximum_bytes_billed=None):
+        self.calls += 1
+        state = (params or {}).get("state", "")
+        return pa.table({"state": [state], "n": [self.calls], "ids": [["a", "b"]]}), 5_000_000_000
+
+
+@pytest.fixture
+def fake(tmp_path, monkeypatch):
+    monkeypatch.setattr(qcache, "CACHE_DIR", tmp_path / "qcache")
+    monkeypatch.setattr(qcache, "stats", qcache.Stats())
+    monkeypatch.setattr(qcache, "_enabled", True)
+    wh = FakeWarehouse()
+    monkeypatch.setattr(warehouse, "current", lambda: wh)
+    return wh
+
+
+SQL = "SELECT n FROM `thematic-fort-453901-t7.cms_npd.practitioner` WHERE _state = @state"
+
+
+def test_reformatted_query_hits(fake):
+    first = warehouse.query(SQL, {"state": "PA"})
+    again = warehouse.query("-- same question\n" + SQL.replace(" ", "\n  "), {"state": "PA"})
+    assert fake.calls == 1
+    assert again == first and again[0].ids == ["a", "b"]
+    assert qcache.stats.hits == 1 and qcache.stats.misses == 1
+    assert qcache.stats.bytes_billed_avoided == 5_000_000_000
+    assert "5.0 GB billed avoided" in qcache.summary()
+
+
+def test_meta_reads_back_what_put_recorded(fake):
+    qcache.put("k", pa.table({"n": [1, 2]}), bytes_billed=123, sql="SELECT 1")
+    meta = qcache.meta(qcache.get("k"))
+    assert (meta["bytes_billed"], meta["rows"], meta["sql"]) == (123, 2, "SELECT 1")
+    assert qcache.meta(pa.table({"n": [1]})) == {}
+
+
+def test_parameters_and_release_are_in_the_key(fake, monkeypatch):
+    warehouse.query(SQL, {"state": "PA"})
+    warehouse.query(SQL, {"state": "OH"})
+    assert fake.calls == 2
+    monkeypatch.setattr(warehouse, "CURRENT_RELEASE", "2099-01-01")
+    assert warehouse.query(SQL, {"state": "PA"})[0]["n"] == 3
+
+
+def test_no_cache_always_runs(fake):
+    qcache.disable()
+    warehouse.query(SQL, {"state": "PA"})
+    warehouse.query(SQL, {"state": "PA"})
+    assert fake.calls == 2
+    assert not qcache.entries()
+
+
+def test_external_tables_expire(fake, monkeypatch):
+    nppes = "SELECT npi FROM `bigquery-public-data.nppes.npi_raw`"
+    warehouse.query(nppes)
+    later = time.time() + 8 * 86400
+    monkeypatch.setattr(qcache.time, "time", lambda: later)
+    warehouse.query(nppes)
+    assert fake.calls == 2
+
+
+def test_lru_eviction_keeps_recently_used(fake, monkeypatch):
+    for state in ("AA", "BB", "CC"):
+        warehouse.query(SQL, {"state": state})
+    files = qcache.entries()
+    for i, p in enumerate(files):
+        os.utime(p, (1000 + i, 1000 + i))
+    warehouse.query(SQL, {"state": "AA"})  # hit: AA becomes most recent
+    size = files[0].stat().st_size
+    monkeypatch.setenv("AINPI_QCACHE_MB", "0")
+    qcache.evict(limit=2 * size)
+    calls = fake.calls
+    warehouse.query(SQL, {"state": "AA"})
+    warehouse.query(SQL, {"state": "CC"})
+    assert fake.calls == calls
+    warehouse.query(SQL, {"state": "BB"})
+    assert fake.calls == calls + 1
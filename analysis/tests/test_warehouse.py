@@ -0,0 +1,224 @@
+"""Tests for analysis/warehouse.py — BigQuery SQL on local DuckDB.
+
+The local backend is only useful if a query means the same thing on both
+sides. The translations most likely to drift quietly are the ones where the
+two dialects disagree on NULLs or on positions: CONCAT with a NULL argument,
+ARRAY_AGG ... IGNORE NULLS, OFFSET versus 1-based subscripts, and BigQuery's
+backslash-escaped string literals. Those are executed here, not just
+string-compared. The state connectivity queries then run unchanged against a
+tiny parquet fixture whose answers are known.
+
+Run: python -m pytest analysis/tests/test_warehouse.py
+"""
+from __future__ import annotations
+
+import json
+import pathlib
+import sys
+
+import pytest
+
+duckdb = pytest.importorskip("duckdb")
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent.parent))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from analysis import warehouse  # noqa: E402
+from analysis.warehouse import DuckDBWarehouse, WarehouseError, translate  # noqa: E402
+
+
+def _one(sql, params=None):
+    duck_sql, _, _ = translate(sql)
+    return duckdb.connect().execute(duck_sql, params or {}).fetchone()
+
+
+def test_tables_params_and_literals():
+    sql, tables, params = translate(
+        'SELECT "a\\"b", r"\\d+", \'it\\\'s\' FROM '
+        '`thematic-fort-453901-t7.cms_npd.practitioner` p '
+        'JOIN `bigquery-public-data.nppes.npi_raw` n ON TRUE WHERE p._state = @state'
+    )
+    assert tables == {"practitioner", "bigquery-public-data.nppes.npi_raw"}
+    assert params == {"state"}
+    assert "$state" in sql and "@" not in sql
+    assert "'a\"b', '\\d+', 'it''s'" in sql
+
+
+def test_comments_and_strings_are_not_translated():
+    sql, _, _ = translate("SELECT 'COUNTIF(x)' -- COUNTIF(y) @p\n")
+    assert sql == "SELECT 'COUNTIF(x)' -- COUNTIF(y) @p\n"
+
+
+@pytest.mark.parametrize("bq, expected", [
+    ("SELECT CONCAT('a', NULL)", None),
+    ("SELECT CONCAT('Practitioner/', 'p1')", "Practitioner/p1"),
+    ("SELECT SAFE_CAST('x' AS INT64)", None),
+    ("SELECT SAFE_DIVIDE(1, 0)", None),
+    ("SELECT JSON_VALUE('{\"a\":{\"b\":\"c\"}}', '$.a.b')", "c"),
+    ("SELECT JSON_EXTRACT_SCALAR('{\"t\":[{\"c\":\"z\"}]}', '$.t[0].c')", "z"),
+    ("SELECT ARRAY_LENGTH(JSON_QUERY_ARRAY('{\"t\":[1,2,3]}', '$.t'))", 3),
+    ("SELECT REGEXP_EXTRACT('ab12', r'([0-9]+)')", "12"),
+    ("SELECT REGEXP_EXTRACT('ab', r'[0-9]+')", None),
+    ("SELECT REGEXP_REPLACE('a.b.c', '\\\\.', '-')", "a-b-c"),
+    ("SELECT REGEXP_CONTAINS('abc', 'b')", True),
+    ("SELECT [10, 20, 30][OFFSET(1)]", 20),
+    ("SELECT [10, 20, 30][ORDINAL(1)]", 10),
+    ("SELECT STRUCT(1 AS lat, 'x' AS city).city", "x"),
+    ("SELECT 2 IN UNNEST([1, 2])", True),
+    ("SELECT COUNTIF(x > 1) FROM UNNEST([1, 2, 3]) AS x", 2),
+    ("SELECT STRING_AGG(s, ',') FROM UNNEST(SPLIT('a|b', '|')) s", "a,b"),
+])
+def test_dialect_semantics(bq, expected):
+    assert _one(bq)[0] == expected
+
+
+def test_array_agg_ignore_nulls_order_limit():
+    got = _one("""
+        SELECT ARRAY_AGG(DISTINCT x IGNORE NULLS ORDER BY x),
+               ARRAY_AGG(STRUCT(x AS v) ORDER BY x DESC LIMIT 1)[OFFSET(0)].v
+        FROM UNNEST([3, NULL, 1, 3]) x
+    """)
+    assert got == ([1, 3], 3)
+
+
+def test_unnest_with_offset_keeps_order():
+    duck_sql, _, _ = translate(
+        "SELECT STRING_AGG(l, '' ORDER BY o) FROM "
+        "UNNEST(JSON_VALUE_ARRAY('{\"a\":[\"x\",\"y\",\"z\"]}', '$.a')) l WITH OFFSET o")
+    assert duckdb.connect().execute(duck_sql).fetchone()[0] == "xyz"
+
+
+# --------------------------------------------------------------------------
+# state_connectivity queries against a fixture
+# --------------------------------------------------------------------------
+
+def _write(path, **cols):
+    pq.write_table(pa.table(cols), path)
+
+
+@pytest.fixture
+def local(tmp_path):
+    _write(tmp_path / "practitioner.parquet",
+           _id=["p1", "p2", "p3"], _npi=["1", "2", "3"], _postal_code=["15213", "19104", "15213"],
+           _state=["PA", "PA", "OH"], _active=[True, True, True])
+    _write(tmp_path / "practitioner_role.parquet",
+           _practitioner_id=["Practitioner/p1", "Practitioner/p1", "Practitioner/p3"],
+           _org_id=["Organization/o1", "Organization/o2", "Organization/o1"],
+           _location_ids=["Location/l1", "", None], _active=[True, True, True])
+    _write(tmp_path / "organization.parquet",
+           _id=["o1", "o2", "o3", "o4"], _npi=["9", None, "7", None],
+           _name=["ONE", "TWO", "THREE", "FOUR"], _city=["A", "B", "C", "D"],
+           _state=["PA", "PA", "OH", "OH"], _active=[True] * 4)
+    _write(tmp_path / "organization_affiliation.parquet",
+           _org_id=["Organization/o1", "Organization/o3", "Organization/o3", "Organization/o2"],
+           _participating_org_id=["Organization/o2", "Organization/o1", "Organization/o4",
+                                  "Organization/o2"],
+           _active=[True] * 4)
+    _write(tmp_path / "location.parquet",
+           _managing_org_id=["Organization/o1"] * 3, _state=["PA"] * 3,
+           _position_lat=pa.array([9.5, 40.4, None], pa.float64()),
+           _position_lng=pa.array([-80.0, -79.9, -79.0], pa.float64()), _city=["S", "N", "X"])
+    ext = tmp_path / "external"
+    ext.mkdir()
+    _write(ext / "bigquery-public-data.nppes.npi_raw.parquet",
+           npi=pa.array([9, 8], pa.int64()), entity_type_code=pa.array([2, 2], pa.int64()),
+           provider_business_practice_location_address_state_name=["PA", "PA"],
+           parent_organization_lbn=["PARENT", "null"])
+    return DuckDBWarehouse(parquet_dir=tmp_path, external_dir=ext)
+
+
+def test_state_connectivity_queries_run_unchanged(local):
+    import state_connectivity as sc
+
+    prac = {r["npi"]: r for r in local.query(sc.PRACTITIONER_SQL, {"state": "PA"})}
+    assert set(prac) == {"1", "2"}
+    assert prac["1"].n_roles == 2 and prac["1"].n_orgs_with_npi == 1
+    assert prac["1"]["n_roles_with_location"] == 1
+    assert sorted(prac["1"]["org_ids"]) == ["o1", "o2"] and prac["1"]["org_npis"] == ["9"]
+    assert prac["2"]["n_roles"] == 0 and prac["2"]["org_ids"] == []
+
+    points = local.query(sc.ORG_POINT_SQL, {"state": "PA"})
+    by_org = {r["org_id"]: r for r in points}
+    # Northernmost geocoded site, numerically: 40.4 beats 9.5.
+    assert by_org["o1"]["sites"] == 2 and by_org["o1"]["lat"] == 40.4
+    assert by_org["o2"]["lat"] is None
+
+    parents = local.query(sc.PARENT_SQL, {"state": "PA"})
+    assert [dict(r) for r in parents] == [{"org_npi": "9", "parent_lbn": "PARENT"}]
+
+
+def test_missing_parquet_names_the_file(tmp_path):
+    wh = DuckDBWarehouse(parquet_dir=tmp_path, external_dir=tmp_path)
+    with pytest.raises(WarehouseError, match="endpoint.parquet"):
+        wh.query("SELECT * FROM `thematic-fort-453901-t7.cms_npd.endpoint`")
+
+
+def test_backend_selection(monkeypatch):
+    monkeypatch.setattr(warehouse, "_default", None)
+    with pytest.raises(WarehouseError):
+        warehouse.use("postgres")
+    monkeypatch.setenv("AINPI_WAREHOUSE", "nope")
+    with pytest.raises(WarehouseError):
+        warehouse.current()
+
+
+def test_national_queries_partition_to_the_per_state_answers(local, monkeypatch):
+    import state_connectivity as sc
+
+    monkeypatch.setattr(sc.warehouse, "query_arrow",
+                        lambda sql, params=None: local.arrow(sql, params)[0])
+    national = sc.national_results(["PA", "OH"], list(sc.QUERIES))
+    def part(name, code):
+        return sc.as_rows(sc.state_table(national, name, code))
+
+    for name, (per_state_sql, _) in sc.QUERIES.items():
+        for code in ("PA", "OH"):
+            expected = [dict(r) for r in local.query(per_state_sql, {"state": code})]
+            assert sorted(part(name, code), key=repr) == sorted(expected, key=repr), (name, code)
+    assert part("orgs", "OH")[0]["org_id"] == "o1"
+    assert [(r["org_a"], r["org_b"]) for r in part("edges", "OH")] == [("o3", "o4")]
+    assert part("parents", "OH") == []
+
+
+def test_jobs_pool_writes_what_the_serial_run_writes(local, monkeypatch, tmp_path):
+    import state_connectivity as sc
+
+    monkeypatch.setattr(sc.warehouse, "query_arrow",
+                        lambda sql, params=None: local.arrow(sql, params)[0])
+    out = {}
+    for jobs in ("1", "2"):
+        out[jobs] = tmp_path / f"jobs{jobs}"
+        monkeypatch.setattr(sys, "argv", ["state_connectivity.py", "PA", "OH", "--no-geo",
+                                          "--no-cache", "--jobs", jobs, "--out-dir", str(out[jobs])])
+        assert sc.main() == 0
+
+    def payloads(d):
+        docs = {p.name: json.loads(p.read_text()) for p in sorted(d.glob("*-connectivity.json"))}
+        for doc in docs.values():
+            doc.pop("generated_at")
+        return docs
+
+    serial = payloads(out["1"])
+    assert sorted(serial) == ["oh-connectivity.json", "pa-connectivity.json"]
+    assert serial["pa-connectivity.json"]["summary"]["practitioners"] == 2
+    assert payloads(out["2"]) == serial
+
+
+def test_a_failed_point_query_costs_the_state_its_map_not_its_payload(local, monkeypatch, tmp_path):
+    import state_connectivity as sc
+
+    def query_arrow(sql, params=None):
+        if sql == sc.ORG_POINT_SQL:
+            raise WarehouseError("point query failed")
+        return local.arrow(sql, params)[0]
+
+    monkeypatch.setattr(sc.warehouse, "query_arrow", query_arrow)
+    monkeypatch.setattr(sc, "load_zip_county", lambda fips: {})
+    monkeypatch.setattr(sc, "load_counties", lambda refresh, **kw: [])
+    monkeypatch.setattr(sys, "argv", ["state_connectivity.py", "PA", "--no-cache",
+                                      "--out-dir", str(tmp_path)])
+    assert sc.main() == 0
+    doc = json.loads((tmp_path / "pa-connectivity.json").read_text())
+    assert doc["summary"]["practitioners"] == 2
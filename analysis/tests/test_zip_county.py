@@ -0,0 +1,113 @@
+"""Tests for analysis/zip_county.py — the cached ZIP to county crosswalk.
+
+The binary artifact must answer exactly what parsing the Census text file
+answered, so the text parse the module used before is kept here as the
+reference and both are run on a small relationship file with the awkward
+cases: a ZCTA crossing a state line, a tie between two counties, a single-
+county ZCTA, and rows the parser must skip. No network: the file is written
+into a temporary cache directory.
+"""
+from __future__ import annotations
+
+import collections
+import csv
+import os
+import pathlib
+import sys
+
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent.parent))
+
+from analysis import zip_county  # noqa: E402
+
+HEADER = ["ZCTA5", "STATE", "COUNTY", "GEOID", "POPPT", "ZPOPPCT"]
+ROWS = [
+    ("00601", "72", "001", "72001", "18465", "100"),
+    ("15213", "42", "003", "42003", "30000", "100"),
+    ("16001", "42", "019", "42019", "9000", "60.25"),      # split, ambiguous
+    ("16001", "42", "005", "42005", "6000", "39.75"),
+    ("16002", "42", "019", "42019", "500", "50"),          # tie: first wins
+    ("16002", "42", "085", "42085", "500", "50"),
+    ("16003", "42", "019", "42019", "10", "80.06"),
+    ("16003", "42", "085", "42085", "2", "19.94"),
+    ("21912", "10", "003", "10003", "40", "40.0"),         # crosses DE / MD
+    ("21912", "24", "015", "24015", "60", "60.0"),
+    ("", "42", "003", "42003", "1", "1"),                  # skipped: no ZCTA
+    ("19999", "42", "101", "42101", "1", "n/a"),           # skipped: no share
+]
+
+
+def reference(path, state_fips=None):
+    """The text parse zip_county.load_zip_county did before the artifact."""
+    pairs = collections.defaultdict(list)
+    with path.open(encoding="utf-8-sig", newline="") as fh:
+        for row in csv.DictReader(fh):
+            if state_fips and row["STATE"] != state_fips:
+                continue
+            zcta = row["ZCTA5"].strip()
+            if not zcta:
+                continue
+            try:
+                share = float(row["ZPOPPCT"])
+            except (TypeError, ValueError):
+                continue
+            pairs[zcta].append((row["GEOID"].strip(), share))
+    by_zip, ambiguous, splits = {}, 0, 0
+    for zcta, options in pairs.items():
+        splits += len(options) > 1
+        fips, share = max(options, key=lambda t: t[1])
+        ambiguous += share < zip_county.AMBIGUOUS_BELOW_PCT
+        by_zip[zcta] = (fips, round(share, 1))
+    return by_zip, ambiguous, splits
+
+
+@pytest.fixture
+def rel(tmp_path, monkeypatch):
+    monkeypatch.setattr(zip_county, "CACHE", tmp_path)
+    zip_county._national.cache_clear()
+    path = tmp_path / zip_county.REL_FILE
+    with path.open("w", newline="") as fh:
+        w = csv.writer(fh)
+        w.writerow(HEADER)
+        w.writerows(ROWS)
+    yield path
+    zip_county._national.cache_clear()
+
+
+@pytest.mark.parametrize("state_fips", [None, "42", "10", "24", "72", "06"])
+def test_matches_the_text_parse(rel, state_fips):
+    xw = zip_county.load_zip_county(state_fips)
+    assert (xw._by_zip, xw.ambiguous_zips, xw.split_zips) == reference(rel, state_fips)
+
+
+def test_lookups(rel):
+    pa = zip_county.load_zip_county("42")
+    assert pa.county("15213-1234") == ("42003", 100.0)
+    assert pa.fips("16002") == "42019"
+    assert pa.county("1521") is None and pa.county(None) is None
+    assert (pa.ambiguous_zips, pa.split_zips) == (2, 3)
+    assert len(pa) == 4
+    assert zip_county.load_zip_county().fips("21912") == "24015"
+
+
+def test_artifact_is_reused_then_rebuilt_when_stale(rel, monkeypatch):
+    zip_county.load_zip_county("42")
+    npz = rel.with_name(zip_county.REL_NPZ)
+    assert npz.exists()
+
+    def fail(path):
+        raise AssertionError("re-parsed the text file")
+
+    monkeypatch.setattr(zip_county, "_parse_rel", fail)
+    zip_county._national.cache_clear()
+    assert zip_county.load_zip_county("42").fips("15213") == "42003"
+
+    monkeypatch.undo()
+    monkeypatch.setattr(zip_county, "CACHE", rel.parent)
+    with rel.open("a", newline="") as fh:
+        csv.writer(fh).writerow(("15213", "42", "005", "42005", "1", "100.5"))
+    mtime = npz.stat().st_mtime + 10
+    os.utime(rel, (mtime, mtime))
+    zip_county._national.cache_clear()
+    assert zip_county.load_zip_county("42").fips("15213") == "42005"
@@ -0,0 +1,634 @@
+"""One query entry point for the cms_npd tables: BigQuery, or DuckDB on a laptop.
+
+The analysis scripts were written against `google.cloud.bigquery.Client`, so
+none of them could run, be tested or be profiled without credentials, and
+every iteration on a query cost a capped but real scan. This module keeps
+their SQL exactly as written and lets it run in one of two places:
+
+    bigquery   the warehouse, through bq_job_config() and its 100 GB cap
+    duckdb     the parquet files export_parquet.py writes, in-process
+
+Usage:
+
+    from analysis import warehouse
+
+    rows = warehouse.query(SQL, {"state": "PA"})   # list of dict rows
+    table = warehouse.query_arrow(SQL)             # pyarrow.Table, for big scans
+    warehouse.use("duckdb")                        # or AINPI_WAREHOUSE=duckdb
+
+Results go through the query result cache (analysis/qcache.py), so a query
+already answered for CURRENT_RELEASE is not paid for twice.
+
+Rows are dicts that also allow attribute access, so `r["npi"]`, `r.npi` and
+`dict(r.items())` all work as they did on bigquery.Row.
+
+## The DuckDB side
+
+Table references are mapped, not rewritten by hand: `{PROJECT}.{DATASET}.x`
+reads `frontend/data/parquet-export/<CURRENT_RELEASE>/x.parquet` (override the
+directory with AINPI_PARQUET_DIR), and any other fully-qualified table, such
+as `bigquery-public-data.nppes.npi_raw`, reads
+`frontend/data/parquet-export/external/<project>.<dataset>.<table>.parquet`
+or a directory of that name holding parquet parts (AINPI_EXTERNAL_PARQUET_DIR).
+A missing file fails with the path it looked for, never with an empty result.
+A NULL array in a Row comes back as [], as the BigQuery client returns it.
+
+translate() turns the BigQuery dialect the scripts use into DuckDB's. It
+works on tokens, so string literals and comments are never touched:
+
+    `project.dataset.table`        view over the parquet file
+    @state                         $state, bound by name
+    "text", r'\\d', '\\n'           standard single-quoted literals
+    COUNTIF / LOGICAL_OR / _AND    count_if / bool_or / bool_and
+    JSON_VALUE, JSON_EXTRACT_SCALAR    json_extract_string
+    JSON_QUERY, JSON_EXTRACT       json_extract
+    JSON_QUERY_ARRAY, ..._ARRAY    CAST(json_extract(..) AS JSON[] | VARCHAR[])
+    SAFE_CAST, INT64, FLOAT64      TRY_CAST, BIGINT, DOUBLE
+    SAFE_DIVIDE(a, b)              a / NULLIF(b, 0)
+    CONCAT(a, b)                   (a || b), NULL if any argument is NULL
+    ARRAY_AGG(DISTINCT x IGNORE NULLS ORDER BY y LIMIT n)
+                                   array_agg(..) FILTER (WHERE x IS NOT NULL),
+                                   sliced to n
+    arr[OFFSET(i)], [ORDINAL(i)]   arr[i + 1], arr[i]
+    STRUCT(a AS x, b AS y)         struct_pack(x := a, y := b)
+    FROM t, UNNEST(arr) AS u       unnest(arr) AS u(u)
+        ... WITH OFFSET o          WITH ORDINALITY AS u(u, o); o counts from 1
+    x IN UNNEST(arr)               x IN (SELECT unnest(arr))
+    REGEXP_CONTAINS / _REPLACE / _EXTRACT   with BigQuery's all-matches and
+                                   first-group semantics
+    SPLIT, ARRAY_LENGTH, TO_JSON_STRING, SELECT * EXCEPT (..)
+
+Anything outside that list passes through unchanged, which is right for the
+large shared subset (CTEs, QUALIFY, ANY_VALUE, IFNULL, NULLIF, window
+functions) and surfaces as a DuckDB error otherwise. Table metadata such as
+`__TABLES__` has no local equivalent.
+
+Run directly to see a translation, or to run a query locally:
+
+    python analysis/warehouse.py < query.sql
+    python analysis/warehouse.py --run --param state=PA < query.sql
+"""
+from __future__ import annotations
+
+import abc
+import argparse
+import os
+import pathlib
+import re
+import sys
+import time
+from typing import Any, Iterable
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from analysis import qcache  # noqa: E402
+from analysis.claims_sources._cohorts import bq_job_config  # noqa: E402
+from analysis.release import CURRENT_RELEASE  # noqa: E402
+
+import pyarrow as pa  # noqa: E402
+
+try:
+    import duckdb
+except ImportError:  # pragma: no cover - optional local backend
+    duckdb = None
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent
+PARQUET_ROOT = REPO_ROOT / "frontend" / "data" / "parquet-export"
+PROJECT = "thematic-fort-453901-t7"
+DATASET = "cms_npd"
+BACKENDS = ("bigquery", "duckdb")
+
+
+class WarehouseError(RuntimeError):
+    """A query that cannot run on the selected backend, with the reason."""
+
+
+class Row(dict):
+    """A result row: a dict, plus attribute access like bigquery.Row."""
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+# --------------------------------------------------------------------------
+# BigQuery -> DuckDB translation
+# --------------------------------------------------------------------------
+
+_TOKEN = re.compile(r"""
+    (?P<comment>--[^\n]*|\#[^\n]*|/\*.*?\*/)
+  | (?P<str>[rRbB]{0,2}(?:'''.*?'''|\"\"\".*?\"\"\"|'(?:\\.|[^'\\])*'|"(?:\\.|[^"\\])*"))
+  | (?P<bt>`[^`]*`)
+  | (?P<param>@\w+)
+  | (?P<word>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<num>\d+(?:\.\d*)?(?:[eE][+-]?\d+)?)
+  | (?P<ws>\s+)
+  | (?P<op>.)
+""", re.S | re.X)
+
+_ESCAPE = re.compile(r"\\(x[0-9a-fA-F]{2}|u[0-9a-fA-F]{4}|U[0-9a-fA-F]{8}|[0-7]{3}|.)", re.S)
+_SIMPLE_ESCAPES = {"a": "\a", "b": "\b", "f": "\f", "n": "\n", "r": "\r",
+                   "t": "\t", "v": "\v"}
+
+_RENAMES = {
+    "COUNTIF": "count_if",
+    "LOGICAL_OR": "bool_or",
+    "LOGICAL_AND": "bool_and",
+    "JSON_VALUE": "json_extract_string",
+    "JSON_EXTRACT_SCALAR": "json_extract_string",
+    "JSON_QUERY": "json_extract",
+    "JSON_EXTRACT": "json_extract",
+    "SAFE_CAST": "TRY_CAST",
+    "REGEXP_CONTAINS": "regexp_matches",
+    "ARRAY_LENGTH": "len",
+}
+_TYPES = {"INT64": "BIGINT", "FLOAT64": "DOUBLE", "BYTES": "BLOB"}
+# Words that end a FROM item, so they are never read as an UNNEST alias.
+_CLAUSE_WORDS = frozenset("""
+    WHERE JOIN LEFT RIGHT INNER FULL CROSS ON USING GROUP ORDER LIMIT HAVING
+    QUALIFY WINDOW UNION INTERSECT EXCEPT WITH AS SELECT
+""".split())
+
+
+def _tokenize(sql: str) -> list[tuple[str, str]]:
+    return [(m.lastgroup, m.group()) for m in _TOKEN.finditer(sql)]
+
+
+def _literal(text: str) -> str:
+    """A BigQuery string literal as a standard SQL one."""
+    prefix = re.match(r"[rRbB]*", text).group().lower()
+    body = text[len(prefix):]
+    quote = body[:3] if body[:3] in ("'''", '"""') else body[0]
+    body = body[len(quote):-len(quote)]
+    if "r" not in prefix:
+        def unescape(m: re.Match) -> str:
+            e = m.group(1)
+            if e[0] in "xuU" and len(e) > 1:
+                return chr(int(e[1:], 16))
+            if len(e) == 3 and e.isdigit():
+                return chr(int(e, 8))
+            return _SIMPLE_ESCAPES.get(e, e)
+        body = _ESCAPE.sub(unescape, body)
+    return "'" + body.replace("'", "''") + "'"
+
+
+class _Translator:
+    def __init__(self, tokens: list[tuple[str, str]]):
+        self.toks = tokens
+        self.tables: set[str] = set()
+        self.params: set[str] = set()
+
+    # -- token helpers ----------------------------------------------------
+
+    def _next(self, i: int) -> int:
+        """Index of the first non-whitespace, non-comment token at or after i."""
+        while i < len(self.toks) and self.toks[i][0] in ("ws", "comment"):
+            i += 1
+        return i
+
+    def _prev(self, i: int) -> tuple[str, str] | None:
+        i -= 1
+        while i >= 0 and self.toks[i][0] in ("ws", "comment"):
+            i -= 1
+        return self.toks[i] if i >= 0 else None
+
+    def _is(self, i: int, kind: str, text: str | None = None) -> bool:
+        if i >= len(self.toks) or self.toks[i][0] != kind:
+            return False
+        return text is None or self.toks[i][1].upper() == text
+
+    def _close(self, i: int) -> int:
+        """Index of the bracket closing the one at i."""
+        pairs = {"(": ")", "[": "]"}
+        opener, depth = self.toks[i][1], 0
+        for j in range(i, len(self.toks)):
+            kind, text = self.toks[j]
+            if kind != "op":
+                continue
+            if text == opener:
+                depth += 1
+            elif text == pairs[opener]:
+                depth -= 1
+                if depth == 0:
+                    return j
+        raise WarehouseError(f"unbalanced {opener!r} in query")
+
+    def _split(self, lo: int, hi: int) -> list[tuple[int, int]]:
+        """Top-level comma-separated (start, end) ranges of toks[lo:hi]."""
+        out, depth, start = [], 0, lo
+        for j in range(lo, hi):
+            kind, text = self.toks[j]
+            if kind != "op":
+                continue
+            if text in "([":
+                depth += 1
+            elif text in ")]":
+                depth -= 1
+            elif text == "," and depth == 0:
+                out.append((start, j))
+                start = j + 1
+        if start < hi or out:
+            out.append((start, hi))
+        return out
+
+    def _find_word(self, lo: int, hi: int, word: str) -> int | None:
+        depth = 0
+        for j in range(lo, hi):
+            kind, text = self.toks[j]
+            if kind == "op" and text in "([":
+                depth += 1
+            elif kind == "op" and text in ")]":
+                depth -= 1
+            elif depth == 0 and kind == "word" and text.upper() == word:
+                return j
+        return None
+
+    # -- translation ------------------------------------------------------
+
+    def run(self, lo: int = 0, hi: int | None = None) -> str:
+        hi = len(self.toks) if hi is None else hi
+        out: list[str] = []
+        i = lo
+        while i < hi:
+            kind, text = self.toks[i]
+            up = text.upper()
+            if kind == "word":
+                j = self._next(i + 1)
+                if j < hi and self._is(j, "op", "("):
+                    k = self._close(j)
+                    handled = self._call(up, i, j, k)
+                    if handled is not None:
+                        out.append(handled)
+                        i = k + 1
+                        # `x IN UNNEST(arr)` became a subquery: nothing to alias.
+                        if up == "UNNEST" and not handled.startswith("(SELECT"):
+                            i = self._unnest_alias(i, hi, out)
+                        continue
+                if up in _TYPES:
+                    out.append(_TYPES[up])
+                elif up == "EXCEPT" and self._prev(i) == ("op", "*"):
+                    out.append("EXCLUDE")
+                else:
+                    out.append(text)
+            elif kind == "op" and text == "[":
+                j = self._next(i + 1)
+                sub = self.toks[j][1].upper() if j < hi else ""
+                if sub in ("OFFSET", "SAFE_OFFSET", "ORDINAL", "SAFE_ORDINAL"):
+                    p = self._next(j + 1)
+                    q = self._close(p)
+                    end = self._close(i)
+                    inner = self.run(p + 1, q)
+                    out.append(f"[({inner}) + 1]" if sub.endswith("OFFSET") else f"[{inner}]")
+                    i = end + 1
+                    continue
+                out.append(text)
+            elif kind == "str":
+                out.append(_literal(text))
+            elif kind == "bt":
+                out.append(self._table(text[1:-1]))
+            elif kind == "param":
+                self.params.add(text[1:])
+                out.append("$" + text[1:])
+            else:
+                out.append(text)
+            i += 1
+        return "".join(out)
+
+    def _args(self, j: int, k: int) -> list[str]:
+        return [self.run(a, b).strip() for a, b in self._split(j + 1, k)]
+
+    def _call(self, up: str, i: int, j: int, k: int) -> str | None:
+        """Translate the call toks[i](toks[j..k]); None leaves it to the caller."""
+        if up in _RENAMES:
+            return f"{_RENAMES[up]}({self.run(j + 1, k)})"
+        if up in ("JSON_QUERY_ARRAY", "JSON_EXTRACT_ARRAY",
+                  "JSON_VALUE_ARRAY", "JSON_EXTRACT_STRING_ARRAY"):
+            args = self._args(j, k)
+            path = args[1] if len(args) > 1 else "'$'"
+            typ = "JSON[]" if up in ("JSON_QUERY_ARRAY", "JSON_EXTRACT_ARRAY") else "VARCHAR[]"
+            return f"CAST(json_extract({args[0]}, {path}) AS {typ})"
+        if up == "SAFE_DIVIDE":
+            a, b = self._args(j, k)
+            return f"(({a}) / NULLIF({b}, 0))"
+        if up == "CONCAT":
+            return "(" + " || ".join(f"({a})" for a in self._args(j, k)) + ")"
+        if up == "TO_JSON_STRING":
+            return f"CAST(to_json({self.run(j + 1, k)}) AS VARCHAR)"
+        if up == "SPLIT":
+            args = self._args(j, k)
+            return f"string_split({args[0]}, {args[1] if len(args) > 1 else repr(',')})"
+        if up == "REGEXP_REPLACE":
+            return f"regexp_replace({self.run(j + 1, k)}, 'g')"
+        if up == "REGEXP_EXTRACT":
+            args = self._args(j, k)
+            # BigQuery returns the first capture group when there is one, and
+            # NULL rather than '' when nothing matches.
+            group = 1 if re.search(r"(?<!\\)\((?!\?)", args[1]) else 0
+            return f"NULLIF(regexp_extract({args[0]}, {args[1]}, {group}), '')"
+        if up == "STRUCT":
+            return self._struct(j, k)
+        if up == "ARRAY_AGG":
+            return self._array_agg(j, k)
+        if up == "UNNEST":
+            prev = self._prev(i)
+            arg = self.run(j + 1, k)
+            if prev and prev[0] == "word" and prev[1].upper() == "IN":
+                return f"(SELECT unnest({arg}))"
+            return f"unnest({arg})"
+        return None
+
+    def _struct(self, j: int, k: int) -> str:
+        fields = []
+        for n, (a, b) in enumerate(self._split(j + 1, k), 1):
+            as_at = self._find_word(a, b, "AS")
+            if as_at is None:
+                fields.append((f"_field_{n}", self.run(a, b).strip()))
+            else:
+                fields.append((self.run(as_at + 1, b).strip(), self.run(a, as_at).strip()))
+        return "struct_pack(" + ", ".join(f"{name} := {expr}" for name, expr in fields) + ")"
+
+    def _array_agg(self, j: int, k: int) -> str:
+        lo, hi = j + 1, k
+        marks = {w: self._find_word(lo, hi, w) for w in ("IGNORE", "RESPECT", "ORDER", "LIMIT")}
+        end_expr = min([m for m in marks.values() if m is not None], default=hi)
+        expr = self.run(lo, end_expr).strip()
+        distinct = ""
+        if re.match(r"DISTINCT\s", expr, re.I):
+            distinct, expr = "DISTINCT ", expr[8:].strip()
+        order = ""
+        if marks["ORDER"] is not None:
+            order = " " + self.run(marks["ORDER"], marks["LIMIT"] or hi).strip()
+        sql = f"array_agg({distinct}{expr}{order})"
+        if marks["IGNORE"] is not None:
+            sql += f" FILTER (WHERE ({expr}) IS NOT NULL)"
+        if marks["LIMIT"] is not None:
+            sql = f"list_slice({sql}, 1, {self.run(marks['LIMIT'] + 1, hi).strip()})"
+        return sql
+
+    def _unnest_alias(self, i: int, hi: int, out: list[str]) -> int:
+        """Give an UNNEST in FROM the column alias DuckDB needs; return new i."""
+        j = self._next(i)
+        if self._is(j, "word", "AS"):
+            j = self._next(j + 1)
+        alias, end = None, i
+        if j < hi and self.toks[j][0] == "word" and self.toks[j][1].upper() not in _CLAUSE_WORDS:
+            alias, end = self.toks[j][1], j + 1
+            j = self._next(j + 1)
+        offset = None
+        if self._is(j, "word", "WITH") and self._is(self._next(j + 1), "word", "OFFSET"):
+            o = self._next(self._next(j + 1) + 1)
+            if self._is(o, "word", "AS"):
+                o = self._next(o + 1)
+            offset, end = self.toks[o][1], o + 1
+        if alias is None and offset is None:
+            return i
+        alias = alias or "unnest"
+        if offset is None:
+            out.append(f" AS {alias}({alias})")
+        else:
+            out.append(f" WITH ORDINALITY AS {alias}({alias}, {offset})")
+        return end
+
+    def _table(self, name: str) -> str:
+        parts = name.split(".")
+        if len(parts) == 3 and parts[:2] == [PROJECT, DATASET]:
+            view = parts[2]
+        elif len(parts) == 2 and parts[0] == DATASET:
+            view = parts[1]
+        else:
+            view = name
+        self.tables.add(view)
+        return '"' + view.replace('"', '""') + '"'
+
+
+def normalize(sql: str) -> str:
+    """`sql` without comments and with whitespace collapsed: the cache key text."""
+    return " ".join(text for kind, text in _tokenize(sql)
+                    if kind not in ("comment", "ws")).strip()
+
+
+def translate(sql: str) -> tuple[str, set[str], set[str]]:
+    """BigQuery SQL -> (DuckDB SQL, tables referenced, parameters referenced).
+
+    Tables come back as view names: the bare table for cms_npd, the dotted
+    `project.dataset.table` for anything else.
+    """
+    t = _Translator(_tokenize(sql))
+    return t.run(), t.tables, t.params
+
+
+# --------------------------------------------------------------------------
+# backends
+# --------------------------------------------------------------------------
+
+def _bq_param(name: str, value: Any):
+    from google.cloud import bigquery
+
+    def typ(v: Any) -> str:
+        if isinstance(v, bool):
+            return "BOOL"
+        if isinstance(v, int):
+            return "INT64"
+        if isinstance(v, float):
+            return "FLOAT64"
+        return "STRING"
+
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = list(value)
+        return bigquery.ArrayQueryParameter(name, typ(items[0]) if items else "STRING", items)
+    return bigquery.ScalarQueryParameter(name, typ(value), value)
+
+
+class _Warehouse(abc.ABC):
+    name = ""
+
+    @abc.abstractmethod
+    def arrow(self, sql: str, params: dict | None = None,
+              maximum_bytes_billed: int | None = None) -> tuple[pa.Table, int]:
+        """(result, bytes billed)."""
+
+    def query(self, sql: str, params: dict | None = None,
+              maximum_bytes_billed: int | None = None) -> list[Row]:
+        """Uncached rows from this backend; module-level query() caches."""
+        return rows(self.arrow(sql, params, maximum_bytes_billed)[0])
+
+
+class BigQueryWarehouse(_Warehouse):
+    name = "bigquery"
+
+    def __init__(self, project: str = PROJECT):
+        from google.cloud import bigquery
+
+        self.client = bigquery.Client(project=project)
+
+    def cache_tag(self, sql: str) -> str:
+        return f"bigquery:{self.client.project}"
+
+    def arrow(self, sql: str, params: dict | None = None,
+              maximum_bytes_billed: int | None = None) -> tuple[pa.Table, int]:
+        """(result, bytes billed)."""
+        cfg = bq_job_config(maximum_bytes_billed)
+        cfg.query_parameters = [_bq_param(k, v) for k, v in (params or {}).items()]
+        job = self.client.query(sql, job_config=cfg)
+        table = job.result().to_arrow()
+        return table, job.total_bytes_billed or 0
+
+
+class DuckDBWarehouse(_Warehouse):
+    name = "duckdb"
+
+    def __init__(self, parquet_dir: pathlib.Path | str | None = None,
+                 external_dir: pathlib.Path | str | None = None):
+        if duckdb is None:
+            raise WarehouseError("the duckdb backend needs `pip install duckdb`")
+        self.parquet_dir = pathlib.Path(
+            parquet_dir or os.environ.get("AINPI_PARQUET_DIR") or PARQUET_ROOT / CURRENT_RELEASE)
+        self.external_dir = pathlib.Path(
+            external_dir or os.environ.get("AINPI_EXTERNAL_PARQUET_DIR") or PARQUET_ROOT / "external")
+        self.con = duckdb.connect()
+        self.views: set[str] = set()
+
+    def _source(self, view: str) -> str:
+        if "." not in view:
+            path = self.parquet_dir / f"{view}.parquet"
+            hint = "run analysis/export_parquet.py for this release, or set AINPI_PARQUET_DIR"
+        else:
+            path = self.external_dir / f"{view}.parquet"
+            if not path.exists() and (self.external_dir / view).is_dir():
+                path = self.external_dir / view / "*.parquet"
+            hint = ("export it once, e.g. bq extract --destination_format=PARQUET, "
+                    "or set AINPI_EXTERNAL_PARQUET_DIR")
+        if "*" not in path.name and not path.exists():
+            raise WarehouseError(f"no local parquet for {view}: expected {path} ({hint})")
+        return str(path).replace("'", "''")
+
+    def _ensure_views(self, views: Iterable[str]) -> None:
+        for view in sorted(set(views) - self.views):
+            ident = '"' + view.replace('"', '""') + '"'
+            self.con.execute(
+                f"CREATE VIEW {ident} AS SELECT * FROM read_parquet('{self._source(view)}')")
+            self.views.add(view)
+
+    def cache_tag(self, sql: str) -> list:
+        """The parquet files `sql` reads, with size and mtime: a re-export misses."""
+        tag = []
+        for view in sorted(translate(sql)[1]):
+            path = pathlib.Path(self._source(view))
+            st = (path.parent if "*" in path.name else path).stat()
+            tag.append([str(path), st.st_size, st.st_mtime_ns])
+        return ["duckdb", tag]
+
+    def arrow(self, sql: str, params: dict | None = None,
+              maximum_bytes_billed: int | None = None) -> tuple[pa.Table, int]:
+        """(result, bytes billed), the latter always 0 locally."""
+        duck_sql, tables, names = translate(sql)
+        self._ensure_views(tables)
+        missing = names - set(params or {})
+        if missing:
+            raise WarehouseError(f"query needs parameters {sorted(missing)}")
+        cur = self.con.cursor()
+        try:
+            cur.execute(duck_sql, {k: v for k, v in (params or {}).items() if k in names})
+            fetch = getattr(cur, "to_arrow_table", None) or cur.fetch_arrow_table
+            return fetch(), 0
+        except duckdb.Error as exc:
+            raise WarehouseError(f"{exc}\n--- translated SQL ---\n{duck_sql}") from exc
+
+
+def rows(table: pa.Table) -> list[Row]:
+    """A result table as Row dicts.
+
+    BigQuery cannot return a NULL array; its client hands back [] where the
+    query produced NULL (e.g. ARRAY_AGG over no rows). DuckDB can, so list
+    columns are filled the same way here.
+    """
+    out = [Row(r) for r in table.to_pylist()]
+    lists = [f.name for f in table.schema
+             if pa.types.is_list(f.type) or pa.types.is_large_list(f.type)]
+    for r in out:
+        for c in lists:
+            if r[c] is None:
+                r[c] = []
+    return out
+
+
+_default: str | None = None
+_instances: dict[str, Any] = {}
+
+
+def use(backend: str | None) -> None:
+    """Set the process-wide backend. None keeps AINPI_WAREHOUSE or bigquery."""
+    global _default
+    if backend is not None and backend not in BACKENDS:
+        raise WarehouseError(f"unknown warehouse backend {backend!r}; expected one of {BACKENDS}")
+    _default = backend
+
+
+def current():
+    """The selected backend's warehouse, created on first use."""
+    name = _default or os.environ.get("AINPI_WAREHOUSE") or "bigquery"
+    if name not in BACKENDS:
+        raise WarehouseError(f"AINPI_WAREHOUSE={name!r} is not one of {BACKENDS}")
+    if name not in _instances:
+        _instances[name] = BigQueryWarehouse() if name == "bigquery" else DuckDBWarehouse()
+    return _instances[name]
+
+
+def query_arrow(sql: str, params: dict | None = None,
+                maximum_bytes_billed: int | None = None) -> pa.Table:
+    """Run `sql` on the selected backend, through the result cache (qcache.py)."""
+    wh = current()
+    if not qcache.enabled():
+        table, billed = wh.arrow(sql, params, maximum_bytes_billed)
+        qcache.record(billed)
+        return table
+    key = qcache.make_key(normalize(sql), sorted((params or {}).items()),
+                          CURRENT_RELEASE, wh.cache_tag(sql))
+    label = f"  qcache {key[:10]}"
+    table = qcache.get(key)
+    if table is not None:
+        billed = qcache.meta(table).get("bytes_billed", 0)
+        print(f"{label} hit: {table.num_rows:,} rows, "
+              f"{qcache.fmt_bytes(billed)} billed avoided")
+        return table
+    table, billed = wh.arrow(sql, params, maximum_bytes_billed)
+    qcache.record(billed)
+    external = any("." in t for t in translate(sql)[1])
+    qcache.put(key, table, bytes_billed=billed, sql=sql,
+               ttl_days=qcache.EXTERNAL_TTL_DAYS if external else None)
+    print(f"{label} miss: {table.num_rows:,} rows, {qcache.fmt_bytes(billed)} billed")
+    return table
+
+
+def query(sql: str, params: dict | None = None,
+          maximum_bytes_billed: int | None = None) -> list[Row]:
+    """Run `sql` on the selected backend with named @parameters bound."""
+    return rows(query_arrow(sql, params, maximum_bytes_billed))
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Translate, and optionally run, BigQuery SQL locally.")
+    ap.add_argument("--run", action="store_true", help="execute on the duckdb backend")
+    ap.add_argument("--param", action="append", default=[], metavar="NAME=VALUE")
+    ap.add_argument("--limit", type=int, default=20, help="rows to print with --run")
+    args = ap.parse_args()
+
+    sql = sys.stdin.read()
+    duck_sql, tables, names = translate(sql)
+    if not args.run:
+        print(duck_sql)
+        print(f"-- tables: {sorted(tables)}  parameters: {sorted(names)}", file=sys.stderr)
+        return 0
+    params = dict(p.split("=", 1) for p in args.param)
+    t0 = time.time()
+    result = rows(DuckDBWarehouse().arrow(sql, params)[0])
+    for r in result[:args.limit]:
+        print(dict(r))
+    print(f"-- {len(result):,} rows in {time.time() - t0:.2f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
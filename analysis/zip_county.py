@@ -29,6 +29,13 @@ Source: Census 2010 ZCTA-to-county relationship file, which publishes the
 population share per pair. The 2020 file replaces it but publishes only land
 area in the same role, which is the weaker basis.
 
+The text file is parsed once into REL_NPZ beside it: every (state, ZCTA,
+county, population share) row as parallel arrays sorted by state and then
+ZCTA. Loading that takes milliseconds, a state is the slice found by two
+binary searches on the state column, and the artifact is rebuilt whenever the
+text file is newer. state_connectivity --all used to re-parse the national
+file once per state.
+
 Usage:
     from analysis.zip_county import load_zip_county
     xw = load_zip_county()
@@ -36,17 +43,21 @@ Usage:
 """
 from __future__ import annotations
 
-import collections
 import csv
+import functools
+import os
 import pathlib
 import subprocess
 
+import numpy as np
+
 REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent
 CACHE = REPO_ROOT / "analysis" / "data" / "geo"
 UA = "ainpi-research/1.0 (+https://ainpi.dev)"
 REL_URL = ("https://www2.census.gov/geo/docs/maps-data/data/rel/"
            "zcta_county_rel_10.txt")
 REL_FILE = "zcta_county_rel_10.txt"
+REL_NPZ = "zcta_county_rel_10.npz"
 
 # Ambiguity threshold. Below this the dominant county holds a bare majority of
 # the ZIP's population and the county assignment is a coin-toss worth
@@ -88,33 +99,82 @@ def _download():
     return dest
 
 
-def load_zip_county(state_fips=None):
-    """Build the crosswalk. `state_fips` limits it to one state, e.g. '42'."""
-    path = _download()
-    pairs = collections.defaultdict(list)
+def _parse_rel(path):
+    """The relationship file as (state, zcta, county, share) arrays.
+
+    Codes are stored as integers and formatted back to zero-padded strings on
+    the way out. Rows are sorted stably by state and ZCTA, so within a ZCTA
+    they keep file order, which is what breaks a tie between two counties.
+    """
+    state, zcta, county, share = [], [], [], []
     with path.open(encoding="utf-8-sig", newline="") as fh:
         for row in csv.DictReader(fh):
-            if state_fips and row["STATE"] != state_fips:
-                continue
-            zcta = row["ZCTA5"].strip()
-            if not zcta:
+            z = row["ZCTA5"].strip()
+            if not z:
                 continue
             try:
-                share = float(row["ZPOPPCT"])
+                pct = float(row["ZPOPPCT"])
+                codes = int(row["STATE"]), int(z), int(row["GEOID"].strip())
             except (TypeError, ValueError):
                 continue
-            pairs[zcta].append((row["GEOID"].strip(), share))
-
-    by_zip = {}
-    ambiguous = 0
-    splits = 0
-    for zcta, options in pairs.items():
-        if len(options) > 1:
-            splits += 1
-        fips, share = max(options, key=lambda t: t[1])
-        if share < AMBIGUOUS_BELOW_PCT:
-            ambiguous += 1
-        by_zip[zcta] = (fips, round(share, 1))
+            state.append(codes[0])
+            zcta.append(codes[1])
+            county.append(codes[2])
+            share.append(pct)
+    state = np.array(state, dtype=np.uint8)
+    zcta = np.array(zcta, dtype=np.uint32)
+    order = np.lexsort((zcta, state))
+    return (state[order], zcta[order],
+            np.array(county, dtype=np.uint32)[order],
+            np.array(share, dtype=np.float64)[order])
+
+
+@functools.lru_cache(maxsize=1)
+def _national():
+    """The national crosswalk arrays, from REL_NPZ, built first if stale."""
+    txt = _download()
+    npz = CACHE / REL_NPZ
+    if not npz.exists() or npz.stat().st_mtime < txt.stat().st_mtime:
+        state, zcta, county, share = _parse_rel(txt)
+        tmp = npz.with_name(f".{npz.name}.{os.getpid()}.tmp.npz")
+        np.savez(tmp, state=state, zcta=zcta, county=county, share=share)
+        os.replace(tmp, npz)
+    with np.load(npz) as data:
+        return data["state"], data["zcta"], data["county"], data["share"]
+
+
+def load_zip_county(state_fips=None):
+    """Build the crosswalk. `state_fips` limits it to one state, e.g. '42'.
+
+    Limited to a state, only that state's part of a ZCTA competes: a ZCTA
+    that crosses a state line is assigned to its dominant county within the
+    state, and counts as split only if it spans counties there.
+    """
+    state, zcta, county, share = _national()
+    if state_fips:
+        lo, hi = np.searchsorted(state, [int(state_fips), int(state_fips) + 1])
+        zcta, county, share = zcta[lo:hi], county[lo:hi], share[lo:hi]
+    else:
+        # Within a ZCTA the file is ordered by county GEOID, whose first two
+        # digits are the state, so this restores file order.
+        order = np.argsort(zcta, kind="stable")
+        zcta, county, share = zcta[order], county[order], share[order]
+    if not len(zcta):
+        return ZipCounty({}, 0, 0)
+
+    starts = np.flatnonzero(np.r_[True, zcta[1:] != zcta[:-1]])
+    sizes = np.diff(np.r_[starts, len(zcta)])
+    # Largest share per ZCTA, first in file order on a tie, as max() picks.
+    group = np.repeat(np.arange(len(starts)), sizes)
+    best = np.lexsort((np.arange(len(zcta)), -share, group))[starts]
+    best_share = share[best]
+    by_zip = {
+        f"{z:05d}": (f"{c:05d}", round(s, 1))
+        for z, c, s in zip(zcta[best].tolist(), county[best].tolist(),
+                           best_share.tolist())
+    }
+    ambiguous = int((best_share < AMBIGUOUS_BELOW_PCT).sum())
+    splits = int((sizes > 1).sum())
     return ZipCounty(by_zip, ambiguous, splits)
 
 